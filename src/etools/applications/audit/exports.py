@@ -1,11 +1,10 @@
 import itertools
 from collections import OrderedDict
 
-from rest_framework_csv.renderers import CSVRenderer
-
 from etools.applications.audit.models import RiskCategory
 from etools.applications.audit.serializers.auditor import AuditorFirmExportSerializer
 from etools.applications.audit.serializers.engagement import EngagementExportSerializer
+from etools.applications.core.renderers import CSVRenderer
 
 
 class BaseCSVRenderer(CSVRenderer):
@@ -112,6 +112,7 @@ from etools.applications.audit.serializers.export import (
     SpotCheckPDFSerializer,
 )
 from etools.applications.audit.serializers.face_export import FaceAuditPDFSerializer, FaceSpotCheckPDFSerializer
+from etools.applications.core.mixins import StreamingExportMixin
 from etools.applications.organizations.models import Organization
 from etools.applications.partners.models import PartnerOrganization
 from etools.applications.partners.serializers.partner_organization_v2 import MinimalPartnerOrganizationListSerializer
@@ -292,6 +293,7 @@ class EngagementPartnerView(generics.ListAPIView):
 
 class EngagementViewSet(
     BaseAuditViewSet,
+    StreamingExportMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet
@@ -461,9 +463,8 @@ class EngagementViewSet(
     @action(detail=False, methods=['get'], url_path='csv', renderer_classes=[EngagementCSVRenderer])
     def export_list_csv(self, request, *args, **kwargs):
         engagements = self.filter_queryset(self.get_queryset())
-        serializer = EngagementExportSerializer(engagements, many=True)
 
-        return Response(serializer.data, headers={
+        return self.get_streaming_response(engagements, serializer=EngagementExportSerializer(many=True), headers={
             'Content-Disposition': 'attachment;filename={}_{}.csv'.format(self.export_filename, timezone.now().date())
         })
 
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from etools.applications.core.models import BulkDeactivationLog, Domain
+from etools.applications.core.models import BulkDeactivationLog, Domain, ExportJob
 
 
 @admin.register(Domain)
@@ -22,3 +22,15 @@ class BulkDeactivationLogAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         # Make logs read-only
         return False
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'view_name', 'status', 'user', 'country']
+    list_filter = ['status', 'view_name', 'created_at']
+    readonly_fields = ['created_at', 'finished_at']
+    raw_id_fields = ['user']
+    search_fields = ['user__email', 'path']
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,115 @@
+import re
+from datetime import timedelta
+from tempfile import TemporaryFile
+from urllib.parse import urlsplit
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Count, Max
+from django.http import QueryDict
+from django.test import RequestFactory
+from django.urls import resolve, Resolver404
+from django.utils import timezone
+
+from etools.applications.core.models import ExportJob
+
+# exportable views by url name, with the models whose changes invalidate a completed export
+EXPORTABLE_VIEWS = {
+    'partners_api:intervention-list': ('partners.Intervention', 'partners.InterventionBudget',
+                                       'funds.FundsReservationHeader'),
+    'partners_api:partner-list': ('partners.PartnerOrganization',),
+    'partners_api:partner-dashboard': ('partners.PartnerOrganization', 'partners.Intervention'),
+    'hact:hact-history': ('hact.HactHistory',),
+}
+
+CONTENT_DISPOSITION_FILENAME = re.compile(r'filename="?(?P<filename>[^";]+)"?')
+
+
+class ExportNotAllowed(Exception):
+    pass
+
+
+def parse_export_url(url):
+    """Split the url of the export into (view_name, path, query_params)"""
+    parts = urlsplit(url)
+    try:
+        match = resolve(parts.path)
+    except Resolver404:
+        raise ExportNotAllowed(f'{parts.path} is not a valid url')
+    if match.view_name not in EXPORTABLE_VIEWS:
+        raise ExportNotAllowed(f'{parts.path} can not be exported in background')
+    query_params = dict(sorted(QueryDict(parts.query).lists()))
+    return match.view_name, parts.path, query_params
+
+
+def get_data_version(view_name):
+    """
+    Fingerprint of the data behind an exportable view, built from the number of records
+    and the last modification of every related model
+    """
+    versions = []
+    for label in EXPORTABLE_VIEWS[view_name]:
+        model = apps.get_model(label)
+        data = model._base_manager.aggregate(count=Count('pk'), modified=Max('modified'))
+        modified = data['modified'].isoformat() if data['modified'] else ''
+        versions.append(f"{data['count']}@{modified}")
+    return '|'.join(versions)
+
+
+def get_reusable_job(user, country, view_name, path, query_params, data_version):
+    jobs = ExportJob.objects.filter(
+        user=user,
+        country=country,
+        view_name=view_name,
+        path=path,
+        query_params=query_params,
+        created_at__gte=timezone.now() - timedelta(seconds=settings.EXPORT_JOB_CACHE_TIMEOUT),
+    )
+    in_progress = jobs.filter(status__in=[ExportJob.STATUS_PENDING, ExportJob.STATUS_RUNNING]).first()
+    if in_progress:
+        return in_progress
+    return jobs.filter(status=ExportJob.STATUS_COMPLETED, data_version=data_version).first()
+
+
+def render_export(job):
+    """Call the exported view as the user who requested the export"""
+    match = resolve(job.path)
+    request = RequestFactory().get(job.path, job.query_params, HTTP_HOST=job.host, secure=True)
+    request.user = job.user
+    request.tenant = job.country
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+def iter_response_content(response):
+    if response.streaming:
+        yield from response.streaming_content
+    else:
+        yield response.content
+
+
+def get_export_filename(job, response):
+    match = CONTENT_DISPOSITION_FILENAME.search(response.get('Content-Disposition', ''))
+    if match:
+        return match.group('filename')
+    export_format = job.query_params.get('format', ['csv'])[0]
+    return f"export.{'xlsx' if export_format == 'xlsx' else 'csv'}"
+
+
+def write_export(job, response, progress_step=1024 * 1024):
+    """Write the response to the default storage, recording progress every progress_step bytes"""
+    written, reported = 0, 0
+    with TemporaryFile() as export_file:
+        for chunk in iter_response_content(response):
+            export_file.write(chunk)
+            written += len(chunk)
+            if written - reported >= progress_step:
+                ExportJob.objects.filter(pk=job.pk).update(progress=written)
+                reported = written
+        export_file.seek(0)
+        job.filename = get_export_filename(job, response)
+        job.progress = written
+        job.file.save(job.filename, File(export_file), save=False)
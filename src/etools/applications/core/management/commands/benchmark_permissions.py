@@ -0,0 +1,53 @@
+from timeit import Timer
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from etools.applications.governments.models import GDD
+from etools.applications.governments.permissions import GDDPermissions
+from etools.applications.partners.models import Intervention
+from etools.applications.partners.permissions import InterventionPermissions
+from etools.applications.travel.models import Trip
+from etools.applications.travel.permissions import TripPermissions
+from etools.applications.users.models import Country
+
+PERMISSION_CLASSES = {
+    'Intervention': (Intervention, InterventionPermissions),
+    'GDD': (GDD, GDDPermissions),
+    'Trip': (Trip, TripPermissions),
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure the per request cost of the permission matrix evaluation for an object'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', dest='schema', required=True)
+        parser.add_argument('--model', dest='model', choices=PERMISSION_CLASSES.keys(), default='Intervention')
+        parser.add_argument('--pk', dest='pk', type=int, required=True)
+        parser.add_argument('--user', dest='user', required=True, help='User email')
+        parser.add_argument('--number', dest='number', type=int, default=200)
+
+    def handle(self, *args, **options):
+        connection.set_tenant(Country.objects.get(schema_name=options['schema']))
+        model, permissions_class = PERMISSION_CLASSES[options['model']]
+        instance = model.objects.get(pk=options['pk'])
+        user = get_user_model().objects.get(email=options['user'])
+        ps = model.permission_structure()
+        number = options['number']
+
+        def build():
+            return permissions_class(user=user, instance=instance, permission_structure=ps)
+
+        permissions = build()
+        with CaptureQueriesContext(connection) as queries:
+            build().get_permissions()
+
+        total = min(Timer(lambda: build().get_permissions()).repeat(repeat=3, number=number)) / number
+        evaluation = min(Timer(permissions.get_permissions).repeat(repeat=3, number=number)) / number
+
+        self.stdout.write(f'{options["model"]} {instance.pk}, {number} iterations')
+        self.stdout.write(f'per request (init + evaluation): {total * 1000:.3f} ms, {len(queries)} queries')
+        self.stdout.write(f'matrix evaluation only: {evaluation * 1000:.3f} ms')
@@ -15,6 +15,7 @@ class Command(BaseCommand):
         every_day, _ = IntervalSchedule.objects.get_or_create(every=1, period=IntervalSchedule.DAYS)
         every_two_weeks, _ = IntervalSchedule.objects.get_or_create(every=14, period=IntervalSchedule.DAYS)
         every_week, _ = IntervalSchedule.objects.get_or_create(every=7, period=IntervalSchedule.DAYS)
+        every_five_minutes, _ = IntervalSchedule.objects.get_or_create(every=5, period=IntervalSchedule.MINUTES)
         midnight, _ = CrontabSchedule.objects.get_or_create(minute=0, hour=0)
         first_day_of_the_month, _ = CrontabSchedule.objects.get_or_create(day_of_month=1, hour=1)
 
@@ -83,4 +84,10 @@ class Command(BaseCommand):
             'enabled': False,
             'interval': every_two_weeks})
 
+        PeriodicTask.objects.get_or_create(name='Push offline blueprint events', defaults={
+            'task': 'etools.applications.field_monitoring.data_collection.tasks.'
+                    'push_offline_blueprint_events_for_all_tenants',
+            'enabled': False,
+            'interval': every_five_minutes})
+
         logger.info('Init Celery command finished')
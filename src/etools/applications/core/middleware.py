@@ -140,8 +140,7 @@ class CheckReadOnlyMiddleware:
             if request.user.is_authenticated:
                 if not any(request.path.startswith(path) for path in settings.READ_ONLY_EXCLUDED_PATHS):
                     # Check if the user is authenticated and belongs to the "Read Only" group
-                    user_group_names = [g.name for g in request.user.groups]
-                    if 'Read Only' in user_group_names:
+                    if 'Read Only' in request.user.group_names:
                         # Return a 403 Forbidden response
                         return HttpResponseForbidden("You don't have permission to perform this action.")
 
@@ -168,8 +167,7 @@ class ExternalAccessControlMiddleware:
         if request.user.is_authenticated:
             # check where they're trying to access:
             if any(request.path.startswith(path) for path in settings.PARTNER_PROTECTED_URLS):
-                user_group_names = [g.name for g in request.user.groups]
-                if not any([g in PARTNER_PD_ACTIVE_GROUPS for g in user_group_names]):
+                if request.user.group_names.isdisjoint(PARTNER_PD_ACTIVE_GROUPS):
                     return HttpResponseForbidden("You don't have permission to perform this action.")
         try:
             response = self.get_response(request)
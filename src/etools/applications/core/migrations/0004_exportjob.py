@@ -0,0 +1,43 @@
+# Generated by Django 4.2.23 on 2026-10-18 09:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+import etools.applications.core.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0001_initial'),
+        ('core', '0003_bulkdeactivationlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_name', models.CharField(help_text='Url name of the exported view', max_length=255)),
+                ('path', models.CharField(max_length=255)),
+                ('query_params', models.JSONField(default=dict)),
+                ('host', models.CharField(max_length=255)),
+                ('data_version', models.CharField(blank=True, help_text='Fingerprint of the exported data', max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('progress', models.PositiveBigIntegerField(default=0, help_text='Bytes written so far')),
+                ('file', models.FileField(blank=True, max_length=1024, upload_to=etools.applications.core.models.export_job_upload_to)),
+                ('filename', models.CharField(blank=True, max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('country', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='users.country')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['user', 'country', 'view_name'], name='core_exportjob_lookup_idx')],
+            },
+        ),
+    ]
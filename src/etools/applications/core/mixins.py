@@ -1,7 +1,10 @@
 from django.db import connection
+from django.http import StreamingHttpResponse
 
 from rest_framework import serializers
 
+from etools.applications.core.renderers import StreamingRenderMixin
+
 
 class ExportModelMixin:
     def set_labels(self, serializer_fields, model):
@@ -32,6 +35,47 @@ class ExportModelMixin:
         return context
 
 
+class StreamingExportMixin:
+    """
+    Stream exports rendered by a StreamingRenderMixin renderer: the queryset is iterated
+    in chunks of export_chunk_size, each chunk is serialized and written as soon as it's fetched.
+    """
+    export_chunk_size = 500
+
+    def is_export_paginated(self):
+        if self.paginator is None:
+            return False
+        get_page_size = getattr(self.paginator, 'get_page_size', None)
+        return get_page_size is None or bool(get_page_size(self.request))
+
+    def iter_export_chunks(self, queryset, serializer):
+        chunk = []
+        for obj in queryset.iterator(chunk_size=self.export_chunk_size):
+            chunk.append(obj)
+            if len(chunk) == self.export_chunk_size:
+                yield serializer.to_representation(chunk)
+                chunk = []
+        if chunk:
+            yield serializer.to_representation(chunk)
+
+    def get_streaming_response(self, queryset, serializer=None, headers=None):
+        renderer = self.request.accepted_renderer
+        serializer = serializer or self.get_serializer(many=True)
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        return StreamingHttpResponse(
+            renderer.render_stream(self.iter_export_chunks(queryset, serializer), self.get_renderer_context()),
+            content_type=content_type,
+            headers=headers,
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not isinstance(request.accepted_renderer, StreamingRenderMixin) or self.is_export_paginated():
+            return super().list(request, *args, **kwargs)
+        return self.get_streaming_response(self.filter_queryset(self.get_queryset()))
+
+
 class ExportSerializerMixin:
     country = serializers.SerializerMethodField()
 
@@ -51,3 +51,48 @@ class BulkDeactivationLog(models.Model):
             f"Bulk deactivated {self.affected_count} {self.model_name} "
             f"records on {self.created_at:%Y-%m-%d %H:%M}"
         )
+
+
+def export_job_upload_to(instance, filename):
+    return f'exports/{instance.country.schema_name}/{instance.user_id}/{instance.pk}/{filename}'
+
+
+class ExportJob(models.Model):
+    """
+    Export of a list endpoint rendered in the background, the output is stored
+    in the default storage and reused for identical requests until data changes.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='export_jobs')
+    country = models.ForeignKey('users.Country', on_delete=models.CASCADE, related_name='export_jobs')
+    view_name = models.CharField(max_length=255, help_text="Url name of the exported view")
+    path = models.CharField(max_length=255)
+    query_params = models.JSONField(default=dict)
+    host = models.CharField(max_length=255)
+    data_version = models.CharField(max_length=255, blank=True, help_text="Fingerprint of the exported data")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    progress = models.PositiveBigIntegerField(default=0, help_text="Bytes written so far")
+    file = models.FileField(upload_to=export_job_upload_to, max_length=1024, blank=True)
+    filename = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=['user', 'country', 'view_name'], name='core_exportjob_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.view_name} [{self.status}] {self.created_at:%Y-%m-%d %H:%M}'
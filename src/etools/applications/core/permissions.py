@@ -1,5 +1,6 @@
 import codecs
 import csv
+from functools import lru_cache
 
 from django.conf import settings
 from django.core.cache import cache
@@ -87,6 +88,11 @@ def import_permissions(model_name):
             result = process_permissions(sheet)
         return result
 
+    # the matrix files are part of the code, so once loaded the structure is kept for the process lifetime
+    # instead of being unpickled from the cache on every call
+    if model_name in _permission_structures:
+        return _permission_structures[model_name]
+
     cache_key = "public-{}-permissions".format(model_name.lower())
     response = cache.get(cache_key, None)
 
@@ -94,10 +100,142 @@ def import_permissions(model_name):
         response = process_file()
         cache.set(cache_key, response)
 
+    _permission_structures[model_name] = response
     return response
 
 
+_permission_structures = {}
+
+
+class PermissionMatrix:
+    """
+    Permission structure compiled for fast evaluation.
+
+    Rules are indexed by action and field. For an instance status and a set of user groups, the rules which
+    can not match are dropped once and the result is kept as a bitset of the allowed fields, plus the few fields
+    whose value depends on a condition; those conditions are only evaluated when the field is requested.
+    """
+    possible_actions = ['edit', 'required', 'view']
+
+    def __init__(self, permission_structure):
+        self.field_index = {field: index for index, field in enumerate(permission_structure)}
+        # bitset of the fields having rules defined for the action
+        self.defined = dict.fromkeys(self.possible_actions, 0)
+        self.rules = {action: [] for action in self.possible_actions}
+        self.groups = set()
+
+        for field, actions in permission_structure.items():
+            index = self.field_index[field]
+            for action in self.possible_actions:
+                # use get to avoid populating the vividict with empty actions
+                condition_groups = actions.get(action) or {}
+                rules = [
+                    self.compile_rule(condition_group, allowed == 'true')
+                    for allowed in ['true', 'false']
+                    for condition_group in condition_groups.get(allowed) or []
+                ]
+                if not rules:
+                    continue
+                self.defined[action] |= 1 << index
+                # if the "false" conditions were defined that means that by default allowed will be "true"
+                default = bool(condition_groups.get('false'))
+                self.rules[action].append((index, field, rules, default))
+
+        self._resolve = lru_cache(maxsize=256)(self._resolve)
+
+    @classmethod
+    def for_structure(cls, permission_structure):
+        """Compile the structure, keeping the result on the structure itself for the next calls"""
+        matrix = getattr(permission_structure, 'compiled_matrix', None)
+        if matrix is None:
+            matrix = cls(permission_structure)
+            try:
+                permission_structure.compiled_matrix = matrix
+            except AttributeError:
+                # plain dict
+                pass
+        return matrix
+
+    def compile_rule(self, condition_group, allowed):
+        status = condition_group['status']
+        group = condition_group['group']
+        condition = condition_group['condition']
+
+        groups = None
+        if group and group != '*':
+            groups = frozenset(group.split('|'))
+            self.groups.update(groups)
+
+        return (
+            status if status and status != '*' else None,
+            groups,
+            condition if condition and condition != '*' else None,
+            allowed,
+        )
+
+    def _resolve(self, status, groups):
+        resolved = {}
+        for action in self.possible_actions:
+            allowed_fields = 0
+            conditional = {}
+            for index, field, rules, default in self.rules[action]:
+                value = default
+                pending = []
+                for rule_status, rule_groups, condition, allowed in rules:
+                    if rule_status is not None and rule_status != status:
+                        continue
+                    if rule_groups is not None and rule_groups.isdisjoint(groups):
+                        continue
+                    if condition is None:
+                        value = allowed
+                        break
+                    pending.append((condition, allowed))
+
+                if pending:
+                    conditional[field] = (pending, value)
+                elif value:
+                    allowed_fields |= 1 << index
+            resolved[action] = (allowed_fields, conditional)
+        return resolved
+
+    def resolve(self, status, user_groups):
+        """
+        :return: {action: (bitset of allowed fields, {field: ([(condition, allowed), ...], fallback)})}
+        """
+        return self._resolve(status, frozenset(self.groups.intersection(user_groups)))
+
+    def get_permissions(self, fields, status, user_groups, check_condition, defaults, undefined=None):
+        """
+        :param fields: fields to return the permissions for
+        :param check_condition: callable returning the value of a condition
+        :param defaults: action defaults, for the fields not in the structure
+        :param undefined: action defaults for the fields in the structure without rules for an action,
+         False if not provided
+        """
+        resolved = self.resolve(status, user_groups)
+        permissions = {}
+        for action in self.possible_actions:
+            allowed_fields, conditional = resolved[action]
+            defined = self.defined[action]
+            action_permissions = permissions[action] = {}
+            for field in fields:
+                index = self.field_index.get(field)
+                if index is None:
+                    action_permissions[field] = defaults[action]
+                elif field in conditional:
+                    rules, fallback = conditional[field]
+                    action_permissions[field] = next(
+                        (allowed for condition, allowed in rules if check_condition(condition)),
+                        fallback,
+                    )
+                elif not defined >> index & 1:
+                    action_permissions[field] = undefined[action] if undefined else False
+                else:
+                    action_permissions[field] = bool(allowed_fields >> index & 1)
+        return permissions
+
+
 class IsUNICEFUser(IsAuthenticated):
 
     def has_permission(self, request, view):
-        return super().has_permission(request, view) and request.user.groups.filter(name='UNICEF User').exists()
+        return super().has_permission(request, view) and 'UNICEF User' in request.user.group_names
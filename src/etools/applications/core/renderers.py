@@ -1,11 +1,72 @@
+import codecs
+import csv
+import pickle
+from tempfile import TemporaryFile
+
+from django.conf import settings
+
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
 from rest_framework_csv import renderers as r
+from rest_framework_csv.misc import Echo
+
+
+class StreamingRenderMixin:
+    """
+    Mixin which allow to render serialized data chunk by chunk, to be used with StreamingHttpResponse.
+    If no header is provided, the flattened rows are spilled to a temporary file until the keys of all
+    the chunks are known, so columns appearing only in later chunks are not lost.
+    """
+
+    def tablize_chunks(self, chunks, header=None, labels=None):
+        if header:
+            yield [labels.get(key, key) for key in header] if labels else header
+            for chunk in chunks:
+                for item in self.flatten_data(chunk):
+                    yield [item.get(key, None) for key in header]
+            return
+
+        keys = set()
+        with TemporaryFile() as rows_file:
+            for chunk in chunks:
+                for item in self.flatten_data(chunk):
+                    keys.update(item)
+                    pickle.dump(item, rows_file)
+            if not keys:
+                return
+
+            header = sorted(keys)
+            yield [labels.get(key, key) for key in header] if labels else header
+            rows_file.seek(0)
+            while True:
+                try:
+                    item = pickle.load(rows_file)
+                except EOFError:
+                    break
+                yield [item.get(key, None) for key in header]
+
+    def render_stream(self, chunks, renderer_context=None):
+        renderer_context = renderer_context or {}
+        writer_opts = renderer_context.get('writer_opts', self.writer_opts or {})
+        header = renderer_context.get('header', self.header)
+        labels = renderer_context.get('labels', self.labels)
+        # incremental encoder writes the BOM once for encodings like utf-8-sig
+        encoder = codecs.getincrementalencoder(renderer_context.get('encoding', settings.DEFAULT_CHARSET))()
+
+        csv_writer = csv.writer(Echo(), **writer_opts)
+        for row in self.tablize_chunks(chunks, header=header, labels=labels):
+            yield encoder.encode(csv_writer.writerow(row))
+
 
+class CSVRenderer(StreamingRenderMixin, r.CSVRenderer):
+    pass
 
-class CSVFlatRenderer(r.CSVRenderer):
+
+class CSVFlatRenderer(CSVRenderer):
     format = 'csv_flat'
 
 
-class FriendlyCSVRenderer(r.CSVRenderer):
+class FriendlyCSVRenderer(CSVRenderer):
     """Mixin which allow to render boolean value in custom way"""
 
     positive = 'Yes'
@@ -29,3 +90,46 @@ class ListSeperatorCSVRenderMixin:
 
     def clean_list(self, list_item):
         return self.separator.join(list_item)
+
+
+class XLSXRenderer(CSVRenderer):
+    """
+    Render the same table as the csv renderer into a write-only workbook,
+    rows are flushed to a temporary file instead of being kept in memory.
+    """
+
+    media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    format = 'xlsx'
+    charset = None
+    render_style = 'binary'
+    block_size = 64 * 1024
+
+    def cell_value(self, value):
+        if isinstance(value, str):
+            return ILLEGAL_CHARACTERS_RE.sub('', value)
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        return str(value)
+
+    def render(self, data, media_type=None, renderer_context=None, writer_opts=None):
+        if data is None:
+            return b''
+        if not isinstance(data, list):
+            data = [data]
+        return b''.join(self.render_stream([data] if data else [], renderer_context))
+
+    def render_stream(self, chunks, renderer_context=None):
+        renderer_context = renderer_context or {}
+        header = renderer_context.get('header', self.header)
+        labels = renderer_context.get('labels', self.labels)
+
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet()
+        for row in self.tablize_chunks(chunks, header=header, labels=labels):
+            worksheet.append([self.cell_value(value) for value in row])
+
+        with TemporaryFile() as xlsx_file:
+            workbook.save(xlsx_file)
+            xlsx_file.seek(0)
+            while block := xlsx_file.read(self.block_size):
+                yield block
@@ -0,0 +1,32 @@
+from django.urls import reverse
+
+from rest_framework import serializers
+
+from etools.applications.core.export_jobs import ExportNotAllowed, parse_export_url
+from etools.applications.core.models import ExportJob
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = (
+            'id', 'view_name', 'path', 'query_params', 'status', 'progress', 'filename', 'error',
+            'created_at', 'finished_at', 'download_url',
+        )
+
+    def get_download_url(self, obj):
+        if obj.status != ExportJob.STATUS_COMPLETED:
+            return None
+        return self.context['request'].build_absolute_uri(reverse('exports-download', args=[obj.pk]))
+
+
+class ExportJobCreateSerializer(serializers.Serializer):
+    url = serializers.CharField(help_text='Url of the list to export, including the filters and format')
+
+    def validate_url(self, value):
+        try:
+            return parse_export_url(value)
+        except ExportNotAllowed as e:
+            raise serializers.ValidationError(str(e))
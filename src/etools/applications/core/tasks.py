@@ -0,0 +1,32 @@
+from django.db import connection
+from django.utils import timezone
+
+from celery.utils.log import get_task_logger
+
+from etools.applications.core.export_jobs import render_export, write_export
+from etools.applications.core.models import ExportJob
+from etools.config.celery import app
+
+logger = get_task_logger(__name__)
+
+
+@app.task
+def run_export_job(job_pk):
+    job = ExportJob.objects.select_related('user', 'country').get(pk=job_pk)
+    connection.set_tenant(job.country)
+    ExportJob.objects.filter(pk=job.pk).update(status=ExportJob.STATUS_RUNNING)
+
+    try:
+        response = render_export(job)
+        if response.status_code != 200:
+            raise ValueError(f'Export failed with status {response.status_code}')
+        write_export(job, response)
+    except Exception as e:
+        logger.exception(f'Export job {job.pk} failed')
+        job.status = ExportJob.STATUS_FAILED
+        job.error = str(e)
+    else:
+        job.status = ExportJob.STATUS_COMPLETED
+    finally:
+        job.finished_at = timezone.now()
+        job.save()
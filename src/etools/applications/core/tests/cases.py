@@ -12,6 +12,7 @@ from django_tenants.utils import get_tenant_domain_model, get_tenant_model
 from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
 from unicef_notification.models import EmailTemplate
 
+from etools.applications.locations.services import LocationReverseGeocodingService
 from etools.applications.users.models import WorkspaceCounter
 from etools.applications.users.tests.factories import SCHEMA_NAME
 
@@ -25,6 +26,11 @@ class BaseTenantTestCase(TenantTestCase):
     client_class = APIClient
     maxDiff = None
 
+    def _fixture_setup(self):
+        super()._fixture_setup()
+        # parent locations are cached by the process and would outlive the rolled back locations of other tests
+        LocationReverseGeocodingService.clear_cache()
+
     def _should_check_constraints(self, connection):
         # We have some tests that fail the constraint checking after each test
         # added in Django 1.10. Disable that for now.
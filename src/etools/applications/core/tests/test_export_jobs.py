@@ -0,0 +1,118 @@
+from unittest.mock import patch
+
+from django.urls import reverse
+
+from rest_framework import status
+from tablib.core import Dataset
+
+from etools.applications.core.models import ExportJob
+from etools.applications.core.tasks import run_export_job
+from etools.applications.core.tests.cases import BaseTenantTestCase
+from etools.applications.partners.tests.factories import InterventionFactory
+from etools.applications.users.tests.factories import UserFactory
+
+
+@patch('etools.applications.core.views.run_export_job.delay')
+class TestExportJobViewSet(BaseTenantTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.unicef_staff = UserFactory(is_staff=True)
+        cls.intervention = InterventionFactory()
+        cls.url = reverse('partners_api:intervention-list') + '?format=csv'
+
+    def create_export(self, user=None, url=None):
+        return self.forced_auth_req(
+            'post',
+            reverse('exports-list'),
+            user=user or self.unicef_staff,
+            data={'url': url or self.url},
+        )
+
+    def test_create(self, mock_delay):
+        response = self.create_export()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['status'], ExportJob.STATUS_PENDING)
+        self.assertEqual(response.data['query_params'], {'format': ['csv']})
+        self.assertIsNone(response.data['download_url'])
+        mock_delay.assert_called_once_with(response.data['id'])
+
+    def test_run(self, mock_delay):
+        job_pk = self.create_export().data['id']
+        run_export_job(job_pk)
+
+        job = ExportJob.objects.get(pk=job_pk)
+        self.assertEqual(job.status, ExportJob.STATUS_COMPLETED)
+        self.assertTrue(job.filename.endswith('.csv'))
+        self.assertGreater(job.progress, 0)
+        self.assertIsNotNone(job.finished_at)
+
+        response = self.forced_auth_req(
+            'get',
+            reverse('exports-detail', args=[job_pk]),
+            user=self.unicef_staff,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.data['download_url'])
+
+        response = self.forced_auth_req(
+            'get',
+            reverse('exports-download', args=[job_pk]),
+            user=self.unicef_staff,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        dataset = Dataset().load(b''.join(response.streaming_content).decode('utf-8'), 'csv')
+        self.assertEqual(dataset.height, 1)
+
+    def test_download_not_completed(self, mock_delay):
+        job_pk = self.create_export().data['id']
+        response = self.forced_auth_req(
+            'get',
+            reverse('exports-download', args=[job_pk]),
+            user=self.unicef_staff,
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_reuse_in_progress(self, mock_delay):
+        job_pk = self.create_export().data['id']
+        response = self.create_export()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], job_pk)
+        self.assertEqual(mock_delay.call_count, 1)
+
+    def test_reuse_completed(self, mock_delay):
+        job_pk = self.create_export().data['id']
+        run_export_job(job_pk)
+
+        response = self.create_export()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], job_pk)
+
+        # different filters are a different export
+        response = self.create_export(url=self.url + '&status=active')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_data_changed(self, mock_delay):
+        job_pk = self.create_export().data['id']
+        run_export_job(job_pk)
+
+        InterventionFactory()
+        response = self.create_export()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(response.data['id'], job_pk)
+
+    def test_other_user(self, mock_delay):
+        job_pk = self.create_export().data['id']
+        other_user = UserFactory(is_staff=True)
+
+        response = self.forced_auth_req('get', reverse('exports-detail', args=[job_pk]), user=other_user)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.create_export(user=other_user)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(response.data['id'], job_pk)
+
+    def test_not_exportable(self, mock_delay):
+        response = self.create_export(url=reverse('partners_api:intervention-detail', args=[self.intervention.pk]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('url', response.data)
+        mock_delay.assert_not_called()
@@ -0,0 +1,96 @@
+from django.test import SimpleTestCase
+
+from etools.applications.core.permissions import PermissionMatrix, process_permissions
+from etools.libraries.pythonlib.collections import Vividict
+
+DEFAULTS = {'edit': True, 'view': True, 'required': False}
+
+
+def rows(*data):
+    for group, condition, status, field, action, allowed in data:
+        yield {
+            'Group': group,
+            'Condition': condition,
+            'Status': status,
+            'Field Name': field,
+            'Action': action,
+            'Allowed': allowed,
+        }
+
+
+class TestPermissionMatrix(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.structure = process_permissions(rows(
+            ('Partner User', '', '*', 'title', 'edit', 'FALSE'),
+            ('*', 'locked', '*', 'title', 'edit', 'FALSE'),
+            ('*', '', 'active', 'title', 'edit', 'FALSE'),
+            ('UNICEF User|PME', '', 'draft', 'start', 'required', 'TRUE'),
+            ('*', 'amendment', 'active', 'start', 'required', 'TRUE'),
+            ('*', '', 'draft', 'end', 'view', 'TRUE'),
+        ))
+        cls.fields = ['title', 'start', 'end', 'other']
+
+    def get_permissions(self, status, groups, conditions):
+        checked = []
+
+        def check_condition(condition):
+            checked.append(condition)
+            return conditions[condition]
+
+        permissions = PermissionMatrix(self.structure).get_permissions(
+            self.fields, status, groups, check_condition, DEFAULTS,
+        )
+        return permissions, checked
+
+    def test_group_rule(self):
+        permissions, checked = self.get_permissions('draft', ['Partner User'], {'locked': False})
+        self.assertFalse(permissions['edit']['title'])
+        self.assertEqual(checked, [])
+
+    def test_condition_rule(self):
+        permissions, checked = self.get_permissions('draft', ['UNICEF User'], {'locked': True})
+        self.assertFalse(permissions['edit']['title'])
+        self.assertEqual(checked, ['locked'])
+
+        permissions, checked = self.get_permissions('draft', ['UNICEF User'], {'locked': False})
+        self.assertTrue(permissions['edit']['title'])
+
+    def test_status_rule(self):
+        permissions, checked = self.get_permissions('active', ['UNICEF User'], {'locked': False, 'amendment': False})
+        self.assertFalse(permissions['edit']['title'])
+        self.assertFalse(permissions['required']['start'])
+        self.assertFalse(permissions['view']['end'])
+
+        permissions, checked = self.get_permissions('draft', ['PME'], {'locked': False})
+        self.assertTrue(permissions['required']['start'])
+        self.assertTrue(permissions['view']['end'])
+
+    def test_conditions_evaluated_lazily(self):
+        # amendment rule only applies to active status
+        permissions, checked = self.get_permissions('draft', ['Partner User'], {})
+        self.assertEqual(checked, [])
+        self.assertIs(permissions['required']['start'], False)
+
+    def test_defaults(self):
+        permissions, checked = self.get_permissions('draft', [], {'locked': False})
+        self.assertEqual(
+            {action: permissions[action]['other'] for action in DEFAULTS},
+            DEFAULTS,
+        )
+        # field in the structure without rules for the action
+        self.assertFalse(permissions['view']['title'])
+
+        matrix = PermissionMatrix(self.structure)
+        permissions = matrix.get_permissions(['title'], 'draft', [], lambda c: False, DEFAULTS, DEFAULTS)
+        self.assertTrue(permissions['view']['title'])
+
+    def test_structure_not_populated(self):
+        PermissionMatrix(self.structure)
+        self.assertNotIn('view', self.structure['title'])
+
+    def test_for_structure(self):
+        structure = Vividict(self.structure)
+        self.assertIs(PermissionMatrix.for_structure(structure), PermissionMatrix.for_structure(structure))
+        self.assertIsNot(PermissionMatrix.for_structure({}), PermissionMatrix.for_structure({}))
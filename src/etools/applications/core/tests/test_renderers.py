@@ -0,0 +1,59 @@
+from io import BytesIO
+
+from django.test import SimpleTestCase
+
+from openpyxl import load_workbook
+
+from etools.applications.core.renderers import CSVRenderer, FriendlyCSVRenderer, XLSXRenderer
+
+
+class TestStreamingRender(SimpleTestCase):
+    data = [
+        {'name': 'First', 'active': True, 'values': [1, 2]},
+        {'name': 'Second', 'active': False, 'values': [3, 4]},
+        {'name': 'Third', 'active': True, 'values': [5, 6]},
+    ]
+
+    def test_same_as_render(self):
+        renderer = FriendlyCSVRenderer()
+        chunks = [self.data[:2], self.data[2:]]
+        self.assertEqual(b''.join(renderer.render_stream(chunks)), renderer.render(self.data))
+
+    def test_header_and_labels(self):
+        renderer = CSVRenderer()
+        renderer.header = ['name', 'values.1']
+        renderer.labels = {'name': 'Name'}
+        content = b''.join(renderer.render_stream([self.data]))
+        self.assertEqual(content, b'Name,values.1\r\nFirst,2\r\nSecond,4\r\nThird,6\r\n')
+
+    def test_column_of_later_chunk(self):
+        renderer = CSVRenderer()
+        chunks = [self.data[:1], [{'name': 'Second', 'comment': 'Late'}]]
+        content = b''.join(renderer.render_stream(chunks))
+        self.assertEqual(
+            content,
+            b'active,comment,name,values.0,values.1\r\nTrue,,First,1,2\r\n,Late,Second,,\r\n',
+        )
+
+    def test_no_data(self):
+        renderer = CSVRenderer()
+        self.assertEqual(b''.join(renderer.render_stream([])), b'')
+        renderer.header = ['name']
+        self.assertEqual(b''.join(renderer.render_stream([])), b'name\r\n')
+
+    def test_bom_written_once(self):
+        chunks = [self.data[:1], self.data[1:]]
+        content = b''.join(CSVRenderer().render_stream(chunks, {'encoding': 'utf-8-sig'}))
+        self.assertTrue(content.startswith(b'\xef\xbb\xbf'))
+        self.assertEqual(content.count(b'\xef\xbb\xbf'), 1)
+
+    def test_xlsx(self):
+        chunks = [self.data[:2], self.data[2:]]
+        content = b''.join(XLSXRenderer().render_stream(chunks))
+        worksheet = load_workbook(BytesIO(content)).active
+        self.assertEqual(list(worksheet.values), [
+            ('active', 'name', 'values.0', 'values.1'),
+            (True, 'First', 1, 2),
+            (False, 'Second', 3, 4),
+            (True, 'Third', 5, 6),
+        ])
@@ -1,16 +1,24 @@
 from django.conf import settings
 from django.contrib.auth import logout
-from django.http import HttpResponseRedirect
+from django.db import connection
+from django.http import FileResponse, Http404, HttpResponseRedirect
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.views.generic import RedirectView
 
 import jwt
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from etools.applications.core.export_jobs import get_data_version, get_reusable_job
+from etools.applications.core.models import ExportJob
 from etools.applications.core.permissions import IsUNICEFUser
+from etools.applications.core.serializers import ExportJobCreateSerializer, ExportJobSerializer
+from etools.applications.core.tasks import run_export_job
 
 
 class MainView(RedirectView):
@@ -63,3 +71,49 @@ class SocialLogoutView(RedirectView):
 
     def get_redirect_url(self, *args, **kwargs):
         return settings.SOCIAL_LOGOUT_URL
+
+
+class ExportJobViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Background exports of list endpoints.
+    POST {"url": "/api/v2/interventions/?format=csv"} schedules the export, or returns the existing one
+    if an identical export is in progress or completed since the data last changed.
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = ExportJobSerializer
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(user=self.request.user, country=connection.tenant)
+
+    def create(self, request, *args, **kwargs):
+        serializer = ExportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        view_name, path, query_params = serializer.validated_data['url']
+        data_version = get_data_version(view_name)
+
+        job = get_reusable_job(request.user, connection.tenant, view_name, path, query_params, data_version)
+        if job:
+            return Response(self.get_serializer(job).data, status=status.HTTP_200_OK)
+
+        job = ExportJob.objects.create(
+            user=request.user,
+            country=connection.tenant,
+            view_name=view_name,
+            path=path,
+            query_params=query_params,
+            host=request.get_host(),
+            data_version=data_version,
+        )
+        run_export_job.delay(job.pk)
+        return Response(self.get_serializer(job).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.status != ExportJob.STATUS_COMPLETED or not job.file:
+            raise Http404
+        return FileResponse(job.file.open('rb'), as_attachment=True, filename=job.filename)
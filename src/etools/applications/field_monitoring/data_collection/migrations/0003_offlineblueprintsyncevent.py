@@ -0,0 +1,35 @@
+# Generated by Django 4.2.23 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('field_monitoring_planning', '0014_monitoringactivity_is_programmatic_visit'),
+        ('field_monitoring_data_collection', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfflineBlueprintSyncEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('initialize', 'Initialize Blueprints'), ('update_data_collectors', 'Update Data Collectors'), ('close', 'Close Blueprints')], max_length=30, verbose_name='Action')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('next_attempt', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Next Attempt')),
+                ('sent', models.DateTimeField(blank=True, null=True, verbose_name='Sent')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('monitoring_activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offline_sync_events', to='field_monitoring_planning.monitoringactivity', verbose_name='Activity')),
+            ],
+            options={
+                'verbose_name': 'Offline Blueprint Sync Event',
+                'verbose_name_plural': 'Offline Blueprint Sync Events',
+                'ordering': ('monitoring_activity', 'id'),
+                'indexes': [models.Index(condition=models.Q(('sent__isnull', True)), fields=['next_attempt'], name='fm_offline_sync_pending_idx')],
+            },
+        ),
+    ]
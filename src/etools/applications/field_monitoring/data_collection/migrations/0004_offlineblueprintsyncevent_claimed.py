@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('field_monitoring_data_collection', '0003_offlineblueprintsyncevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offlineblueprintsyncevent',
+            name='claimed',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Claimed'),
+        ),
+    ]
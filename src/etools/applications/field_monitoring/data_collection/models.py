@@ -1,7 +1,9 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from model_utils import Choices
 from unicef_attachments.models import Attachment
 from unicef_djangolib.fields import CodedGenericRelation
 
@@ -227,3 +229,38 @@ class ActivityOverallFinding(QuestionTargetMixin, models.Model):
 
     def __str__(self):
         return '{} - {}'.format(self.monitoring_activity, self.narrative_finding)
+
+
+class OfflineBlueprintSyncEvent(models.Model):
+    """
+    Change of the activity blueprints waiting to be pushed to the offline collect backend.
+    Recorded in the transaction changing the activity and delivered by celery, see offline.synchronizer.
+    """
+    ACTIONS = Choices(
+        ('initialize', _('Initialize Blueprints')),
+        ('update_data_collectors', _('Update Data Collectors')),
+        ('close', _('Close Blueprints')),
+    )
+
+    monitoring_activity = models.ForeignKey(MonitoringActivity, related_name='offline_sync_events',
+                                            verbose_name=_('Activity'), on_delete=models.CASCADE)
+    action = models.CharField(max_length=30, choices=ACTIONS, verbose_name=_('Action'))
+    created = models.DateTimeField(auto_now_add=True, verbose_name=_('Created'))
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_('Attempts'))
+    next_attempt = models.DateTimeField(default=timezone.now, verbose_name=_('Next Attempt'))
+    sent = models.DateTimeField(null=True, blank=True, verbose_name=_('Sent'))
+    error = models.TextField(blank=True, verbose_name=_('Error'))
+    # set while a worker pushes the event
+    claimed = models.DateTimeField(null=True, blank=True, verbose_name=_('Claimed'))
+
+    class Meta:
+        verbose_name = _('Offline Blueprint Sync Event')
+        verbose_name_plural = _('Offline Blueprint Sync Events')
+        ordering = ('monitoring_activity', 'id',)
+        indexes = [
+            models.Index(fields=['next_attempt'], condition=models.Q(sent__isnull=True),
+                         name='fm_offline_sync_pending_idx'),
+        ]
+
+    def __str__(self):
+        return '{}: {}'.format(self.monitoring_activity, self.get_action_display())
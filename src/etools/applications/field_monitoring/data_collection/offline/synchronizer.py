@@ -1,14 +1,15 @@
 import json
+from datetime import timedelta
 from typing import List, TYPE_CHECKING
 from urllib.parse import urljoin
 
 from django.conf import settings
-from django.db import connection
+from django.db import connection, transaction
 from django.urls import reverse
+from django.utils import timezone
 
 from etools_offline import OfflineCollect
 from sentry_sdk import capture_exception
-from simplejson import JSONDecodeError
 
 from etools.applications.environment.helpers import tenant_switch_is_active
 from etools.applications.field_monitoring.data_collection.offline.blueprint import (
@@ -23,9 +24,10 @@ if TYPE_CHECKING:
 class MonitoringActivityOfflineSynchronizer:
     """
     Interface to synchronize MonitoringActivity blueprints with etools offline collect backend.
-    """
 
-    # todo: move external api calls into celery tasks for better stability & speed improvement
+    Changes are recorded in the outbox inside the transaction changing the activity and pushed by a celery task
+    once it's committed, so the activity changes don't wait for the offline collect backend.
+    """
 
     def __init__(self, activity: 'MonitoringActivity'):
         self.activity = activity
@@ -36,10 +38,27 @@ class MonitoringActivityOfflineSynchronizer:
         data_collectors += list(self.activity.team_members.values_list('email', flat=True))
         return data_collectors
 
-    def initialize_blueprints(self) -> None:
+    def _record(self, action: str) -> None:
         if not self.enabled:
             return
 
+        from etools.applications.field_monitoring.data_collection.models import OfflineBlueprintSyncEvent
+        from etools.applications.field_monitoring.data_collection.tasks import push_offline_blueprint_events
+
+        OfflineBlueprintSyncEvent.objects.create(monitoring_activity=self.activity, action=action)
+        schema_name = connection.tenant.schema_name
+        transaction.on_commit(lambda: push_offline_blueprint_events.delay(schema_name))
+
+    def initialize_blueprints(self) -> None:
+        self._record('initialize')
+
+    def update_data_collectors_list(self) -> None:
+        self._record('update_data_collectors')
+
+    def close_blueprints(self) -> None:
+        self._record('close')
+
+    def push_initialize_blueprints(self) -> None:
         # absolute host should be provided, so we have to add protocol to domain
         host = settings.HOST
         if not host.startswith('http'):
@@ -47,49 +66,150 @@ class MonitoringActivityOfflineSynchronizer:
 
         for method in self.activity.methods:
             blueprint = get_blueprint_for_activity_and_method(self.activity, method)
-            try:
-                OfflineCollect().add(data={
-                    "is_active": True,
-                    "code": blueprint.code,
-                    "form_title": blueprint.title,
-                    "form_instructions": json.dumps(blueprint.to_dict(), indent=2),
-                    "accessible_by": self._get_data_collectors(),
-                    "api_response_url": urljoin(
-                        host,
-                        '{}?workspace={}'.format(
-                            reverse(
-                                'field_monitoring_data_collection:activities-offline',
-                                args=[self.activity.id, method.id]
-                            ),
-                            connection.tenant.schema_name or ''
-                        )
+            OfflineCollect().add(data={
+                "is_active": True,
+                "code": blueprint.code,
+                "form_title": blueprint.title,
+                "form_instructions": json.dumps(blueprint.to_dict(), indent=2),
+                "accessible_by": self._get_data_collectors(),
+                "api_response_url": urljoin(
+                    host,
+                    '{}?workspace={}'.format(
+                        reverse(
+                            'field_monitoring_data_collection:activities-offline',
+                            args=[self.activity.id, method.id]
+                        ),
+                        connection.tenant.schema_name or ''
                     )
-                })
-            except JSONDecodeError:
-                capture_exception()
+                )
+            })
 
-    def update_data_collectors_list(self) -> None:
-        if not self.enabled:
-            return
+    def push_data_collectors_list(self) -> None:
+        for method in self.activity.methods:
+            OfflineCollect().update(
+                get_blueprint_code(self.activity, method),
+                accessible_by=self._get_data_collectors()
+            )
 
+    def push_close_blueprints(self) -> None:
         for method in self.activity.methods:
-            try:
-                OfflineCollect().update(
-                    get_blueprint_code(self.activity, method),
-                    accessible_by=self._get_data_collectors()
-                )
-            except JSONDecodeError:
-                capture_exception()
+            OfflineCollect().delete(get_blueprint_code(self.activity, method))
 
-    def close_blueprints(self) -> None:
-        if not self.enabled:
-            return
 
-        for method in self.activity.methods:
-            code = get_blueprint_code(self.activity, method)
+class OfflineBlueprintOutbox:
+    """
+    Deliver the recorded blueprint changes of the current tenant.
 
-            # todo: at this moment we got jsondecodeerror event for .get, so we can't check safely blueprint existence
-            try:
-                OfflineCollect().delete(code)
-            except JSONDecodeError:
-                capture_exception()
+    Pending events of an activity are coalesced into the one call giving the same result, so repeated changes
+    of the same activity cost one request. Events are claimed in a short transaction and pushed outside of it,
+    one worker at a time per activity; blueprints are identified by their code on the offline backend, which
+    makes the repeated call of a lost worker harmless. Failed pushes are retried with an exponential backoff.
+    """
+    batch_size = 50
+    max_attempts = 8
+    retry_delay = 60  # seconds, doubled with every failed attempt
+    claim_timeout = 10 * 60  # seconds, after which the events claimed by a lost worker are pushed again
+
+    def __init__(self):
+        # earliest retry of the events failed by the pushes of this outbox
+        self.next_retry = None
+
+    def get_pending_events(self):
+        from etools.applications.field_monitoring.data_collection.models import OfflineBlueprintSyncEvent
+
+        return OfflineBlueprintSyncEvent.objects.filter(sent__isnull=True, attempts__lt=self.max_attempts)
+
+    def get_claimed_events(self, now):
+        return self.get_pending_events().filter(claimed__gt=now - timedelta(seconds=self.claim_timeout))
+
+    @staticmethod
+    def get_action(events) -> str:
+        """Single action having the same effect as all the events of the activity, in their order"""
+        actions = [event.action for event in events]
+        if actions[-1] == 'close':
+            return 'close'
+
+        if 'close' in actions:
+            actions = actions[len(actions) - actions[::-1].index('close'):]
+        # blueprints not created yet get the current data collectors
+        return 'initialize' if 'initialize' in actions else 'update_data_collectors'
+
+    def claim(self, activity_ids, now) -> dict:
+        """Claim the pending events of the activities not pushed by another worker, grouped by activity"""
+        from etools.applications.field_monitoring.data_collection.models import OfflineBlueprintSyncEvent
+        from etools.applications.field_monitoring.planning.models import MonitoringActivity
+
+        with transaction.atomic():
+            # activities are locked while their events are claimed, so two workers can't claim the same activity
+            activity_ids = list(MonitoringActivity.objects.filter(
+                id__in=activity_ids,
+            ).select_for_update(skip_locked=True).values_list('id', flat=True))
+            events = list(
+                self.get_pending_events().filter(monitoring_activity_id__in=activity_ids).exclude(
+                    monitoring_activity_id__in=self.get_claimed_events(now).values('monitoring_activity_id'),
+                ).order_by('id')
+            )
+            for event in events:
+                event.claimed = now
+            OfflineBlueprintSyncEvent.objects.bulk_update(events, fields=['claimed'])
+
+        activity_events = {}
+        for event in events:
+            activity_events.setdefault(event.monitoring_activity_id, []).append(event)
+        return activity_events
+
+    def push(self) -> bool:
+        """Push the due events of a batch of activities, return True if the batch was full"""
+        from etools.applications.field_monitoring.data_collection.models import OfflineBlueprintSyncEvent
+        from etools.applications.field_monitoring.planning.models import MonitoringActivity
+
+        now = timezone.now()
+        activity_ids = list(
+            self.get_pending_events().filter(next_attempt__lte=now)
+            .exclude(monitoring_activity_id__in=self.get_claimed_events(now).values('monitoring_activity_id'))
+            .order_by('monitoring_activity_id')
+            .values_list('monitoring_activity_id', flat=True)
+            .distinct()[:self.batch_size]
+        )
+        if not activity_ids:
+            return False
+
+        activity_events = self.claim(activity_ids, now)
+        activities = MonitoringActivity.objects.in_bulk(activity_events)
+        events = []
+        for activity_id, pending_events in activity_events.items():
+            # the offline backend is called outside of any transaction, no lock is held while waiting for it
+            self.push_activity_events(activities[activity_id], pending_events, now)
+            events.extend(pending_events)
+
+        for event in events:
+            event.claimed = None
+        OfflineBlueprintSyncEvent.objects.bulk_update(
+            events, fields=['attempts', 'next_attempt', 'sent', 'error', 'claimed'],
+        )
+
+        return len(activity_ids) == self.batch_size
+
+    def push_activity_events(self, activity, events, now) -> None:
+        synchronizer = MonitoringActivityOfflineSynchronizer(activity)
+        push = {
+            'initialize': synchronizer.push_initialize_blueprints,
+            'update_data_collectors': synchronizer.push_data_collectors_list,
+            'close': synchronizer.push_close_blueprints,
+        }[self.get_action(events)]
+
+        try:
+            push()
+        except Exception as ex:  # noqa
+            # offline backend is unavailable or answers with an error page
+            capture_exception(ex)
+            for event in events:
+                event.attempts += 1
+                event.next_attempt = now + timedelta(seconds=self.retry_delay * 2 ** (event.attempts - 1))
+                event.error = str(ex)
+                if event.attempts < self.max_attempts:
+                    self.next_retry = min(filter(None, [self.next_retry, event.next_attempt]))
+        else:
+            for event in events:
+                event.sent = now
+                event.error = ''
@@ -0,0 +1,38 @@
+from django.db import connection
+from django.utils import timezone
+
+from django_tenants.utils import schema_context
+
+from etools.applications.field_monitoring.data_collection.offline.synchronizer import OfflineBlueprintOutbox
+from etools.applications.users.models import Country
+from etools.config.celery import app
+
+
+def schedule_retry(tenant_name, outbox):
+    """Push the events failed by the outbox again once they are due"""
+    if outbox.next_retry:
+        push_offline_blueprint_events.apply_async(
+            (tenant_name,), countdown=max((outbox.next_retry - timezone.now()).total_seconds(), 0),
+        )
+
+
+@app.task
+def push_offline_blueprint_events(tenant_name):
+    outbox = OfflineBlueprintOutbox()
+    with schema_context(tenant_name):
+        batch_full = outbox.push()
+
+    if batch_full:
+        push_offline_blueprint_events.delay(tenant_name)
+    schedule_retry(tenant_name, outbox)
+
+
+@app.task
+def push_offline_blueprint_events_for_all_tenants():
+    """Push the events recorded while the workers were unavailable and retry the failed ones"""
+    for country in Country.objects.exclude(name='Global').all():
+        connection.set_tenant(country)
+        outbox = OfflineBlueprintOutbox()
+        while outbox.push():
+            pass
+        schedule_retry(country.schema_name, outbox)
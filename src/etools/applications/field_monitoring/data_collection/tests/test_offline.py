@@ -1,8 +1,10 @@
+from datetime import timedelta
 from unittest.mock import patch
 
 from django.core.management import call_command
 from django.db import connection
 from django.test import override_settings
+from django.utils import timezone
 
 import simplejson
 from rest_framework import status
@@ -11,7 +13,9 @@ from etools.applications.attachments.tests.factories import AttachmentFactory, A
 from etools.applications.core.tests.cases import BaseTenantTestCase
 from etools.applications.environment.models import TenantSwitch
 from etools.applications.environment.tests.factories import TenantSwitchFactory
-from etools.applications.field_monitoring.data_collection.models import StartedChecklist
+from etools.applications.field_monitoring.data_collection.models import OfflineBlueprintSyncEvent, StartedChecklist
+from etools.applications.field_monitoring.data_collection.offline.synchronizer import OfflineBlueprintOutbox
+from etools.applications.field_monitoring.data_collection.tasks import push_offline_blueprint_events
 from etools.applications.field_monitoring.data_collection.tests.factories import (
     ActivityQuestionFactory,
     StartedChecklistFactory,
@@ -206,7 +210,8 @@ class MonitoringActivityOfflineBlueprintsSyncTestCase(APIViewSetTestCase, BaseTe
         ActivityQuestionFactory(monitoring_activity=activity, is_enabled=True, question__methods=[MethodFactory()])
 
         add_mock.reset_mock()
-        self._test_update(self.fm_user, activity, {'status': 'assigned'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self._test_update(self.fm_user, activity, {'status': 'assigned'})
         add_mock.assert_called()
 
     @override_settings(ETOOLS_OFFLINE_API='http://example.com/b/api/remote/blueprint/',
@@ -217,7 +222,8 @@ class MonitoringActivityOfflineBlueprintsSyncTestCase(APIViewSetTestCase, BaseTe
         ActivityQuestionFactory(monitoring_activity=activity, is_enabled=True, question__methods=[MethodFactory()])
 
         add_mock.reset_mock()
-        self._test_update(self.fm_user, activity, {'status': 'assigned'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self._test_update(self.fm_user, activity, {'status': 'assigned'})
         add_mock.assert_called()
 
     @override_settings(ETOOLS_OFFLINE_API='http://example.com/b/api/remote/blueprint/',
@@ -229,7 +235,8 @@ class MonitoringActivityOfflineBlueprintsSyncTestCase(APIViewSetTestCase, BaseTe
         ActivityQuestionFactory(monitoring_activity=activity, is_enabled=True, question__methods=[MethodFactory()])
 
         add_mock.reset_mock()
-        self._test_update(self.fm_user, activity, {'status': 'assigned'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self._test_update(self.fm_user, activity, {'status': 'assigned'})
         add_mock.assert_not_called()
 
     @override_settings(ETOOLS_OFFLINE_API='http://example.com/b/api/remote/blueprint/',
@@ -241,7 +248,8 @@ class MonitoringActivityOfflineBlueprintsSyncTestCase(APIViewSetTestCase, BaseTe
         ActivityQuestionFactory(monitoring_activity=activity, is_enabled=True, question__methods=[MethodFactory()])
 
         add_mock.reset_mock()
-        self._test_update(self.fm_user, activity, {'status': 'assigned'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self._test_update(self.fm_user, activity, {'status': 'assigned'})
         add_mock.assert_called()
 
     @override_settings(ETOOLS_OFFLINE_API='http://example.com/b/api/remote/blueprint/')
@@ -251,8 +259,9 @@ class MonitoringActivityOfflineBlueprintsSyncTestCase(APIViewSetTestCase, BaseTe
         ActivityQuestionFactory(monitoring_activity=activity, is_enabled=True, question__methods=[MethodFactory()])
 
         update_mock.reset_mock()
-        activity.visit_lead = UserFactory()
-        activity.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            activity.visit_lead = UserFactory()
+            activity.save()
         update_mock.assert_called()
 
     @override_settings(ETOOLS_OFFLINE_API='http://example.com/b/api/remote/blueprint/')
@@ -262,7 +271,8 @@ class MonitoringActivityOfflineBlueprintsSyncTestCase(APIViewSetTestCase, BaseTe
         ActivityQuestionFactory(monitoring_activity=activity, is_enabled=True, question__methods=[MethodFactory()])
 
         update_mock.reset_mock()
-        activity.team_members.add(UserFactory())
+        with self.captureOnCommitCallbacks(execute=True):
+            activity.team_members.add(UserFactory())
         update_mock.assert_called()
 
     @override_settings(ETOOLS_OFFLINE_API='http://example.com/b/api/remote/blueprint/')
@@ -272,7 +282,8 @@ class MonitoringActivityOfflineBlueprintsSyncTestCase(APIViewSetTestCase, BaseTe
         ActivityQuestionFactory(monitoring_activity=activity, is_enabled=True, question__methods=[MethodFactory()])
 
         update_mock.reset_mock()
-        activity.team_members.remove(activity.team_members.first())
+        with self.captureOnCommitCallbacks(execute=True):
+            activity.team_members.remove(activity.team_members.first())
         update_mock.assert_called()
 
     @override_settings(ETOOLS_OFFLINE_API='http://example.com/b/api/remote/blueprint/',
@@ -283,7 +294,8 @@ class MonitoringActivityOfflineBlueprintsSyncTestCase(APIViewSetTestCase, BaseTe
         ActivityQuestionFactory(monitoring_activity=activity, is_enabled=True, question__methods=[MethodFactory()])
 
         delete_mock.reset_mock()
-        self._test_update(self.fm_user, activity, {'status': 'cancelled', 'cancel_reason': 'For testing purposes'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self._test_update(self.fm_user, activity, {'status': 'cancelled', 'cancel_reason': 'For testing purposes'})
         delete_mock.assert_called()
 
     @override_settings(ETOOLS_OFFLINE_API='http://example.com/b/api/remote/blueprint/',
@@ -296,7 +308,8 @@ class MonitoringActivityOfflineBlueprintsSyncTestCase(APIViewSetTestCase, BaseTe
         StartedChecklistFactory(monitoring_activity=activity, method=method)
 
         delete_mock.reset_mock()
-        self._test_update(activity.visit_lead, activity, {'status': 'report_finalization'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self._test_update(activity.visit_lead, activity, {'status': 'report_finalization'})
         delete_mock.assert_called()
 
     @override_settings(ETOOLS_OFFLINE_API='', UNICEF_USER_EMAIL="@example.com")
@@ -306,7 +319,8 @@ class MonitoringActivityOfflineBlueprintsSyncTestCase(APIViewSetTestCase, BaseTe
         ActivityQuestionFactory(monitoring_activity=activity, is_enabled=True, question__methods=[MethodFactory()])
 
         add_mock.reset_mock()
-        self._test_update(self.fm_user, activity, {'status': 'assigned'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self._test_update(self.fm_user, activity, {'status': 'assigned'})
         add_mock.assert_not_called()
 
     @override_settings(ETOOLS_OFFLINE_API='http://example.com/b/api/remote/blueprint/',
@@ -326,7 +340,8 @@ class MonitoringActivityOfflineBlueprintsSyncTestCase(APIViewSetTestCase, BaseTe
         activity = MonitoringActivityFactory(status='pre_assigned', partners=[PartnerFactory()])
         ActivityQuestionFactory(monitoring_activity=activity, is_enabled=True, question__methods=[MethodFactory()])
 
-        self._test_update(self.fm_user, activity, {'status': 'assigned'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self._test_update(self.fm_user, activity, {'status': 'assigned'})
         capture_event_mock.assert_called()
 
     @override_settings(ETOOLS_OFFLINE_API='http://example.com/b/api/remote/blueprint/',
@@ -346,7 +361,8 @@ class MonitoringActivityOfflineBlueprintsSyncTestCase(APIViewSetTestCase, BaseTe
         activity = MonitoringActivityFactory(status='data_collection', partners=[PartnerFactory()])
         ActivityQuestionFactory(monitoring_activity=activity, is_enabled=True, question__methods=[MethodFactory()])
 
-        activity.team_members.remove(activity.team_members.first())
+        with self.captureOnCommitCallbacks(execute=True):
+            activity.team_members.remove(activity.team_members.first())
         capture_event_mock.assert_called()
 
     @override_settings(ETOOLS_OFFLINE_API='http://example.com/b/api/remote/blueprint/',
@@ -366,10 +382,154 @@ class MonitoringActivityOfflineBlueprintsSyncTestCase(APIViewSetTestCase, BaseTe
         activity = MonitoringActivityFactory(status='data_collection', partners=[PartnerFactory()])
         ActivityQuestionFactory(monitoring_activity=activity, is_enabled=True, question__methods=[MethodFactory()])
 
-        self._test_update(self.fm_user, activity, {'status': 'cancelled', 'cancel_reason': 'For testing purposes'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self._test_update(self.fm_user, activity, {'status': 'cancelled', 'cancel_reason': 'For testing purposes'})
         capture_event_mock.assert_called()
 
 
+@override_settings(ETOOLS_OFFLINE_API='http://example.com/b/api/remote/blueprint/')
+class OfflineBlueprintOutboxTestCase(BaseTenantTestCase):
+    def setUp(self):
+        super().setUp()
+        TenantSwitch.get("fm_offline_sync_disabled").flush()
+        self.activity = MonitoringActivityFactory(status='data_collection', partners=[PartnerFactory()])
+        ActivityQuestionFactory(
+            monitoring_activity=self.activity, is_enabled=True, question__methods=[MethodFactory()]
+        )
+        self.activity.offline_sync_events.all().delete()
+
+    def record_events(self, *actions):
+        for action in actions:
+            OfflineBlueprintSyncEvent.objects.create(monitoring_activity=self.activity, action=action)
+
+    @patch('etools.applications.field_monitoring.data_collection.offline.synchronizer.OfflineCollect.update')
+    def test_event_pushed_on_commit(self, update_mock):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.activity.team_members.add(UserFactory())
+
+        event = self.activity.offline_sync_events.get()
+        self.assertEqual(event.action, 'update_data_collectors')
+        self.assertIsNone(event.sent)
+        update_mock.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+        update_mock.assert_called_once()
+        event.refresh_from_db()
+        self.assertIsNotNone(event.sent)
+
+    @patch('etools.applications.field_monitoring.data_collection.offline.synchronizer.OfflineCollect.update')
+    @patch('etools.applications.field_monitoring.data_collection.offline.synchronizer.OfflineCollect.add')
+    def test_events_coalesced(self, add_mock, update_mock):
+        self.record_events('initialize', 'update_data_collectors', 'update_data_collectors')
+
+        self.assertFalse(OfflineBlueprintOutbox().push())
+
+        add_mock.assert_called_once()
+        update_mock.assert_not_called()
+        self.assertFalse(self.activity.offline_sync_events.filter(sent__isnull=True).exists())
+
+    @patch('etools.applications.field_monitoring.data_collection.offline.synchronizer.OfflineCollect.delete')
+    @patch('etools.applications.field_monitoring.data_collection.offline.synchronizer.OfflineCollect.add')
+    def test_events_coalesced_to_close(self, add_mock, delete_mock):
+        self.record_events('initialize', 'update_data_collectors', 'close')
+
+        OfflineBlueprintOutbox().push()
+
+        add_mock.assert_not_called()
+        delete_mock.assert_called_once()
+
+    def test_get_action(self):
+        def get_action(*actions):
+            return OfflineBlueprintOutbox.get_action([OfflineBlueprintSyncEvent(action=action) for action in actions])
+
+        self.assertEqual(get_action('update_data_collectors'), 'update_data_collectors')
+        self.assertEqual(get_action('close', 'update_data_collectors'), 'update_data_collectors')
+        self.assertEqual(get_action('close', 'initialize', 'update_data_collectors'), 'initialize')
+        self.assertEqual(get_action('initialize', 'close'), 'close')
+
+    @patch('etools.applications.field_monitoring.data_collection.offline.synchronizer.capture_exception')
+    @patch('etools.applications.field_monitoring.data_collection.offline.synchronizer.OfflineCollect.add')
+    def test_failed_push_retried_later(self, add_mock, capture_exception_mock):
+        add_mock.side_effect = Exception('Bad Gateway')
+        self.record_events('initialize')
+
+        OfflineBlueprintOutbox().push()
+
+        capture_exception_mock.assert_called_once()
+        event = self.activity.offline_sync_events.get()
+        self.assertIsNone(event.sent)
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.error, 'Bad Gateway')
+        self.assertGreater(event.next_attempt, timezone.now())
+
+        # not due yet
+        OfflineBlueprintOutbox().push()
+        add_mock.assert_called_once()
+
+        add_mock.side_effect = None
+        event.next_attempt = timezone.now()
+        event.save()
+        OfflineBlueprintOutbox().push()
+        event.refresh_from_db()
+        self.assertIsNotNone(event.sent)
+        self.assertEqual(event.error, '')
+
+    @patch('etools.applications.field_monitoring.data_collection.offline.synchronizer.OfflineCollect.add')
+    def test_events_claimed_while_pushed(self, add_mock):
+        self.record_events('initialize')
+
+        def check_claimed(*args, **kwargs):
+            # claim is written before the offline backend is called
+            self.assertIsNotNone(self.activity.offline_sync_events.get().claimed)
+
+        add_mock.side_effect = check_claimed
+        OfflineBlueprintOutbox().push()
+
+        add_mock.assert_called_once()
+        event = self.activity.offline_sync_events.get()
+        self.assertIsNotNone(event.sent)
+        self.assertIsNone(event.claimed)
+
+    @patch('etools.applications.field_monitoring.data_collection.offline.synchronizer.OfflineCollect.add')
+    def test_claimed_activity_skipped(self, add_mock):
+        self.record_events('initialize')
+        self.activity.offline_sync_events.update(claimed=timezone.now())
+        # recorded while the activity is pushed by another worker
+        self.record_events('update_data_collectors')
+
+        OfflineBlueprintOutbox().push()
+        add_mock.assert_not_called()
+
+        # worker was lost
+        self.activity.offline_sync_events.update(
+            claimed=timezone.now() - timedelta(seconds=OfflineBlueprintOutbox.claim_timeout + 1),
+        )
+        OfflineBlueprintOutbox().push()
+        add_mock.assert_called_once()
+        self.assertFalse(self.activity.offline_sync_events.filter(sent__isnull=True).exists())
+
+    @patch('etools.applications.field_monitoring.data_collection.tasks.push_offline_blueprint_events.apply_async')
+    @patch('etools.applications.field_monitoring.data_collection.offline.synchronizer.capture_exception')
+    @patch('etools.applications.field_monitoring.data_collection.offline.synchronizer.OfflineCollect.add')
+    def test_failed_push_rescheduled(self, add_mock, capture_exception_mock, apply_async_mock):
+        add_mock.side_effect = Exception('Bad Gateway')
+        self.record_events('initialize')
+
+        push_offline_blueprint_events(connection.tenant.schema_name)
+
+        apply_async_mock.assert_called_once()
+        self.assertEqual(apply_async_mock.call_args[0][0], (connection.tenant.schema_name,))
+        countdown = apply_async_mock.call_args[1]['countdown']
+        self.assertGreater(countdown, 0)
+        self.assertLessEqual(countdown, OfflineBlueprintOutbox.retry_delay)
+
+        # nothing failed, nothing to reschedule
+        apply_async_mock.reset_mock()
+        push_offline_blueprint_events(connection.tenant.schema_name)
+        apply_async_mock.assert_not_called()
+
+
 class MonitoringActivityOfflineValuesTestCase(APIViewSetTestCase, BaseTenantTestCase):
     base_view = 'field_monitoring_data_collection:activities'
 
@@ -14,6 +14,7 @@ from unicef_attachments.models import Attachment
 from unicef_djangolib.fields import CodedGenericRelation
 
 from etools.applications.locations.models import Location
+from etools.applications.locations.services import LocationReverseGeocodingService
 from etools.applications.partners.models import PartnerOrganization
 from etools.applications.reports.models import Result, Section
 
@@ -215,14 +216,8 @@ class LocationSite(TimeStampedModel):
 
     @staticmethod
     def get_parent_location(point):
-        locations = Location.objects.all_with_geom().filter(geom__contains=point, is_active=True)
-        if locations:
-            matched_locations = list(filter(lambda l: l.is_leaf_node(), locations)) or locations
-            location = min(matched_locations, key=lambda l: l.geom.length)
-        else:
-            location = Location.objects.filter(admin_level=0, is_active=True).first()
-
-        return location
+        location_id = LocationReverseGeocodingService().get_parent_location_id(point)
+        return Location.objects.filter(pk=location_id).first() if location_id else None
 
     def save(self, **kwargs):
         if not self.parent_id:
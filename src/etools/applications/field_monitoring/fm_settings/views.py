@@ -51,6 +51,7 @@ from etools.applications.field_monitoring.permissions import IsEditAction, IsFie
 from etools.applications.field_monitoring.views import FMBaseViewSet, LinkedAttachmentsViewSet
 from etools.applications.locations.models import Location
 from etools.applications.reports.views.v2 import OutputListAPIView
+from etools.libraries.views.cache import cache_response
 
 
 class MethodsViewSet(
@@ -116,6 +117,10 @@ class LocationSitesViewSet(FMBaseViewSet, viewsets.ModelViewSet):
             return self.queryset.filter(parent_id=parent_id)
         return self.queryset
 
+    @cache_response('fm-sites')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     @action(detail=False, methods=['get'], url_path='export')
     def export(self, request, *args, **kwargs):
         instances = self.filter_queryset(self.get_queryset())
@@ -140,6 +145,10 @@ class LocationWithSitesViewSet(FMBaseViewSet, mixins.ListModelMixin, viewsets.Ge
     filter_backends = (DjangoFilterBackend, SearchFilter, OrderingFilter)
     search_fields = ('name', 'p_code')
 
+    @cache_response('fm-sites')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 class LocationsCountryView(views.APIView):
     def get(self, request, *args, **kwargs):
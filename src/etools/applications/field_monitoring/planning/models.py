@@ -1,4 +1,5 @@
 import logging
+from collections import defaultdict
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -179,6 +180,9 @@ class MonitoringActivityFacilityType(models.Model):
 
 class MonitoringActivitiesQuerySet(models.QuerySet):
     def filter_hact_for_partner(self, partner_id: int):
+        return self.filter_hact_for_partners([partner_id])
+
+    def filter_hact_for_partners(self, partner_ids: list[int]):
         from etools.applications.field_monitoring.data_collection.models import ActivityQuestionOverallFinding
 
         question_sq = ActivityQuestionOverallFinding.objects.filter(
@@ -192,14 +196,14 @@ class MonitoringActivitiesQuerySet(models.QuerySet):
         # finding_sq = ActivityOverallFinding.objects.filter(
         #     ~Q(narrative_finding=''),
         #     monitoring_activity_id=OuterRef('id'),
-        #     partner_id=partner_id,
+        #     partner_id__in=partner_ids,
         # )
 
         return self.annotate(
             is_hact=Exists(question_sq),
             # has_finding_for_partner=Exists(finding_sq),
         ).filter(
-            partners=partner_id,
+            partners__in=partner_ids,
             status=MonitoringActivity.STATUS_COMPLETED,
             is_hact=True,
             # has_finding_for_partner=True,
@@ -495,22 +499,26 @@ class MonitoringActivity(
                 Q(sections__in=self.sections.values_list('pk', flat=True)) |
                 Q(sections__isnull=True))
 
+        targets = {level: list(getattr(self, relation).all()) for relation, level in self.RELATIONS_MAPPING}
+        level_questions = defaultdict(list)
+        for question in applicable_questions.filter(level__in=[level for level in targets if targets[level]]):
+            level_questions[question.level].append(question)
+        templates = self.get_questions_templates(level_questions, targets)
+
         questions = []
 
         for relation, level in self.RELATIONS_MAPPING:
-            for target in getattr(self, relation).all():
-                target_questions = applicable_questions.filter(level=level).prefetch_templates(
-                    level, target_id=target.id
-                )
-                for target_question in target_questions:
+            for target in targets[level]:
+                for target_question in level_questions[level]:
+                    template = templates.get((target_question.id, target.id)) or templates.get((target_question.id, None))
                     activity_question = ActivityQuestion(
                         question=target_question, monitoring_activity=self,
                         text=target_question.text, is_hact=target_question.is_hact,
-                        is_enabled=target_question.template.is_active if target_question.template else False
+                        is_enabled=template.is_active if template else False
                     )
 
-                    if target_question.template:
-                        activity_question.specific_details = target_question.template.specific_details
+                    if template:
+                        activity_question.specific_details = template.specific_details
 
                     setattr(activity_question, Question.get_target_relation_name(level), target)
 
@@ -518,6 +526,28 @@ class MonitoringActivity(
 
         ActivityQuestion.objects.bulk_create(questions)
 
+    @staticmethod
+    def get_questions_templates(level_questions, targets):
+        """
+        First base and specific templates of the questions for the targets of their level, loaded at once:
+        {(question id, target id or None for the base template): template}
+        """
+        templates_filter = Q()
+        for level, questions in level_questions.items():
+            target = Question.get_target_relation_name(level)
+            templates_filter |= Q(question__in=questions) & (
+                Q(**{'{}__isnull'.format(target): True}) |
+                Q(**{'{}__in'.format(target): [t.id for t in targets[level]]})
+            )
+        if not templates_filter:
+            return {}
+
+        templates = {}
+        for template in QuestionTemplate.objects.filter(templates_filter).select_related('question'):
+            target_id = getattr(template, '{}_id'.format(Question.get_target_relation_name(template.question.level)))
+            templates.setdefault((template.question_id, target_id), template)
+        return templates
+
     @transaction.atomic()
     def prepare_activity_overall_findings(self):
         try:
@@ -525,10 +555,15 @@ class MonitoringActivity(
 
             from etools.applications.field_monitoring.data_collection.models import ActivityOverallFinding
 
+            target_fields = ['{}_id'.format(Question.get_target_relation_name(level)) for __, level in self.RELATIONS_MAPPING]
+            questions_targets = set()
+            for target_ids in self.questions.values_list(*target_fields).distinct():
+                questions_targets.update(zip(target_fields, target_ids))
+
             findings = []
             for relation, level in self.RELATIONS_MAPPING:
                 for target in getattr(self, relation).all():
-                    if not self.questions.filter(**{Question.get_target_relation_name(level): target}).exists():
+                    if ('{}_id'.format(Question.get_target_relation_name(level)), target.id) not in questions_targets:
                         continue
 
                     finding = ActivityOverallFinding(monitoring_activity=self)
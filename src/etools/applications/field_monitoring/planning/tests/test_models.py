@@ -2,6 +2,8 @@ from datetime import date, timedelta
 from unittest import skip
 
 from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from dateutil.utils import today
@@ -345,6 +347,31 @@ class TestMonitoringActivityQuestionsFlow(BaseTenantTestCase):
         )
         self.assertFalse(ActivityQuestionOverallFinding.objects.filter(activity_question=disabled_question).exists())
 
+    def test_structure_queries_independent_of_targets(self):
+        intervention_question = QuestionFactory(level=Question.LEVELS.intervention, sections=[])
+
+        def count_queries(targets_count):
+            partners = [PartnerFactory() for __ in range(targets_count)]
+            interventions = [InterventionFactory() for __ in range(targets_count)]
+            QuestionTemplateFactory(question=self.specific_question, partner=partners[0])
+            QuestionTemplateFactory(question=intervention_question, intervention=interventions[0])
+            activity = MonitoringActivityFactory(
+                status=MonitoringActivity.STATUSES.draft,
+                sections=[self.first_section, self.second_section],
+                partners=partners,
+                interventions=interventions,
+            )
+
+            with CaptureQueriesContext(connection) as queries:
+                activity.prepare_questions_structure()
+                activity.prepare_activity_overall_findings()
+
+            self.assertEqual(activity.questions.count(), targets_count * 3)
+            self.assertEqual(activity.overall_findings.count(), targets_count * 2)
+            return len(queries)
+
+        self.assertEqual(count_queries(2), count_queries(6))
+
 
 class TestMonitoringActivityGroups(BaseTenantTestCase):
     @classmethod
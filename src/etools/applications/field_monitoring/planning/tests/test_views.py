@@ -9,6 +9,7 @@ from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.test import APIRequestFactory
+from tablib import Dataset
 from unicef_attachments.models import Attachment, AttachmentLink, FileType
 from unicef_locations.tests.factories import LocationFactory
 
@@ -1002,9 +1003,10 @@ class ActivitiesViewTestCase(FMBaseTestCaseMixin, APIViewSetTestCase, BaseTenant
 
         with self.assertNumQueries(18):
             response = self.make_request_to_viewset(self.unicef_user, action='export', method='get', data={'page': 1, 'page_size': 100})
+            content = b''.join(response.streaming_content).decode('utf-8')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('Content-Disposition', response.headers)
-        self.assertEqual(len(response.data), 24)
+        self.assertEqual(Dataset().load(content, 'csv').height, 24)
 
 
 class TestDuplicateMonitoringActivityView(BaseTenantTestCase):
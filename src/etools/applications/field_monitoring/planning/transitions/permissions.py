@@ -3,7 +3,7 @@ from etools.applications.tpm.models import PME
 
 
 def user_is_field_monitor_permission(activity, user):
-    return user.groups.filter(name__in=[PME.name, FMUser.name]).exists()
+    return not user.group_names.isdisjoint([PME.name, FMUser.name])
 
 
 def user_is_visit_lead_permission(activity, user):
@@ -11,5 +11,5 @@ def user_is_visit_lead_permission(activity, user):
 
 
 def user_is_pme_or_approver_or_reviewer_permission(activity, user):
-    return user.groups.filter(name__in=[PME.name, MonitoringVisitApprover.name]).exists() \
+    return not user.group_names.isdisjoint([PME.name, MonitoringVisitApprover.name]) \
         or user in activity.report_reviewers.all()
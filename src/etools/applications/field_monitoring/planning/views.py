@@ -26,6 +26,7 @@ from unicef_restlib.views import NestedViewSetMixin
 from unicef_snapshot.models import Activity as HistoryActivity
 
 from etools.applications.audit.models import UNICEFUser
+from etools.applications.core.mixins import StreamingExportMixin
 from etools.applications.field_monitoring.fm_settings.models import Question
 from etools.applications.field_monitoring.fm_settings.serializers import FMCommonAttachmentSerializer
 from etools.applications.field_monitoring.permissions import (
@@ -88,6 +89,7 @@ from etools.applications.partners.serializers.partner_organization_v2 import Min
 from etools.applications.reports.models import Result, ResultType
 from etools.applications.tpm.models import ThirdPartyMonitor
 from etools.applications.users.models import Realm
+from etools.libraries.views.cache import cache_response
 
 # HTML sanitization for xhtml2pdf: removals then replacements. Order matters.
 _PDF_HTML_REMOVALS = [
@@ -192,6 +194,7 @@ class FacilityTypesViewSet(viewsets.ReadOnlyModelViewSet):
 class MonitoringActivitiesViewSet(
     ValidatorViewMixin,
     FMBaseViewSet,
+    StreamingExportMixin,
     viewsets.ModelViewSet,
 ):
     """
@@ -518,8 +521,7 @@ class MonitoringActivitiesViewSet(
             'offices',
         )
 
-        serializer = MonitoringActivityExportSerializer(activities, many=True)
-        return Response(serializer.data, headers={
+        return self.get_streaming_response(activities, serializer=MonitoringActivityExportSerializer(many=True), headers={
             'Content-Disposition': 'attachment;filename=monitoring_activities_{}.csv'.format(timezone.now().date())
         })
 
@@ -585,6 +587,10 @@ class CPOutputsViewSet(
     queryset = Result.objects.filter(result_type__name=ResultType.OUTPUT).select_related('result_type').order_by('name')
     serializer_class = CPOutputListSerializer
 
+    @cache_response('results')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 class InterventionsViewSet(
     FMBaseViewSet,
@@ -2,9 +2,9 @@ import datetime
 import logging
 from decimal import Decimal
 
-from django.db import models
-from django.db.models import F, Sum, Value
-from django.db.models.functions import Concat
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
 
 from unicef_vision.settings import INSIGHT_DATE_FORMAT
 from unicef_vision.synchronizers import FileDataSynchronizer, MultiModelDataSynchronizer
@@ -17,6 +17,7 @@ from etools.applications.funds.models import (
     FundsReservationItem,
 )
 from etools.applications.vision.synchronizers import VisionDataTenantSynchronizer
+from etools.libraries.views.cache import bump_cache_version
 
 
 class FundReservationsSynchronizer(VisionDataTenantSynchronizer):
@@ -100,11 +101,14 @@ class FundReservationsSynchronizer(VisionDataTenantSynchronizer):
     LINE_ITEM_FIELDS = ['LINE_ITEM', 'FR_NUMBER', 'WBS_ELEMENT', 'GRANT_REF',
                         'FUND', 'OVERALL_AMOUNT', 'OVERALL_AMOUNT_DC',
                         'DUE_DATE', 'FR_LINE_ITEM_TEXT', 'DONOR_NAME', 'DONOR_CODE']
+    BATCH_SIZE = 500
 
     def __init__(self, *args, **kwargs):
         self.header_records = {}
         self.item_records = {}
         self.fr_headers = {}
+        # headers whose line items were created or updated
+        self.synced_fr_ids = set()
         self.REVERSE_MAPPING = {v: k for k, v in self.MAPPING.items()}
         self.REVERSE_HEADER_FIELDS = [self.REVERSE_MAPPING[v] for v in self.HEADER_FIELDS]
         self.REVERSE_ITEM_FIELDS = [self.REVERSE_MAPPING[v] for v in self.LINE_ITEM_FIELDS]
@@ -190,12 +194,30 @@ class FundReservationsSynchronizer(VisionDataTenantSynchronizer):
         return obj_field == record_field
 
     def update_obj(self, obj, new_record):
-        updates = False
+        return bool(self.update_obj_fields(obj, new_record))
+
+    def update_obj_fields(self, obj, new_record):
+        updated_fields = []
         for k in new_record:
             if not self.equal_fields(k, getattr(obj, k), new_record[k]):
-                updates = True
+                updated_fields.append(k)
                 setattr(obj, k, new_record[k])
-        return updates
+        return updated_fields
+
+    def bulk_update_objects(self, model, objects_fields):
+        """Save the changed objects with a bulk update of the fields changed in any of them"""
+        if not objects_fields:
+            return 0
+
+        now = timezone.now()
+        fields = set()
+        for obj, updated_fields in objects_fields:
+            obj.modified = now
+            fields.update(updated_fields)
+        model.objects.bulk_update(
+            [obj for obj, __ in objects_fields], sorted(fields) + ['modified'], batch_size=self.BATCH_SIZE,
+        )
+        return len(objects_fields)
 
     def header_sync(self):
 
@@ -215,15 +237,19 @@ class FundReservationsSynchronizer(VisionDataTenantSynchronizer):
             to_create.append(FundsReservationHeader(**record))
 
         if to_create:
-            created_objects = FundsReservationHeader.objects.bulk_create(to_create)
+            created_objects = FundsReservationHeader.objects.bulk_create(to_create, batch_size=self.BATCH_SIZE)
             self.map_header_objects(created_objects)
+            self.synced_fr_ids.update(h.pk for h in created_objects)
 
         self.map_header_objects(to_update)
-        updated = 0
+        changed = []
         for h in to_update:
-            if self.update_obj(h, self.header_records.get(h.fr_number)):
-                h.save()
-                updated += 1
+            updated_fields = self.update_obj_fields(h, self.header_records.get(h.fr_number))
+            if updated_fields:
+                changed.append((h, updated_fields))
+                # totals from vision are reconciled with the line items
+                self.synced_fr_ids.add(h.pk)
+        updated = self.bulk_update_objects(FundsReservationHeader, changed)
 
         return updated, len(to_create)
 
@@ -232,14 +258,15 @@ class FundReservationsSynchronizer(VisionDataTenantSynchronizer):
         to_update = []
 
         fr_line_item_keys = {k for k in self.item_records.keys()}
+        fr_numbers = {record['fr_number'] for record in self.item_records.values()}
 
-        list_of_line_items = FundsReservationItem.objects.annotate(
-            unique_ref=Concat(
-                F('fund_reservation__fr_number'), Value('-'), F('line_item'),
-                output_field=models.CharField())
-        ).filter(unique_ref__in=fr_line_item_keys)
+        # match by header and line item, which are indexed, instead of the concatenated reference
+        list_of_line_items = FundsReservationItem.objects.filter(
+            fund_reservation__fr_number__in=fr_numbers,
+        ).annotate(fr_number=F('fund_reservation__fr_number'))
 
         for li in list_of_line_items:
+            li.unique_ref = '{}-{}'.format(li.fr_number, li.line_item)
             if li.unique_ref in fr_line_item_keys:
                 to_update.append(li)
                 fr_line_item_keys.remove(li.unique_ref)
@@ -251,22 +278,33 @@ class FundReservationsSynchronizer(VisionDataTenantSynchronizer):
             del record['fr_number']
             to_create.append(FundsReservationItem(**record))
 
-        FundsReservationItem.objects.bulk_create(to_create)
-        updated = 0
+        FundsReservationItem.objects.bulk_create(to_create, batch_size=self.BATCH_SIZE)
+        self.synced_fr_ids.update(li.fund_reservation_id for li in to_create)
+
+        changed = []
         for li in to_update:
             local_record = self.item_records.get(li.unique_ref)
             del local_record['fr_number']
-            if self.update_obj(li, local_record):
-                li.save()
-                updated += 1
+            updated_fields = self.update_obj_fields(li, local_record)
+            if updated_fields:
+                changed.append((li, updated_fields))
+                self.synced_fr_ids.add(li.fund_reservation_id)
+        updated = self.bulk_update_objects(FundsReservationItem, changed)
+
+        if to_create or changed:
+            # bulk queries don't send the signals invalidating the cached dropdowns
+            transaction.on_commit(lambda: bump_cache_version('pmp-dropdowns'))
 
         return updated, len(to_create)
 
-    @staticmethod
-    def update_fr_totals():
-        totals_updated = 0
+    @classmethod
+    def update_fr_totals(cls, fr_ids=None):
+        """Update headers totals from their line items, only for the given headers if provided"""
         qs = FundsReservationHeader.objects
+        if fr_ids is not None:
+            qs = qs.filter(pk__in=fr_ids)
         qs = qs.annotate(my_li_total_sum_local=Sum('fr_items__overall_amount_dc')).annotate(my_li_total_sum=Sum('fr_items__overall_amount'))
+        to_update = []
         for fr in qs:
             updated = False
             # Note that Sum() returns None, not 0, if there's nothing to sum.
@@ -281,10 +319,13 @@ class FundReservationsSynchronizer(VisionDataTenantSynchronizer):
                 updated = True
 
             if updated:
-                fr.save()
-                totals_updated += 1
+                fr.modified = timezone.now()
+                to_update.append(fr)
 
-        return totals_updated
+        FundsReservationHeader.objects.bulk_update(
+            to_update, ['total_amt', 'total_amt_local', 'modified'], batch_size=cls.BATCH_SIZE,
+        )
+        return len(to_update)
 
     def _save_records(self, records):
 
@@ -292,7 +333,8 @@ class FundReservationsSynchronizer(VisionDataTenantSynchronizer):
         self.set_mapping(filtered_records)
         h_processed = self.header_sync()
         i_processed = self.li_sync()
-        h_totals_updated = self.update_fr_totals()
+        # totals only change for the headers synced or whose line items were synced
+        h_totals_updated = self.update_fr_totals(self.synced_fr_ids)
 
         logging.info('tocreate {}'.format(h_processed[1]))
         logging.info('toupdate {}'.format(h_processed[0]))
@@ -2,6 +2,9 @@
 import datetime
 from decimal import Decimal
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from etools.applications.core.tests.cases import BaseTenantTestCase
 from etools.applications.funds import synchronizers
 from etools.applications.funds.models import (
@@ -17,6 +20,7 @@ from etools.applications.funds.tests.factories import (
     FundsReservationItemFactory,
 )
 from etools.applications.users.models import Country
+from etools.libraries.views.cache import get_cache_versions
 
 
 class TestFundReservationsSynchronizer(BaseTenantTestCase):
@@ -304,6 +308,64 @@ class TestFundReservationsSynchronizer(BaseTenantTestCase):
         response = self.adapter._save_records([self.data])
         self.assertEqual(response, 2)
 
+    def test_save_records_totals_synced_headers_only(self):
+        other_header = FundsReservationHeaderFactory(total_amt=100)
+        self.data["LINE_ITEM"] = "333"
+        self.adapter._save_records([self.data])
+
+        self.fund_header.refresh_from_db()
+        self.assertEqual(self.fund_header.total_amt, Decimal("40.00"))
+        self.assertEqual(self.fund_header.total_amt_local, Decimal("10.00"))
+        other_header.refresh_from_db()
+        self.assertEqual(other_header.total_amt, 100)
+
+    def test_save_records_header_totals_reconciled(self):
+        self.adapter._save_records([self.data])
+        self.fund_header.refresh_from_db()
+        self.assertEqual(self.fund_header.total_amt, Decimal("20.00"))
+
+        # header total is overwritten from vision while the line items are unchanged
+        synchronizers.FundReservationsSynchronizer(
+            business_area_code=self.country.business_area_code,
+        )._save_records([self.data])
+        self.fund_header.refresh_from_db()
+        self.assertEqual(self.fund_header.total_amt, Decimal("20.00"))
+
+    def test_save_records_dropdowns_invalidated(self):
+        def save_records(**data):
+            with self.captureOnCommitCallbacks(execute=True):
+                synchronizers.FundReservationsSynchronizer(
+                    business_area_code=self.country.business_area_code,
+                )._save_records([dict(self.data, LINE_ITEM="333", **data)])
+            return get_cache_versions(['pmp-dropdowns'])[0]
+
+        version = save_records()
+        # nothing changed
+        self.assertEqual(save_records(), version)
+        self.assertGreater(save_records(OVERALL_AMOUNT="30.00"), version)
+
+    def test_save_records_bulk(self):
+        def records(count):
+            return [dict(self.data, LINE_ITEM=str(i), OVERALL_AMOUNT="1.00") for i in range(count)]
+
+        # header is up to date after the first sync
+        self.adapter._save_records(records(1))
+
+        with CaptureQueriesContext(connection) as few_records_queries:
+            synchronizers.FundReservationsSynchronizer(
+                business_area_code=self.country.business_area_code,
+            )._save_records(records(2))
+        with CaptureQueriesContext(connection) as many_records_queries:
+            synchronizers.FundReservationsSynchronizer(
+                business_area_code=self.country.business_area_code,
+            )._save_records(records(20))
+
+        self.assertEqual(len(few_records_queries), len(many_records_queries))
+        self.assertEqual(self.fund_header.fr_items.count(), 21)
+        self.assertEqual(self.fund_header.fr_items.get(line_item=1).overall_amount, 1)
+        self.fund_header.refresh_from_db()
+        self.assertEqual(self.fund_header.total_amt, 20 + 20)
+
 
 class TestFundCommitmentSynchronizer(BaseTenantTestCase):
     @classmethod
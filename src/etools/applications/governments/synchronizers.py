@@ -7,7 +7,6 @@ from django.db.models import Q
 from unicef_vision.exceptions import VisionException
 from unicef_vision.settings import INSIGHT_DATE_FORMAT
 
-from etools.applications.environment.helpers import tenant_switch_is_active
 from etools.applications.governments.models import EWPActivity, EWPKeyIntervention, EWPOutput, GovernmentEWP
 from etools.applications.locations.models import Location
 from etools.applications.partners.models import PartnerOrganization
@@ -267,6 +266,7 @@ class EWPSynchronizer:
 # class EWPsSynchronizer(FileDataSynchronizer):
 class EWPsSynchronizer(VisionDataTenantSynchronizer):
     ENDPOINT = 'ramworkplans'
+    DISABLED_SWITCH = "EWP Sync Disabled"
     DATES = (
         "WPA_END_DATE",
         "WPA_START_DATE",
@@ -416,6 +416,6 @@ class EWPsSynchronizer(VisionDataTenantSynchronizer):
         return synchronizer.update()
 
     def sync(self):
-        if tenant_switch_is_active("EWP Sync Disabled"):
+        if self.is_disabled():
             raise VisionException("EWP Sync is disabled")
         return super().sync()
@@ -372,7 +372,7 @@ class GDDCancelView(GDDActionView):
         if gdd.status == GDD.CANCELLED:
             raise ValidationError(_("GDD has already been cancelled."))
 
-        if not request.user.groups.filter(name=PRC_SECRETARY).exists():
+        if PRC_SECRETARY not in request.user.group_names:
             raise ValidationError(_("Only PRC Secretary can cancel"))
 
         request.data.update({"status": GDD.CANCELLED})
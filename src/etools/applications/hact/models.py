@@ -1,4 +1,4 @@
-from datetime import date, datetime
+from datetime import datetime
 from decimal import Decimal
 
 from django.db import models
@@ -9,6 +9,7 @@ from django.utils.translation import gettext_lazy as _
 from model_utils.models import TimeStampedModel
 
 from etools.applications.audit.models import Audit, Engagement, MicroAssessment, SpecialAudit, SpotCheck
+from etools.applications.hact.services import HactPartnersSummary
 from etools.applications.organizations.models import OrganizationType
 from etools.applications.partners.models import PartnerOrganization
 from etools.libraries.pythonlib.datetime import get_current_year
@@ -41,15 +42,16 @@ class AggregateHact(TimeStampedModel):
         return f'{self.year}'
 
     def update(self):
+        partners = self.get_partners_summary()
         self.partner_values = {
-            'assurance_activities': self.get_assurance_activities(),
-            'assurance_coverage': self.get_assurance_coverage(),
+            'assurance_activities': self.get_assurance_activities(partners),
+            'assurance_coverage': self.get_assurance_coverage(partners),
             'financial_findings': self.get_financial_findings(),
             'financial_findings_numbers': self.get_financial_findings_numbers(),
             'charts': {
-                'cash_transfers_amounts': self.cash_transfers_amounts(),
-                'cash_transfers_risk_ratings': self.get_cash_transfer_risk_rating(),
-                'cash_transfers_partner_type': self.get_cash_transfer_partner_type(),
+                'cash_transfers_amounts': self.cash_transfers_amounts(partners),
+                'cash_transfers_risk_ratings': self.get_cash_transfer_risk_rating(partners),
+                'cash_transfers_partner_type': self.get_cash_transfer_partner_type(partners),
                 'spot_checks_completed': self.get_spot_checks_completed(),
             },
         }
@@ -59,187 +61,48 @@ class AggregateHact(TimeStampedModel):
     def get_queryset():
         return PartnerOrganization.objects.hact_active()
 
-    def _sum_json_values(self, qs_filters, filter_dict={}):
-        partners = self.get_queryset().filter(**filter_dict)
+    def get_partners_summary(self):
+        return HactPartnersSummary(self.get_queryset())
 
-        def get_value(obj, qs_filters):
-            qs_filters = qs_filters.split('__')
-            json_field_name = qs_filters.pop(0)
-            json_field = getattr(obj, json_field_name)
-            for qs_filter in qs_filters:
-                json_field = json_field[qs_filter]
-            return json_field
-
-        return sum([get_value(p, qs_filters) for p in partners])
-
-    def cash_transfers_amounts(self):
-        FIRST_LEVEL = Decimal(50000.00)
-        SECOND_LEVEL = Decimal(100000.00)
-        THIRD_LEVEL = Decimal(350000.00)
-        FOURTH_LEVEL = Decimal(500000.00)
-
-        ct_amount_first = self.get_queryset().filter(total_ct_ytd__lte=FIRST_LEVEL)
-        cash_transfers_amounts_first = [
-            '$0-50,000',
-            ct_amount_first.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_NOT_REQUIRED, PartnerOrganization.RATING_NOT_ASSESSED
-            ]).aggregate(total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_first.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_LOW, PartnerOrganization.RATING_LOW_RISK_ASSUMED
-            ]).aggregate(total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_first.filter(highest_risk_rating_name=PartnerOrganization.RATING_MEDIUM).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_first.filter(highest_risk_rating_name=PartnerOrganization.RATING_SIGNIFICANT).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_first.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_HIGH,
-                PartnerOrganization.RATING_HIGH_RISK_ASSUMED,
-                PartnerOrganization.PSEA_RATING_HIGH
-            ]).aggregate(total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_first.aggregate(count=Count('total_ct_ytd'))['count'],
-        ]
-
-        ct_amount_second = self.get_queryset().filter(total_ct_ytd__gt=FIRST_LEVEL, total_ct_ytd__lte=SECOND_LEVEL)
-        cash_transfers_amounts_second = [
-            '$50,001-100,000',
-            ct_amount_second.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_NOT_REQUIRED, PartnerOrganization.RATING_NOT_ASSESSED
-            ]).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_second.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_LOW, PartnerOrganization.RATING_LOW_RISK_ASSUMED
-            ]).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_second.filter(highest_risk_rating_name=PartnerOrganization.RATING_MEDIUM).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_second.filter(highest_risk_rating_name=PartnerOrganization.RATING_SIGNIFICANT).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_second.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_HIGH,
-                PartnerOrganization.RATING_HIGH_RISK_ASSUMED,
-                PartnerOrganization.PSEA_RATING_HIGH
-            ]).aggregate(total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_second.aggregate(count=Count('total_ct_ytd'))['count'],
-        ]
-
-        ct_amount_third = self.get_queryset().filter(total_ct_ytd__gt=SECOND_LEVEL, total_ct_ytd__lte=THIRD_LEVEL)
-        cash_transfers_amounts_third = [
-            '$100,001-350,000',
-            ct_amount_third.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_NOT_REQUIRED, PartnerOrganization.RATING_NOT_ASSESSED
-            ]).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_third.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_LOW, PartnerOrganization.RATING_LOW_RISK_ASSUMED
-            ]).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_third.filter(highest_risk_rating_name=PartnerOrganization.RATING_MEDIUM).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_third.filter(highest_risk_rating_name=PartnerOrganization.RATING_SIGNIFICANT).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_third.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_HIGH,
-                PartnerOrganization.RATING_HIGH_RISK_ASSUMED,
-                PartnerOrganization.PSEA_RATING_HIGH
-            ]).aggregate(total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_third.aggregate(count=Count('total_ct_ytd'))['count'],
-        ]
-
-        ct_amount_fourth = self.get_queryset().filter(total_ct_ytd__gt=THIRD_LEVEL, total_ct_ytd__lte=FOURTH_LEVEL)
-        cash_transfers_amounts_fourth = [
-            '$350,001-500,000',
-            ct_amount_fourth.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_NOT_REQUIRED, PartnerOrganization.RATING_NOT_ASSESSED
-            ]).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_fourth.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_LOW, PartnerOrganization.RATING_LOW_RISK_ASSUMED
-            ]).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_fourth.filter(highest_risk_rating_name=PartnerOrganization.RATING_MEDIUM).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_fourth.filter(highest_risk_rating_name=PartnerOrganization.RATING_SIGNIFICANT).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_fourth.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_HIGH,
-                PartnerOrganization.RATING_HIGH_RISK_ASSUMED,
-                PartnerOrganization.PSEA_RATING_HIGH
-            ]).aggregate(total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_fourth.aggregate(count=Count('total_ct_ytd'))['count'],
-        ]
-
-        ct_amount_fifth = self.get_queryset().filter(total_ct_ytd__gt=FOURTH_LEVEL)
-        cash_transfers_amounts_fifth = [
-            '>$500,000',
-            ct_amount_fifth.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_NOT_REQUIRED, PartnerOrganization.RATING_NOT_ASSESSED
-            ]).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_fifth.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_LOW, PartnerOrganization.RATING_LOW_RISK_ASSUMED
-            ]).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_fifth.filter(highest_risk_rating_name__in=PartnerOrganization.RATING_MEDIUM).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_fifth.filter(highest_risk_rating_name__in=PartnerOrganization.RATING_SIGNIFICANT).aggregate(
-                total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_fifth.filter(highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_HIGH,
-                PartnerOrganization.RATING_HIGH_RISK_ASSUMED,
-                PartnerOrganization.PSEA_RATING_HIGH
-            ]).aggregate(total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total'],
-            ct_amount_fifth.aggregate(count=Count('total_ct_ytd'))['count'],
-        ]
+    @staticmethod
+    def _current_year_engagements(engagement_model):
+        return engagement_model.objects.filter(
+            Q(partner__reported_cy__gt=0) | Q(partner__total_ct_cy__gt=0),
+            date_of_draft_report_to_ip__year=datetime.now().year,
+        ).exclude(status=Engagement.CANCELLED)
 
+    def cash_transfers_amounts(self, partners=None):
+        partners = partners or self.get_partners_summary()
         return [
             ['Risk Rating', 'Not Required', 'Low', 'Medium', 'Significant', 'High', 'Number of IPs'],
-            cash_transfers_amounts_first,
-            cash_transfers_amounts_second,
-            cash_transfers_amounts_third,
-            cash_transfers_amounts_fourth,
-            cash_transfers_amounts_fifth,
+        ] + [
+            [
+                label,
+                amounts['not_required'],
+                amounts['low'],
+                amounts['medium'],
+                amounts['significant'],
+                amounts['high'],
+                amounts['count'],
+            ]
+            for (label, __, __), amounts in zip(partners.CT_AMOUNT_LEVELS, partners.ct_amounts)
         ]
 
-    def get_cash_transfer_risk_rating(self):
-        total_ct_dict = {
-            'total': Sum('total_ct_ytd'),
-            'count': Count('total_ct_ytd')
-        }
-
-        high = self.get_queryset().filter(
-            highest_risk_rating_name__in=[PartnerOrganization.RATING_HIGH,
-                                          PartnerOrganization.RATING_HIGH_RISK_ASSUMED,
-                                          PartnerOrganization.PSEA_RATING_HIGH]
-        ).aggregate(**total_ct_dict)
-        significant = self.get_queryset().filter(
-            highest_risk_rating_name__in=PartnerOrganization.RATING_SIGNIFICANT).aggregate(**total_ct_dict)
-        moderate = self.get_queryset().filter(
-            highest_risk_rating_name__in=PartnerOrganization.RATING_MEDIUM).aggregate(**total_ct_dict)
-        low = self.get_queryset().filter(highest_risk_rating_name__in=[
-            PartnerOrganization.RATING_LOW, PartnerOrganization.RATING_LOW_RISK_ASSUMED]).aggregate(**total_ct_dict)
-        non_assessed = self.get_queryset().filter(
-            highest_risk_rating_name__in=[
-                PartnerOrganization.RATING_NOT_REQUIRED, PartnerOrganization.RATING_NOT_ASSESSED
-            ]).aggregate(**total_ct_dict)
-
+    def get_cash_transfer_risk_rating(self, partners=None):
+        ratings = (partners or self.get_partners_summary()).ct_risk_ratings
         return [
             ['Risk Rating', 'Total Cash Transfers', {'role': 'style'}, 'Number of IPs'],
-            ['Not Required', non_assessed['total'], '#D8D8D8', non_assessed['count']],
-            ['Low', low['total'], '#2BB0F2', low['count']],
-            ['Medium', moderate['total'], '#FECC02', moderate['count']],
-            ['Significant', significant['total'], '#F05656', significant['count']],
-            ['High', high['total'], '#751010', high['count']],
+            ['Not Required', ratings['not_required']['total'], '#D8D8D8', ratings['not_required']['count']],
+            ['Low', ratings['low']['total'], '#2BB0F2', ratings['low']['count']],
+            ['Medium', ratings['medium']['total'], '#FECC02', ratings['medium']['count']],
+            ['Significant', ratings['significant']['total'], '#F05656', ratings['significant']['count']],
+            ['High', ratings['high']['total'], '#751010', ratings['high']['count']],
         ]
 
-    def get_cash_transfer_partner_type(self):
-        total_ct_dict = {
-            'total': Sum('total_ct_ytd'),
-            'count': Count('total_ct_ytd')
-        }
-
-        gov = self.get_queryset().filter(partner_type=OrganizationType.GOVERNMENT).aggregate(**total_ct_dict)
-        cso = self.get_queryset().filter(
-            partner_type=OrganizationType.CIVIL_SOCIETY_ORGANIZATION).aggregate(**total_ct_dict)
+    def get_cash_transfer_partner_type(self, partners=None):
+        partner_types = (partners or self.get_partners_summary()).ct_partner_types
+        cso = partner_types[OrganizationType.CIVIL_SOCIETY_ORGANIZATION]
+        gov = partner_types[OrganizationType.GOVERNMENT]
 
         return [
             ['Partner Type', 'Total Cash Transfers', {'role': 'style'}, 'Number of Partners'],
@@ -247,127 +110,97 @@ class AggregateHact(TimeStampedModel):
             ['GOV', gov['total'], '#F05656', gov['count']],
         ]
 
-    @staticmethod
-    def get_spot_checks_completed():
-        qs = SpotCheck.objects.filter(
-            Q(partner__reported_cy__gt=0) | Q(partner__total_ct_cy__gt=0),
-            date_of_draft_report_to_ip__year=datetime.now().year).exclude(status=Engagement.CANCELLED)
+    @classmethod
+    def get_spot_checks_completed(cls):
+        spot_checks = cls._current_year_engagements(SpotCheck).aggregate(
+            staff=Count('id', filter=Q(agreement__auditor_firm__unicef_users_allowed=True)),
+            service_providers=Count('id', filter=Q(agreement__auditor_firm__unicef_users_allowed=False)),
+        )
         return [
             ['Completed by', 'Count'],
-            ['Staff', qs.filter(agreement__auditor_firm__unicef_users_allowed=True).count()],
-            ['Service Providers', qs.filter(agreement__auditor_firm__unicef_users_allowed=False).count()],
+            ['Staff', spot_checks['staff']],
+            ['Service Providers', spot_checks['service_providers']],
         ]
 
-    def get_assurance_activities(self):
-        year_limit = date.today().year - PartnerOrganization.EXPIRING_ASSESSMENT_LIMIT_YEAR
+    def get_assurance_activities(self, partners=None):
+        partners = partners or self.get_partners_summary()
         return {
             'programmatic_visits': {
-                'completed': self._sum_json_values('hact_values__programmatic_visits__completed__total'),
-                'min_required': sum([p.min_req_programme_visits for p in self.get_queryset()]),
+                'completed': partners.programmatic_visits_completed,
+                'min_required': partners.programmatic_visits_required,
             },
             'spot_checks': {
-                'completed': SpotCheck.objects.filter(
-                    Q(partner__reported_cy__gt=0) | Q(partner__total_ct_cy__gt=0),
-                    date_of_draft_report_to_ip__year=datetime.now().year).exclude(
-                    status=Engagement.CANCELLED).count(),
-                'required': sum([p.planned_engagement.spot_check_required for p in self.get_queryset().filter(
-                    planned_engagement__isnull=False)]),
-                'follow_up': self.get_queryset().aggregate(total=Coalesce(Sum(
-                    'planned_engagement__spot_check_follow_up'), 0))['total']
+                'completed': self._current_year_engagements(SpotCheck).count(),
+                'required': partners.spot_checks_required,
+                'follow_up': partners.spot_checks_follow_up,
             },
-            'scheduled_audit': Audit.objects.filter(
-                Q(partner__reported_cy__gt=0) | Q(partner__total_ct_cy__gt=0),
-                date_of_draft_report_to_ip__year=datetime.now().year).exclude(
-                status=Engagement.CANCELLED).count(),
-            'special_audit': SpecialAudit.objects.filter(
-                Q(partner__reported_cy__gt=0) | Q(partner__total_ct_cy__gt=0),
-                date_of_draft_report_to_ip__year=datetime.now().year).exclude(
-                status=Engagement.CANCELLED).count(),
-            'micro_assessment': MicroAssessment.objects.filter(
-                Q(partner__reported_cy__gt=0) | Q(partner__total_ct_cy__gt=0),
-                date_of_draft_report_to_ip__year=datetime.now().year).exclude(
-                status=Engagement.CANCELLED).count(),
-            'missing_micro_assessment': PartnerOrganization.objects.hact_active(
-                last_assessment_date__isnull=False, last_assessment_date__year__lte=year_limit).count(),
+            'scheduled_audit': self._current_year_engagements(Audit).count(),
+            'special_audit': self._current_year_engagements(SpecialAudit).count(),
+            'micro_assessment': self._current_year_engagements(MicroAssessment).count(),
+            'missing_micro_assessment': partners.missing_micro_assessment,
         }
 
     @staticmethod
     def get_financial_findings():
+        current_year = datetime.now().year
         audits = Audit.objects.filter(
             Q(partner__reported_cy__gt=0) | Q(partner__total_ct_cy__gt=0),
-            date_of_draft_report_to_ip__year=datetime.now().year).exclude(status=Engagement.CANCELLED)
-
-        refunds = audits.filter(amount_refunded__isnull=False).aggregate(
-            total=Coalesce(Sum('amount_refunded'), Decimal(0.0)))['total']
-        additional_supporting_document_provided = audits.filter(
-            additional_supporting_documentation_provided__isnull=False,
-        ).aggregate(
-            total=Coalesce(Sum('additional_supporting_documentation_provided'), Decimal(0.0)))['total']
-        justification_provided_and_accepted = audits.filter(
-            justification_provided_and_accepted__isnull=False).aggregate(
-            total=Coalesce(Sum('justification_provided_and_accepted'), Decimal(0.0)))['total']
-        impairment = audits.filter(
-            write_off_required__isnull=False).aggregate(
-            total=Coalesce(Sum('write_off_required'), Decimal(0.0)))['total']
+            date_of_draft_report_to_ip__year__in=[current_year, current_year - 1],
+        ).exclude(status=Engagement.CANCELLED)
+
+        def _sum(field_name, year):
+            return Coalesce(Sum(field_name, filter=Q(date_of_draft_report_to_ip__year=year)), Decimal(0.0))
+
+        totals = audits.aggregate(
+            audited_expenditure=_sum('audited_expenditure', current_year),
+            financial_findings=_sum('financial_findings', current_year),
+            amount_refunded=_sum('amount_refunded', current_year),
+            additional_supporting_documentation_provided=_sum(
+                'additional_supporting_documentation_provided', current_year),
+            justification_provided_and_accepted=_sum('justification_provided_and_accepted', current_year),
+            write_off_required=_sum('write_off_required', current_year),
+            financial_findings_y1=_sum('financial_findings', current_year - 1),
+            amount_refunded_y1=_sum('amount_refunded', current_year - 1),
+            additional_supporting_documentation_provided_y1=_sum(
+                'additional_supporting_documentation_provided', current_year - 1),
+            write_off_required_y1=_sum('write_off_required', current_year - 1),
+        )
 
         # pending_unsupported_amount property
-        _ff = audits.filter(financial_findings__isnull=False).aggregate(
-            total=Coalesce(Sum('financial_findings'), Decimal(0.0)))['total']
-        _ar = audits.filter(amount_refunded__isnull=False).aggregate(
-            total=Coalesce(Sum('amount_refunded'), Decimal(0.0)))['total']
-        _asdp = audits.filter(additional_supporting_documentation_provided__isnull=False).aggregate(
-            total=Coalesce(Sum('additional_supporting_documentation_provided'), Decimal(0.0)))['total']
-        _wor = audits.filter(write_off_required__isnull=False).aggregate(
-            total=Coalesce(Sum('write_off_required'), Decimal(0.0)))['total']
-        outstanding = _ff - _ar - _asdp - _wor
-
-        outstanding_audits_y1 = Audit.objects.filter(
-            Q(partner__reported_cy__gt=0) | Q(partner__total_ct_cy__gt=0),
-            date_of_draft_report_to_ip__year=datetime.now().year - 1).exclude(status=Engagement.CANCELLED)
-        _ff_y1 = outstanding_audits_y1.filter(financial_findings__isnull=False).aggregate(
-            total=Coalesce(Sum('financial_findings'), Decimal(0.0)))['total']
-        _ar_y1 = outstanding_audits_y1.filter(amount_refunded__isnull=False).aggregate(
-            total=Coalesce(Sum('amount_refunded'), Decimal(0.0)))['total']
-        _asdp_y1 = outstanding_audits_y1.filter(additional_supporting_documentation_provided__isnull=False).aggregate(
-            total=Coalesce(Sum('additional_supporting_documentation_provided'), Decimal(0.0)))['total']
-        _wor_y1 = outstanding_audits_y1.filter(write_off_required__isnull=False).aggregate(
-            total=Coalesce(Sum('write_off_required'), Decimal(0.0)))['total']
-        outstanding_y1 = _ff_y1 - _ar_y1 - _asdp_y1 - _wor_y1
-
-        total_financial_findings = audits.filter(
-            financial_findings__isnull=False).aggregate(total=Coalesce(Sum('financial_findings'), Decimal(0.0)))['total']
-        total_audited_expenditure = audits.filter(audited_expenditure__isnull=False).aggregate(
-            total=Coalesce(Sum('audited_expenditure'), Decimal(0.0)))['total']
+        outstanding = totals['financial_findings'] - totals['amount_refunded'] - \
+            totals['additional_supporting_documentation_provided'] - totals['write_off_required']
+        outstanding_y1 = totals['financial_findings_y1'] - totals['amount_refunded_y1'] - \
+            totals['additional_supporting_documentation_provided_y1'] - totals['write_off_required_y1']
 
         return [
             {
                 'name': 'Total Audited Expenditure',
-                'value': total_audited_expenditure,
+                'value': totals['audited_expenditure'],
                 'highlighted': False,
             },
             {
                 'name': 'Total Financial Findings',
-                'value': total_financial_findings,
+                'value': totals['financial_findings'],
                 'highlighted': True,
             },
             {
                 'name': 'Refunds',
-                'value': refunds,
+                'value': totals['amount_refunded'],
                 'highlighted': False,
             },
             {
                 'name': 'Additional Supporting Documentation Received',
-                'value': additional_supporting_document_provided,
+                'value': totals['additional_supporting_documentation_provided'],
                 'highlighted': False,
             },
             {
                 'name': 'Justification Provided and Accepted',
-                'value': justification_provided_and_accepted,
+                'value': totals['justification_provided_and_accepted'],
                 'highlighted': False,
             },
             {
                 'name': 'Impairment',
-                'value': impairment,
+                'value': totals['write_off_required'],
                 'highlighted': False,
             },
             {
@@ -382,86 +215,88 @@ class AggregateHact(TimeStampedModel):
             }
         ]
 
-    @staticmethod
-    def get_financial_findings_numbers():
-
-        audits = Audit.objects.filter(
-            Q(partner__reported_cy__gt=0) | Q(partner__total_ct_cy__gt=0),
-            date_of_draft_report_to_ip__year=datetime.now().year).exclude(status=Engagement.CANCELLED)
+    @classmethod
+    def get_financial_findings_numbers(cls):
+        findings = cls._current_year_engagements(Audit).aggregate(
+            high=Count('risks', filter=Q(risks__value=4)),
+            medium=Count('risks', filter=Q(risks__value=2)),
+            low=Count('risks', filter=Q(risks__value=1)),
+            qualified=Count('id', distinct=True, filter=Q(audit_opinion=Audit.OPTION_QUALIFIED)),
+            unqualified=Count('id', distinct=True, filter=Q(audit_opinion=Audit.OPTION_UNQUALIFIED)),
+            denial=Count('id', distinct=True, filter=Q(audit_opinion=Audit.OPTION_DENIAL)),
+            adverse=Count('id', distinct=True, filter=Q(audit_opinion=Audit.OPTION_ADVERSE)),
+        )
         return [
             {
                 'name': 'Number of High Priority Findings',
-                'value': audits.filter(risks__value=4).count(),
+                'value': findings['high'],
             },
             {
                 'name': 'Number of Medium Priority Findings',
-                'value': audits.filter(risks__value=2).count(),
+                'value': findings['medium'],
             },
             {
                 'name': 'Number of Low Priority Findings',
-                'value': audits.filter(risks__value=1).count(),
+                'value': findings['low'],
             },
             {
                 'name': 'Audit Opinion',
                 'value': [
                     {
                         'name': 'qualified',
-                        'value': audits.filter(audit_opinion=Audit.OPTION_QUALIFIED).count(),
+                        'value': findings['qualified'],
                     },
                     {
                         'name': 'unqualified',
-                        'value': audits.filter(audit_opinion=Audit.OPTION_UNQUALIFIED).count(),
+                        'value': findings['unqualified'],
                     },
                     {
                         'name': 'denial',
-                        'value': audits.filter(audit_opinion=Audit.OPTION_DENIAL).count(),
+                        'value': findings['denial'],
                     },
                     {
                         'name': 'adverse',
-                        'value': audits.filter(audit_opinion=Audit.OPTION_ADVERSE).count(),
+                        'value': findings['adverse'],
                     },
                 ],
             }
         ]
 
-    @staticmethod
-    def get_assurance_coverage():
-        qs = PartnerOrganization.objects.hact_active()
-
-        no_coverage = qs.filter(hact_values__assurance_coverage=PartnerOrganization.ASSURANCE_VOID)
-        partial_coverage = qs.filter(hact_values__assurance_coverage=PartnerOrganization.ASSURANCE_PARTIAL)
-        full_coverage = qs.filter(hact_values__assurance_coverage=PartnerOrganization.ASSURANCE_COMPLETE)
+    def get_assurance_coverage(self, partners=None):
+        partners = partners or self.get_partners_summary()
+        no_coverage = partners.coverage[PartnerOrganization.ASSURANCE_VOID]
+        partial_coverage = partners.coverage[PartnerOrganization.ASSURANCE_PARTIAL]
+        full_coverage = partners.coverage[PartnerOrganization.ASSURANCE_COMPLETE]
         return {
             'coverage_by_number_of_ips': [
                 ['Coverage by number of IPs', 'Count'],
-                ['Without Assurance', no_coverage.count()],
-                ['Partially Met Requirements', partial_coverage.count()],
-                ['Met Requirements', full_coverage.count()]
+                ['Without Assurance', no_coverage['count']],
+                ['Partially Met Requirements', partial_coverage['count']],
+                ['Met Requirements', full_coverage['count']]
             ],
             'coverage_by_cash_transfer': [
                 ['Coverage by Cash Transfer (USD) (Total)', 'Count'],
-                ['Without Assurance', no_coverage.aggregate(total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total']],
-                ['Partially Met Requirements', partial_coverage.aggregate(
-                    total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total']],
-                ['Met Requirements', full_coverage.aggregate(total=Coalesce(Sum('total_ct_ytd'), Decimal(0.0)))['total']],
+                ['Without Assurance', no_coverage['total']],
+                ['Partially Met Requirements', partial_coverage['total']],
+                ['Met Requirements', full_coverage['total']],
 
             ],
             'table': [
                 {
                     'label': 'Partners',
-                    'value': PartnerOrganization.objects.hact_active().count()
+                    'value': partners.partners_count
                 },
                 {
                     'label': 'IPs without required PV',
-                    'value': PartnerOrganization.objects.not_programmatic_visit_compliant().count()
+                    'value': partners.not_programmatic_visit_compliant
                 },
                 {
                     'label': 'IPs without required SC',
-                    'value': PartnerOrganization.objects.not_spot_check_compliant().count()
+                    'value': partners.not_spot_check_compliant
                 },
                 {
                     'label': 'IPs without required assurance',
-                    'value': PartnerOrganization.objects.not_assurance_compliant().count()
+                    'value': partners.not_assurance_compliant
                 }
             ]
         }
@@ -0,0 +1,368 @@
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import ExtractQuarter
+from django.utils import timezone
+
+from etools.applications.audit.models import Audit, Engagement, SpecialAudit, SpotCheck
+from etools.applications.field_monitoring.planning.models import MonitoringActivity, MonitoringActivityGroup
+from etools.applications.organizations.models import OrganizationType
+from etools.applications.partners.models import (
+    Intervention,
+    InterventionPlannedVisits,
+    PartnerOrganization,
+    PartnerPlannedVisits,
+)
+from etools.applications.t2f.models import Travel, TravelType
+from etools.applications.tpm.models import TPMActivity, TPMVisit
+
+QUARTERS = ('q1', 'q2', 'q3', 'q4')
+
+
+def _quarter_counts():
+    return dict.fromkeys(QUARTERS, 0)
+
+
+class PartnerHactCalculator:
+    """
+    Set based version of the PartnerOrganization.update_* hact methods.
+
+    Planned/completed visits, spot checks and audits are computed for all partners at once with one aggregate
+    query per source and written back with a single bulk_update, producing the same hact_values as running
+    update_planned_visits_to_hact, update_programmatic_visits, update_spot_checks, update_audits_completed,
+    update_hact_support and update_min_requirements for each partner.
+    """
+
+    def __init__(self, partners):
+        self.partners = list(partners.select_related('planned_engagement'))
+        self.partner_ids = [partner.id for partner in self.partners]
+        self.year = datetime.date.today().year
+
+    def update(self):
+        """
+        :return: {partner: [updated minimum requirements]} for partners with changed minimum requirements
+        """
+        if not self.partners:
+            return {}
+
+        planned_visits = self.get_planned_visits()
+        programmatic_visits = self.get_programmatic_visits()
+        spot_checks = self.get_spot_checks()
+        audits, outstanding_findings = self.get_audits()
+
+        now = timezone.now()
+        updated_requirements = {}
+        for partner in self.partners:
+            hact = partner.hact_values
+
+            planned = planned_visits.get(partner.id) or _quarter_counts()
+            for quarter in QUARTERS:
+                hact['programmatic_visits']['planned'][quarter] = planned[quarter]
+            hact['programmatic_visits']['planned']['total'] = sum(planned.values())
+
+            completed = programmatic_visits.get(partner.id) or _quarter_counts()
+            for quarter in QUARTERS:
+                hact['programmatic_visits']['completed'][quarter] = completed[quarter]
+            hact['programmatic_visits']['completed']['total'] = sum(completed.values())
+
+            checks = spot_checks.get(partner.id) or _quarter_counts()
+            for quarter in QUARTERS:
+                hact['spot_checks']['completed'][quarter] = checks[quarter]
+            hact['spot_checks']['completed']['total'] = sum(checks.values())
+
+            hact['audits']['completed'] = audits.get(partner.id, 0)
+            hact['outstanding_findings'] = sum(outstanding_findings.get(partner.id, []))
+            hact['assurance_coverage'] = partner.assurance_coverage
+
+            updated = []
+            for hact_eng in ['programmatic_visits', 'spot_checks', 'audits']:
+                if hact[hact_eng]['minimum_requirements'] != partner.hact_min_requirements[hact_eng]:
+                    hact[hact_eng]['minimum_requirements'] = partner.hact_min_requirements[hact_eng]
+                    updated.append(hact_eng)
+            if updated:
+                updated_requirements[partner] = updated
+
+            partner.modified = now
+
+        PartnerOrganization.objects.bulk_update(self.partners, ['hact_values', 'modified'], batch_size=500)
+        return updated_requirements
+
+    @staticmethod
+    def _count_by_quarter(queryset, partner_field, date_field, counts=None):
+        counts = counts if counts is not None else defaultdict(_quarter_counts)
+        rows = queryset.annotate(
+            hact_partner_id=F(partner_field),
+            hact_quarter=ExtractQuarter(date_field),
+        ).values('hact_partner_id', 'hact_quarter').annotate(hact_count=Count('id')).order_by()
+        for row in rows:
+            counts[row['hact_partner_id']][QUARTERS[row['hact_quarter'] - 1]] += row['hact_count']
+        return counts
+
+    def get_planned_visits(self):
+        government_ids = [
+            partner.id for partner in self.partners if partner.partner_type == OrganizationType.GOVERNMENT
+        ]
+        planned = defaultdict(_quarter_counts)
+
+        interventions_pv = InterventionPlannedVisits.objects.filter(
+            intervention__agreement__partner__in=self.partner_ids,
+            year=self.year,
+        ).exclude(
+            intervention__agreement__partner__in=government_ids,
+        ).exclude(
+            intervention__status__in=[Intervention.DRAFT, Intervention.CANCELLED],
+        ).values('intervention__agreement__partner').annotate(
+            q1=Sum('programmatic_q1'),
+            q2=Sum('programmatic_q2'),
+            q3=Sum('programmatic_q3'),
+            q4=Sum('programmatic_q4'),
+        ).order_by()
+        for row in interventions_pv:
+            planned[row['intervention__agreement__partner']] = {q: row[q] or 0 for q in QUARTERS}
+
+        partners_pv = PartnerPlannedVisits.objects.filter(partner__in=government_ids, year=self.year)
+        for pv in partners_pv:
+            planned[pv.partner_id] = {
+                'q1': pv.programmatic_q1,
+                'q2': pv.programmatic_q2,
+                'q3': pv.programmatic_q3,
+                'q4': pv.programmatic_q4,
+            }
+        return planned
+
+    def get_programmatic_visits(self):
+        year = datetime.datetime.now().year
+
+        t2f = Travel.objects.filter(
+            activities__travel_type=TravelType.PROGRAMME_MONITORING,
+            traveler=F('activities__primary_traveler'),
+            status=Travel.COMPLETED,
+            end_date__year=timezone.now().year,
+            activities__partner__in=self.partner_ids,
+        )
+        counts = self._count_by_quarter(t2f, 'activities__partner', 'end_date')
+
+        tpm = TPMActivity.objects.filter(
+            is_pv=True,
+            partner__in=self.partner_ids,
+            tpm_visit__status=TPMVisit.UNICEF_APPROVED,
+            date__year=year,
+        )
+        self._count_by_quarter(tpm, 'partner', 'date', counts)
+
+        fm_groups = MonitoringActivityGroup.objects.filter(
+            partner__in=self.partner_ids,
+            monitoring_activities__status='completed',
+        ).annotate(
+            end_date=Max('monitoring_activities__end_date'),
+        ).filter(
+            end_date__year=year,
+        ).values_list('partner_id', 'end_date')
+        for partner_id, end_date in fm_groups:
+            counts[partner_id][QUARTERS[(end_date.month - 1) // 3]] += 1
+
+        grouped_activities = defaultdict(set)
+        for partner_id, activity_id in MonitoringActivityGroup.objects.filter(
+            partner__in=self.partner_ids,
+        ).values_list('partner_id', 'monitoring_activities__id'):
+            grouped_activities[partner_id].add(activity_id)
+
+        fm_activities = MonitoringActivity.objects.filter(
+            end_date__year=year,
+        ).filter_hact_for_partners(self.partner_ids).values_list('partners', 'id', 'end_date')
+        for partner_id, activity_id, end_date in fm_activities:
+            excluded = grouped_activities[partner_id]
+            # groups without activities put a NULL into the per partner "NOT IN" exclusion, which matches nothing
+            if activity_id in excluded or None in excluded:
+                continue
+            counts[partner_id][QUARTERS[(end_date.month - 1) // 3]] += 1
+
+        return counts
+
+    def get_spot_checks(self):
+        spot_checks = SpotCheck.objects.filter(
+            partner__in=self.partner_ids,
+            date_of_draft_report_to_ip__year=datetime.datetime.now().year,
+        ).exclude(status=Engagement.CANCELLED)
+        return self._count_by_quarter(spot_checks, 'partner', 'date_of_draft_report_to_ip')
+
+    def get_audits(self):
+        year = datetime.datetime.now().year
+        audits_filter = dict(
+            partner__in=self.partner_ids,
+            year_of_audit=year,
+            date_of_draft_report_to_ip__isnull=False,
+        )
+
+        completed = defaultdict(int)
+        outstanding_findings = defaultdict(list)
+        for audit in Audit.objects.filter(**audits_filter).exclude(status=Engagement.CANCELLED):
+            completed[audit.partner_id] += 1
+            if audit.pending_unsupported_amount:
+                outstanding_findings[audit.partner_id].append(audit.pending_unsupported_amount)
+
+        special_audits = SpecialAudit.objects.filter(**audits_filter).exclude(
+            status=Engagement.CANCELLED,
+        ).values('partner').annotate(audits_count=Count('id')).order_by()
+        for row in special_audits:
+            completed[row['partner']] += row['audits_count']
+
+        return completed, outstanding_findings
+
+
+class HactPartnersSummary:
+    """
+    Accumulates everything AggregateHact needs from hact active partners in a single streamed pass over a
+    values() queryset; hact_values keys are extracted by Postgres, so partner rows are never loaded whole.
+    """
+    CT_AMOUNT_LEVELS = [
+        ('$0-50,000', None, Decimal(50000.00)),
+        ('$50,001-100,000', Decimal(50000.00), Decimal(100000.00)),
+        ('$100,001-350,000', Decimal(100000.00), Decimal(350000.00)),
+        ('$350,001-500,000', Decimal(350000.00), Decimal(500000.00)),
+        ('>$500,000', Decimal(500000.00), None),
+    ]
+    RISK_RATINGS = {
+        'not_required': [PartnerOrganization.RATING_NOT_REQUIRED, PartnerOrganization.RATING_NOT_ASSESSED],
+        'low': [PartnerOrganization.RATING_LOW, PartnerOrganization.RATING_LOW_RISK_ASSUMED],
+        'medium': [PartnerOrganization.RATING_MEDIUM],
+        'significant': [PartnerOrganization.RATING_SIGNIFICANT],
+        'high': [
+            PartnerOrganization.RATING_HIGH,
+            PartnerOrganization.RATING_HIGH_RISK_ASSUMED,
+            PartnerOrganization.PSEA_RATING_HIGH,
+        ],
+    }
+    ASSURANCE_COVERAGES = [
+        PartnerOrganization.ASSURANCE_VOID,
+        PartnerOrganization.ASSURANCE_PARTIAL,
+        PartnerOrganization.ASSURANCE_COMPLETE,
+    ]
+    FIELDS = [
+        'total_ct_ytd',
+        'net_ct_cy',
+        'reported_cy',
+        'partner_type',
+        'type_of_assessment',
+        'highest_risk_rating_name',
+        'last_assessment_date',
+        'planned_engagement__id',
+        'planned_engagement__scheduled_audit',
+        'planned_engagement__spot_check_follow_up',
+        'planned_engagement__spot_check_planned_q1',
+        'planned_engagement__spot_check_planned_q2',
+        'planned_engagement__spot_check_planned_q3',
+        'planned_engagement__spot_check_planned_q4',
+        'hact_values__assurance_coverage',
+        'hact_values__programmatic_visits__completed__total',
+        'hact_values__spot_checks__completed__total',
+        'hact_values__audits__completed',
+    ]
+
+    def __init__(self, partners):
+        self.partners_count = 0
+        self.programmatic_visits_completed = 0
+        self.programmatic_visits_required = 0
+        self.spot_checks_required = 0
+        self.spot_checks_follow_up = 0
+        self.missing_micro_assessment = 0
+        self.not_programmatic_visit_compliant = 0
+        self.not_spot_check_compliant = 0
+        self.not_assurance_compliant = 0
+        # [level][rating] -> amount, [level]['count'] -> number of partners
+        self.ct_amounts = [
+            dict.fromkeys(self.RISK_RATINGS.keys(), Decimal(0.0)) | {'count': 0} for __ in self.CT_AMOUNT_LEVELS
+        ]
+        self.ct_risk_ratings = {rating: {'total': None, 'count': 0} for rating in self.RISK_RATINGS}
+        self.ct_partner_types = {
+            partner_type: {'total': None, 'count': 0}
+            for partner_type in [OrganizationType.GOVERNMENT, OrganizationType.CIVIL_SOCIETY_ORGANIZATION]
+        }
+        self.coverage = {
+            coverage: {'count': 0, 'total': Decimal(0.0)} for coverage in self.ASSURANCE_COVERAGES
+        }
+
+        year_limit = datetime.date.today().year - PartnerOrganization.EXPIRING_ASSESSMENT_LIMIT_YEAR
+        for partner in partners.values(*self.FIELDS).iterator(chunk_size=2000):
+            self.add(partner, year_limit)
+
+    @staticmethod
+    def _gt(value, level):
+        # mimic sql comparison where null never matches
+        return value is not None and value > level
+
+    @staticmethod
+    def _add(total, value):
+        # mimic sql Sum where nulls are ignored and no values produce null
+        if value is None:
+            return total
+        return value if total is None else total + value
+
+    def _rating(self, highest_risk_rating_name):
+        for rating, names in self.RISK_RATINGS.items():
+            if highest_risk_rating_name in names:
+                return rating
+        return None
+
+    def _ct_level(self, total_ct_ytd):
+        if total_ct_ytd is None:
+            return None
+        for index, (__, lower, upper) in enumerate(self.CT_AMOUNT_LEVELS):
+            if (lower is None or total_ct_ytd > lower) and (upper is None or total_ct_ytd <= upper):
+                return index
+        return None
+
+    def add(self, partner, year_limit):
+        total_ct_ytd = partner['total_ct_ytd']
+        self.partners_count += 1
+
+        self.programmatic_visits_completed += partner['hact_values__programmatic_visits__completed__total']
+        self.programmatic_visits_required += PartnerOrganization.get_min_req_programme_visits(
+            partner['partner_type'], partner['net_ct_cy'], partner['highest_risk_rating_name'],
+        )
+        if partner['planned_engagement__id'] is not None:
+            self.spot_checks_required += partner['planned_engagement__spot_check_follow_up']
+            self.spot_checks_required += PartnerOrganization.get_min_req_spot_checks(
+                partner['partner_type'], partner['type_of_assessment'], partner['reported_cy'],
+                partner['planned_engagement__scheduled_audit'],
+            )
+            self.spot_checks_follow_up += partner['planned_engagement__spot_check_follow_up']
+        if partner['last_assessment_date'] and partner['last_assessment_date'].year <= year_limit:
+            self.missing_micro_assessment += 1
+
+        rating = self._rating(partner['highest_risk_rating_name'])
+        level = self._ct_level(total_ct_ytd)
+        if level is not None:
+            self.ct_amounts[level]['count'] += 1
+            if rating:
+                self.ct_amounts[level][rating] += total_ct_ytd
+        if rating:
+            self.ct_risk_ratings[rating]['total'] = self._add(self.ct_risk_ratings[rating]['total'], total_ct_ytd)
+            self.ct_risk_ratings[rating]['count'] += total_ct_ytd is not None
+        if partner['partner_type'] in self.ct_partner_types:
+            partner_type = self.ct_partner_types[partner['partner_type']]
+            partner_type['total'] = self._add(partner_type['total'], total_ct_ytd)
+            partner_type['count'] += total_ct_ytd is not None
+
+        coverage = self.coverage.get(partner['hact_values__assurance_coverage'])
+        if coverage:
+            coverage['count'] += 1
+            coverage['total'] = self._add(coverage['total'], total_ct_ytd)
+
+        not_pv_compliant = (
+            self._gt(partner['net_ct_cy'], PartnerOrganization.CT_MR_AUDIT_TRIGGER_LEVEL) and
+            partner['hact_values__programmatic_visits__completed__total'] == 0
+        )
+        spot_check_required = self._gt(partner['reported_cy'], PartnerOrganization.CT_CP_AUDIT_TRIGGER_LEVEL) or any(
+            self._gt(partner[f'planned_engagement__spot_check_planned_q{quarter}'], 0) for quarter in range(1, 5)
+        )
+        not_sc_compliant = (
+            spot_check_required and
+            partner['hact_values__spot_checks__completed__total'] == 0 and
+            partner['hact_values__audits__completed'] == 0
+        )
+        self.not_programmatic_visit_compliant += not_pv_compliant
+        self.not_spot_check_compliant += not_sc_compliant
+        self.not_assurance_compliant += not_pv_compliant and not_sc_compliant
@@ -1,5 +1,6 @@
 from datetime import datetime
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import connection, transaction
 
@@ -9,6 +10,7 @@ from unicef_vision.exceptions import VisionException
 from etools.applications.audit.models import UNICEFAuditFocalPoint
 from etools.applications.environment.notifications import send_notification_with_template
 from etools.applications.hact.models import AggregateHact, HactHistory
+from etools.applications.hact.services import PartnerHactCalculator
 from etools.applications.partners.models import PartnerOrganization
 from etools.applications.users.models import Country
 from etools.applications.vision.models import VisionSyncLog
@@ -18,13 +20,22 @@ from etools.libraries.djangolib.utils import get_environment
 logger = get_task_logger(__name__)
 
 
+HACT_UPDATED_LABELS = {
+    'programmatic_visits': 'PV',
+    'spot_checks': 'SC',
+    'audits': 'Audits',
+}
+
+
+def _hact_updated_partner_list(updated_requirements):
+    return [
+        (partner.vendor_number, partner.name, ', '.join([HACT_UPDATED_LABELS[item] for item in updated]))
+        for partner, updated in updated_requirements.items()
+    ]
+
+
 @app.task
 def update_hact_for_country(business_area_code):
-    updated_dict = {
-        'programmatic_visits': 'PV',
-        'spot_checks': 'SC',
-        'audits': 'Audits',
-    }
     country = Country.objects.get(business_area_code=business_area_code)
     log = VisionSyncLog(
         country=country,
@@ -35,25 +46,23 @@ def update_hact_for_country(business_area_code):
     hact_updated_partner_list = []
     try:
         partners = PartnerOrganization.objects.hact_active()
-        for partner in partners:
-            logger.debug('Updating Partner {}'.format(partner.name))
-            partner.update_planned_visits_to_hact()
-            partner.update_programmatic_visits()
-            partner.update_spot_checks()
-            partner.update_audits_completed()
-            partner.update_hact_support()
-            updated = partner.update_min_requirements()
-            if updated:
-                updated_string = ', '.join([updated_dict[item] for item in updated])
-                hact_updated_partner_list.append((partner.vendor_number, partner.name, updated_string))
+        chunk_size = settings.HACT_UPDATE_CHUNK_SIZE
+        partner_ids = list(partners.values_list('id', flat=True))
+        if chunk_size and len(partner_ids) > chunk_size:
+            for i in range(0, len(partner_ids), chunk_size):
+                update_hact_for_partners.delay(business_area_code, partner_ids[i:i + chunk_size])
+        else:
+            with transaction.atomic():
+                updated_requirements = PartnerHactCalculator(partners).update()
+            hact_updated_partner_list = _hact_updated_partner_list(updated_requirements)
 
     except Exception as e:
         logger.info('HACT Sync', exc_info=True)
         log.exception_message = e
         raise VisionException
     else:
-        log.total_records = partners.count()
-        log.total_processed = partners.count()
+        log.total_records = len(partner_ids)
+        log.total_processed = len(partner_ids)
         log.successful = True
     finally:
         log.save()
@@ -61,6 +70,19 @@ def update_hact_for_country(business_area_code):
         notify_hact_update.delay(hact_updated_partner_list, country.id)
 
 
+@app.task
+def update_hact_for_partners(business_area_code, partner_ids):
+    """Recalculate hact values for a chunk of partners dispatched by update_hact_for_country"""
+    country = Country.objects.get(business_area_code=business_area_code)
+    connection.set_tenant(country)
+    partners = PartnerOrganization.objects.hact_active().filter(id__in=partner_ids)
+    with transaction.atomic():
+        updated_requirements = PartnerHactCalculator(partners).update()
+    hact_updated_partner_list = _hact_updated_partner_list(updated_requirements)
+    if hact_updated_partner_list:
+        notify_hact_update.delay(hact_updated_partner_list, country.id)
+
+
 @app.task
 def update_hact_values(*args, **kwargs):
 
@@ -204,3 +204,18 @@ class TestAggregateHact(BaseTenantTestCase):
         _check_item(financial_findings_numbers[3]['value'][1], 'unqualified', 1)
         _check_item(financial_findings_numbers[3]['value'][2], 'denial', 0)
         _check_item(financial_findings_numbers[3]['value'][3], 'adverse', 0)
+
+    def test_update_queries_independent_of_partners_count(self):
+        with self.assertNumQueries(9):
+            self.aggregate_hact.update()
+        cash_transfers_amounts = self.aggregate_hact.partner_values['charts']['cash_transfers_amounts']
+
+        PartnerFactory(reported_cy=300.0, total_ct_ytd=75000.0, highest_risk_rating_name=PartnerOrganization.RATING_MEDIUM)
+        PartnerFactory(reported_cy=300.0, total_ct_ytd=0, highest_risk_rating_name=PartnerOrganization.RATING_SIGNIFICANT)
+        with self.assertNumQueries(9):
+            self.aggregate_hact.update()
+
+        updated_amounts = self.aggregate_hact.partner_values['charts']['cash_transfers_amounts']
+        self.assertEqual(updated_amounts[2][3], cash_transfers_amounts[2][3] + 75000)
+        self.assertEqual(updated_amounts[2][6], cash_transfers_amounts[2][6] + 1)
+        self.assertEqual(updated_amounts[1][6], cash_transfers_amounts[1][6] + 1)
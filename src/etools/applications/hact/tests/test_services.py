@@ -0,0 +1,139 @@
+import datetime
+import json
+
+from django.utils import timezone
+
+from etools.applications.audit.models import Engagement
+from etools.applications.audit.tests.factories import AuditFactory, SpecialAuditFactory, SpotCheckFactory
+from etools.applications.core.tests.cases import BaseTenantTestCase
+from etools.applications.hact.services import PartnerHactCalculator
+from etools.applications.organizations.models import OrganizationType
+from etools.applications.organizations.tests.factories import OrganizationFactory
+from etools.applications.partners.models import hact_default, Intervention, PartnerOrganization
+from etools.applications.partners.tests.factories import (
+    AgreementFactory,
+    InterventionFactory,
+    InterventionPlannedVisitsFactory,
+    PartnerFactory,
+    PartnerPlannedVisitsFactory,
+)
+from etools.applications.t2f.models import Travel, TravelType
+from etools.applications.t2f.tests.factories import TravelActivityFactory, TravelFactory
+from etools.applications.tpm.models import TPMVisit
+from etools.applications.tpm.tests.factories import TPMActivityFactory, TPMVisitFactory
+from etools.applications.users.tests.factories import UserFactory
+from etools.libraries.pythonlib.encoders import CustomJSONEncoder
+
+
+class TestPartnerHactCalculator(BaseTenantTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        year = datetime.date.today().year
+        cls.cso_partner = PartnerFactory(
+            organization=OrganizationFactory(organization_type=OrganizationType.CIVIL_SOCIETY_ORGANIZATION),
+            reported_cy=60000,
+            net_ct_cy=60000,
+            total_ct_cy=60000,
+            highest_risk_rating_name=PartnerOrganization.RATING_HIGH,
+        )
+        cls.gov_partner = PartnerFactory(
+            organization=OrganizationFactory(organization_type=OrganizationType.GOVERNMENT),
+            reported_cy=20000,
+            total_ct_cy=20000,
+        )
+
+        AgreementFactory(partner=cls.gov_partner)
+        intervention = InterventionFactory(
+            agreement=AgreementFactory(partner=cls.cso_partner),
+            status=Intervention.ACTIVE,
+        )
+        InterventionPlannedVisitsFactory(intervention=intervention, year=year, programmatic_q1=1, programmatic_q3=3)
+        PartnerPlannedVisitsFactory(partner=cls.gov_partner, year=year, programmatic_q2=2, programmatic_q4=1)
+
+        traveller = UserFactory()
+        travel = TravelFactory(
+            traveler=traveller,
+            status=Travel.COMPLETED,
+            end_date=datetime.datetime(year, 9, 1, tzinfo=timezone.get_default_timezone()),
+        )
+        TravelActivityFactory(
+            travels=[travel],
+            primary_traveler=traveller,
+            travel_type=TravelType.PROGRAMME_MONITORING,
+            partner=cls.cso_partner,
+        )
+        TPMActivityFactory(
+            tpm_visit=TPMVisitFactory(status=TPMVisit.UNICEF_APPROVED),
+            partner=cls.gov_partner,
+            is_pv=True,
+            date=datetime.datetime(year, 5, 1),
+        )
+
+        for partner in [cls.cso_partner, cls.gov_partner]:
+            SpotCheckFactory(
+                partner=partner,
+                status=Engagement.FINAL,
+                date_of_draft_report_to_ip=datetime.datetime(year, 4, 1),
+            )
+            SpotCheckFactory(
+                partner=partner,
+                status=Engagement.CANCELLED,
+                date_of_draft_report_to_ip=datetime.datetime(year, 4, 10),
+            )
+        AuditFactory(
+            partner=cls.cso_partner,
+            status=Engagement.FINAL,
+            year_of_audit=year,
+            date_of_draft_report_to_ip=datetime.datetime(year, 4, 1),
+            financial_findings=1000,
+        )
+        SpecialAuditFactory(
+            partner=cls.cso_partner,
+            status=Engagement.FINAL,
+            year_of_audit=year,
+            date_of_draft_report_to_ip=datetime.datetime(year, 4, 1),
+        )
+
+    def _per_partner_hact_values(self):
+        values = {}
+        for partner in PartnerOrganization.objects.hact_active():
+            partner.update_planned_visits_to_hact()
+            partner.update_programmatic_visits()
+            partner.update_spot_checks()
+            partner.update_audits_completed()
+            partner.update_hact_support()
+            partner.update_min_requirements()
+            values[partner.pk] = json.dumps(partner.hact_values, cls=CustomJSONEncoder)
+        return values
+
+    def test_same_values_as_per_partner_update(self):
+        expected = self._per_partner_hact_values()
+        PartnerOrganization.objects.update(hact_values=hact_default())
+
+        PartnerHactCalculator(PartnerOrganization.objects.hact_active()).update()
+
+        for partner in PartnerOrganization.objects.hact_active():
+            self.assertEqual(json.dumps(partner.hact_values, cls=CustomJSONEncoder), expected[partner.pk])
+
+    def test_updated_min_requirements(self):
+        PartnerOrganization.objects.update(hact_values=hact_default())
+        partners = PartnerOrganization.objects.filter(pk=self.cso_partner.pk)
+        min_requirements = partners.get().hact_min_requirements
+        updated = PartnerHactCalculator(partners).update()
+        self.assertEqual(
+            list(updated.values()),
+            [[key for key in ['programmatic_visits', 'spot_checks', 'audits'] if min_requirements[key]]],
+        )
+
+        updated = PartnerHactCalculator(PartnerOrganization.objects.filter(pk=self.cso_partner.pk)).update()
+        self.assertEqual(updated, {})
+
+    def test_queries_independent_of_partners_count(self):
+        partners = PartnerOrganization.objects.hact_active()
+        with self.assertNumQueries(12):
+            PartnerHactCalculator(partners).update()
+
+        for __ in range(5):
+            PartnerFactory(reported_cy=10000)
+        with self.assertNumQueries(12):
+            PartnerHactCalculator(partners).update()
@@ -1,6 +1,6 @@
 import csv
 from io import StringIO
-from typing import Any, Dict, Iterator, List
+from typing import Any, Dict, Iterator, List, Optional
 
 
 class BaseCSVExporter:
@@ -9,13 +9,16 @@ class BaseCSVExporter:
 
     def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
         self.chunk_size = chunk_size
+        # one buffer and writer for the whole export, emptied after every chunk
+        self._output = StringIO()
+        self._writer = csv.writer(self._output)
 
     def _write_csv_rows_bulk(self, rows_data: List[List[Any]]) -> str:
-        output = StringIO()
-        writer = csv.writer(output)
-        writer.writerows(rows_data)
-        output.seek(0)
-        return output.read()
+        self._writer.writerows(rows_data)
+        data = self._output.getvalue()
+        self._output.seek(0)
+        self._output.truncate()
+        return data
 
     def _write_csv_row(self, row_data: List[Any]) -> str:
         return self._write_csv_rows_bulk([row_data])
@@ -51,14 +54,62 @@ class BaseCSVExporter:
             rows_values = self._extract_values_bulk(all_rows, list(headers.keys()))
             yield self._write_csv_rows_bulk(rows_values)
 
+    def _get_keyset_ordering(self, queryset) -> Optional[str]:
+        """
+        Return the primary key ordering of the queryset ('pk' or '-pk')
+        or None when it is ordered by other fields.
+        """
+        ordering = queryset.query.order_by
+        if not ordering and queryset.query.default_ordering:
+            ordering = queryset.model._meta.ordering
+        pk_name = queryset.model._meta.pk.name
+
+        if not ordering or list(ordering) in [['pk'], [pk_name]]:
+            return 'pk'
+        if list(ordering) in [['-pk'], ['-' + pk_name]]:
+            return '-pk'
+        return None
+
     def _paginate_queryset(self, queryset) -> Iterator[list]:
-        offset = 0
-        while True:
-            chunk = list(queryset[offset:offset + self.chunk_size])
-            if not chunk:
-                break
+        """
+        Iterate the queryset in chunks without OFFSET, which would re-scan all the previous rows for every chunk.
+        Querysets ordered by primary key are paged with a `pk > last_pk` condition, otherwise the ordered
+        primary keys are read once with a server side cursor and every chunk is fetched by its keys.
+        """
+        keyset_ordering = self._get_keyset_ordering(queryset)
+        if keyset_ordering:
+            yield from self._paginate_by_keyset(queryset, keyset_ordering)
+        else:
+            yield from self._paginate_by_ordered_keys(queryset)
+
+    def _paginate_by_keyset(self, queryset, ordering: str) -> Iterator[list]:
+        queryset = queryset.order_by(ordering)
+        lookup = 'pk__lt' if ordering.startswith('-') else 'pk__gt'
+        chunk = list(queryset[:self.chunk_size])
+        while chunk:
             yield chunk
-            offset += self.chunk_size
+            if len(chunk) < self.chunk_size:
+                break
+            chunk = list(queryset.filter(**{lookup: chunk[-1].pk})[:self.chunk_size])
+
+    def _paginate_by_ordered_keys(self, queryset) -> Iterator[list]:
+        # distinct querysets ordered through relations can return the same key more than once
+        seen = set()
+        keys = []
+        for pk in queryset.values_list('pk', flat=True).iterator(chunk_size=self.chunk_size):
+            if pk in seen:
+                continue
+            seen.add(pk)
+            keys.append(pk)
+            if len(keys) == self.chunk_size:
+                yield self._fetch_chunk(queryset, keys)
+                keys = []
+        if keys:
+            yield self._fetch_chunk(queryset, keys)
+
+    def _fetch_chunk(self, queryset, keys: List[Any]) -> list:
+        objects = queryset.order_by().in_bulk(keys)
+        return [objects[pk] for pk in keys if pk in objects]
 
     def _iterate_with_chunking(
         self, queryset, serializer_class: Any, headers: Dict[str, str], use_row_expansion: bool = False
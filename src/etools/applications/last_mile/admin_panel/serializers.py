@@ -321,6 +321,7 @@ class UserAdminUpdateSerializer(serializers.ModelSerializer):
                 profile.organization = profile_data.get('organization')
                 if not Realm.objects.filter(user=instance, country=country, organization=profile_data.get('organization')).exists():
                     Realm.objects.filter(user=instance, country=country, organization=old_organization).update(organization=profile_data.get('organization'))
+                    instance.clear_groups_cache()
             elif validated_data.get('organizations'):
                 # Delete old realms
                 Realm.objects.filter(user=instance, country=country).delete()
@@ -330,6 +331,7 @@ class UserAdminUpdateSerializer(serializers.ModelSerializer):
                 for org in validated_data.get('organizations'):
                     new_realms.append(Realm(user=instance, country=country, organization=org, group=IP_LM_EDITOR_GROUP))
                 Realm.objects.bulk_create(new_realms)
+                instance.clear_groups_cache()
             if 'country' in profile_data:
                 profile.country = country
             profile.save()
@@ -827,6 +829,7 @@ class AlertNotificationCreateSerializer(serializers.ModelSerializer):
         for group in validated_data['groups']:
             realms_to_create.append(Realm(user=user, country=country, organization=user.profile.organization, group=group))
         Realm.objects.bulk_create(realms_to_create)
+        user.clear_groups_cache()
         return {
             "user": {"email": validated_data['user']['email']},
             'groups': [group for group in validated_data['groups']]
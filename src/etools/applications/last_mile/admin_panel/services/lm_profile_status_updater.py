@@ -19,6 +19,7 @@ class LMProfileStatusUpdater:
             self.admin_validator.validate_last_mile_profile(user)
             user.is_active = status == models.Profile.ApprovalStatus.APPROVED
             user.realms.update(is_active=status == models.Profile.ApprovalStatus.APPROVED)
+            user.clear_groups_cache()
             last_mile_profile = user.last_mile_profile
             if last_mile_profile.created_by:
                 self.admin_validator.validate_user_can_approve(last_mile_profile.created_by.id, approver_user.id)
@@ -44,10 +45,12 @@ class LMProfileStatusUpdater:
             last_mile_profile.approve(approver_user, review_notes)
             instance.is_active = True
             instance.realms.update(is_active=True)
+            instance.clear_groups_cache()
             instance.save(update_fields=['is_active'])
         elif status == models.Profile.ApprovalStatus.REJECTED:
             last_mile_profile.reject(approver_user, review_notes)
             instance.is_active = False
             instance.realms.update(is_active=False)
+            instance.clear_groups_cache()
             instance.save(update_fields=['is_active'])
         return last_mile_profile
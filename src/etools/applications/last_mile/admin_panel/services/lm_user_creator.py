@@ -48,6 +48,7 @@ class LMUserCreator:
                 for organization in organizations:
                     realms_to_create.append(Realm(user=user, country=country, organization=organization, group=group))
                 Realm.objects.bulk_create(realms_to_create)
+                user.clear_groups_cache()
             user.is_active = False
             user.save()
             user.profile.save()
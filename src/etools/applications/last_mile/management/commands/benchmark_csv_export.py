@@ -0,0 +1,80 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from etools.applications.last_mile.admin_panel.csv_exporter import BaseCSVExporter
+from etools.applications.last_mile.admin_panel.serializers import ItemAdminSerializer
+from etools.applications.last_mile.models import Item
+from etools.applications.users.models import Country
+
+HEADERS = {
+    'quantity': 'Quantity',
+    'modified': 'Modified',
+    'uom': 'UOM',
+    'batch_id': 'Batch Number',
+    'description': 'Description',
+}
+
+
+class OffsetCSVExporter(BaseCSVExporter):
+    """Previous OFFSET pagination, for comparison"""
+
+    def _paginate_queryset(self, queryset):
+        offset = 0
+        while True:
+            chunk = list(queryset[offset:offset + self.chunk_size])
+            if not chunk:
+                break
+            yield chunk
+            offset += self.chunk_size
+
+
+class Command(BaseCommand):
+    help = 'Measure the lmsm csv export of the items table with offset and keyset pagination'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', dest='schema', required=True)
+        parser.add_argument('--limit', dest='limit', type=int, default=0, help='Export the first items only')
+        parser.add_argument('--chunk-size', dest='chunk_size', type=int, default=BaseCSVExporter.DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--ordering', dest='ordering', default='id',
+                            help='Items ordering, a non primary key ordering uses the ordered keys pagination')
+
+    def measure(self, label, exporter, queryset):
+        chunk_durations = []
+        size = 0
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            last = start
+            for data in exporter._iterate_with_chunking(queryset, ItemAdminSerializer, HEADERS):
+                size += len(data)
+                now = time.perf_counter()
+                chunk_durations.append(now - last)
+                last = now
+            duration = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # constant time per chunk means the export is linear in the number of rows
+        tenth = max(len(chunk_durations) // 10, 1)
+        first = sum(chunk_durations[:tenth]) / tenth * 1000
+        last = sum(chunk_durations[-tenth:]) / tenth * 1000
+        self.stdout.write(
+            f'{label}: {len(chunk_durations)} chunks, {size / 1024 / 1024:.1f} MB csv, {duration:.1f} s, '
+            f'{len(queries)} queries, {first:.1f} ms per chunk at start, {last:.1f} ms per chunk at end, '
+            f'{peak / 1024 / 1024:.1f} MB peak memory',
+        )
+
+    def handle(self, *args, **options):
+        connection.set_tenant(Country.objects.get(schema_name=options['schema']))
+
+        queryset = Item.all_objects.select_related('material').order_by(options['ordering'])
+        if options['limit']:
+            queryset = queryset.filter(pk__in=Item.all_objects.order_by('id').values('id')[:options['limit']])
+        self.stdout.write(f'{queryset.count()} items')
+
+        self.measure('offset', OffsetCSVExporter(chunk_size=options['chunk_size']), queryset)
+        self.measure('keyset', BaseCSVExporter(chunk_size=options['chunk_size']), queryset)
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('last_mile', '0023_dispensingpointtype'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pointofinterest',
+            index=models.Index(fields=['modified', 'id'], name='lm_poi_modified_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['modified', 'id'], name='lm_transfer_modified_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemtransferhistory',
+            index=models.Index(fields=['modified', 'id'], name='lm_item_history_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['modified', 'id'], name='lm_item_modified_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemauditlog',
+            index=models.Index(fields=['modified', 'id'], name='lm_item_audit_modified_idx'),
+        ),
+    ]
@@ -26,6 +26,7 @@ from etools.applications.last_mile.admin_panel.constants import (
     USER_ADMIN_PANEL_PERMISSION,
 )
 from etools.applications.locations.models import Location
+from etools.applications.locations.services import LocationReverseGeocodingService
 from etools.applications.partners.models import PartnerOrganization
 from etools.applications.users.models import User
 from etools.applications.utils.validators import JSONSchemaValidator
@@ -285,22 +286,17 @@ class PointOfInterest(TimeStampedModel, models.Model):
     class Meta:
         verbose_name = _('Point of Interest')
         verbose_name_plural = _('Points of Interest')
+        indexes = [
+            models.Index(fields=['modified', 'id'], name='lm_poi_modified_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
     @staticmethod
     def get_parent_location(point):
-        if not point:
-            return Location.objects.filter(admin_level=0, is_active=True).first()
-        locations = Location.objects.all_with_geom().filter(geom__contains=point, is_active=True)
-        if locations:
-            matched_locations = list(filter(lambda l: l.is_leaf_node(), locations)) or locations
-            location = min(matched_locations, key=lambda l: l.geom.length)
-        else:
-            location = Location.objects.filter(admin_level=0, is_active=True).first()
-
-        return location
+        location_id = LocationReverseGeocodingService().get_parent_location_id(point)
+        return Location.objects.filter(pk=location_id).first() if location_id else None
 
     def is_warehouse(self):
         return self.poi_type.category.lower() == 'warehouse' if self.poi_type else False
@@ -327,10 +323,10 @@ class PointOfInterest(TimeStampedModel, models.Model):
         if not self.p_code:
             self.p_code = self._autogenerate_pcode()
         if not self.parent_id:
-            self.parent = self.get_parent_location(self.point)
+            self.parent_id = LocationReverseGeocodingService().get_parent_location_id(self.point)
             assert self.parent_id, 'Unable to find location for {}'.format(self.point)
         elif self.tracker.has_changed('point') and self.pk:
-            self.parent = self.get_parent_location(self.point)
+            self.parent_id = LocationReverseGeocodingService().get_parent_location_id(self.point)
         super().save(**kwargs)
 
     def approve(self, approver_user, notes=None):
@@ -596,6 +592,9 @@ class Transfer(TimeStampedModel, models.Model):
 
     class Meta:
         ordering = ("-id",)
+        indexes = [
+            models.Index(fields=['modified', 'id'], name='lm_transfer_modified_id_idx'),
+        ]
 
     def __str__(self):
         try:
@@ -759,12 +758,47 @@ class PartnerMaterial(TimeStampedModel, models.Model):
 
 
 class ItemQuerySet(models.QuerySet):
+    """
+    Bulk writes bypass the model signals, the audit log of the changed items is written here instead
+    """
+
     def prepare_for_lm_export(self) -> models.QuerySet:
         return self.annotate(
             material_number=models.F('material__number'),
             material_description=models.F('material__short_description'),
         ).filter(transfer__approval_status=Transfer.ApprovalStatus.APPROVED).values()
 
+    def bulk_create(self, objs, *args, **kwargs):
+        from etools.applications.last_mile.services.audit_log_service import AuditLogService
+
+        objs = super().bulk_create(objs, *args, **kwargs)
+        AuditLogService().handle_bulk_create(objs)
+        for obj in objs:
+            obj.tracker.set_saved_fields()
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        from etools.applications.last_mile.services.audit_log_service import AuditLogService, item_audit_suspended
+
+        objs = list(objs)
+        with item_audit_suspended():
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+        AuditLogService().handle_bulk_update(objs, fields)
+        attnames = [self.model._meta.get_field(field).attname for field in fields]
+        for obj in objs:
+            obj.tracker.set_saved_fields(fields=attnames)
+        return rows
+
+    def update(self, **kwargs):
+        from etools.applications.last_mile.services.audit_log_service import AuditLogService
+
+        audit_service = AuditLogService()
+        items = audit_service.get_items_before_update(self)
+        rows = super().update(**kwargs)
+        if items:
+            audit_service.handle_queryset_update(items, kwargs)
+        return rows
+
 
 class ItemManager(models.Manager):
     def get_queryset(self):
@@ -785,6 +819,9 @@ class ItemTransferHistory(TimeStampedModel, models.Model):
 
     class Meta:
         unique_together = ('transfer', 'item')
+        indexes = [
+            models.Index(fields=['modified', 'id'], name='lm_item_history_modified_idx'),
+        ]
 
 
 class Item(TimeStampedModel, models.Model):
@@ -820,7 +857,9 @@ class Item(TimeStampedModel, models.Model):
     hidden = models.BooleanField(default=False)
 
     objects = ItemManager()
-    all_objects = models.Manager()
+    all_objects = ItemQuerySet.as_manager()
+
+    tracker = FieldTracker()
 
     other = models.JSONField(
         verbose_name=_("Other Details"),
@@ -858,6 +897,9 @@ class Item(TimeStampedModel, models.Model):
     class Meta:
         base_manager_name = 'objects'
         ordering = ("expiry_date",)
+        indexes = [
+            models.Index(fields=['modified', 'id'], name='lm_item_modified_id_idx'),
+        ]
 
     @cached_property
     def partner_organization(self):
@@ -1075,6 +1117,7 @@ class ItemAuditLog(TimeStampedModel, models.Model):
             models.Index(fields=['item_id']),
             models.Index(fields=['action']),
             models.Index(fields=['user']),
+            models.Index(fields=['modified', 'id'], name='lm_item_audit_modified_idx'),
         ]
 
     def __str__(self):
@@ -108,15 +108,17 @@ class IsLMSMAdmin(IsAuthenticated):
         ).exists()
 
     def has_permission(self, request, view) -> bool:
-        base_permission = super().has_permission(request, view)
-        is_admin = request.user.groups.filter(name=self.LMSM_ADMIN_GROUP).exists()
-        return base_permission and is_admin and self.has_page_permission(request, view)
+        return (
+            super().has_permission(request, view) and
+            self.LMSM_ADMIN_GROUP in request.user.group_names and
+            self.has_page_permission(request, view)
+        )
 
 
 class IsIPLMEditor(IsAuthenticated):
 
     def has_permission(self, request, view):
-        return super().has_permission(request, view) and request.user.groups.filter(name='IP LM Editor').exists()
+        return super().has_permission(request, view) and 'IP LM Editor' in request.user.group_names
 
 
 class IsIPLMEditorOrViewerReadOnly(IsAuthenticated):
@@ -153,7 +155,7 @@ class LMSMAPIPermission(IsAuthenticated):
 class IsLMSMGroup(IsAuthenticated):
 
     def has_permission(self, request, view):
-        return super().has_permission(request, view) and request.user.groups.filter(name__in=LMSMPermissionsService.LMSM_GROUPS).exists()
+        return super().has_permission(request, view) and not request.user.group_names.isdisjoint(LMSMPermissionsService.LMSM_GROUPS)
 
 
 class LastMileUserPermissionRetriever():
@@ -12,6 +12,8 @@ from unicef_attachments.serializers import AttachmentSerializerMixin
 
 from etools.applications.last_mile import models
 from etools.applications.last_mile.fields import AttachmentMultipleFileField, AttachmentMultipleSerializerMixin
+from etools.applications.last_mile.services.audit_log_service import item_audit_batch
+from etools.applications.last_mile.services.transfer_history_service import transfer_history_batch
 from etools.applications.last_mile.tasks import (
     notify_dispensing_transfer,
     notify_first_checkin_transfer,
@@ -289,6 +291,7 @@ class ItemSplitSerializer(serializers.ModelSerializer):
             raise ValidationError(_('Incorrect split values.'))
         return value
 
+    @transfer_history_batch()
     def save(self, **kwargs):
         _item = models.Item(
             transfer=self.instance.transfer,
@@ -443,6 +446,8 @@ class TransferCheckinSerializer(TransferBaseSerializer):
         models.Item.objects.bulk_update(list_items_update, ['base_quantity', 'base_uom'])
 
     @transaction.atomic
+    @item_audit_batch()
+    @transfer_history_batch()
     def update(self, instance, validated_data):
         checkin_items = validated_data.pop('items')
 
@@ -666,6 +671,8 @@ class TransferCheckOutSerializer(TransferBaseSerializer):
             validated_data['from_partner_organization_id'] = self.context['request'].user.profile.organization.partner.pk
 
     @transaction.atomic
+    @item_audit_batch()
+    @transfer_history_batch()
     def create(self, validated_data):
         checkout_items = validated_data.pop('items')
 
@@ -1,6 +1,11 @@
 import logging
+from contextlib import contextmanager
+from threading import local
 
 from django.db import transaction
+from django.db.models import F, prefetch_related_objects, Window
+from django.db.models.functions import RowNumber
+from django.utils.functional import cached_property
 
 from etools.applications.core.middleware import get_current_user
 from etools.applications.environment.helpers import tenant_switch_is_active
@@ -8,20 +13,57 @@ from etools.applications.last_mile.models import AuditConfiguration, Item, ItemA
 
 logger = logging.getLogger(__name__)
 
+_state = local()
+
+RELATED_INFO_LOOKUPS = (
+    'transfer__origin_point',
+    'transfer__destination_point',
+    'transfer__partner_organization__organization',
+    'material',
+)
+
+
+@contextmanager
+def item_audit_batch():
+    """
+    Buffer the item audit logs created inside the block and write them with one bulk_create when it is left,
+    instead of an insert and a cleanup of the old entries for every saved item.
+    """
+    if getattr(_state, 'entries', None) is not None:
+        # the outer block writes the entries
+        yield
+        return
+
+    _state.entries = []
+    try:
+        yield
+        entries = _state.entries
+    finally:
+        _state.entries = None
+
+    AuditLogService().write_entries(entries)
+
+
+@contextmanager
+def item_audit_suspended():
+    """Skip the audit of queryset updates inside the block, e.g. when they are part of a bulk update"""
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
 
 class AuditLogService:
 
-    def handle_pre_save(self, instance, **kwargs):
-        if not self.should_audit(instance):
-            return
+    def __init__(self):
+        # previous transfers and materials of changed items, by (field name, pk)
+        self._previous_related = {}
 
-        if instance.pk:
-            try:
-                instance._original = Item.objects.get(pk=instance.pk)
-            except Item.DoesNotExist:
-                instance._original = None
-        else:
-            instance._original = None
+    @cached_property
+    def config(self):
+        return AuditConfiguration.get_active_config()
 
     def handle_post_save(self, instance, created, **kwargs):
         user = get_current_user()
@@ -30,8 +72,15 @@ class AuditLogService:
 
         if created:
             self._handle_item_creation(instance, user)
-        else:
-            self._handle_item_update(instance, user)
+            return
+
+        # the tracker holds the values loaded from the database until the save is over
+        changes = instance.tracker.changed()
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            attnames = {Item._meta.get_field(field).attname for field in update_fields}
+            changes = {field: value for field, value in changes.items() if field in attnames}
+        self._handle_item_update(instance, user, changes)
 
     def handle_post_delete(self, instance, **kwargs):
         user = get_current_user()
@@ -40,9 +89,56 @@ class AuditLogService:
 
         self._handle_item_deletion(instance, user)
 
+    def handle_bulk_create(self, items):
+        user = get_current_user()
+        if not items or not self.should_audit(None, user):
+            return
+
+        prefetch_related_objects(items, *RELATED_INFO_LOOKUPS)
+        with item_audit_batch():
+            for item in items:
+                self._handle_item_creation(item, user)
+
+    def handle_bulk_update(self, items, fields):
+        """Log the changes of the updated fields, the item trackers still hold the values before the update"""
+        user = get_current_user()
+        if not items or not self.should_audit(None, user):
+            return
+
+        attnames = [Item._meta.get_field(field).attname for field in fields]
+        changes = {item.pk: item.tracker.changed() for item in items}
+        self._load_previous_related(changes.values())
+        prefetch_related_objects(items, *RELATED_INFO_LOOKUPS)
+        with item_audit_batch():
+            for item in items:
+                self._handle_item_update(item, user, changes={
+                    field: value for field, value in changes[item.pk].items() if field in attnames
+                })
+
+    def get_items_before_update(self, queryset):
+        """Load the items matched by a queryset update with their current values, so that changes can be logged"""
+        if getattr(_state, 'suspended', False) or not self.should_audit(None, get_current_user()):
+            return []
+        return list(queryset.select_related(*RELATED_INFO_LOOKUPS))
+
+    def handle_queryset_update(self, items, values):
+        if any(hasattr(value, 'resolve_expression') for value in values.values()):
+            updated_items = Item.all_objects.in_bulk([item.pk for item in items])
+            attnames = [Item._meta.get_field(field).attname for field in values]
+            for item in items:
+                for attname in attnames:
+                    setattr(item, attname, getattr(updated_items[item.pk], attname))
+        else:
+            for item in items:
+                for field, value in values.items():
+                    setattr(item, field, value)
+
+        self.handle_bulk_update(items, values.keys())
+        for item in items:
+            item.tracker.set_saved_fields()
+
     def _handle_item_creation(self, instance, user):
-        config = AuditConfiguration.get_active_config()
-        tracked_fields = config.tracked_fields if config else []
+        tracked_fields = self.config.tracked_fields if self.config else []
 
         new_values = {}
         for field in tracked_fields:
@@ -58,12 +154,8 @@ class AuditLogService:
             instance=instance
         )
 
-    def _handle_item_update(self, instance, user):
-        original = getattr(instance, '_original', None)
-        if not original:
-            return
-
-        changed_fields = self.get_changed_fields(original, instance)
+    def _handle_item_update(self, instance, user, changes):
+        changed_fields = self.get_changed_fields(changes)
         if not changed_fields:
             return
 
@@ -71,7 +163,7 @@ class AuditLogService:
         new_values = {}
 
         for field, old_value in changed_fields.items():
-            old_values[field] = self.serialize_field_value(original, field, old_value)
+            old_values[field] = self.serialize_field_value(instance, field, old_value, previous=True)
             new_value = getattr(instance, field)
             new_values[field] = self.serialize_field_value(instance, field, new_value)
 
@@ -85,12 +177,11 @@ class AuditLogService:
             changed_fields=changed_fields,
             user=user,
             instance=instance,
-            original_instance=original
+            critical_changes=self.detect_critical_changes(changes, instance),
         )
 
     def _handle_item_deletion(self, instance, user):
-        config = AuditConfiguration.get_active_config()
-        tracked_fields = config.tracked_fields if config else []
+        tracked_fields = self.config.tracked_fields if self.config else []
 
         old_values = {}
         for field in tracked_fields:
@@ -111,7 +202,7 @@ class AuditLogService:
     def should_audit(self, instance, user=None):
         if not tenant_switch_is_active("lmsm_item_audit_logs"):
             return False
-        config = AuditConfiguration.get_active_config()
+        config = self.config
         if not config or not config.is_enabled:
             return False
 
@@ -123,44 +214,30 @@ class AuditLogService:
 
         return True
 
-    def get_changed_fields(self, old_instance, new_instance):
-        config = AuditConfiguration.get_active_config()
-        if not config:
+    def get_changed_fields(self, changes):
+        """Filter the item tracker changes, a mapping of field to previous value, down to the tracked fields"""
+        if not self.config:
             return {}
 
-        tracked_fields = config.tracked_fields or []
-
-        if not old_instance:
-            return {
-                field: None for field in tracked_fields
-                if hasattr(new_instance, field)
-            }
-
-        changed_fields = {}
-        for field in tracked_fields:
-            if hasattr(old_instance, field) and hasattr(new_instance, field):
-                old_value = getattr(old_instance, field)
-                new_value = getattr(new_instance, field)
-                if old_value != new_value:
-                    changed_fields[field] = old_value
+        tracked_fields = self.config.tracked_fields or []
+        return {field: changes[field] for field in tracked_fields if field in changes}
 
-        return changed_fields
-
-    def serialize_field_value(self, instance, field_name, value):
+    def serialize_field_value(self, instance, field_name, value, previous=False):
         if value is None:
             return None
 
-        config = AuditConfiguration.get_active_config()
-        fk_fields = config.fk_field_mappings if config else {}
+        fk_fields = self.config.fk_field_mappings if self.config else {}
 
         if field_name in fk_fields:
-            if hasattr(instance, fk_fields[field_name]):
-                related_obj = getattr(instance, fk_fields[field_name])
-                if related_obj:
-                    return {
-                        'id': value,
-                        'str': str(related_obj)
-                    }
+            if previous:
+                related_obj = self._get_previous_related(instance, fk_fields[field_name], value)
+            else:
+                related_obj = getattr(instance, fk_fields[field_name], None)
+            if related_obj:
+                return {
+                    'id': value,
+                    'str': str(related_obj)
+                }
             return {'id': value, 'str': None}
 
         if hasattr(value, 'isoformat'):
@@ -219,74 +296,108 @@ class AuditLogService:
 
         return material_info if material_info else None
 
-    def detect_critical_changes(self, old_instance, new_instance):
-        critical_changes = {}
+    def _load_previous_related(self, changes_list):
+        """Load the previous transfers and materials of changed items with one query per model"""
+        previous_ids = {'transfer': set(), 'material': set()}
+        for changes in changes_list:
+            for field_name, ids in previous_ids.items():
+                if changes.get(f'{field_name}_id'):
+                    ids.add(changes[f'{field_name}_id'])
+
+        for field_name, ids in previous_ids.items():
+            model = Item._meta.get_field(field_name).related_model
+            for pk, obj in model._base_manager.in_bulk(ids).items():
+                self._previous_related[(field_name, pk)] = obj
+
+    def _get_previous_related(self, instance, field_name, pk):
+        if pk is None:
+            return None
+        if (field_name, pk) not in self._previous_related:
+            model = instance._meta.get_field(field_name).related_model
+            self._previous_related[(field_name, pk)] = model._base_manager.filter(pk=pk).first()
+        return self._previous_related[(field_name, pk)]
 
-        if not old_instance:
-            return critical_changes
+    def detect_critical_changes(self, changes, instance):
+        critical_changes = {}
 
-        old_transfer_id = getattr(old_instance, 'transfer_id', None)
-        new_transfer_id = getattr(new_instance, 'transfer_id', None)
-        if old_transfer_id != new_transfer_id:
+        if 'transfer_id' in changes:
+            old_transfer = self._get_previous_related(instance, 'transfer', changes['transfer_id'])
             critical_changes['transfer_changed'] = {
-                'old_transfer_id': old_transfer_id,
-                'new_transfer_id': new_transfer_id,
-                'old_transfer_name': old_instance.transfer.name if old_instance.transfer else None,
-                'new_transfer_name': new_instance.transfer.name if new_instance.transfer else None
+                'old_transfer_id': changes['transfer_id'],
+                'new_transfer_id': instance.transfer_id,
+                'old_transfer_name': old_transfer.name if old_transfer else None,
+                'new_transfer_name': instance.transfer.name if instance.transfer else None
             }
 
-        old_material_id = getattr(old_instance, 'material_id', None)
-        new_material_id = getattr(new_instance, 'material_id', None)
-        if old_material_id != new_material_id:
+        if 'material_id' in changes:
+            old_material = self._get_previous_related(instance, 'material', changes['material_id'])
             critical_changes['material_changed'] = {
-                'old_material_id': old_material_id,
-                'new_material_id': new_material_id,
-                'old_material_number': old_instance.material.number if old_instance.material else None,
-                'new_material_number': new_instance.material.number if new_instance.material else None,
-                'old_material_description': old_instance.material.short_description if old_instance.material else None,
-                'new_material_description': new_instance.material.short_description if new_instance.material else None
+                'old_material_id': changes['material_id'],
+                'new_material_id': instance.material_id,
+                'old_material_number': old_material.number if old_material else None,
+                'new_material_number': instance.material.number if instance.material else None,
+                'old_material_description': old_material.short_description if old_material else None,
+                'new_material_description': instance.material.short_description if instance.material else None
             }
 
         return critical_changes if critical_changes else None
 
-    def create_audit_log(self, item_id, action, old_values=None, new_values=None, changed_fields=None, user=None, instance=None, original_instance=None):
+    def create_audit_log(self, item_id, action, old_values=None, new_values=None, changed_fields=None, user=None, instance=None, critical_changes=None):
         try:
-            with transaction.atomic():
-                self.cleanup_old_entries(item_id)
+            transfer_info = None
+            material_info = None
+
+            if instance:
+                transfer_info = self.get_transfer_info(instance)
+                material_info = self.get_material_info(instance)
 
-                transfer_info = None
-                material_info = None
+            if action != ItemAuditLog.ACTION_UPDATE:
                 critical_changes = None
 
-                if instance:
-                    transfer_info = self.get_transfer_info(instance)
-                    material_info = self.get_material_info(instance)
-
-                    if action == ItemAuditLog.ACTION_UPDATE and original_instance:
-                        critical_changes = self.detect_critical_changes(original_instance, instance)
-
-                ItemAuditLog.objects.create(
-                    item_id=item_id,
-                    action=action,
-                    changed_fields=list(changed_fields.keys()) if changed_fields else None,
-                    old_values=old_values,
-                    new_values=new_values,
-                    user=user,
-                    transfer_info=transfer_info,
-                    material_info=material_info,
-                    critical_changes=critical_changes
-                )
+            entry = ItemAuditLog(
+                item_id=item_id,
+                action=action,
+                changed_fields=list(changed_fields.keys()) if changed_fields else None,
+                old_values=old_values,
+                new_values=new_values,
+                user=user,
+                transfer_info=transfer_info,
+                material_info=material_info,
+                critical_changes=critical_changes
+            )
         except Exception as e:
             logger.error(f"Failed to create audit log for item {item_id}: {e}")
+            return
+
+        entries = getattr(_state, 'entries', None)
+        if entries is not None:
+            entries.append(entry)
+        else:
+            self.write_entries([entry])
+
+    def write_entries(self, entries):
+        if not entries:
+            return
+
+        try:
+            with transaction.atomic():
+                ItemAuditLog.objects.bulk_create(entries)
+                self.cleanup_old_entries({entry.item_id for entry in entries})
+        except Exception as e:
+            logger.error(f"Failed to create audit logs for items {sorted({entry.item_id for entry in entries})}: {e}")
 
-    def cleanup_old_entries(self, item_id):
-        config = AuditConfiguration.get_active_config()
+    def cleanup_old_entries(self, item_ids):
+        """Keep the latest max_entries_per_item entries of every item"""
+        config = self.config
         if not config or config.max_entries_per_item <= 0:
             return
 
-        count = ItemAuditLog.objects.filter(item_id=item_id).count()
-        if count >= config.max_entries_per_item:
-            entries_to_delete = count - config.max_entries_per_item + 1
-            old_entries = ItemAuditLog.objects.filter(item_id=item_id).order_by('created')[:entries_to_delete]
-            old_entry_ids = list(old_entries.values_list('id', flat=True))
+        old_entry_ids = list(ItemAuditLog.objects.filter(item_id__in=item_ids).annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=[F('item_id')],
+                order_by=[F('created').desc(), F('id').desc()],
+            ),
+        ).filter(position__gt=config.max_entries_per_item).values_list('id', flat=True))
+        if old_entry_ids:
             ItemAuditLog.objects.filter(id__in=old_entry_ids).delete()
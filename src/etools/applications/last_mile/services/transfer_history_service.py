@@ -0,0 +1,113 @@
+import logging
+from contextlib import contextmanager
+from threading import local
+
+from etools.applications.last_mile.models import TransferHistory
+
+logger = logging.getLogger(__name__)
+
+_state = local()
+
+
+@contextmanager
+def transfer_history_batch():
+    """
+    Collect the initial items and history of the transfers whose items are saved inside the block and write them
+    once per transfer when it is left, instead of a rewrite of the transfer for every saved item.
+    """
+    if getattr(_state, 'transfers', None) is not None:
+        # the outer block writes the transfers
+        yield
+        return
+
+    _state.transfers = {}
+    try:
+        yield
+        transfers = _state.transfers
+    finally:
+        _state.transfers = None
+
+    TransferHistoryService().write(transfers.values())
+
+
+class TransferChanges:
+    """Initial items and history origins recorded for a transfer and not written yet"""
+
+    def __init__(self, transfer):
+        # every in memory copy of the transfer gets the written values, as the signal used to update them in place
+        self.instances = [transfer]
+        self.recorded_item_ids = {item['id'] for item in transfer.initial_items or []}
+        self.items = []
+        self.origin_ids = set()
+        self.origin_id = None
+
+    def add_instance(self, transfer):
+        if not any(instance is transfer for instance in self.instances):
+            self.instances.append(transfer)
+
+
+class TransferHistoryService:
+
+    def record_item(self, item):
+        """Record the saved item in the initial items and the history of its transfer"""
+        transfer = item.transfer
+        transfers = getattr(_state, 'transfers', None)
+        batched = transfers is not None
+        if not batched:
+            transfers = {}
+
+        changes = transfers.get(transfer.pk)
+        if changes is None:
+            changes = transfers[transfer.pk] = TransferChanges(transfer)
+        else:
+            changes.add_instance(transfer)
+
+        if transfer.status == transfer.PENDING and item.quantity > 0 and item.pk not in changes.recorded_item_ids:
+            # serializers import the batch from this module
+            from etools.applications.last_mile.serializers import ItemSerializer
+
+            changes.recorded_item_ids.add(item.pk)
+            changes.items.append(ItemSerializer(item).data)
+
+        changes.origin_id = next(
+            pk for pk in (item.origin_transfer_id, transfer.origin_transfer_id, transfer.pk) if pk is not None
+        )
+        changes.origin_ids.add(changes.origin_id)
+
+        if not batched:
+            self.write([changes])
+
+    def write(self, changes_list):
+        changes_list = list(changes_list)
+        try:
+            histories = self.get_histories({origin_id for changes in changes_list for origin_id in changes.origin_ids})
+        except Exception:
+            logger.exception("Error adding transfer history")
+            histories = {}
+
+        for changes in changes_list:
+            transfer = changes.instances[0]
+            values = {}
+            if changes.items:
+                values['initial_items'] = (transfer.initial_items or []) + changes.items
+            history = histories.get(changes.origin_id)
+            if history is not None and transfer.transfer_history_id != history.pk:
+                values['transfer_history'] = history
+            if not values:
+                continue
+
+            for instance in changes.instances:
+                for field, value in values.items():
+                    setattr(instance, field, value)
+            transfer.save(update_fields=list(values))
+
+    def get_histories(self, origin_ids):
+        """Map the origin transfer ids to their history, the missing histories are created"""
+        histories = {}
+        for history in TransferHistory.objects.filter(origin_transfer_id__in=origin_ids).order_by('pk'):
+            histories.setdefault(history.origin_transfer_id, history)
+
+        missing = [TransferHistory(origin_transfer_id=origin_id) for origin_id in origin_ids if origin_id not in histories]
+        for history in TransferHistory.objects.bulk_create(missing):
+            histories[history.origin_transfer_id] = history
+        return histories
@@ -1,15 +1,17 @@
+import base64
 import json
 import logging
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 from django.contrib.gis.geos import Point
 from django.db import connection, transaction
-from django.db.models import QuerySet, Value
+from django.db.models import Q, QuerySet, Value
 
 from etools.applications.last_mile import models
 from etools.applications.last_mile.validator_ext import ItemValidator, ValidatorEXT
+from etools.applications.locations.services import LocationReverseGeocodingService
 from etools.applications.organizations.models import Organization
 from etools.applications.partners.models import PartnerOrganization
 
@@ -109,9 +111,24 @@ class MaterialIngestService:
 
 class PointOfInterestIngestService:
 
+    @staticmethod
+    def get_parent_location_ids(validated_data: List[Dict[str, Any]]) -> Dict[int, int]:
+        """
+        Find the parent locations of all rows with one query, an updated point with new coordinates reads its
+        parent from the reverse geocoding cache when saved
+        """
+        points = {}
+        for idx, row in enumerate(validated_data):
+            try:
+                points[idx] = Point(float(row.get('longitude', '')), float(row.get('latitude', '')))
+            except (TypeError, ValueError):
+                continue
+        return dict(zip(points, LocationReverseGeocodingService().get_parent_location_ids(points.values())))
+
     @transaction.atomic
     def ingest_pois(self, validated_data: List[Dict[str, Any]], user) -> POIIngestResultDTO:
         report = POIIngestResultDTO()
+        parent_ids = self.get_parent_location_ids(validated_data)
 
         for idx, row in enumerate(validated_data):
             name = row['name']
@@ -207,7 +224,7 @@ class PointOfInterestIngestService:
                     defaults=defaults
                 )
             else:
-                poi_obj = models.PointOfInterest(**defaults)
+                poi_obj = models.PointOfInterest(parent_id=parent_ids.get(idx), **defaults)
                 poi_obj.save()
                 created = True
 
@@ -233,6 +250,17 @@ class InvalidDateFormatError(ExportError, ValueError):
     pass
 
 
+class InvalidCursorError(ExportError, ValueError):
+    pass
+
+
+@dataclass
+class ExportPageDTO:
+    rows: List[Dict[str, Any]]
+    next_cursor: str
+    has_more: bool
+
+
 class DataExportService:
 
     MODEL_CONFIG = {
@@ -244,7 +272,10 @@ class DataExportService:
         "item_audit_log": models.ItemAuditLog.objects
     }
 
-    def get_export_queryset(self, model_type: str, last_modified: str = None) -> QuerySet:
+    FEED_PAGE_SIZE = 1000
+    FEED_MAX_PAGE_SIZE = 10000
+
+    def _get_queryset(self, model_type: str, last_modified: str = None) -> QuerySet:
         if model_type not in self.MODEL_CONFIG:
             raise InvalidModelTypeError(f"'{model_type}' is not a valid data model type.")
 
@@ -265,9 +296,52 @@ class DataExportService:
         if country_name:
             queryset = queryset.annotate(country=Value(country_name), country_code=Value(country_code))
 
-        queryset = queryset.order_by('id')
         return queryset
 
+    def get_export_queryset(self, model_type: str, last_modified: str = None) -> QuerySet:
+        return self._get_queryset(model_type, last_modified).order_by('id')
+
+    @staticmethod
+    def encode_cursor(modified: datetime, pk: int) -> str:
+        token = json.dumps([modified.isoformat(), pk])
+        return base64.urlsafe_b64encode(token.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        try:
+            modified, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(modified), int(pk)
+        except (ValueError, TypeError):
+            raise InvalidCursorError("Invalid 'cursor'.")
+
+    def get_export_page(
+        self, model_type: str, cursor: str = None, last_modified: str = None, page_size: int = FEED_PAGE_SIZE
+    ) -> ExportPageDTO:
+        """
+        Return the records changed after the cursor, ordered by (modified, id), and the cursor of the next page.
+        Records changed in the meantime are returned again on a later page, none are skipped.
+        """
+        page_size = max(1, min(page_size, self.FEED_MAX_PAGE_SIZE))
+        queryset = self._get_queryset(model_type, last_modified).order_by('modified', 'id')
+        if cursor:
+            modified, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(Q(modified__gt=modified) | Q(modified=modified, id__gt=pk))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        if has_more:
+            # records joined to many-valued relations span several rows, a record is never split across pages
+            boundary = rows[page_size]
+            rows = [row for row in rows[:page_size] if row['id'] != boundary['id']]
+            if not rows:
+                rows = list(queryset.filter(modified=boundary['modified'], id=boundary['id']))
+
+        if rows:
+            next_cursor = self.encode_cursor(rows[-1]['modified'], rows[-1]['id'])
+        else:
+            next_cursor = cursor or ''
+        return ExportPageDTO(rows=rows, next_cursor=next_cursor, has_more=has_more)
+
 
 @dataclass
 class IngestReportDTO:
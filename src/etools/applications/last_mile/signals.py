@@ -6,8 +6,8 @@ from django.dispatch import receiver
 
 from etools.applications.last_mile import audit_signals  # noqa
 from etools.applications.last_mile.models import Item
-from etools.applications.last_mile.serializers import ItemSerializer
 from etools.applications.last_mile.services.permissions_service import LMSMPermissionsService
+from etools.applications.last_mile.services.transfer_history_service import TransferHistoryService
 from etools.applications.users.models import Realm
 
 logger = logging.getLogger(__name__)
@@ -20,23 +20,7 @@ def log_transfer(sender, instance, **kwargs):
         logger.warning(f"Item has no transfer : {instance}")
         return  # No transfer available, exit early
 
-    if transfer.status == transfer.PENDING and instance.quantity > 0:
-        item_exists = any(item['id'] == instance.pk for item in transfer.initial_items or [])
-
-        if not item_exists:
-            transfer.initial_items = (transfer.initial_items or []) + [ItemSerializer(instance).data]
-            transfer.save(update_fields=["initial_items"])
-
-    transfer_origin_pk = getattr(transfer.origin_transfer, "pk", None)
-    original_transfer = getattr(instance, "origin_transfer", None)
-    original_transfer_pk = getattr(original_transfer, "pk", None)
-
-    try:
-        transfer.add_transfer_history(
-            origin_transfer_pk=transfer_origin_pk, original_transfer_pk=original_transfer_pk
-        )
-    except Exception:
-        logger.exception("Error adding transfer history")
+    TransferHistoryService().record_item(instance)
 
 
 @receiver(pre_save, sender=Item)
@@ -0,0 +1,66 @@
+import csv
+from io import StringIO
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from etools.applications.core.tests.cases import BaseTenantTestCase
+from etools.applications.last_mile.admin_panel.csv_exporter import POITypesCSVExporter
+from etools.applications.last_mile.admin_panel.serializers import PointOfInterestTypeAdminSerializer
+from etools.applications.last_mile.models import PointOfInterestType
+from etools.applications.last_mile.tests.factories import PointOfInterestTypeFactory
+
+
+class TestBaseCSVExporter(BaseTenantTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.poi_types = [PointOfInterestTypeFactory(name=f'Type {i:02d}', category=f'category {i % 3}') for i in range(7)]
+
+    def get_names(self, chunks):
+        return [poi_type.name for chunk in chunks for poi_type in chunk]
+
+    def test_paginate_by_keyset(self):
+        exporter = POITypesCSVExporter(chunk_size=3)
+        queryset = PointOfInterestType.objects.filter(pk__in=[p.pk for p in self.poi_types]).order_by('id')
+
+        with CaptureQueriesContext(connection) as queries:
+            chunks = list(exporter._paginate_queryset(queryset))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 1])
+        self.assertEqual(self.get_names(chunks), [p.name for p in self.poi_types])
+        self.assertEqual(len(queries), 3)
+        self.assertNotIn('OFFSET', ' '.join(query['sql'] for query in queries))
+
+    def test_paginate_by_keyset_descending(self):
+        exporter = POITypesCSVExporter(chunk_size=3)
+        queryset = PointOfInterestType.objects.filter(pk__in=[p.pk for p in self.poi_types]).order_by('-id')
+
+        chunks = list(exporter._paginate_queryset(queryset))
+
+        self.assertEqual(self.get_names(chunks), [p.name for p in reversed(self.poi_types)])
+
+    def test_paginate_by_ordered_keys(self):
+        exporter = POITypesCSVExporter(chunk_size=3)
+        queryset = PointOfInterestType.objects.filter(
+            pk__in=[p.pk for p in self.poi_types],
+        ).order_by('category', '-name')
+
+        with CaptureQueriesContext(connection) as queries:
+            chunks = list(exporter._paginate_queryset(queryset))
+
+        self.assertEqual(self.get_names(chunks), list(queryset.values_list('name', flat=True)))
+        self.assertNotIn('OFFSET', ' '.join(query['sql'] for query in queries))
+
+    def test_generate_csv_data(self):
+        exporter = POITypesCSVExporter(chunk_size=2)
+        queryset = PointOfInterestType.objects.filter(pk__in=[p.pk for p in self.poi_types]).order_by('id')
+
+        data = list(exporter.generate_csv_data(queryset, PointOfInterestTypeAdminSerializer))
+
+        # header and one block per chunk, every block holds only its own rows
+        self.assertEqual(len(data), 5)
+        self.assertEqual(len(list(csv.reader(StringIO(data[1])))), 2)
+        rows = list(csv.reader(StringIO(''.join(data))))
+        self.assertEqual(rows[0], ['Unique ID', 'Created', 'Modified', 'Name', 'Category'])
+        self.assertEqual([row[3] for row in rows[1:]], [p.name for p in self.poi_types])
@@ -3,6 +3,8 @@ from decimal import Decimal
 from unittest.mock import Mock, patch
 
 from django.db import connection, IntegrityError, transaction
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from rest_framework.reverse import reverse
@@ -11,6 +13,7 @@ from etools.applications.core.tests.cases import BaseTenantTestCase
 from etools.applications.environment.tests.factories import TenantSwitchFactory
 from etools.applications.last_mile import models
 from etools.applications.last_mile.admin import ItemAuditLogAdmin
+from etools.applications.last_mile.services.audit_log_service import item_audit_batch
 from etools.applications.last_mile.tests.factories import (
     ItemAuditConfigurationFactory,
     ItemFactory,
@@ -815,3 +818,109 @@ class TestItemAuditLogAdvancedScenarios(BaseTenantTestCase):
 
         item.refresh_from_db()
         self.assertEqual(item.quantity, 100)
+
+
+class TestItemAuditLogBulkOperations(BaseTenantTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.transfer = TransferFactory()
+        cls.material = MaterialFactory()
+        ItemAuditConfigurationFactory()
+        cls.tenant = TenantSwitchFactory(
+            name="lmsm_item_audit_logs",
+            countries=[connection.tenant],
+        )
+        cls.tenant.flush()
+
+    def setUp(self):
+        self.items = [
+            ItemFactory(transfer=self.transfer, material=self.material, quantity=i + 1, batch_id=f'BATCH_{i}')
+            for i in range(3)
+        ]
+        models.ItemAuditLog.objects.all().delete()
+
+    def test_bulk_create(self):
+        items = models.Item.objects.bulk_create([
+            models.Item(transfer=self.transfer, material=self.material, quantity=10 + i) for i in range(3)
+        ])
+
+        audit_logs = models.ItemAuditLog.objects.filter(item_id__in=[item.pk for item in items])
+        self.assertEqual(audit_logs.count(), 3)
+        for audit_log in audit_logs:
+            self.assertEqual(audit_log.action, models.ItemAuditLog.ACTION_CREATE)
+            self.assertIsNotNone(audit_log.transfer_info)
+
+        # the tracker is reset, a later save logs only the later changes
+        items[0].quantity = 50
+        items[0].save()
+        audit_log = models.ItemAuditLog.objects.filter(
+            item_id=items[0].pk, action=models.ItemAuditLog.ACTION_UPDATE,
+        ).get()
+        self.assertEqual(audit_log.changed_fields, ['quantity'])
+
+    def test_bulk_update(self):
+        for item in self.items:
+            item.quantity += 100
+            item.comment = 'not saved'
+        models.Item.objects.bulk_update(self.items, ['quantity'])
+
+        audit_logs = models.ItemAuditLog.objects.filter(item_id__in=[item.pk for item in self.items])
+        self.assertEqual(audit_logs.count(), 3)
+        for audit_log in audit_logs:
+            self.assertEqual(audit_log.action, models.ItemAuditLog.ACTION_UPDATE)
+            self.assertEqual(audit_log.changed_fields, ['quantity'])
+            self.assertEqual(audit_log.new_values['quantity'], audit_log.old_values['quantity'] + 100)
+
+    def test_queryset_update(self):
+        new_transfer = TransferFactory()
+        models.Item.objects.filter(pk__in=[item.pk for item in self.items]).update(transfer=new_transfer)
+
+        audit_logs = models.ItemAuditLog.objects.filter(item_id__in=[item.pk for item in self.items])
+        self.assertEqual(audit_logs.count(), 3)
+        for audit_log in audit_logs:
+            self.assertEqual(audit_log.changed_fields, ['transfer_id'])
+            self.assertEqual(audit_log.old_values['transfer_id']['id'], self.transfer.pk)
+            self.assertEqual(audit_log.new_values['transfer_id']['id'], new_transfer.pk)
+            self.assertEqual(audit_log.critical_changes['transfer_changed']['old_transfer_id'], self.transfer.pk)
+            self.assertEqual(audit_log.transfer_info['transfer_id'], new_transfer.pk)
+
+    def test_queryset_update_expression(self):
+        models.Item.all_objects.filter(pk__in=[item.pk for item in self.items]).update(quantity=F('quantity') * 2)
+
+        for item in self.items:
+            audit_log = models.ItemAuditLog.objects.get(item_id=item.pk)
+            self.assertEqual(audit_log.old_values['quantity'], item.quantity)
+            self.assertEqual(audit_log.new_values['quantity'], item.quantity * 2)
+
+    def test_queryset_update_soft_delete(self):
+        self.transfer.items.update(hidden=True)
+
+        actions = models.ItemAuditLog.objects.filter(
+            item_id__in=[item.pk for item in self.items],
+        ).values_list('action', flat=True)
+        self.assertEqual(list(actions), [models.ItemAuditLog.ACTION_SOFT_DELETE] * 3)
+
+    def test_batch_writes_entries_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            with item_audit_batch():
+                for item in self.items:
+                    item.quantity += 1
+                    item.save()
+
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "last_mile_itemauditlog"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(models.ItemAuditLog.objects.filter(item_id__in=[item.pk for item in self.items]).count(), 3)
+
+    def test_cleanup_keeps_latest_entries(self):
+        config = models.AuditConfiguration.get_active_config()
+        config.max_entries_per_item = 2
+        config.save()
+        self.addCleanup(config._clear_cache)
+
+        for i in range(4):
+            models.Item.objects.filter(pk__in=[item.pk for item in self.items]).update(quantity=100 + i)
+
+        for item in self.items:
+            audit_logs = models.ItemAuditLog.objects.filter(item_id=item.pk).order_by('created')
+            self.assertEqual([log.new_values['quantity'] for log in audit_logs], [102, 103])
@@ -0,0 +1,78 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from etools.applications.core.tests.cases import BaseTenantTestCase
+from etools.applications.last_mile import models
+from etools.applications.last_mile.services.transfer_history_service import transfer_history_batch
+from etools.applications.last_mile.tests.factories import ItemFactory, MaterialFactory, TransferFactory
+
+
+class TestTransferHistoryService(BaseTenantTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.material = MaterialFactory()
+
+    def get_transfer_updates(self, queries):
+        return [query for query in queries if query['sql'].startswith('UPDATE "last_mile_transfer"')]
+
+    def test_item_save(self):
+        transfer = TransferFactory()
+        item = ItemFactory(transfer=transfer, material=self.material, quantity=5)
+
+        transfer.refresh_from_db()
+        self.assertEqual([i['id'] for i in transfer.initial_items], [item.pk])
+        self.assertEqual(transfer.transfer_history.origin_transfer_id, transfer.pk)
+
+    def test_item_save_already_recorded(self):
+        transfer = TransferFactory()
+        item = ItemFactory(transfer=transfer, material=self.material, quantity=5)
+
+        item.quantity = 3
+        with CaptureQueriesContext(connection) as queries:
+            item.save(update_fields=['quantity'])
+
+        self.assertEqual(self.get_transfer_updates(queries), [])
+        transfer.refresh_from_db()
+        self.assertEqual(len(transfer.initial_items), 1)
+        self.assertEqual(transfer.initial_items[0]['quantity'], 5)
+        self.assertEqual(models.TransferHistory.objects.filter(origin_transfer_id=transfer.pk).count(), 1)
+
+    def test_batch(self):
+        transfer = TransferFactory()
+        origin = TransferFactory()
+
+        with CaptureQueriesContext(connection) as queries:
+            with transfer_history_batch():
+                items = [ItemFactory(transfer=transfer, material=self.material, quantity=2) for _ in range(5)]
+                items.append(ItemFactory(transfer=transfer, origin_transfer=origin, material=self.material))
+                for item in items:
+                    item.save(update_fields=['quantity'])
+
+        self.assertEqual(len(self.get_transfer_updates(queries)), 1)
+        self.assertEqual([i['id'] for i in transfer.initial_items], [item.pk for item in items])
+        transfer.refresh_from_db()
+        self.assertEqual([i['id'] for i in transfer.initial_items], [item.pk for item in items])
+        self.assertEqual(transfer.transfer_history.origin_transfer_id, origin.pk)
+        self.assertTrue(models.TransferHistory.objects.filter(origin_transfer_id=transfer.pk).exists())
+
+    def test_batch_query_count_independent_of_items(self):
+        def save_items(count):
+            transfer = TransferFactory()
+            with CaptureQueriesContext(connection) as queries:
+                with transfer_history_batch():
+                    for _ in range(count):
+                        ItemFactory(transfer=transfer, material=self.material)
+            return len(self.get_transfer_updates(queries))
+
+        self.assertEqual(save_items(2), save_items(10))
+
+    def test_batch_not_pending(self):
+        transfer = TransferFactory(status=models.Transfer.COMPLETED)
+
+        with transfer_history_batch():
+            ItemFactory(transfer=transfer, material=self.material)
+
+        transfer.refresh_from_db()
+        self.assertEqual(transfer.initial_items, None)
+        self.assertEqual(transfer.transfer_history.origin_transfer_id, transfer.pk)
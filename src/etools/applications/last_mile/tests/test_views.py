@@ -422,13 +422,17 @@ class TestTransferView(BaseTenantTestCase):
             item_id__in=[item_1.id, item_2.id, item_3.id]
         ).order_by('item_id', 'created')
 
-        self.assertEqual(audit_logs.count(), 3)
+        # created, then base quantity and uom set in bulk on check-in
+        self.assertEqual(audit_logs.count(), 6)
 
         item_1_audits = audit_logs.filter(item_id=item_1.id)
-        if item_1_audits.exists():
-            latest_audit = item_1_audits.latest('created')
-            self.assertEqual(latest_audit.action, models.ItemAuditLog.ACTION_CREATE)
-            self.assertIsNotNone(latest_audit.transfer_info)
+        self.assertEqual(item_1_audits.filter(action=models.ItemAuditLog.ACTION_CREATE).count(), 1)
+        latest_audit = item_1_audits.latest('created')
+        self.assertEqual(latest_audit.action, models.ItemAuditLog.ACTION_UPDATE)
+        self.assertEqual(set(latest_audit.changed_fields), {'base_quantity', 'base_uom'})
+        self.assertIsNone(latest_audit.old_values['base_quantity'])
+        self.assertEqual(latest_audit.new_values['base_quantity'], 11)
+        self.assertIsNotNone(latest_audit.transfer_info)
 
         # test new checkin of an already checked-in transfer
         response = self.forced_auth_req('patch', url, user=self.partner_staff, data=checkin_data)
@@ -504,7 +508,7 @@ class TestTransferView(BaseTenantTestCase):
             item_id__in=[item.id for item in short_transfer.items.all()]
         )
 
-        self.assertEqual(checkin_audit_logs.count(), 3)
+        self.assertEqual(checkin_audit_logs.count(), 4)
         self.assertEqual(short_audit_logs.count(), 2)
 
         for audit_log in checkin_audit_logs:
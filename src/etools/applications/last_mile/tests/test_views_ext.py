@@ -24,6 +24,7 @@ from unicef_locations.tests.factories import LocationFactory
 from etools.applications.core.tests.cases import BaseTenantTestCase
 from etools.applications.environment.tests.factories import TenantSwitchFactory
 from etools.applications.last_mile import models
+from etools.applications.last_mile.services_ext import DataExportService
 from etools.applications.last_mile.tasks import _notify_transfer_ingest_alerts
 from etools.applications.organizations.tests.factories import OrganizationFactory
 from etools.applications.partners.tests.factories import PartnerFactory
@@ -1386,6 +1387,70 @@ class TestVisionLMSMExport(BaseTenantTestCase):
         self.assertEqual(data, [])
 
 
+class TestVisionLMSMExportFeed(BaseTenantTestCase):
+    url = reverse("last_mile:vision-export-data-feed")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.api_user = UserFactory(is_superuser=True)
+
+        # identical modified timestamps, the id breaks the tie
+        with freeze_time(timezone.now() - timedelta(days=1)):
+            cls.items = [ItemFactory() for _ in range(5)]
+
+    def _get_page(self, **params):
+        response = self.forced_auth_req(method="get", url=self.url, data=params, user=self.api_user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        content = b"".join(response.streaming_content).decode("utf-8")
+        rows = [json.loads(line) for line in content.splitlines()]
+        return rows, response["X-Next-Cursor"], response["X-Has-More"] == "true"
+
+    def test_request_fails_for_invalid_cursor(self):
+        response = self.forced_auth_req(
+            method="get", url=self.url, data={"type": "item", "cursor": "not-a-cursor"}, user=self.api_user
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {"cursor": "Invalid 'cursor'."})
+
+    def test_pages_cover_all_records_once(self):
+        ids = []
+        cursor = ""
+        has_more = True
+        while has_more:
+            rows, cursor, has_more = self._get_page(type="item", page_size=2, cursor=cursor)
+            self.assertLessEqual(len(rows), 2)
+            ids.extend(row["id"] for row in rows)
+
+        self.assertEqual(ids, sorted(item.pk for item in self.items))
+
+    def test_resume_from_last_cursor(self):
+        rows, cursor, has_more = self._get_page(type="item", page_size=10)
+        self.assertEqual(len(rows), 5)
+        self.assertFalse(has_more)
+
+        rows, next_cursor, has_more = self._get_page(type="item", cursor=cursor)
+        self.assertEqual(rows, [])
+        self.assertEqual(next_cursor, cursor)
+
+        self.items[0].quantity += 1
+        self.items[0].save()
+        rows, next_cursor, has_more = self._get_page(type="item", cursor=cursor)
+        self.assertEqual([row["id"] for row in rows], [self.items[0].pk])
+        self.assertNotEqual(next_cursor, cursor)
+
+    def test_record_not_split_across_pages(self):
+        poi = PointOfInterestFactory(partner_organizations=[PartnerFactory(), PartnerFactory()])
+        cursor = DataExportService.encode_cursor(poi.modified - timedelta(microseconds=1), 0)
+
+        rows, cursor, has_more = self._get_page(type="poi", page_size=1, cursor=cursor)
+
+        self.assertEqual([row["id"] for row in rows], [poi.pk, poi.pk])
+        rows, cursor, has_more = self._get_page(type="poi", cursor=cursor)
+        self.assertEqual(rows, [])
+
+
 class TestVisionUsersExport(BaseTenantTestCase):
     url = reverse("last_mile:users-list")
 
@@ -44,6 +44,11 @@ urlpatterns = [
         view=views_ext.VisionLMSMExport.as_view(http_method_names=['get'],),
         name="vision-export-data"
     ),
+    path(
+        'export-data/feed/',
+        view=views_ext.VisionLMSMExportFeed.as_view(http_method_names=['get'],),
+        name="vision-export-data-feed"
+    ),
     path(
         'users/',
         view=views_ext.VisionUsersExport.as_view(),
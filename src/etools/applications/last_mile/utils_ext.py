@@ -1,11 +1,21 @@
 from io import StringIO
-from typing import Iterator
+from typing import Any, Dict, Iterable, Iterator
 
 from django.db.models import QuerySet
 
 from etools.libraries.pythonlib.encoders import CustomJSONEncoder
 
 
+def rename_fields(item: Dict[str, Any], field_renames: dict) -> Dict[str, Any]:
+    for old_key, new_key in field_renames.items():
+        if old_key in item:
+            if new_key is None:
+                del item[old_key]
+            else:
+                item[new_key] = item.pop(old_key)
+    return item
+
+
 def stream_queryset_as_json(
     queryset: QuerySet,
     chunk_size: int = 1000,
@@ -21,12 +31,7 @@ def stream_queryset_as_json(
     first = True
 
     for item in iterator:
-        for old_key, new_key in field_renames.items():
-            if old_key in item:
-                if new_key is None:
-                    del item[old_key]
-                else:
-                    item[new_key] = item.pop(old_key)
+        rename_fields(item, field_renames)
         if first:
             buffer.write(encoder.encode(item))
             first = False
@@ -42,3 +47,25 @@ def stream_queryset_as_json(
         yield buffer.getvalue()
 
     yield ']'
+
+
+def stream_rows_as_ndjson(
+    rows: Iterable[Dict[str, Any]],
+    buffer_size: int = 50,
+    field_renames: dict = {},
+) -> Iterator[str]:
+    """One json document per line, a consumer can process the records as they arrive"""
+    encoder = CustomJSONEncoder(ensure_ascii=False)
+    buffer = StringIO()
+    buffer_count = 0
+
+    for item in rows:
+        buffer.write(encoder.encode(rename_fields(item, field_renames)))
+        buffer.write('\n')
+        buffer_count += 1
+        if buffer_count >= buffer_size:
+            yield buffer.getvalue()
+            buffer = StringIO()
+            buffer_count = 0
+    if buffer_count > 0:
+        yield buffer.getvalue()
@@ -21,13 +21,14 @@ from etools.applications.last_mile.serializers_ext import (
 )
 from etools.applications.last_mile.services_ext import (
     DataExportService,
+    InvalidCursorError,
     InvalidDateFormatError,
     InvalidModelTypeError,
     MaterialIngestService,
     PointOfInterestIngestService,
     TransferIngestService,
 )
-from etools.applications.last_mile.utils_ext import stream_queryset_as_json
+from etools.applications.last_mile.utils_ext import stream_queryset_as_json, stream_rows_as_ndjson
 
 
 class VisionIngestMaterialsApiView(APIView):
@@ -101,6 +102,9 @@ class VisionUsersExport(ListAPIView):
 
 class VisionLMSMExport(APIView):
     permission_classes = (LMSMAPIPermission,)
+    field_renames = {
+        'transfer': {'dispense_type_name': 'dispense_type', 'dispense_type_id': None},
+    }
 
     def get(self, request, *args, **kwargs):
         model_type = request.query_params.get('type')
@@ -122,9 +126,7 @@ class VisionLMSMExport(APIView):
         except InvalidDateFormatError as e:
             return Response({"last_modified": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        field_renames = {}
-        if model_type == 'transfer':
-            field_renames = {'dispense_type_name': 'dispense_type', 'dispense_type_id': None}
+        field_renames = self.field_renames.get(model_type, {})
 
         response = StreamingHttpResponse(
             stream_queryset_as_json(queryset, chunk_size=chunk_size, field_renames=field_renames),
@@ -134,6 +136,50 @@ class VisionLMSMExport(APIView):
         return response
 
 
+class VisionLMSMExportFeed(VisionLMSMExport):
+    """
+    Incremental change feed of a data model, as bounded NDJSON pages ordered by (modified, id).
+    The X-Next-Cursor header is passed as `cursor` to get the next page, a consumer stores it
+    once the page is processed and resumes from it after a failure.
+    """
+
+    def get(self, request, *args, **kwargs):
+        model_type = request.query_params.get('type')
+        cursor = request.query_params.get('cursor')
+        last_modified = request.query_params.get('last_modified')
+
+        if not model_type:
+            return Response({"type": "This field is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            page_size = int(request.query_params.get('page_size', DataExportService.FEED_PAGE_SIZE))
+        except ValueError:
+            return Response({"page_size": "A valid integer is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            page = DataExportService().get_export_page(
+                model_type=model_type,
+                cursor=cursor,
+                last_modified=last_modified,
+                page_size=page_size,
+            )
+        except InvalidModelTypeError as e:
+            return Response({"type": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except InvalidDateFormatError as e:
+            return Response({"last_modified": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except InvalidCursorError as e:
+            return Response({"cursor": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            stream_rows_as_ndjson(page.rows, field_renames=self.field_renames.get(model_type, {})),
+            content_type='application/x-ndjson'
+        )
+        response['X-Next-Cursor'] = page.next_cursor
+        response['X-Has-More'] = 'true' if page.has_more else 'false'
+
+        return response
+
+
 class VisionIngestTransfersApiView(APIView):
     permission_classes = (LMSMAPIPermission,)
 
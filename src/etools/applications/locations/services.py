@@ -1,13 +1,17 @@
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
+from typing import Iterable, List, Optional
 
-from django.db import connection
+from django.contrib.gis.geos import Point
+from django.db import connection, transaction
 from django.db.models import QuerySet
 
 from unicef_locations.cache import invalidate_cache
 
 from etools.applications.core.models import BulkDeactivationLog
 from etools.applications.locations.models import Location
-from etools.libraries.views.cache import invalidate_view_cache
+from etools.libraries.views.cache import bump_cache_version, get_cache_versions, invalidate_view_cache
 
 
 @dataclass
@@ -31,6 +35,114 @@ class LocationsDeactivationService:
             )
             try:
                 invalidate_cache()
+                LocationReverseGeocodingService.invalidate_cache()
             finally:
                 invalidate_view_cache('locations.{}'.format(connection.tenant.country_short_code or ''))
         return DeactivateLocationsResult(deactivated_count=updated)
+
+
+class LocationReverseGeocodingService:
+    """
+    Find the location a point belongs to: the smallest active leaf location containing it, the smallest active
+    location if none of them is a leaf, and the active country location if the point is outside all of them.
+    """
+
+    CACHE_SIZE = 4096
+    # version of the tenant locations, keeping increasing when evicted unlike the locations etag version
+    CACHE_NAMESPACE = 'locations'
+    # active locations containing the point, leaf nodes first and then by area, the geom spatial index is used
+    PARENT_LOCATION_SQL = """
+        SELECT (
+            SELECT location.id FROM {table} location
+            WHERE location.is_active
+                AND ST_Contains(location.geom, ST_SetSRID(ST_MakePoint(coordinates.x, coordinates.y), %s))
+            ORDER BY location.rght = location.lft + 1 DESC, ST_Area(location.geom)
+            LIMIT 1
+        )
+        FROM unnest(%s::double precision[], %s::double precision[]) WITH ORDINALITY AS coordinates(x, y, position)
+        ORDER BY coordinates.position
+    """
+
+    # lru of the parent location ids by tenant, locations version and coordinates
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def get_parent_location_id(self, point: Optional[Point]) -> Optional[int]:
+        return self.get_parent_location_ids([point])[0]
+
+    def get_parent_location_ids(self, points: Iterable[Optional[Point]]) -> List[Optional[int]]:
+        """Parent location ids in the order of the points, the locations of all new coordinates are found at once"""
+        srid = Location._meta.get_field('geom').srid
+        cache_prefix = (connection.schema_name, *get_cache_versions([self.CACHE_NAMESPACE]))
+
+        coordinates = [self.get_coordinates(point, srid) for point in points]
+        found = {}
+        missing = []
+        for coordinate in coordinates:
+            if coordinate is None or coordinate in found:
+                continue
+            found[coordinate] = self._cache_get(cache_prefix + coordinate)
+            if found[coordinate] is None:
+                missing.append(coordinate)
+
+        if missing:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    self.PARENT_LOCATION_SQL.format(table=connection.ops.quote_name(Location._meta.db_table)),
+                    [srid, [x for x, _ in missing], [y for _, y in missing]],
+                )
+                location_ids = [row[0] for row in cursor.fetchall()]
+
+            default_id = None
+            if not all(location_ids):
+                default_id = self.get_default_location_id()
+            for coordinate, location_id in zip(missing, location_ids):
+                found[coordinate] = location_id or default_id
+                if found[coordinate]:
+                    self._cache_set(cache_prefix + coordinate, found[coordinate])
+
+        if None in coordinates:
+            found[None] = self.get_default_location_id()
+        return [found[coordinate] for coordinate in coordinates]
+
+    def get_default_location_id(self) -> Optional[int]:
+        return Location.objects.filter(admin_level=0, is_active=True).values_list('id', flat=True).first()
+
+    @staticmethod
+    def get_coordinates(point: Optional[Point], srid: int):
+        if not point:
+            return None
+        if point.srid and point.srid != srid:
+            point = point.transform(srid, clone=True)
+        return point.x, point.y
+
+    @classmethod
+    def invalidate_cache(cls):
+        """
+        Invalidate the parent locations of the tenant cached by all the processes, right away for the changes
+        of the current transaction and once they are committed for the lookups done meanwhile
+        """
+        bump_cache_version(cls.CACHE_NAMESPACE)
+        schema_name = connection.schema_name
+        transaction.on_commit(lambda: bump_cache_version(cls.CACHE_NAMESPACE, schema_name=schema_name))
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._cache_lock:
+            cls._cache.clear()
+
+    @classmethod
+    def _cache_get(cls, key):
+        with cls._cache_lock:
+            location_id = cls._cache.get(key)
+            if location_id is not None:
+                cls._cache.move_to_end(key)
+            return location_id
+
+    @classmethod
+    def _cache_set(cls, key, location_id):
+        with cls._cache_lock:
+            cls._cache[key] = location_id
+            cls._cache.move_to_end(key)
+            if len(cls._cache) > cls.CACHE_SIZE:
+                cls._cache.popitem(last=False)
@@ -5,16 +5,19 @@ from django.dispatch import receiver
 from unicef_locations.cache import invalidate_cache
 
 from etools.applications.locations.models import Location
+from etools.applications.locations.services import LocationReverseGeocodingService
 from etools.libraries.views.cache import invalidate_view_cache
 
 
 @receiver(post_save, sender=Location)
 def update_location_cache_on_save(instance, created, **kwargs):
     invalidate_cache()
+    LocationReverseGeocodingService.invalidate_cache()
     invalidate_view_cache('locations.{}'.format(connection.tenant.country_short_code or ''))
 
 
 @receiver(post_delete, sender=Location)
 def update_location_cache_on_delete(instance, **kwargs):
     invalidate_cache()
+    LocationReverseGeocodingService.invalidate_cache()
     invalidate_view_cache('locations.{}'.format(connection.tenant.country_short_code or ''))
@@ -1,15 +1,18 @@
+import hashlib
 import logging
 from datetime import datetime
 
 from django.contrib.auth import get_user_model
-from django.db import IntegrityError
-from django.db.models import F, Value
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import connection, IntegrityError, transaction
+from django.db.models import CharField, F, Func, Value
 from django.db.models.functions import Concat
 
 import celery
 from carto.exceptions import CartoException
 from celery.utils.log import get_task_logger
 from tenant_schemas_celery.app import get_schema_name_from_task
+from unicef_locations.cache import invalidate_cache
 from unicef_locations.models import CartoDBTable
 from unicef_locations.synchronizers import LocationSynchronizer
 from unicef_locations.utils import get_location_model
@@ -18,17 +21,29 @@ from unicef_vision.utils import get_vision_logger_domain_model
 from etools.applications.environment.notifications import send_notification_with_template
 from etools.applications.field_monitoring.fm_settings.models import LocationSite
 from etools.applications.field_monitoring.planning.models import MonitoringActivity
+from etools.applications.locations.services import LocationReverseGeocodingService
 from etools.applications.users.models import Country
 from etools.applications.utils.query import has_related_records
+from etools.libraries.views.cache import bump_cache_version
 
 logger = get_task_logger(__name__)
 
 
+class GeometryHash(Func):
+    """md5 of the geometry WKB, computed by the database to avoid loading polygons"""
+    template = 'MD5(ST_AsBinary(%(expressions)s))'
+    output_field = CharField()
+
+
 class eToolsLocationSynchronizer(LocationSynchronizer):
     """eTools version of synchronizer with use the VisionSyncLog to store log execution"""
 
-    def __init__(self, pk, schema) -> None:
+    def __init__(self, pk, schema, incremental=True) -> None:
         super().__init__(pk)
+        self.incremental = incremental
+        # tree changes made before the locations update, by handle_obsolete_locations
+        self.obsolete_tree_ids = set()
+        self.obsolete_full_rebuild = False
         country = Country.objects.get(schema_name=schema)
         self.log, _ = get_vision_logger_domain_model().objects.get_or_create(
             handler_name=f'LocationsHandler (lev{self.carto.admin_level})',
@@ -44,20 +59,35 @@ class eToolsLocationSynchronizer(LocationSynchronizer):
             self.log.total_processed = new + updated
             self.log.successful = True
             self.log.exception_message = 'Congrats: Success'
+            self.invalidate_caches()
         except CartoException as e:
             self.log.exception_message = e
             self.log.successful = False
         finally:
             self.log.save()
 
+    @staticmethod
+    def invalidate_caches():
+        # locations are written in bulk, without the save signals invalidating the caches
+        invalidate_cache()
+        LocationReverseGeocodingService.invalidate_cache()
+        schema_name = connection.schema_name
+        transaction.on_commit(lambda: bump_cache_version('fm-sites', 'pmp-dropdowns', schema_name=schema_name))
+
     def create_or_update_locations(self, batch_size=500):
         """
         Create or update locations based on p-code (only active locations are considerate)
 
+        In incremental mode existing locations are written only when their name, admin level, parent or
+        geometry hash differ from the carto row, and only the trees touched by new, moved or obsolete locations
+        are rebuilt.
         """
         logging.info('Create/Update new locations')
         rows = self.get_cartodb_locations()
         new, updated, skipped, error = 0, 0, 0, 0
+        unchanged = 0
+        affected_tree_ids = set(self.obsolete_tree_ids)
+        full_rebuild = not self.incremental or self.obsolete_full_rebuild
         logging.info(f'Total Rows {len(rows)}')
         logging.info(f'Batch size {batch_size}')
         for idx in range(0, len(rows), batch_size):
@@ -65,13 +95,10 @@ class eToolsLocationSynchronizer(LocationSynchronizer):
             logging.info(f'processing batch {idx + 1}')
             batch = list(batch)
             indexed_batch = {item[self.carto.pcode_col]: item for item in batch}
-            # first get all the pcodes intended to be updated from the rows
-            all_new_pcodes = [r[self.carto.pcode_col] for r in batch]
-            # get all records that exist for these pcodes that will need to be adjusted
-            existing_loc_qs = get_location_model().objects.filter(p_code__in=all_new_pcodes, is_active=True)
+            # get all records that exist for the pcodes in the batch, in a single query
+            existing_locs = {loc.p_code: loc for loc in self.get_existing_locations(indexed_batch.keys())}
             # from batch keep all rows that are new
-            rows_to_create = [row for row in batch if row[self.carto.pcode_col]
-                              not in existing_loc_qs.values_list("p_code", flat=True)]
+            rows_to_create = [row for row in batch if row[self.carto.pcode_col] not in existing_locs]
 
             # get_all_parents and map them by p_code:
             parent_pcodes = []
@@ -83,26 +110,46 @@ class eToolsLocationSynchronizer(LocationSynchronizer):
             # parent location dict {pcode: item}
             parents = {r.p_code: r for r in parents_qs.all()}
 
-            # make a list of tuples (row_from_carto, existing_location_object) to iterate over and update
-            update_tuples = [(indexed_batch[loc.p_code], loc) for loc in existing_loc_qs.all()]
-            locs_to_update = []
-            for row, existing_loc in update_tuples:
-                pcode = row[self.carto.pcode_col]
+            locs_to_update, geoms_to_update, points_to_update = [], [], []
+            for pcode, existing_loc in existing_locs.items():
+                row = indexed_batch[pcode]
                 name = row[self.carto.name_col]
                 geom = row['the_geom']
                 parent_code = row[self.carto.parent_code_col] if self.carto.parent_code_col in row else None
-                if all([name, pcode, geom]):
-                    geom_key = 'point' if 'Point' in geom else 'geom'
+                if not all([name, pcode, geom]):
+                    skipped += 1
+                    logger.info(f"Skipping row pcode {pcode}")
+                    continue
+
+                geom_key = 'point' if 'Point' in geom else 'geom'
+                parent = parents.get(parent_code, None) if parent_code else None
+                attrs_changed = self.has_changed(existing_loc, name, parent)
+                geom_changed = not self.incremental or \
+                    getattr(existing_loc, f'{geom_key}_hash') != self.geometry_hash(geom)
+                if not (attrs_changed or geom_changed):
+                    unchanged += 1
+                    continue
+
+                if attrs_changed:
+                    if existing_loc.parent_id != (parent.pk if parent else None):
+                        # the location moves, both the tree it leaves and the one it joins need rebuilding
+                        affected_tree_ids.add(existing_loc.tree_id)
+                        if parent:
+                            affected_tree_ids.add(parent.tree_id)
+                        else:
+                            full_rebuild = True
                     existing_loc.admin_level = self.carto.admin_level
                     existing_loc.admin_level_name = self.carto.admin_level_name
                     existing_loc.name = name
-                    existing_loc.parent = parents.get(parent_code, None) if parent_code else None
-                    setattr(existing_loc, geom_key, geom)
+                    existing_loc.parent = parent
                     locs_to_update.append(existing_loc)
-                    updated += 1
-                else:
-                    skipped += 1
-                    logger.info(f"Skipping row pcode {pcode}")
+                if geom_changed:
+                    setattr(existing_loc, geom_key, geom)
+                    if geom_key == 'point':
+                        points_to_update.append(existing_loc)
+                    else:
+                        geoms_to_update.append(existing_loc)
+                updated += 1
 
             locs_to_create = []
             for row in rows_to_create:
@@ -110,8 +157,9 @@ class eToolsLocationSynchronizer(LocationSynchronizer):
                 name = row[self.carto.name_col]
                 geom = row['the_geom']
                 parent_code = row[self.carto.parent_code_col] if self.carto.parent_code_col in row else None
-                geom_key = 'point' if 'Point' in geom else 'geom'
                 if all([name, pcode, geom]):
+                    geom_key = 'point' if 'Point' in geom else 'geom'
+                    parent = parents.get(parent_code, None) if parent_code else None
                     values = {
                         'p_code': pcode,
                         'is_active': True,
@@ -119,11 +167,17 @@ class eToolsLocationSynchronizer(LocationSynchronizer):
                         'admin_level_name': self.carto.admin_level_name,
                         'name': name,
                         geom_key: geom,
-                        'parent': parents.get(parent_code, None) if parent_code else None
+                        'parent': parent,
                     }
                     # set everything to 0 in the tree, we'll rebuild later
-                    for key in ['lft', 'rght', 'level', 'tree_id']:
+                    for key in ['lft', 'rght', 'level']:
                         values[key] = 0
+                    # new locations join their parent tree, new roots require a full rebuild
+                    values['tree_id'] = parent.tree_id if parent else 0
+                    if parent:
+                        affected_tree_ids.add(parent.tree_id)
+                    else:
+                        full_rebuild = True
                     new_rec = get_location_model()(**values)
                     locs_to_create.append(new_rec)
                     new += 1
@@ -131,11 +185,12 @@ class eToolsLocationSynchronizer(LocationSynchronizer):
                     skipped += 1
                     logger.info(f"Skipping row pcode {pcode}")
 
-            # update the records:
+            # update the records, geometries are written only for the locations where they changed
             try:
-                get_location_model().objects.bulk_update(locs_to_update, fields=['p_code', 'is_active', 'admin_level',
-                                                                                 'admin_level_name', 'name',
-                                                                                 'geom', 'point', 'parent'])
+                get_location_model().objects.bulk_update(locs_to_update, fields=['admin_level', 'admin_level_name',
+                                                                                 'name', 'parent'])
+                get_location_model().objects.bulk_update(geoms_to_update, fields=['geom'])
+                get_location_model().objects.bulk_update(points_to_update, fields=['point'])
             except IntegrityError as e:
                 message = "Duplicates found on update"
                 logger.exception(e)
@@ -150,11 +205,48 @@ class eToolsLocationSynchronizer(LocationSynchronizer):
                 logger.exception(message)
                 raise CartoException(message)
 
-        logger.info("Rebuilding the tree, have patience")
-        get_location_model().objects.rebuild()
+        logging.info(f'Unchanged {unchanged}')
+        skipped += unchanged
+        if full_rebuild:
+            logger.info("Rebuilding the tree, have patience")
+            get_location_model().objects.rebuild()
+        else:
+            self.rebuild_trees(affected_tree_ids)
         logger.info("Rebuilt")
         return new, updated, skipped, error
 
+    def get_existing_locations(self, pcodes):
+        qs = get_location_model().objects.filter(p_code__in=pcodes, is_active=True)
+        if self.incremental:
+            qs = qs.annotate(geom_hash=GeometryHash('geom'), point_hash=GeometryHash('point'))
+        return qs
+
+    def has_changed(self, location, name, parent):
+        if not self.incremental:
+            return True
+        return any([
+            location.name != name,
+            location.admin_level != self.carto.admin_level,
+            location.admin_level_name != self.carto.admin_level_name,
+            location.parent_id != (parent.pk if parent else None),
+        ])
+
+    @staticmethod
+    def geometry_hash(geom):
+        """md5 of the geometry WKB, matching GeometryHash computed by the database"""
+        return hashlib.md5(GEOSGeometry(geom).wkb).hexdigest()
+
+    def rebuild_trees(self, tree_ids):
+        for tree_id in sorted(tree_ids):
+            logger.info(f"Rebuilding tree {tree_id}")
+            try:
+                get_location_model().objects.partial_rebuild(tree_id)
+            except RuntimeError:
+                # multiple roots share the tree (e.g. locations orphaned by handle_obsolete_locations)
+                logger.info("Rebuilding the tree, have patience")
+                get_location_model().objects.rebuild()
+                return
+
     def clean_upper_level(self):
         """
         Check upper level active locations with no reference
@@ -216,12 +308,16 @@ class eToolsLocationSynchronizer(LocationSynchronizer):
         # update all child locations for the "obsolete locations", leave them orphan; - with the understanding that
         # all previous parent relationships are stored in a separate db for reference or remapped adequately
         # on subsequent children updates.
-        get_location_model().objects.filter(parent__in=loc_qs).update(parent=None)
-        loc_qs.exclude(pk__in=affected).delete()
+        if get_location_model().objects.filter(parent__in=loc_qs).update(parent=None):
+            # orphans become roots of new trees
+            self.obsolete_full_rebuild = True
+        to_delete = loc_qs.exclude(pk__in=affected)
+        self.obsolete_tree_ids.update(to_delete.values_list('tree_id', flat=True))
+        to_delete.delete()
 
 
 @celery.current_app.task(bind=True)
-def import_locations(self, carto_table_pk):
+def import_locations(self, carto_table_pk, incremental=True):
     """
     Delete all locations that are not matching* in the remap table and are not in use (referenced models).
     Deactivate all locations that are in use and are not matching* in the remap table.
@@ -232,10 +328,12 @@ def import_locations(self, carto_table_pk):
 
     Iterate on all the “new” locations:
     if they have match update else create
+
+    With incremental (default) unchanged locations are skipped, pass incremental=False to rewrite all of them.
     """
 
     schema = get_schema_name_from_task(self, dict)
-    eToolsLocationSynchronizer(carto_table_pk, schema).sync()
+    eToolsLocationSynchronizer(carto_table_pk, schema, incremental=incremental).sync()
 
 
 @celery.current_app.task
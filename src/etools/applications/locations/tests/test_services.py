@@ -1,3 +1,10 @@
+import time
+from unittest import mock
+
+from django.contrib.gis.geos import GEOSGeometry, Point
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -6,9 +13,10 @@ from unicef_locations.tests.factories import LocationFactory
 from etools.applications.core.models import BulkDeactivationLog
 from etools.applications.core.tests.cases import BaseTenantTestCase
 from etools.applications.locations.models import Location
-from etools.applications.locations.services import LocationsDeactivationService
+from etools.applications.locations.services import LocationReverseGeocodingService, LocationsDeactivationService
 from etools.applications.locations.views import LocationLightWithActiveSerializer
 from etools.applications.users.tests.factories import UserFactory
+from etools.libraries.views.cache import VIEW_CACHE_VERSION_KEY
 
 
 class TestLocationsDeactivationService(BaseTenantTestCase):
@@ -94,3 +102,82 @@ class TestLocationsDeactivationService(BaseTenantTestCase):
         idx = ids.index(str(location.id))
         self.assertIn('is_active', response.data[idx])
         self.assertFalse(response.data[idx]['is_active'])
+
+
+class TestLocationReverseGeocodingService(BaseTenantTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.country = LocationFactory(admin_level=0, geom=GEOSGeometry('MULTIPOLYGON(((0 0, 0 40, 40 40, 40 0, 0 0)))'))
+        cls.region = LocationFactory(
+            admin_level=1, parent=cls.country, geom=GEOSGeometry('MULTIPOLYGON(((0 0, 0 20, 20 20, 20 0, 0 0)))'),
+        )
+        cls.district = LocationFactory(
+            admin_level=2, parent=cls.region, geom=GEOSGeometry('MULTIPOLYGON(((0 0, 0 10, 10 10, 10 0, 0 0)))'),
+        )
+        # a bigger leaf overlapping the region
+        cls.camp = LocationFactory(
+            admin_level=2, parent=cls.country, geom=GEOSGeometry('MULTIPOLYGON(((5 5, 5 30, 30 30, 30 5, 5 5)))'),
+        )
+
+    def setUp(self):
+        self.service = LocationReverseGeocodingService()
+
+    def test_smallest_leaf(self):
+        self.assertEqual(self.service.get_parent_location_id(Point(2, 2)), self.district.pk)
+        self.assertEqual(self.service.get_parent_location_id(Point(7, 7)), self.district.pk)
+        self.assertEqual(self.service.get_parent_location_id(Point(25, 25)), self.camp.pk)
+
+    def test_leaf_before_smaller_parent(self):
+        self.assertEqual(self.service.get_parent_location_id(Point(15, 15)), self.camp.pk)
+
+    def test_not_leaf(self):
+        self.assertEqual(self.service.get_parent_location_id(Point(15, 2)), self.region.pk)
+
+    def test_inactive(self):
+        self.assertEqual(self.service.get_parent_location_id(Point(1, 1)), self.district.pk)
+        LocationsDeactivationService().deactivate(Location.objects.filter(pk=self.district.pk))
+
+        self.assertEqual(self.service.get_parent_location_id(Point(1, 1)), self.region.pk)
+
+    def test_outside(self):
+        self.assertEqual(self.service.get_parent_location_id(Point(50, 50)), self.country.pk)
+        self.assertEqual(self.service.get_parent_location_id(None), self.country.pk)
+
+    def test_batch(self):
+        points = [Point(2, 2), None, Point(25, 25), Point(15, 2), Point(2, 2), Point(50, 50)]
+
+        with CaptureQueriesContext(connection) as queries:
+            location_ids = self.service.get_parent_location_ids(points)
+
+        self.assertEqual(location_ids, [
+            self.district.pk, self.country.pk, self.camp.pk, self.region.pk, self.district.pk, self.country.pk,
+        ])
+        # the locations of all points and the country
+        self.assertLessEqual(len(queries), 3)
+
+    def test_cached(self):
+        self.service.get_parent_location_id(Point(3, 4))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.service.get_parent_location_id(Point(3, 4)), self.district.pk)
+
+    def test_cache_invalidated_on_location_change(self):
+        self.service.get_parent_location_id(Point(35, 35))
+        village = LocationFactory(
+            admin_level=3, parent=self.country, geom=GEOSGeometry('MULTIPOLYGON(((31 31, 31 39, 39 39, 39 31, 31 31)))'),
+        )
+
+        self.assertEqual(self.service.get_parent_location_id(Point(35, 35)), village.pk)
+
+    def test_cache_version_evicted(self):
+        self.service.get_parent_location_id(Point(3, 4))
+        # version counter starts again from a newer version, cached parents are not reused
+        cache.delete(VIEW_CACHE_VERSION_KEY.format(
+            schema_name=connection.schema_name, namespace=LocationReverseGeocodingService.CACHE_NAMESPACE,
+        ))
+
+        with mock.patch('etools.libraries.views.cache.time.time', return_value=time.time() + 60):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.service.get_parent_location_id(Point(3, 4)), self.district.pk)
+        self.assertGreater(len(queries), 0)
@@ -0,0 +1,100 @@
+from unittest.mock import patch
+
+from django.db import connection
+
+from unicef_locations.synchronizers import LocationSynchronizer
+from unicef_locations.tests.factories import CartoDBTableFactory, LocationFactory
+
+from etools.applications.core.tests.cases import BaseTenantTestCase
+from etools.applications.locations.models import Location, LocationsManager
+from etools.applications.locations.tasks import eToolsLocationSynchronizer
+from etools.libraries.views.cache import get_cache_versions
+
+
+class TestLocationSynchronizer(BaseTenantTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.carto = CartoDBTableFactory(admin_level=1, admin_level_name='Region', parent_code_col='parent_pcode')
+        cls.country = LocationFactory(p_code='C0', name='Country', admin_level=0)
+
+    def _row(self, pcode, name, x=10):
+        return {
+            'the_geom': f'{{"type": "Point", "coordinates": [{x}, 20]}}',
+            'name': name,
+            'pcode': pcode,
+            'parent_pcode': self.country.p_code,
+        }
+
+    def _sync(self, rows, incremental=True, obsolete=None):
+        synchronizer = eToolsLocationSynchronizer(self.carto.pk, connection.schema_name, incremental=incremental)
+        if obsolete:
+            synchronizer.handle_obsolete_locations(obsolete)
+        with patch.object(synchronizer, 'get_cartodb_locations', return_value=rows):
+            return synchronizer.create_or_update_locations()
+
+    def test_create(self):
+        new, updated, skipped, error = self._sync([self._row('R1', 'Region 1'), self._row('R2', 'Region 2')])
+        self.assertEqual((new, updated, skipped, error), (2, 0, 0, 0))
+        region = Location.objects.get(p_code='R1')
+        self.assertEqual(region.parent, self.country)
+        self.assertEqual(region.tree_id, self.country.tree_id)
+        self.assertEqual(list(self.country.get_children().values_list('p_code', flat=True)), ['R1', 'R2'])
+
+    def test_unchanged_skipped(self):
+        rows = [self._row('R1', 'Region 1'), self._row('R2', 'Region 2')]
+        self._sync(rows)
+
+        with patch.object(LocationsManager, 'rebuild') as rebuild, \
+                patch.object(LocationsManager, 'partial_rebuild') as partial_rebuild:
+            new, updated, skipped, error = self._sync(rows)
+        self.assertEqual((new, updated, skipped, error), (0, 0, 2, 0))
+        rebuild.assert_not_called()
+        partial_rebuild.assert_not_called()
+
+        # deleted obsolete location leaves a gap in its tree
+        self._sync(rows + [self._row('R3', 'Region 3')])
+        with patch.object(LocationsManager, 'rebuild') as rebuild, \
+                patch.object(LocationsManager, 'partial_rebuild') as partial_rebuild:
+            self._sync(rows, obsolete=['R3'])
+        self.assertFalse(Location.objects.filter(p_code='R3').exists())
+        rebuild.assert_not_called()
+        partial_rebuild.assert_called_once_with(self.country.tree_id)
+
+    def test_obsolete_location_children_rebuilt(self):
+        rows = [self._row('R1', 'Region 1'), self._row('R2', 'Region 2')]
+        self._sync(rows)
+        LocationFactory(p_code='D1', name='District 1', admin_level=2, parent=Location.objects.get(p_code='R1'))
+
+        self._sync(rows[1:], obsolete=['R1'])
+
+        district = Location.objects.get(p_code='D1')
+        self.assertIsNone(district.parent)
+        self.assertTrue(district.is_root_node())
+        self.assertNotEqual(district.tree_id, self.country.tree_id)
+        country = Location.objects.get(pk=self.country.pk)
+        self.assertEqual(list(country.get_children().values_list('p_code', flat=True)), ['R2'])
+
+    def test_changed_updated(self):
+        self._sync([self._row('R1', 'Region 1'), self._row('R2', 'Region 2')])
+
+        new, updated, skipped, error = self._sync([self._row('R1', 'Region One'), self._row('R2', 'Region 2', x=11)])
+        self.assertEqual((new, updated, skipped, error), (0, 2, 0, 0))
+        self.assertEqual(Location.objects.get(p_code='R1').name, 'Region One')
+        self.assertEqual(Location.objects.all_with_geom().get(p_code='R2').point.x, 11)
+
+    def test_full_sync_updates_all(self):
+        rows = [self._row('R1', 'Region 1'), self._row('R2', 'Region 2')]
+        self._sync(rows)
+
+        new, updated, skipped, error = self._sync(rows, incremental=False)
+        self.assertEqual((new, updated, skipped, error), (0, 2, 0, 0))
+
+    def test_sync_invalidates_view_caches(self):
+        versions = get_cache_versions(['fm-sites', 'pmp-dropdowns'])
+        synchronizer = eToolsLocationSynchronizer(self.carto.pk, connection.schema_name)
+
+        with patch.object(LocationSynchronizer, 'sync', return_value=(1, 0, 0, 0)), \
+                self.captureOnCommitCallbacks(execute=True):
+            synchronizer.sync()
+
+        self.assertEqual(get_cache_versions(['fm-sites', 'pmp-dropdowns']), [version + 1 for version in versions])
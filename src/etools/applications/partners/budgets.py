@@ -0,0 +1,138 @@
+from contextlib import contextmanager
+from threading import local
+
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from etools.applications.partners.models import (
+    Intervention,
+    InterventionBudget,
+    InterventionManagementBudget,
+    InterventionSupplyItem,
+)
+from etools.applications.reports.models import InterventionActivity
+
+_state = local()
+
+
+def get_budget_totals(intervention_ids):
+    """
+    Sum the budget components of the interventions, with one aggregate query per component
+    instead of walking the results structure of every intervention.
+    """
+    intervention_ids = list(intervention_ids)
+    totals = {
+        pk: {
+            'activities_unicef_cash': 0,
+            'activities_cso_cash': 0,
+            'management_unicef_total': 0,
+            'management_partner_total': 0,
+            'unicef_supply': 0,
+            'partner_supply': 0,
+        }
+        for pk in intervention_ids
+    }
+
+    activities = InterventionActivity.objects.filter(
+        is_active=True,
+        result__result_link__intervention_id__in=intervention_ids,
+    ).values(
+        intervention_id=F('result__result_link__intervention_id'),
+    ).order_by().annotate(
+        unicef_cash=Sum('unicef_cash'),
+        cso_cash=Sum('cso_cash'),
+    )
+    for row in activities:
+        totals[row['intervention_id']]['activities_unicef_cash'] = row['unicef_cash'] or 0
+        totals[row['intervention_id']]['activities_cso_cash'] = row['cso_cash'] or 0
+
+    management_budgets = InterventionManagementBudget.objects.filter(
+        intervention_id__in=intervention_ids,
+    ).annotate(
+        unicef_total=F('act1_unicef') + F('act2_unicef') + F('act3_unicef'),
+        partner_total=F('act1_partner') + F('act2_partner') + F('act3_partner'),
+    ).values_list('intervention_id', 'unicef_total', 'partner_total')
+    for intervention_id, unicef_total, partner_total in management_budgets:
+        totals[intervention_id]['management_unicef_total'] = unicef_total
+        totals[intervention_id]['management_partner_total'] = partner_total
+
+    supply_items = InterventionSupplyItem.objects.filter(
+        intervention_id__in=intervention_ids,
+    ).values('intervention_id').order_by().annotate(
+        unicef_supply=Sum('total_price', filter=Q(provided_by=InterventionSupplyItem.PROVIDED_BY_UNICEF)),
+        partner_supply=Sum('total_price', filter=~Q(provided_by=InterventionSupplyItem.PROVIDED_BY_UNICEF)),
+    )
+    for row in supply_items:
+        totals[row['intervention_id']]['unicef_supply'] = row['unicef_supply'] or 0
+        totals[row['intervention_id']]['partner_supply'] = row['partner_supply'] or 0
+
+    return totals
+
+
+def update_budget_totals(intervention):
+    """
+    Recalculate the intervention budget totals after one of its components is changed.
+    Inside budget_totals_deferred, the recalculation is postponed to the end of the block.
+    """
+    try:
+        budget = intervention.planned_budget
+    except InterventionBudget.DoesNotExist:
+        return
+
+    pending = getattr(_state, 'pending', None)
+    if pending is None:
+        budget.save()
+    else:
+        pending[intervention.pk] = budget
+
+
+@contextmanager
+def budget_totals_deferred():
+    """
+    Coalesce budget recalculations requested inside the block, so that every intervention budget
+    is recalculated once when the block is left, no matter how many activities or items were saved.
+    """
+    if getattr(_state, 'pending', None) is not None:
+        # the outer block takes care of the recalculation
+        yield
+        return
+
+    _state.pending = {}
+    try:
+        yield
+        pending = _state.pending
+    finally:
+        _state.pending = None
+
+    for budget in pending.values():
+        # budget could be changed by another instance inside the block
+        budget.refresh_from_db()
+        budget.save()
+
+
+def recalculate_budget_totals(interventions=None, batch_size=500):
+    """
+    Recalculate the budget totals of every intervention (or the given queryset) of the current tenant,
+    e.g. after migrating currencies or activities. Only budgets whose totals have changed are updated.
+    Returns the number of updated budgets.
+    """
+    if interventions is None:
+        interventions = Intervention.objects.all()
+    intervention_ids = list(interventions.order_by('pk').values_list('pk', flat=True))
+
+    updated = 0
+    for i in range(0, len(intervention_ids), batch_size):
+        batch = intervention_ids[i:i + batch_size]
+        totals = get_budget_totals(batch)
+        changed_budgets = []
+        for budget in InterventionBudget.objects.filter(intervention_id__in=batch):
+            initial = [round(getattr(budget, field), 2) for field in InterventionBudget.TOTALS_FIELDS]
+            budget.set_totals(totals[budget.intervention_id])
+            if initial != [round(getattr(budget, field), 2) for field in InterventionBudget.TOTALS_FIELDS]:
+                budget.modified = timezone.now()
+                changed_budgets.append(budget)
+
+        InterventionBudget.objects.bulk_update(changed_budgets, InterventionBudget.TOTALS_FIELDS + ['modified'])
+        updated += len(changed_budgets)
+
+    return updated
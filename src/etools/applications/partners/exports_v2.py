@@ -6,15 +6,14 @@ from django.utils.translation import gettext as _
 from openpyxl import Workbook
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 from openpyxl.utils import get_column_letter
-from rest_framework_csv import renderers as r
 
-from etools.applications.core.renderers import FriendlyCSVRenderer
+from etools.applications.core.renderers import CSVRenderer, FriendlyCSVRenderer
 from etools.applications.core.util_scripts import currency_format
 from etools.applications.partners.models import Intervention
 from etools.applications.partners.utils import get_quarters_range
 
 
-class PartnerOrganizationCSVRenderer(r.CSVRenderer):
+class PartnerOrganizationCSVRenderer(CSVRenderer):
     header = ['vendor_number', 'organization_full_name',
               'short_name', 'alternate_name', 'partner_type', 'shared_with', 'address',
               'phone_number', 'email_address', 'risk_rating', 'sea_risk_rating_nm', 'psea_assessment_date',
@@ -77,7 +76,7 @@ class PartnerOrganizationDashboardCsvRenderer(FriendlyCSVRenderer):
     }
 
 
-class AgreementCSVRenderer(r.CSVRenderer):
+class AgreementCSVRenderer(CSVRenderer):
     header = [
         "agreement_number",
         "status",
@@ -117,7 +116,7 @@ class AgreementCSVRenderer(r.CSVRenderer):
     }
 
 
-class InterventionCSVRenderer(r.CSVRenderer):
+class InterventionCSVRenderer(CSVRenderer):
     header = [
         "partner_name", "vendor_number", "status", "partner_type", "cso_type", "agreement_number", "country_programmes",
         "document_type", "number", "title", "start", "end", "offices", "sectors", "locations", "contingency_pd",
@@ -188,7 +187,7 @@ class InterventionCSVRenderer(r.CSVRenderer):
     }
 
 
-class PartnershipDashCSVRenderer(r.CSVRenderer):
+class PartnershipDashCSVRenderer(CSVRenderer):
     header = [
         'partner_name',
         'partner_vendor_number',
@@ -242,7 +241,7 @@ class PartnershipDashCSVRenderer(r.CSVRenderer):
     }
 
 
-class InterventionLocationCSVRenderer(r.CSVRenderer):
+class InterventionLocationCSVRenderer(CSVRenderer):
     header = [   # This controls field order in the output
         'partner',
         'partner_vendor_number',
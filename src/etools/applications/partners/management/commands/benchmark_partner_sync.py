@@ -0,0 +1,65 @@
+import json
+import os
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from etools.applications.partners import synchronizers
+from etools.applications.users.models import Country
+
+DEFAULT_FIXTURE = os.path.join(
+    os.path.dirname(synchronizers.__file__), 'tests', 'data', 'vision_partners.json',
+)
+
+
+class Command(BaseCommand):
+    help = 'Measure one by one and batched saving of a recorded VISION partners response, changes are rolled back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', dest='schema', required=True)
+        parser.add_argument('--fixture', dest='fixture', default=DEFAULT_FIXTURE, help='Recorded VISION response')
+        parser.add_argument('--size', dest='size', type=int, default=0,
+                            help='Replicate the fixture records with new vendor numbers up to size')
+
+    def measure(self, label, func, setup=None):
+        with transaction.atomic():
+            if setup:
+                setup()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                processed = func()
+                duration = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{label}: {processed} records saved, {duration * 1000:.1f} ms, {len(queries)} queries')
+
+    def handle(self, *args, **options):
+        country = Country.objects.get(schema_name=options['schema'])
+        connection.set_tenant(country)
+        synchronizer = synchronizers.PartnerSynchronizer(business_area_code=country.business_area_code)
+
+        with open(options['fixture']) as f:
+            records = synchronizer._filter_records(synchronizer._convert_records(json.load(f)))
+        if options['size']:
+            records = [
+                dict(records[i % len(records)], VENDOR_CODE='{}-{}'.format(
+                    records[i % len(records)]['VENDOR_CODE'], i // len(records),
+                ))
+                for i in range(options['size'])
+            ]
+        self.stdout.write(f'{len(records)} records')
+
+        def save_one_by_one():
+            return sum(synchronizer._partner_save(record) for record in records)
+
+        def save_records():
+            return synchronizer._save_records(records)
+
+        # changes are rolled back, partners must not be notified
+        with mock.patch.object(synchronizers, 'notify_partner_hidden'):
+            self.measure('one by one', save_one_by_one)
+            self.measure('batched', save_records)
+            self.measure('batched, unchanged records', save_records, setup=save_records)
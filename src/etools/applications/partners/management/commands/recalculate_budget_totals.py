@@ -0,0 +1,36 @@
+import logging
+
+from django.core.management import BaseCommand
+from django.db import connection
+
+from etools.applications.partners.budgets import recalculate_budget_totals
+from etools.applications.users.models import Country
+from etools.libraries.tenant_support.utils import run_on_all_tenants
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Recalculate the budget totals of all interventions, e.g. after currency or activities migrations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', dest='schema')
+        parser.add_argument('--batch-size', dest='batch_size', type=int, default=500)
+
+    def run(self, batch_size):
+        updated = recalculate_budget_totals(batch_size=batch_size)
+        logger.info('%s budgets updated for %s' % (updated, connection.schema_name))
+
+    def handle(self, *args, **options):
+
+        logger.info('Command started')
+
+        countries = Country.objects.exclude(name__iexact='global')
+        if options['schema']:
+            country = countries.get(schema_name=options['schema'])
+            connection.set_tenant(country)
+            self.run(options['batch_size'])
+        else:
+            run_on_all_tenants(self.run, batch_size=options['batch_size'])
+
+        logger.info('Command finished')
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partners', '0007_intervention_partner_selection_modality_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='partnerorganization',
+            name='vision_sync_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32, verbose_name='VISION Sync Hash'),
+        ),
+    ]
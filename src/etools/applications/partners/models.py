@@ -442,6 +442,14 @@ class PartnerOrganization(TimeStampedModel):
         verbose_name=_("VISION Synced"),
         default=False,
     )
+    # hash of the last VISION record applied, to skip unchanged records on sync
+    vision_sync_hash = models.CharField(
+        verbose_name=_("VISION Sync Hash"),
+        max_length=32,
+        blank=True,
+        default='',
+        editable=False,
+    )
     blocked = models.BooleanField(verbose_name=_("Blocked"), default=False)
     deleted_flag = models.BooleanField(
         verbose_name=_('Marked for deletion'),
@@ -643,57 +651,67 @@ class PartnerOrganization(TimeStampedModel):
 
     @cached_property
     def min_req_programme_visits(self):
+        return self.get_min_req_programme_visits(self.partner_type, self.net_ct_cy, self.highest_risk_rating_name)
+
+    @staticmethod
+    def get_min_req_programme_visits(partner_type, net_ct_cy, highest_risk_rating_name):
         programme_visits = 0
-        if self.partner_type not in [OrganizationType.BILATERAL_MULTILATERAL, OrganizationType.UN_AGENCY]:
-            ct = self.net_ct_cy or 0  # Must be integer, but net_ct_cy could be None
+        if partner_type not in [OrganizationType.BILATERAL_MULTILATERAL, OrganizationType.UN_AGENCY]:
+            ct = net_ct_cy or 0  # Must be integer, but net_ct_cy could be None
 
             if ct <= PartnerOrganization.CT_MR_AUDIT_TRIGGER_LEVEL:
                 programme_visits = 0
             elif PartnerOrganization.CT_MR_AUDIT_TRIGGER_LEVEL < ct <= PartnerOrganization.CT_MR_AUDIT_TRIGGER_LEVEL2:
                 programme_visits = 1
             elif PartnerOrganization.CT_MR_AUDIT_TRIGGER_LEVEL2 < ct <= PartnerOrganization.CT_MR_AUDIT_TRIGGER_LEVEL3:
-                if self.highest_risk_rating_name in [PartnerOrganization.RATING_HIGH,
-                                                     PartnerOrganization.PSEA_RATING_HIGH,
-                                                     PartnerOrganization.RATING_HIGH_RISK_ASSUMED,
-                                                     PartnerOrganization.RATING_SIGNIFICANT]:
+                if highest_risk_rating_name in [PartnerOrganization.RATING_HIGH,
+                                                PartnerOrganization.PSEA_RATING_HIGH,
+                                                PartnerOrganization.RATING_HIGH_RISK_ASSUMED,
+                                                PartnerOrganization.RATING_SIGNIFICANT]:
                     programme_visits = 3
-                elif self.highest_risk_rating_name in [PartnerOrganization.RATING_MEDIUM,
-                                                       PartnerOrganization.PSEA_RATING_MEDIUM]:
+                elif highest_risk_rating_name in [PartnerOrganization.RATING_MEDIUM,
+                                                  PartnerOrganization.PSEA_RATING_MEDIUM]:
                     programme_visits = 2
-                elif self.highest_risk_rating_name in [PartnerOrganization.RATING_LOW,
-                                                       PartnerOrganization.RATING_LOW_RISK_ASSUMED,
-                                                       PartnerOrganization.PSEA_RATING_LOW]:
+                elif highest_risk_rating_name in [PartnerOrganization.RATING_LOW,
+                                                  PartnerOrganization.RATING_LOW_RISK_ASSUMED,
+                                                  PartnerOrganization.PSEA_RATING_LOW]:
                     programme_visits = 1
             else:
-                if self.highest_risk_rating_name in [PartnerOrganization.RATING_HIGH,
-                                                     PartnerOrganization.PSEA_RATING_HIGH,
-                                                     PartnerOrganization.RATING_HIGH_RISK_ASSUMED,
-                                                     PartnerOrganization.RATING_SIGNIFICANT]:
+                if highest_risk_rating_name in [PartnerOrganization.RATING_HIGH,
+                                                PartnerOrganization.PSEA_RATING_HIGH,
+                                                PartnerOrganization.RATING_HIGH_RISK_ASSUMED,
+                                                PartnerOrganization.RATING_SIGNIFICANT]:
                     programme_visits = 4
-                elif self.highest_risk_rating_name in [PartnerOrganization.RATING_MEDIUM,
-                                                       PartnerOrganization.PSEA_RATING_MEDIUM]:
+                elif highest_risk_rating_name in [PartnerOrganization.RATING_MEDIUM,
+                                                  PartnerOrganization.PSEA_RATING_MEDIUM]:
                     programme_visits = 3
-                elif self.highest_risk_rating_name in [PartnerOrganization.RATING_LOW,
-                                                       PartnerOrganization.RATING_LOW_RISK_ASSUMED,
-                                                       PartnerOrganization.PSEA_RATING_LOW]:
+                elif highest_risk_rating_name in [PartnerOrganization.RATING_LOW,
+                                                  PartnerOrganization.RATING_LOW_RISK_ASSUMED,
+                                                  PartnerOrganization.PSEA_RATING_LOW]:
                     programme_visits = 2
         return programme_visits
 
     @cached_property
     def min_req_spot_checks(self):
+        required = self.get_min_req_spot_checks(self.partner_type, self.type_of_assessment, self.reported_cy)
+        if required:
+            try:
+                if self.planned_engagement.scheduled_audit:
+                    return 0
+            except PlannedEngagement.DoesNotExist:
+                pass
+        return required
+
+    @staticmethod
+    def get_min_req_spot_checks(partner_type, type_of_assessment, reported_cy, scheduled_audit=False):
         # reported_cy can be None
-        reported_cy = self.reported_cy or 0
-        if self.partner_type in [OrganizationType.BILATERAL_MULTILATERAL, OrganizationType.UN_AGENCY]:
+        reported_cy = reported_cy or 0
+        if partner_type in [OrganizationType.BILATERAL_MULTILATERAL, OrganizationType.UN_AGENCY]:
             return 0
-        if self.type_of_assessment == 'Low Risk Assumed' or reported_cy <= PartnerOrganization.CT_CP_AUDIT_TRIGGER_LEVEL:
+        if type_of_assessment == 'Low Risk Assumed' or reported_cy <= PartnerOrganization.CT_CP_AUDIT_TRIGGER_LEVEL:
+            return 0
+        if scheduled_audit:
             return 0
-        try:
-            self.planned_engagement
-        except PlannedEngagement.DoesNotExist:
-            pass
-        else:
-            if self.planned_engagement.scheduled_audit:
-                return 0
         return 1
 
     @cached_property
@@ -1621,17 +1639,6 @@ class InterventionManager(models.Manager):
         )
         return qs
 
-    def budget_qs(self):
-        from etools.applications.reports.models import InterventionActivity
-
-        qs = super().get_queryset().only().prefetch_related(
-            'management_budgets',
-            'supply_items',
-            Prefetch('result_links__ll_results__activities',
-                     queryset=InterventionActivity.objects.filter(is_active=True)),
-        )
-        return qs
-
     def full_snapshot_qs(self):
         return self.detail_qs().prefetch_related(
             'reviews',
@@ -2822,17 +2829,21 @@ class InterventionAmendment(TimeStampedModel):
         self.amended_intervention.title = self.amended_intervention.title.replace('[Amended]', '').lstrip(' ')
 
     def merge_amendment(self):
+        from etools.applications.partners.budgets import budget_totals_deferred
+
         self.clean_amended_intervention()
 
-        merge_instance(
-            self.intervention,
-            self.amended_intervention,
-            self.related_objects_map,
-            INTERVENTION_AMENDMENT_RELATED_FIELDS,
-            INTERVENTION_AMENDMENT_IGNORED_FIELDS,
-            INTERVENTION_AMENDMENT_COPY_POST_EFFECTS,
-            INTERVENTION_AMENDMENT_MERGE_POST_EFFECTS,
-        )
+        # every merged activity or supply item would recalculate the budget otherwise
+        with budget_totals_deferred():
+            merge_instance(
+                self.intervention,
+                self.amended_intervention,
+                self.related_objects_map,
+                INTERVENTION_AMENDMENT_RELATED_FIELDS,
+                INTERVENTION_AMENDMENT_IGNORED_FIELDS,
+                INTERVENTION_AMENDMENT_COPY_POST_EFFECTS,
+                INTERVENTION_AMENDMENT_MERGE_POST_EFFECTS,
+            )
 
         # copy signatures to amendment
         pd_attachment = self.amended_intervention.signed_pd_attachment.first()
@@ -3063,6 +3074,19 @@ class InterventionBudget(TimeStampedModel):
 
     tracker = FieldTracker()
 
+    # fields calculated from the budget components
+    TOTALS_FIELDS = [
+        'partner_contribution_local',
+        'partner_supply_local',
+        'total_partner_contribution_local',
+        'total_unicef_cash_local_wo_hq',
+        'unicef_cash_local',
+        'in_kind_amount_local',
+        'total',
+        'total_local',
+        'programme_effectiveness',
+    ]
+
     class Meta:
         verbose_name_plural = _('Intervention budget')
 
@@ -3110,39 +3134,23 @@ class InterventionBudget(TimeStampedModel):
         )
 
     def calc_totals(self, save=True):
-        intervention = Intervention.objects.budget_qs().get(id=self.intervention_id)
+        from etools.applications.partners.budgets import get_budget_totals
+
+        self.set_totals(get_budget_totals([self.intervention_id])[self.intervention_id])
 
+        if save:
+            self.save()
+
+    def set_totals(self, totals):
+        """Set the totals from the budget components aggregated by get_budget_totals"""
         # partner and unicef totals
-        def init_totals():
-            self.partner_contribution_local = 0
-            self.total_unicef_cash_local_wo_hq = 0
-
-        init = False
-        for link in intervention.result_links.all():
-            for result in link.ll_results.all():
-                for activity in result.activities.all():  # activities prefetched with is_active=True in budget_qs
-                    if not init:
-                        init_totals()
-                        init = True
-                    self.partner_contribution_local += activity.cso_cash
-                    self.total_unicef_cash_local_wo_hq += activity.unicef_cash
-
-        programme_effectiveness = 0
-        if not init:
-            init_totals()
-        programme_effectiveness += intervention.management_budgets.unicef_total
-        self.partner_contribution_local += intervention.management_budgets.partner_total
-        self.total_unicef_cash_local_wo_hq += intervention.management_budgets.unicef_total
+        self.partner_contribution_local = totals['activities_cso_cash'] + totals['management_partner_total']
+        self.total_unicef_cash_local_wo_hq = totals['activities_unicef_cash'] + totals['management_unicef_total']
         self.unicef_cash_local = self.total_unicef_cash_local_wo_hq + self.total_hq_cash_local
 
         # in kind totals
-        self.in_kind_amount_local = 0
-        self.partner_supply_local = 0
-        for item in intervention.supply_items.all():
-            if item.provided_by == InterventionSupplyItem.PROVIDED_BY_UNICEF:
-                self.in_kind_amount_local += item.total_price
-            else:
-                self.partner_supply_local += item.total_price
+        self.in_kind_amount_local = totals['unicef_supply']
+        self.partner_supply_local = totals['partner_supply']
 
         self.total = self.total_unicef_contribution() + self.partner_contribution
         self.total_partner_contribution_local = self.partner_contribution_local + self.partner_supply_local
@@ -3150,13 +3158,10 @@ class InterventionBudget(TimeStampedModel):
         self.total_local = total_unicef_contrib_local + self.total_partner_contribution_local
 
         if total_unicef_contrib_local:
-            self.programme_effectiveness = programme_effectiveness / total_unicef_contrib_local * 100
+            self.programme_effectiveness = totals['management_unicef_total'] / total_unicef_contrib_local * 100
         else:
             self.programme_effectiveness = 0
 
-        if save:
-            self.save()
-
 
 class InterventionReviewQuestionnaire(models.Model):
     # answer fields to be renamed when questionnaire will be available
@@ -3655,8 +3660,10 @@ class InterventionManagementBudget(TimeStampedModel):
         super().save(*args, **kwargs)
         # planned budget is not created yet, so just skip; totals will be updated during planned budget creation
         if not create:
+            from etools.applications.partners.budgets import update_budget_totals
+
             # update budgets
-            self.intervention.planned_budget.save()
+            update_budget_totals(self.intervention)
 
     def update_cash(self):
         aggregated_items = self.items.values('kind').order_by('kind')
@@ -3744,13 +3751,17 @@ class InterventionSupplyItem(TimeStampedModel):
     def save(self, *args, **kwargs):
         self.total_price = self.unit_number * self.unit_price
         super().save()
+        from etools.applications.partners.budgets import update_budget_totals
+
         # update budgets
-        self.intervention.planned_budget.save()
+        update_budget_totals(self.intervention)
 
     def delete(self, **kwargs):
         super().delete(**kwargs)
+        from etools.applications.partners.budgets import update_budget_totals
+
         # update budgets
-        self.intervention.planned_budget.save()
+        update_budget_totals(self.intervention)
 
 
 class InterventionManagementBudgetItem(models.Model):
@@ -1,5 +1,4 @@
 import datetime
-from functools import lru_cache
 
 from django.apps import apps
 from django.conf import settings
@@ -9,9 +8,9 @@ from etools_validator.utils import check_rigid_related
 from rest_framework import permissions
 from rest_framework.permissions import BasePermission
 
+from etools.applications.core.permissions import PermissionMatrix
 from etools.applications.environment.helpers import tenant_switch_is_active
 from etools.libraries.djangolib.utils import get_all_field_names, is_user_in_groups
-from etools.libraries.pythonlib.collections import HashableDict
 
 # READ_ONLY_API_GROUP_NAME is the name of the permissions group that provides read-only access to some list views.
 # Initially, this is only being used for PRP-related endpoints.
@@ -39,12 +38,14 @@ class PMPPermissions:
     }
     possible_actions = ['edit', 'required', 'view']
 
+    # permission of the actions without rules for a field present in the structure; if None, False is used
+    undefined_actions_permissions = None
+
     def __init__(self, user, instance, permission_structure, **kwargs):
         self.MODEL = apps.get_model(self.MODEL_NAME)
         self.user = user
         self.user_groups = self.get_user_groups()
         self.instance = instance
-        self.condition_group_valid = lru_cache(maxsize=16)(self.condition_group_valid)
         self.permission_structure = permission_structure
         self.all_model_fields = get_all_field_names(self.MODEL)
         self.all_model_fields += self.EXTRA_FIELDS
@@ -52,62 +53,32 @@ class PMPPermissions:
     def get_user_groups(self):
         if self.user.email == settings.TASK_ADMIN_USER:
             return [UNICEF_USER]
-        return list(self.user.groups.values_list('name', flat=True))
-
-    def condition_group_valid(self, condition_group):
-        if condition_group['status'] and condition_group['status'] != '*':
-            if self.instance.status != condition_group['status']:
-                return False
-        if condition_group['group'] and condition_group['group'] != '*':
-            groups = condition_group['group'].split("|")
-
-            # If none of the groups defined match any of the groups in the user groups
-            if not set(groups).intersection(set(self.user_groups)):
-                return False
-        if condition_group['condition'] and condition_group['condition'] != '*':
-            # use the following commented line in case we want to not use a condition mapper and interpret the
-            # condition directly from the sheet (not recommended)
-            # if not eval(condition_group['condition'], globals=globals(), locals=locals()):
-            if not self.condition_map[condition_group['condition']]:
-                return False
-        return True
+        return list(self.user.group_names)
 
-    def get_field_permissions(self, action, field):
-        condition_groups = field[action]
-
-        # For a field and one action (start_date, can_view) you can't define both true conditions and false conditions
-        # because if both groups fail, we can't know what to default to
-        # this assertion should be in the ingestion script
-
-        # if the "false" conditions were defined that means that by default allowed will be "true"
-        # otherwise it means that the "true" conditions were defined and therefore default will be "false"
-        default_return = bool(len(condition_groups['false']))
-
-        for allowed in ['true', 'false']:
-            for condition_group in condition_groups[allowed]:
-                if self.condition_group_valid(HashableDict(condition_group)):
-                    return True if allowed == 'true' else False
-
-        return default_return
+    def check_condition(self, condition):
+        # conditions can be provided as callables, to be evaluated only if a field depends on them
+        value = self.condition_map[condition]
+        if callable(value):
+            value = self.condition_map[condition] = value()
+        return value
 
     def get_permissions(self):
-        ps = self.permission_structure
-
-        my_permissions = {}
-        for action in self.possible_actions:
-            my_permissions[action] = {}
-            for field in self.all_model_fields:
-                if field not in ps:
-                    my_permissions[action][field] = self.actions_default_permissions[action]
-                else:
-                    my_permissions[action][field] = self.get_field_permissions(action, ps[field])
-        return my_permissions
+        matrix = PermissionMatrix.for_structure(self.permission_structure)
+        return matrix.get_permissions(
+            self.all_model_fields,
+            self.instance.status,
+            self.user_groups,
+            self.check_condition,
+            self.actions_default_permissions,
+            self.undefined_actions_permissions,
+        )
 
 
 class InterventionPermissions(PMPPermissions):
 
     MODEL_NAME = 'partners.Intervention'
     EXTRA_FIELDS = ['sections_present', 'pd_outputs', 'final_partnership_review', 'prc_reviews', 'document_currency']
+    undefined_actions_permissions = PMPPermissions.actions_default_permissions
 
     def __init__(self, **kwargs):
         """
@@ -222,7 +193,7 @@ class InterventionPermissions(PMPPermissions):
             'prp_mode_off': prp_mode_off(),
             'prp_server_on': prp_server_on(),
             'user_adds_amendment+prp_mode_on': user_added_amendment(self.instance) and not prp_mode_off(),
-            'termination_doc_attached': self.instance.termination_doc_attachment.exists(),
+            'termination_doc_attached': self.instance.termination_doc_attachment.exists,
             'not_ended': self.instance.end >= datetime.datetime.now().date() if self.instance.end else False,
             'unicef_court': self.instance.unicef_court and unlocked(self.instance),
             'partner_court': not self.instance.unicef_court and unlocked(self.instance),
@@ -283,20 +254,11 @@ class InterventionPermissions(PMPPermissions):
                               "partner_selection_modality",
                               "cfei_number",
                               "other_details"]
-        ps = self.permission_structure
-        my_permissions = {}
-        for action in self.possible_actions:
-            my_permissions[action] = {}
-            for field in self.all_model_fields:
-                if action == "required" and field in list_of_new_fields and intervention_is_v1():
-                    my_permissions[action][field] = False
-                elif field in ps:
-                    if not ps[field][action]['true'] and not ps[field][action]['false']:
-                        my_permissions[action][field] = self.actions_default_permissions[action]
-                    else:
-                        my_permissions[action][field] = self.get_field_permissions(action, ps[field])
-                else:
-                    my_permissions[action][field] = self.actions_default_permissions[action]
+        my_permissions = super().get_permissions()
+        if intervention_is_v1():
+            for field in list_of_new_fields:
+                if field in my_permissions['required']:
+                    my_permissions['required'][field] = False
         return my_permissions
 
 
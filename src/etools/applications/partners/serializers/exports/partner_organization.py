@@ -145,7 +145,7 @@ class PartnerOrganizationExportFlatSerializer(
 
     class Meta:
         model = PartnerOrganization
-        exclude = ('sea_risk_rating_name', 'organization')
+        exclude = ('sea_risk_rating_name', 'organization', 'vision_sync_hash')
 
     def get_name(self, obj):
         return obj.name
@@ -1,14 +1,31 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from threading import local
+
+from django.db.models import Prefetch, prefetch_related_objects
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.signals import m2m_changed, pre_delete, pre_save
+
+from model_utils.tracker import FieldInstanceTracker
 from unicef_restlib.serializers import UserContextSerializerMixin
 from unicef_snapshot.models import Activity
 from unicef_snapshot.utils import jsonify
 
 from etools.applications.partners.amendment_utils import (
     full_snapshot_instance,
+    full_snapshot_m2m_relations,
+    full_snapshot_one_to_many,
+    full_snapshot_one_to_one,
     INTERVENTION_FULL_SNAPSHOT_IGNORED_FIELDS,
     INTERVENTION_FULL_SNAPSHOT_RELATED_FIELDS,
 )
 from etools.applications.partners.models import Intervention
 
+_state = local()
+
+# models and m2m through models of the full snapshot mapped to the intervention relations they belong to
+_relation_senders = None
+
 
 def create_change_dict_recursive(prev_dict, current_dict):
     """Create a dictionary showing the differences between the
@@ -69,35 +86,198 @@ def save_snapshot(user, target, target_before, current_obj_dict):
     Activity.objects.create(**activity_kwargs)
 
 
-class FullInterventionSnapshotSerializerMixin(UserContextSerializerMixin):
+def get_relation_senders():
     """
-    Save full intervention snapshot on save.
+    Map the models of the intervention full snapshot to the intervention relations they belong to
+    and start watching their changes.
     """
+    global _relation_senders
+    if _relation_senders is not None:
+        return _relation_senders
 
-    def get_intervention(self):
-        raise NotImplementedError
+    senders = defaultdict(set)
 
-    def prefetch_relations(self, instance: object) -> Intervention:
-        return Intervention.objects.full_snapshot_qs().get(pk=instance.pk)
+    def collect(model, relation):
+        label = model._meta.label
+        ignored = INTERVENTION_FULL_SNAPSHOT_IGNORED_FIELDS.get(label, [])
+        for name in INTERVENTION_FULL_SNAPSHOT_RELATED_FIELDS.get(label, []):
+            if name in ignored:
+                continue
+            field = model._meta.get_field(name)
+            if field.many_to_many:
+                senders[field.remote_field.through if field.concrete else field.through].add(relation or name)
+            elif field.one_to_many or field.one_to_one:
+                senders[field.related_model].add(relation or name)
+                collect(field.related_model, relation or name)
 
-    def save(self, **kwargs):
-        target = self.get_intervention()
-        target_before = full_snapshot_instance(
-            self.prefetch_relations(target),
-            INTERVENTION_FULL_SNAPSHOT_RELATED_FIELDS,
-            INTERVENTION_FULL_SNAPSHOT_IGNORED_FIELDS,
-        )
+    collect(Intervention, None)
+    _relation_senders = dict(senders)
+
+    for sender in _relation_senders:
+        # through models with extra fields can be both linked and saved directly
+        pre_save.connect(_pre_save, sender=sender, dispatch_uid='intervention_snapshot')
+        pre_delete.connect(_pre_delete, sender=sender, dispatch_uid='intervention_snapshot')
+        m2m_changed.connect(_m2m_changed, sender=sender, dispatch_uid='intervention_snapshot')
+
+    return _relation_senders
+
+
+def _mark_changed(sender):
+    for snapshot in getattr(_state, 'snapshots', None) or []:
+        snapshot.record_relations(_relation_senders[sender])
+
+
+def snapshot_bulk_change(model):
+    """
+    Bulk operations don't send the model signals, so the objects of the model have to be recorded
+    by the open snapshots before they are written in bulk
+    """
+    if getattr(_state, 'snapshots', None):
+        get_relation_senders()
+        if model in _relation_senders:
+            _mark_changed(model)
+
+
+def _has_changes(instance):
+    """
+    Saving an existing object tracking all its fields is a no-op for the snapshot
+    when no field other than the ignored ones has changed
+    """
+    tracker = getattr(instance, 'tracker', None)
+    if instance.pk is None or not isinstance(tracker, FieldInstanceTracker):
+        return True
+    if not {field.attname for field in instance._meta.concrete_fields} <= set(tracker.fields):
+        return True
+    ignored = INTERVENTION_FULL_SNAPSHOT_IGNORED_FIELDS.get(instance._meta.label, [])
+    return any(name not in ignored for name in tracker.changed())
+
+
+def _pre_save(sender, instance, **kwargs):
+    if getattr(_state, 'snapshots', None) and _has_changes(instance):
+        _mark_changed(sender)
+
+
+def _pre_delete(sender, **kwargs):
+    if getattr(_state, 'snapshots', None):
+        _mark_changed(sender)
+
+
+def _m2m_changed(sender, action, **kwargs):
+    if getattr(_state, 'snapshots', None) and action in ('pre_add', 'pre_remove', 'pre_clear'):
+        _mark_changed(sender)
 
-        instance = super().save(**kwargs)
 
-        # refresh instance to avoid cached relations
-        target = self.prefetch_relations(target)
+def get_relations_prefetch_lookups(relations):
+    """Lookups of the full snapshot queryset prefetching the given intervention relations"""
+    return [
+        lookup for lookup in Intervention.objects.full_snapshot_qs()._prefetch_related_lookups
+        if (lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup).split(LOOKUP_SEP)[0] in relations
+    ]
 
-        current_obj_dict = full_snapshot_instance(
-            target,
-            INTERVENTION_FULL_SNAPSHOT_RELATED_FIELDS,
+
+class InterventionSnapshot:
+    """
+    Full intervention snapshot limited to the relations changed while it is open.
+
+    The intervention fields are recorded when it starts. A relation is recorded the first time one of its objects
+    is saved, deleted or linked, before the change is written, and only the recorded relations are loaded again
+    to calculate the change, so the cost follows the size of the change instead of the size of the intervention.
+    The change saved is the same as the difference of two full snapshots.
+    """
+
+    def __init__(self, intervention):
+        self.intervention_pk = intervention.pk
+        self.intervention = None
+        self.relations = []
+        self.before = None
+
+    @staticmethod
+    def get_many_to_one_fields():
+        return [
+            name for name in INTERVENTION_FULL_SNAPSHOT_RELATED_FIELDS[Intervention._meta.label]
+            if Intervention._meta.get_field(name).many_to_one
+        ]
+
+    def get_intervention(self):
+        return Intervention.objects.select_related(*self.get_many_to_one_fields()).get(pk=self.intervention_pk)
+
+    def snapshot(self, intervention, relations):
+        copy_map = full_snapshot_instance(
+            intervention,
+            {Intervention._meta.label: self.get_many_to_one_fields()},
             INTERVENTION_FULL_SNAPSHOT_IGNORED_FIELDS,
         )
-        save_snapshot(self.get_user(), target, target_before, current_obj_dict)
+        copy_map.update(self.snapshot_relations(intervention, relations))
+        return copy_map
+
+    def snapshot_relations(self, intervention, relations):
+        prefetch_related_objects([intervention], *get_relations_prefetch_lookups(relations))
+
+        copy_map = {}
+        for relation in relations:
+            field = Intervention._meta.get_field(relation)
+            if field.one_to_one:
+                copy_map[relation] = {}
+                full_snapshot_one_to_one(
+                    intervention, relation, copy_map[relation],
+                    INTERVENTION_FULL_SNAPSHOT_RELATED_FIELDS, INTERVENTION_FULL_SNAPSHOT_IGNORED_FIELDS,
+                )
+            elif field.one_to_many:
+                copy_map[relation] = []
+                full_snapshot_one_to_many(
+                    intervention, relation, copy_map[relation],
+                    INTERVENTION_FULL_SNAPSHOT_RELATED_FIELDS, INTERVENTION_FULL_SNAPSHOT_IGNORED_FIELDS,
+                )
+            elif field.many_to_many:
+                full_snapshot_m2m_relations(intervention, [relation], copy_map)
+        return copy_map
+
+    def start(self):
+        get_relation_senders()
+        self.intervention = self.get_intervention()
+        self.before = self.snapshot(self.intervention, [])
+        if getattr(_state, 'snapshots', None) is None:
+            _state.snapshots = []
+        _state.snapshots.append(self)
+
+    def stop(self):
+        _state.snapshots.remove(self)
+
+    def record_relations(self, relations):
+        relations = [relation for relation in relations if relation not in self.relations]
+        if relations:
+            # nothing of these relations has been written yet, so the database still holds their previous state
+            self.before.update(self.snapshot_relations(self.intervention, relations))
+            self.relations.extend(relations)
+
+    def save(self, user):
+        target = self.get_intervention()
+        save_snapshot(user, target, self.before, self.snapshot(target, self.relations))
+
+
+@contextmanager
+def intervention_snapshot(intervention, user):
+    """Save the intervention changes made inside the block as one snapshot activity"""
+    snapshot = InterventionSnapshot(intervention)
+    snapshot.start()
+    try:
+        yield
+    finally:
+        snapshot.stop()
+
+    snapshot.save(user)
+
+
+class FullInterventionSnapshotSerializerMixin(UserContextSerializerMixin):
+    """
+    Save full intervention snapshot on save.
+    """
+
+    def get_intervention(self):
+        raise NotImplementedError
+
+    def save(self, **kwargs):
+        with intervention_snapshot(self.get_intervention(), self.get_user()):
+            instance = super().save(**kwargs)
 
         return instance
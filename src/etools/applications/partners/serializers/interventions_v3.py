@@ -12,6 +12,7 @@ from rest_framework.exceptions import ValidationError
 from unicef_attachments.fields import AttachmentSingleFileField
 
 from etools.applications.field_monitoring.fm_settings.serializers import LocationSiteSerializer
+from etools.applications.partners.budgets import budget_totals_deferred
 from etools.applications.partners.models import (
     FileType,
     Intervention,
@@ -212,6 +213,7 @@ class InterventionManagementBudgetSerializer(
         )
 
     @transaction.atomic
+    @budget_totals_deferred()
     def update(self, instance, validated_data):
         items = validated_data.pop('items', None)
         instance = super().update(instance, validated_data)
@@ -323,7 +323,7 @@ class PartnerOrganizationDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = PartnerOrganization
-        exclude = ('organization',)
+        exclude = ('organization', 'vision_sync_hash')
 
 
 class PartnerOrganizationDashboardSerializer(serializers.ModelSerializer):
@@ -430,7 +430,7 @@ class PartnerOrganizationCreateUpdateSerializer(SnapshotModelSerializer):
 
     class Meta:
         model = PartnerOrganization
-        fields = "__all__"
+        exclude = ('vision_sync_hash',)
         extra_kwargs = {
             "partner_type": {
                 "error_messages": {
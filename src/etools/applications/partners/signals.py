@@ -1,13 +1,46 @@
 from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
+from unicef_attachments.models import FileType as AttachmentFileType
+from unicef_locations.models import GatewayType
+
+from etools.applications.attachments.models import AttachmentFlat
+from etools.applications.funds.models import FundsReservationItem
+from etools.applications.locations.models import Location
+from etools.applications.organizations.models import Organization
+from etools.applications.partners.budgets import update_budget_totals
 from etools.applications.partners.models import (
+    FileType,
     Intervention,
-    InterventionBudget,
     InterventionReview,
     InterventionSupplyItem,
+    PartnerOrganization,
     PRCOfficerInterventionReview,
 )
+from etools.applications.reports.models import CountryProgramme, Result
+from etools.applications.users.models import Country, Realm, User, UserProfile
+from etools.libraries.views.cache import register_view_cache_invalidation
+
+register_view_cache_invalidation(
+    'pmp-dropdowns',
+    AttachmentFileType,
+    AttachmentFlat,
+    Country,
+    CountryProgramme,
+    FileType,
+    FundsReservationItem,
+    GatewayType,
+    Location,
+    Organization,
+    PartnerOrganization,
+    Realm,
+    Result,
+)
+# unicef signatories of the dropdowns; user saves only updating the last login are frequent and ignored
+register_view_cache_invalidation(
+    'pmp-dropdowns', User, fields=['first_name', 'last_name', 'username', 'email', 'is_active'],
+)
+register_view_cache_invalidation('pmp-dropdowns', UserProfile, fields=['country'])
 
 # TODO clean up: endpoint removed in prp
 # @receiver(post_save, sender=Intervention)
@@ -23,11 +56,8 @@ def calc_totals_on_delete(instance, **kwargs):
     except Intervention.DoesNotExist:
         pass
     else:
-        try:
-            # update budgets
-            intervention.planned_budget.save()
-        except InterventionBudget.DoesNotExist:
-            pass
+        # update budgets
+        update_budget_totals(intervention)
 
 
 @receiver(m2m_changed, sender=InterventionReview.prc_officers.through)
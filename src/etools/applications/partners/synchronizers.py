@@ -1,3 +1,4 @@
+import hashlib
 import json
 import logging
 from datetime import datetime
@@ -7,6 +8,7 @@ from typing import Optional, Tuple
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import connection, transaction
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
 import requests
@@ -18,13 +20,19 @@ from unicef_vision.utils import comp_decimals
 
 from etools.applications.environment.helpers import tenant_switch_is_active
 from etools.applications.organizations.models import Organization
-from etools.applications.partners.models import Intervention, PartnerOrganization, PlannedEngagement
+from etools.applications.partners.models import (
+    CoreValuesAssessment,
+    Intervention,
+    PartnerOrganization,
+    PlannedEngagement,
+)
 from etools.applications.partners.serializers.exports.vision.interventions_v1 import InterventionSerializer
 from etools.applications.partners.tasks import notify_partner_hidden
 from etools.applications.reports.models import InterventionActivity
 from etools.applications.users.mixins import PARTNER_ACTIVE_GROUPS
 from etools.applications.users.models import Country, Realm
 from etools.applications.vision.synchronizers import VisionDataTenantSynchronizer, VisionSyncLog
+from etools.libraries.views.cache import bump_cache_version
 
 logger = logging.getLogger(__name__)
 
@@ -99,6 +107,16 @@ class PartnerSynchronizer(VisionDataTenantSynchronizer):
         'short_name': 'SEARCH_TERM1',
     }
 
+    BATCH_SIZE = 500
+    ORGANIZATION_SYNC_FIELDS = ['name', 'short_name', 'organization_type', 'cso_type', 'modified']
+    PARTNER_SYNC_FIELDS = [
+        'rating', 'type_of_assessment', 'address', 'city', 'postal_code', 'country', 'phone_number', 'email',
+        'core_values_assessment_date', 'last_assessment_date', 'deleted_flag', 'blocked', 'hidden', 'vision_synced',
+        'highest_risk_rating_name', 'highest_risk_rating_type', 'psea_assessment_date', 'sea_risk_rating_name',
+        'total_ct_cy', 'total_ct_cp', 'net_ct_cy', 'total_ct_ytd', 'reported_cy', 'basis_for_risk_rating',
+        'vision_sync_hash', 'modified',
+    ]
+
     def _filter_records(self, records):
         records = super()._filter_records(records)
 
@@ -150,11 +168,99 @@ class PartnerSynchronizer(VisionDataTenantSynchronizer):
                 return True
         return False
 
-    def _partner_save(self, partner, full_sync=True):
-        processed = 0
+    @staticmethod
+    def get_record_hash(record):
+        return hashlib.md5(json.dumps(record, sort_keys=True, default=str).encode()).hexdigest()
+
+    @staticmethod
+    def _hide_partner(partner, partner_org):
+        partner_org.deleted_flag = bool(partner['MARKED_FOR_DELETION'])
+        partner_org.blocked = bool(partner['POSTING_BLOCK'])
+        partner_org.hidden = True
+
+    def _apply_record(self, partner, org, partner_org, created, new, full_sync=True):
+        """
+        Update the organization and partner instances from the VISION record, without saving them.
+        Returns whether they need to be saved and whether the partner has just been blocked.
+        """
         saving = False
         notify_block = False
 
+        if created or self._changed_fields(org, partner):
+            org.name = partner['VENDOR_NAME']
+            org.short_name = partner['SEARCH_TERM1'] or ''
+            org.organization_type = self.get_partner_type(partner)
+            org.cso_type = self.get_cso_type(partner)
+
+        if new or self._changed_fields(partner_org, partner):
+            partner_org.rating = self.get_partner_rating(partner)
+            partner_org.type_of_assessment = self.get_type_of_assessment(partner)
+            partner_org.address = partner.get('STREET', '')
+            partner_org.city = partner.get('CITY', '')
+            partner_org.postal_code = partner.get('POSTAL_CODE', '')
+            partner_org.country = partner['COUNTRY']
+            partner_org.phone_number = partner.get('PHONE_NUMBER', '')
+            partner_org.email = partner.get('EMAIL', '')
+            partner_org.core_values_assessment_date = datetime.strptime(
+                partner['CORE_VALUE_ASSESSMENT_DT'],
+                '%d-%b-%y').date() if partner['CORE_VALUE_ASSESSMENT_DT'] else None
+            partner_org.last_assessment_date = datetime.strptime(
+                partner['DATE_OF_ASSESSMENT'], '%d-%b-%y') if partner["DATE_OF_ASSESSMENT"] else None
+
+            partner_org.deleted_flag = bool(partner['MARKED_FOR_DELETION'])
+            posting_block = bool(partner['POSTING_BLOCK'])
+
+            if posting_block and not partner_org.blocked:  # i'm blocking the partner now
+                notify_block = True
+            partner_org.blocked = posting_block
+
+            partner_org.hidden = partner_org.deleted_flag or partner_org.blocked or partner_org.manually_blocked
+            partner_org.vision_synced = True
+
+            partner_org.highest_risk_rating_name = self.get_partner_higest_rating(partner)
+            partner_org.highest_risk_rating_type = partner.get("HIGEST_RISK_RATING_TYPE", "")
+            partner_org.psea_assessment_date = datetime.strptime(
+                partner['PSEA_ASSESSMENT_DATE'], INSIGHT_DATE_FORMAT) if partner['PSEA_ASSESSMENT_DATE'] else None
+            partner_org.sea_risk_rating_name = partner["SEA_RISK_RATING_NAME"] \
+                if partner["SEA_RISK_RATING_NAME"] else ''
+            saving = True
+
+        if full_sync and (
+                partner_org.total_ct_cp is None or
+                partner_org.total_ct_cy is None or
+                partner_org.net_ct_cy is None or
+                partner_org.total_ct_ytd is None or
+                partner_org.reported_cy is None or
+                not comp_decimals(partner_org.total_ct_cp, Decimal(partner['TOTAL_CASH_TRANSFERRED_CP'])) or
+                not comp_decimals(partner_org.total_ct_cy, Decimal(partner['TOTAL_CASH_TRANSFERRED_CY'])) or
+                not comp_decimals(partner_org.net_ct_cy, Decimal(partner['NET_CASH_TRANSFERRED_CY'])) or
+                not comp_decimals(partner_org.total_ct_ytd, Decimal(partner['TOTAL_CASH_TRANSFERRED_YTD'])) or
+                not comp_decimals(partner_org.reported_cy, Decimal(partner['REPORTED_CY']))):
+
+            partner_org.total_ct_cy = partner['TOTAL_CASH_TRANSFERRED_CY']
+            partner_org.total_ct_cp = partner['TOTAL_CASH_TRANSFERRED_CP']
+            partner_org.net_ct_cy = partner['NET_CASH_TRANSFERRED_CY']
+            partner_org.total_ct_ytd = partner['TOTAL_CASH_TRANSFERRED_YTD']
+            partner_org.reported_cy = partner['REPORTED_CY']
+
+            saving = True
+            logger.debug('sums changed', partner_org)
+
+        if saving:
+            # clear basis_for_risk_rating in certain cases
+            if partner_org.basis_for_risk_rating and (
+                    partner_org.type_of_assessment.upper() in [PartnerOrganization.HIGH_RISK_ASSUMED,
+                                                               PartnerOrganization.LOW_RISK_ASSUMED] or (
+                    partner_org.rating == PartnerOrganization.RATING_NOT_REQUIRED and
+                    partner_org.type_of_assessment == PartnerOrganization.MICRO_ASSESSMENT)
+            ):
+                partner_org.basis_for_risk_rating = ''
+
+        return saving, notify_block
+
+    def _partner_save(self, partner, full_sync=True):
+        processed = 0
+
         try:
             org, created = Organization.objects.get_or_create(vendor_number=partner['VENDOR_CODE'])
             partner_org, new = PartnerOrganization.objects.get_or_create(organization=org)
@@ -165,83 +271,16 @@ class PartnerSynchronizer(VisionDataTenantSynchronizer):
                 ))
 
                 if partner_org.id:
-                    partner_org.deleted_flag = bool(partner['MARKED_FOR_DELETION'])
-                    partner_org.blocked = bool(partner['POSTING_BLOCK'])
-                    partner_org.hidden = True
+                    self._hide_partner(partner, partner_org)
                     partner_org.save()
                 return processed
 
-            if created or self._changed_fields(org, partner):
-                org.name = partner['VENDOR_NAME']
-                org.short_name = partner['SEARCH_TERM1'] or ''
-                org.organization_type = self.get_partner_type(partner)
-                org.cso_type = self.get_cso_type(partner)
-
-            if new or self._changed_fields(partner_org, partner):
-                partner_org.rating = self.get_partner_rating(partner)
-                partner_org.type_of_assessment = self.get_type_of_assessment(partner)
-                partner_org.address = partner.get('STREET', '')
-                partner_org.city = partner.get('CITY', '')
-                partner_org.postal_code = partner.get('POSTAL_CODE', '')
-                partner_org.country = partner['COUNTRY']
-                partner_org.phone_number = partner.get('PHONE_NUMBER', '')
-                partner_org.email = partner.get('EMAIL', '')
-                partner_org.core_values_assessment_date = datetime.strptime(
-                    partner['CORE_VALUE_ASSESSMENT_DT'],
-                    '%d-%b-%y') if partner['CORE_VALUE_ASSESSMENT_DT'] else None
-                partner_org.last_assessment_date = datetime.strptime(
-                    partner['DATE_OF_ASSESSMENT'], '%d-%b-%y') if partner["DATE_OF_ASSESSMENT"] else None
-
-                partner_org.deleted_flag = bool(partner['MARKED_FOR_DELETION'])
-                posting_block = bool(partner['POSTING_BLOCK'])
-
-                if posting_block and not partner_org.blocked:  # i'm blocking the partner now
-                    notify_block = True
-                partner_org.blocked = posting_block
-
-                partner_org.hidden = partner_org.deleted_flag or partner_org.blocked or partner_org.manually_blocked
-                partner_org.vision_synced = True
-
-                partner_org.highest_risk_rating_name = self.get_partner_higest_rating(partner)
-                partner_org.highest_risk_rating_type = partner.get("HIGEST_RISK_RATING_TYPE", "")
-                partner_org.psea_assessment_date = datetime.strptime(
-                    partner['PSEA_ASSESSMENT_DATE'], INSIGHT_DATE_FORMAT) if partner['PSEA_ASSESSMENT_DATE'] else None
-                partner_org.sea_risk_rating_name = partner["SEA_RISK_RATING_NAME"] \
-                    if partner["SEA_RISK_RATING_NAME"] else ''
-                saving = True
-
-            if full_sync and (
-                    partner_org.total_ct_cp is None or
-                    partner_org.total_ct_cy is None or
-                    partner_org.net_ct_cy is None or
-                    partner_org.total_ct_ytd is None or
-                    partner_org.reported_cy is None or
-                    not comp_decimals(partner_org.total_ct_cp, Decimal(partner['TOTAL_CASH_TRANSFERRED_CP'])) or
-                    not comp_decimals(partner_org.total_ct_cy, Decimal(partner['TOTAL_CASH_TRANSFERRED_CY'])) or
-                    not comp_decimals(partner_org.net_ct_cy, Decimal(partner['NET_CASH_TRANSFERRED_CY'])) or
-                    not comp_decimals(partner_org.total_ct_ytd, Decimal(partner['TOTAL_CASH_TRANSFERRED_YTD'])) or
-                    not comp_decimals(partner_org.reported_cy, Decimal(partner['REPORTED_CY']))):
-
-                partner_org.total_ct_cy = partner['TOTAL_CASH_TRANSFERRED_CY']
-                partner_org.total_ct_cp = partner['TOTAL_CASH_TRANSFERRED_CP']
-                partner_org.net_ct_cy = partner['NET_CASH_TRANSFERRED_CY']
-                partner_org.total_ct_ytd = partner['TOTAL_CASH_TRANSFERRED_YTD']
-                partner_org.reported_cy = partner['REPORTED_CY']
-
-                saving = True
-                logger.debug('sums changed', partner_org)
+            saving, notify_block = self._apply_record(partner, org, partner_org, created, new, full_sync=full_sync)
 
             if saving:
                 logger.debug('Updating Partner', partner_org)
-
-                # clear basis_for_risk_rating in certain cases
-                if partner_org.basis_for_risk_rating and (
-                        partner_org.type_of_assessment.upper() in [PartnerOrganization.HIGH_RISK_ASSUMED,
-                                                                   PartnerOrganization.LOW_RISK_ASSUMED] or (
-                        partner_org.rating == PartnerOrganization.RATING_NOT_REQUIRED and
-                        partner_org.type_of_assessment == PartnerOrganization.MICRO_ASSESSMENT)
-                ):
-                    partner_org.basis_for_risk_rating = ''
+                # the record is applied partially, so it can't be skipped on the next full sync
+                partner_org.vision_sync_hash = ''
                 org.save()
                 partner_org.save()
 
@@ -266,12 +305,125 @@ class PartnerSynchronizer(VisionDataTenantSynchronizer):
 
         return processed
 
+    def _save_batch(self, records):
+        """
+        Save a batch of records with a constant number of queries: organizations and partners are fetched
+        by vendor number at once, records unchanged since the last sync are skipped by their hash
+        and the changes are written with bulk queries.
+        """
+        # VISION returns a single record by vendor; if not, the last one is kept as with one by one saving
+        records = {record['VENDOR_CODE']: record for record in records}
+        organizations = Organization.objects.in_bulk(list(records), field_name='vendor_number')
+        partners = {
+            partner_org.organization.vendor_number: partner_org
+            for partner_org in PartnerOrganization.all_partners.filter(organization__vendor_number__in=list(records))
+        }
+
+        processed = 0
+        now = timezone.now()
+        new_organizations, updated_organizations = [], []
+        new_partners, updated_partners = [], []
+        synced_partners, engaged_partners, blocked_partners, deleted_partners = [], [], [], []
+
+        for vendor_number, partner in records.items():
+            record_hash = self.get_record_hash(partner)
+            partner_org = partners.get(vendor_number)
+            if partner_org and partner_org.vision_sync_hash == record_hash:
+                if self.get_partner_type(partner):
+                    processed += 1
+                continue
+
+            org = partner_org.organization if partner_org else organizations.get(vendor_number)
+            created = org is None
+            new = partner_org is None
+            if created:
+                org = Organization(vendor_number=vendor_number)
+            if new:
+                partner_org = PartnerOrganization(organization=org)
+
+            try:
+                if self.get_partner_type(partner):
+                    saving, notify_block = self._apply_record(partner, org, partner_org, created, new)
+                else:
+                    logger.info('Partner {} skipped, because OrganizationType is {}'.format(
+                        partner['VENDOR_NAME'], partner['PARTNER_TYPE_DESC']
+                    ))
+                    self._hide_partner(partner, partner_org)
+                    partner_org.modified = now
+                    saving, notify_block = False, False
+            except Exception:
+                logger.exception('Exception occurred during Partner Sync')
+                continue
+
+            partner_org.vision_sync_hash = record_hash
+            if saving:
+                org.modified = now
+                partner_org.modified = now
+
+            if created:
+                new_organizations.append(org)
+            elif saving:
+                updated_organizations.append(org)
+            if new:
+                new_partners.append(partner_org)
+            else:
+                updated_partners.append(partner_org)
+
+            if self.get_partner_type(partner):
+                synced_partners.append(partner_org)
+                if new:
+                    engaged_partners.append(partner_org)
+                if notify_block:
+                    blocked_partners.append(partner_org)
+                if saving and partner_org.deleted_flag:
+                    deleted_partners.append(partner_org)
+                processed += 1
+
+        with transaction.atomic():
+            Organization.objects.bulk_create(new_organizations)
+            Organization.objects.bulk_update(updated_organizations, self.ORGANIZATION_SYNC_FIELDS)
+            PartnerOrganization.all_partners.bulk_create(new_partners)
+            PartnerOrganization.all_partners.bulk_update(updated_partners, self.PARTNER_SYNC_FIELDS)
+
+            PlannedEngagement.objects.bulk_create([
+                PlannedEngagement(partner=partner_org) for partner_org in engaged_partners
+            ])
+            self._update_core_values_assessments(synced_partners)
+
+            for partner_org in deleted_partners:
+                self.deactivate_staff_members(partner_org)
+
+        for partner_org in blocked_partners:
+            notify_partner_hidden.delay(partner_org.pk, connection.schema_name)
+
+        if new_organizations or updated_organizations or new_partners or updated_partners:
+            # bulk queries don't send the signals invalidating the cached dropdowns
+            bump_cache_version('pmp-dropdowns')
+
+        return processed
+
+    @staticmethod
+    def _update_core_values_assessments(partners):
+        # if date has changed, archive old and create a new one not archived
+        existing = set(CoreValuesAssessment.objects.filter(
+            partner__in=partners,
+        ).values_list('partner_id', 'date'))
+        outdated = [
+            partner_org for partner_org in partners
+            if (partner_org.pk, partner_org.core_values_assessment_date) not in existing
+        ]
+        CoreValuesAssessment.objects.filter(partner__in=outdated).update(archived=True)
+        CoreValuesAssessment.objects.bulk_create([
+            CoreValuesAssessment(partner=partner_org, date=partner_org.core_values_assessment_date, archived=False)
+            for partner_org in outdated
+        ])
+
     def _save_records(self, records):
         processed = 0
         filtered_records = self._filter_records(records)
 
-        for partner in filtered_records:
-            processed += self._partner_save(partner)
+        for i in range(0, len(filtered_records), self.BATCH_SIZE):
+            processed += self._save_batch(filtered_records[i:i + self.BATCH_SIZE])
 
         return processed
 
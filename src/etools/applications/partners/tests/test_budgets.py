@@ -0,0 +1,98 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.management import call_command
+
+from etools.applications.core.tests.cases import BaseTenantTestCase
+from etools.applications.partners.budgets import budget_totals_deferred, get_budget_totals, recalculate_budget_totals
+from etools.applications.partners.models import InterventionBudget, InterventionSupplyItem
+from etools.applications.partners.tests.factories import (
+    InterventionFactory,
+    InterventionResultLinkFactory,
+    InterventionSupplyItemFactory,
+)
+from etools.applications.reports.tests.factories import InterventionActivityFactory, LowerResultFactory
+
+
+class TestBudgetTotals(BaseTenantTestCase):
+    def setUp(self):
+        super().setUp()
+        self.intervention = InterventionFactory()
+        mgmt_budget = self.intervention.management_budgets
+        mgmt_budget.act1_unicef = 20
+        mgmt_budget.act1_partner = 10
+        mgmt_budget.save()
+        self.lower_result = LowerResultFactory(
+            result_link=InterventionResultLinkFactory(intervention=self.intervention),
+        )
+
+    def test_get_budget_totals(self):
+        InterventionActivityFactory(result=self.lower_result, unicef_cash=100, cso_cash=200)
+        InterventionActivityFactory(result=self.lower_result, unicef_cash=1000, cso_cash=1000, is_active=False)
+        InterventionSupplyItemFactory(intervention=self.intervention, unit_number=6, unit_price=5)
+        InterventionSupplyItemFactory(
+            intervention=self.intervention, unit_number=1, unit_price=3,
+            provided_by=InterventionSupplyItem.PROVIDED_BY_PARTNER,
+        )
+        other_intervention = InterventionFactory()
+
+        with self.assertNumQueries(3):
+            totals = get_budget_totals([self.intervention.pk, other_intervention.pk])
+
+        self.assertEqual(totals[self.intervention.pk], {
+            'activities_unicef_cash': 100,
+            'activities_cso_cash': 200,
+            'management_unicef_total': 20,
+            'management_partner_total': 10,
+            'unicef_supply': 30,
+            'partner_supply': 3,
+        })
+        self.assertEqual(totals[other_intervention.pk]['activities_unicef_cash'], 0)
+        self.assertEqual(totals[other_intervention.pk]['unicef_supply'], 0)
+
+    def test_deferred(self):
+        budget = self.intervention.planned_budget
+
+        with patch.object(InterventionBudget, 'save', autospec=True, side_effect=InterventionBudget.save) as save:
+            with budget_totals_deferred():
+                for __ in range(3):
+                    InterventionActivityFactory(result=self.lower_result, unicef_cash=10, cso_cash=20)
+                    InterventionSupplyItemFactory(intervention=self.intervention, unit_number=1, unit_price=2)
+                with budget_totals_deferred():
+                    InterventionActivityFactory(result=self.lower_result, unicef_cash=10, cso_cash=20)
+                self.assertEqual(save.call_count, 0)
+
+        self.assertEqual(save.call_count, 1)
+        budget.refresh_from_db()
+        self.assertEqual(budget.unicef_cash_local, 10 * 4 + 20)
+        self.assertEqual(budget.partner_contribution_local, 20 * 4 + 10)
+        self.assertEqual(budget.in_kind_amount_local, 6)
+
+    def test_deferred_exception(self):
+        with patch.object(InterventionBudget, 'save') as save:
+            with self.assertRaises(ValueError):
+                with budget_totals_deferred():
+                    InterventionActivityFactory(result=self.lower_result)
+                    raise ValueError
+        save.assert_not_called()
+
+    def test_recalculate_budget_totals(self):
+        InterventionActivityFactory(result=self.lower_result, unicef_cash=100, cso_cash=200)
+        InterventionFactory()
+        InterventionBudget.objects.filter(intervention=self.intervention).update(
+            unicef_cash_local=0, total_local=0, programme_effectiveness=0,
+        )
+
+        self.assertEqual(recalculate_budget_totals(batch_size=1), 1)
+        budget = InterventionBudget.objects.get(intervention=self.intervention)
+        self.assertEqual(budget.unicef_cash_local, 120)
+        self.assertEqual(budget.total_local, 120 + 210)
+        self.assertEqual(budget.programme_effectiveness, Decimal('16.67'))
+
+        # nothing changed
+        self.assertEqual(recalculate_budget_totals(), 0)
+
+    def test_command(self):
+        InterventionBudget.objects.filter(intervention=self.intervention).update(unicef_cash_local=0)
+        call_command('recalculate_budget_totals', schema=self.tenant.schema_name)
+        self.assertEqual(InterventionBudget.objects.get(intervention=self.intervention).unicef_cash_local, 20)
@@ -1,7 +1,9 @@
 import datetime
+from io import BytesIO
 
 from django.urls import reverse
 
+from openpyxl import load_workbook
 from rest_framework import status
 from tablib.core import Dataset
 from unicef_locations.tests.factories import LocationFactory
@@ -121,7 +123,7 @@ class TestInterventionModelExport(BaseInterventionModelExportTestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        dataset = Dataset().load(response.content.decode('utf-8'), 'csv')
+        dataset = Dataset().load(b''.join(response.streaming_content).decode('utf-8'), 'csv')
         self.assertEqual(dataset.height, 1)
         self.assertEqual(dataset._get_headers(), [
             "Partner",
@@ -244,7 +246,7 @@ class TestInterventionModelExport(BaseInterventionModelExportTestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        dataset = Dataset().load(response.content.decode('utf-8'), 'csv')
+        dataset = Dataset().load(b''.join(response.streaming_content).decode('utf-8'), 'csv')
         country_programmes_idx = dataset._get_headers().index('Country Programmes')
         self.assertEqual(dataset[0][country_programmes_idx], self.intervention.agreement.country_programme.name)
 
@@ -257,11 +259,25 @@ class TestInterventionModelExport(BaseInterventionModelExportTestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        dataset = Dataset().load(response.content.decode('utf-8'), 'csv')
+        dataset = Dataset().load(b''.join(response.streaming_content).decode('utf-8'), 'csv')
         self.assertEqual(dataset.height, 1)
         self.assertEqual(len(dataset._get_headers()), 104)
         self.assertEqual(len(dataset[0]), 104)
 
+    def test_xlsx_export_api(self):
+        response = self.forced_auth_req(
+            'get',
+            reverse('partners_api:intervention-list'),
+            user=self.unicef_staff,
+            data={"format": "xlsx"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('.xlsx', response['Content-Disposition'])
+        rows = list(load_workbook(BytesIO(b''.join(response.streaming_content))).active.values)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(len(rows[0]), 104)
+
 
 class TestInterventionAmendmentModelExport(BaseInterventionModelExportTestCase):
     def setUp(self):
@@ -108,7 +108,7 @@ class TestPartnerOrganizationModelExport(PartnerModelExportTestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        dataset = Dataset().load(response.content.decode('utf-8-sig'), 'csv')
+        dataset = Dataset().load(b''.join(response.streaming_content).decode('utf-8-sig'), 'csv')
         self.assertEqual(dataset.height, 1)
         self.assertEqual(dataset._get_headers(), [
             'Vendor Number',
@@ -190,7 +190,7 @@ class TestPartnerOrganizationModelExport(PartnerModelExportTestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        dataset = Dataset().load(response.content.decode('utf-8'), 'csv')
+        dataset = Dataset().load(b''.join(response.streaming_content).decode('utf-8'), 'csv')
         self.assertEqual(dataset.height, 1)
         self.assertEqual(len(dataset._get_headers()), 55)
         self.assertEqual(len(dataset[0]), 55)
@@ -210,7 +210,7 @@ class TestPartnerOrganizationModelExport(PartnerModelExportTestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        dataset = Dataset().load(response.content.decode('utf-8'), 'csv')
+        dataset = Dataset().load(b''.join(response.streaming_content).decode('utf-8'), 'csv')
         self.assertEqual(dataset.height, 2)
         self.assertEqual(len(dataset._get_headers()), 55)
         self.assertEqual(len(dataset[0]), 55)
@@ -224,7 +224,7 @@ class TestPartnerOrganizationModelExport(PartnerModelExportTestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        dataset = Dataset().load(response.content.decode('utf-8'), 'csv')
+        dataset = Dataset().load(b''.join(response.streaming_content).decode('utf-8'), 'csv')
         self.assertEqual(dataset.height, 1)
         self.assertEqual(len(dataset._get_headers()), 55)
         self.assertEqual(len(dataset[0]), 55)
@@ -107,7 +107,7 @@ class TestModelExport(BaseTenantTestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        dataset = Dataset().load(response.content.decode('utf-8'), 'csv')
+        dataset = Dataset().load(b''.join(response.streaming_content).decode('utf-8'), 'csv')
         self.assertEqual(dataset.height, 1)
 
         self.assertEqual(dataset._get_headers(), [
@@ -237,7 +237,7 @@ class TestModelExport(BaseTenantTestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        dataset = Dataset().load(response.content.decode('utf-8'), 'csv')
+        dataset = Dataset().load(b''.join(response.streaming_content).decode('utf-8'), 'csv')
         self.assertEqual(dataset.height, 1)
 
         self.assertEqual(dataset._get_headers(), [
@@ -416,7 +416,7 @@ class TestModelExport(BaseTenantTestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        dataset = Dataset().load(response.content.decode('utf-8-sig'), 'csv')
+        dataset = Dataset().load(b''.join(response.streaming_content).decode('utf-8-sig'), 'csv')
         self.assertEqual(dataset.height, 2)
         self.assertEqual(dataset._get_headers(), [
             'Vendor Number',
@@ -0,0 +1,122 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from unicef_snapshot.models import Activity
+
+from etools.applications.core.tests.cases import BaseTenantTestCase
+from etools.applications.partners.amendment_utils import (
+    full_snapshot_instance,
+    INTERVENTION_FULL_SNAPSHOT_IGNORED_FIELDS,
+    INTERVENTION_FULL_SNAPSHOT_RELATED_FIELDS,
+)
+from etools.applications.partners.models import Intervention
+from etools.applications.partners.serializers.intervention_snapshot import (
+    create_change_dict_recursive,
+    intervention_snapshot,
+)
+from etools.applications.partners.tests.factories import (
+    InterventionFactory,
+    InterventionResultLinkFactory,
+    InterventionSupplyItemFactory,
+)
+from etools.applications.reports.tests.factories import AppliedIndicatorFactory, LowerResultFactory, SectionFactory
+from etools.applications.users.tests.factories import UserFactory
+
+
+class TestInterventionSnapshot(BaseTenantTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory(is_staff=True)
+
+    def create_intervention(self, results_count):
+        intervention = InterventionFactory()
+        for __ in range(results_count):
+            result_link = InterventionResultLinkFactory(intervention=intervention)
+            lower_result = LowerResultFactory(result_link=result_link)
+            AppliedIndicatorFactory(lower_result=lower_result)
+        return intervention
+
+    def full_snapshot(self, intervention):
+        return full_snapshot_instance(
+            Intervention.objects.full_snapshot_qs().get(pk=intervention.pk),
+            INTERVENTION_FULL_SNAPSHOT_RELATED_FIELDS,
+            INTERVENTION_FULL_SNAPSHOT_IGNORED_FIELDS,
+        )
+
+    def update_supply_item(self, intervention, supply_item, unit_price):
+        with intervention_snapshot(intervention, self.user):
+            supply_item.unit_price = unit_price
+            supply_item.save()
+
+    def test_change_same_as_full_snapshot(self):
+        intervention = self.create_intervention(2)
+        supply_item = InterventionSupplyItemFactory(intervention=intervention, unit_number=10, unit_price=2)
+        before = self.full_snapshot(intervention)
+
+        self.update_supply_item(intervention, supply_item, 8)
+
+        activity = Activity.objects.get(target_object_id=intervention.pk)
+        self.assertEqual(activity.action, Activity.UPDATE)
+        self.assertEqual(activity.by_user, self.user)
+        self.assertEqual(activity.change, create_change_dict_recursive(before, self.full_snapshot(intervention)))
+        self.assertIn('supply_items', activity.change)
+        self.assertIn('planned_budget', activity.change)
+        self.assertIn('supply_items', activity.data)
+        self.assertNotIn('result_links', activity.data)
+
+    def test_intervention_fields_and_many_to_many(self):
+        intervention = self.create_intervention(1)
+        section = SectionFactory()
+        before = self.full_snapshot(intervention)
+
+        with intervention_snapshot(intervention, self.user):
+            intervention.title = 'New title'
+            intervention.save()
+            intervention.sections.add(section)
+
+        activity = Activity.objects.get(target_object_id=intervention.pk)
+        self.assertEqual(activity.change, create_change_dict_recursive(before, self.full_snapshot(intervention)))
+        self.assertEqual(activity.change['title']['after'], 'New title')
+        self.assertIn('sections', activity.change)
+
+    def test_delete(self):
+        intervention = self.create_intervention(2)
+        lower_result = intervention.result_links.first().ll_results.first()
+        before = self.full_snapshot(intervention)
+
+        with intervention_snapshot(intervention, self.user):
+            lower_result.delete()
+
+        activity = Activity.objects.get(target_object_id=intervention.pk)
+        self.assertEqual(activity.change, create_change_dict_recursive(before, self.full_snapshot(intervention)))
+        self.assertIn('result_links', activity.change)
+
+    def test_no_change(self):
+        intervention = self.create_intervention(1)
+        supply_item = InterventionSupplyItemFactory(intervention=intervention, unit_number=10, unit_price=2)
+
+        self.update_supply_item(intervention, supply_item, 2)
+
+        self.assertFalse(Activity.objects.filter(target_object_id=intervention.pk).exists())
+
+    def test_error_inside_block(self):
+        intervention = self.create_intervention(1)
+
+        with self.assertRaises(ValueError):
+            with intervention_snapshot(intervention, self.user):
+                intervention.title = 'New title'
+                intervention.save()
+                raise ValueError
+
+        self.assertFalse(Activity.objects.filter(target_object_id=intervention.pk).exists())
+
+    def test_queries_independent_of_intervention_size(self):
+        def count_queries(results_count):
+            intervention = self.create_intervention(results_count)
+            supply_item = InterventionSupplyItemFactory(intervention=intervention, unit_number=10, unit_price=2)
+            with CaptureQueriesContext(connection) as queries:
+                self.update_supply_item(intervention, supply_item, 8)
+            return len(queries)
+
+        self.assertEqual(count_queries(1), count_queries(5))
@@ -1683,7 +1683,8 @@ class TestInterventionBudget(BaseTenantTestCase):
         pd_output = LowerResultFactory(result_link=result_link)
         activity = InterventionActivityFactory(result=pd_output)
         InterventionActivityItemFactory(activity=activity)
-        with self.assertNumQueries(6):
+        # one aggregate query per budget component
+        with self.assertNumQueries(3):
             intervention.planned_budget.calc_totals(save=False)
 
 
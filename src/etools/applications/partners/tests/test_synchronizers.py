@@ -1,8 +1,12 @@
 import datetime
+import json
+import os
 
 from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from etools.applications.core.tests.cases import BaseTenantTestCase
+from etools.applications.organizations.models import Organization
 from etools.applications.organizations.tests.factories import OrganizationFactory
 from etools.applications.partners import synchronizers
 from etools.applications.partners.models import PartnerOrganization
@@ -188,6 +192,71 @@ class TestPartnerSynchronizer(BaseTenantTestCase):
         response = self.adapter._save_records([self.data])
         self.assertEqual(response, 1)
 
+    def test_save_records_unchanged_skipped(self):
+        """Check that records unchanged since the last sync are not applied again"""
+        self.assertEqual(self.adapter._save_records([self.data]), 1)
+        partner = PartnerOrganization.objects.get(vendor_number=self.data["VENDOR_CODE"])
+        self.assertEqual(partner.vision_sync_hash, self.adapter.get_record_hash(self.data))
+        Organization.objects.filter(pk=partner.organization_id).update(name="Local")
+
+        self.assertEqual(self.adapter._save_records([self.data]), 1)
+        self.assertEqual(PartnerOrganization.objects.get(pk=partner.pk).name, "Local")
+
+        self.data["VENDOR_NAME"] = "ACME Ltd."
+        self.assertEqual(self.adapter._save_records([self.data]), 1)
+        self.assertEqual(PartnerOrganization.objects.get(pk=partner.pk).name, "ACME Ltd.")
+
+    def test_save_records_queries(self):
+        """Check that the number of queries doesn't depend on the number of records"""
+        def records(prefix, count, **kwargs):
+            return [dict(self.data, VENDOR_CODE='{}{}'.format(prefix, i), **kwargs) for i in range(count)]
+
+        with CaptureQueriesContext(connection) as create_one:
+            self.adapter._save_records(records('A', 1))
+        with CaptureQueriesContext(connection) as create_many:
+            self.adapter._save_records(records('B', 10))
+        self.assertEqual(len(create_one), len(create_many))
+
+        with CaptureQueriesContext(connection) as update_one:
+            self.adapter._save_records(records('A', 1, VENDOR_NAME='Updated'))
+        with CaptureQueriesContext(connection) as update_many:
+            self.adapter._save_records(records('B', 10, VENDOR_NAME='Updated'))
+        self.assertEqual(len(update_one), len(update_many))
+        self.assertEqual(PartnerOrganization.objects.filter(organization__name='Updated').count(), 11)
+
+    def test_save_records_vision_fixture(self):
+        json_filename = os.path.join(os.path.dirname(__file__), 'data', 'vision_partners.json')
+        with open(json_filename) as f:
+            records = self.adapter._convert_records(json.load(f))
+
+        self.assertEqual(self.adapter._save_records(records), 3)
+        partner_qs = PartnerOrganization.objects.filter(vendor_number__startswith='25002000')
+        self.assertEqual(partner_qs.count(), 4)
+
+        partner = partner_qs.get(vendor_number='2500200001')
+        self.assertEqual(partner.name, 'ASSOCIATION FOR COMMUNITY DEVELOPMENT')
+        self.assertEqual(partner.cso_type, 'National')
+        self.assertEqual(partner.total_ct_cp, 1250000)
+        self.assertTrue(partner.vision_synced)
+        self.assertTrue(hasattr(partner, 'planned_engagement'))
+        self.assertEqual(
+            list(partner.core_values_assessments.values_list('date', 'archived')),
+            [(datetime.date(2022, 1, 10), False)],
+        )
+
+        supplier = partner_qs.get(vendor_number='2500200004')
+        self.assertIsNone(supplier.name)
+        self.assertTrue(supplier.hidden)
+        self.assertTrue(supplier.blocked)
+
+        # a new core values assessment date archives the previous assessment
+        records[0]['CORE_VALUE_ASSESSMENT_DT'] = '10-Jan-24'
+        self.assertEqual(self.adapter._save_records(records), 3)
+        self.assertEqual(
+            list(partner.core_values_assessments.order_by('date').values_list('date', 'archived')),
+            [(datetime.date(2022, 1, 10), True), (datetime.date(2024, 1, 10), False)],
+        )
+
 
 class TestDCTSynchronizer(BaseTenantTestCase):
     @classmethod
@@ -609,3 +609,119 @@ class TestPermissions(BaseTestCase):
             data={'name': 'test', 'context_details': 'test'}
         )
         self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+
+class TestWorkplan(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('partners:intervention-workplan', args=[self.intervention.pk])
+
+    def get_item_data(self, name, unicef_cash, cso_cash, **kwargs):
+        return {
+            'name': name, 'unit': 'item', 'no_units': 1, 'unit_price': str(unicef_cash + cso_cash),
+            'unicef_cash': str(unicef_cash), 'cso_cash': str(cso_cash), **kwargs,
+        }
+
+    def test_retrieve(self):
+        item = InterventionActivityItemFactory(activity=self.activity)
+        response = self.forced_auth_req('get', self.url, user=self.user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data['results'][0]['id'], self.pd_output.pk)
+        self.assertEqual(response.data['results'][0]['activities'][0]['id'], self.activity.pk)
+        self.assertEqual(response.data['results'][0]['activities'][0]['items'][0]['id'], item.pk)
+
+    def test_update(self):
+        kept_item = InterventionActivityItemFactory(activity=self.activity, unicef_cash=1, cso_cash=1)
+        removed_item = InterventionActivityItemFactory(activity=self.activity)
+        time_frame = self.intervention.quarters.first()
+
+        response = self.forced_auth_req(
+            'put', self.url,
+            user=self.user,
+            data={'results': [{
+                'id': self.pd_output.pk,
+                'activities': [
+                    {
+                        'id': self.activity.pk,
+                        'name': 'updated',
+                        'items': [
+                            self.get_item_data('new', 3, 4),
+                            self.get_item_data('kept', 5, 6, id=kept_item.pk),
+                        ],
+                    },
+                    {
+                        'name': 'new',
+                        'time_frames': [time_frame.pk],
+                        'items': [self.get_item_data('first', 1, 2), self.get_item_data('second', 3, 0)],
+                    },
+                ],
+            }]},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertFalse(InterventionActivityItem.objects.filter(pk=removed_item.pk).exists())
+
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.name, 'updated')
+        self.assertEqual(self.activity.unicef_cash, 8)
+        self.assertEqual(self.activity.cso_cash, 10)
+        self.assertEqual(
+            [(item.name, item.code) for item in self.activity.items.order_by('code')],
+            [('kept', f'{self.activity.code}.1'), ('new', f'{self.activity.code}.2')],
+        )
+
+        new_activity = self.pd_output.activities.exclude(pk=self.activity.pk).get()
+        self.assertEqual(new_activity.code, f'{self.pd_output.code}.2')
+        self.assertEqual(new_activity.unicef_cash, 4)
+        self.assertEqual(new_activity.cso_cash, 2)
+        self.assertEqual(list(new_activity.time_frames.all()), [time_frame])
+        self.assertEqual(
+            list(new_activity.items.values_list('code', flat=True)),
+            [f'{new_activity.code}.1', f'{new_activity.code}.2'],
+        )
+
+        self.intervention.refresh_from_db()
+        self.assertEqual(
+            response.data['intervention']['planned_budget']['total_cash_local'],
+            str(self.intervention.planned_budget.total_cash_local()),
+        )
+
+    def test_update_activity_of_other_intervention(self):
+        activity = InterventionActivityFactory()
+        response = self.forced_auth_req(
+            'put', self.url,
+            user=self.user,
+            data={'results': [{'id': self.pd_output.pk, 'activities': [{'id': activity.pk, 'name': 'test'}]}]},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+
+    def test_update_in_signature(self):
+        self.intervention.status = Intervention.SIGNATURE
+        self.intervention.save()
+
+        response = self.forced_auth_req(
+            'put', self.url,
+            user=self.user,
+            data={'results': [{'id': self.pd_output.pk, 'activities': [{'name': 'test'}]}]},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+
+    def test_update_queries_independent_of_size(self):
+        def count_workplan_queries(activities_count):
+            pd_output = LowerResultFactory(result_link=self.result_link)
+            with CaptureQueries() as cq:
+                response = self.forced_auth_req(
+                    'put', self.url,
+                    user=self.user,
+                    data={'results': [{
+                        'id': pd_output.pk,
+                        'activities': [
+                            {'name': str(i), 'items': [self.get_item_data(str(j), 1, 1) for j in range(3)]}
+                            for i in range(activities_count)
+                        ],
+                    }]},
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+            return len([query for query in cq.queries if 'reports_interventionactivity' in query['sql']])
+
+        self.assertEqual(count_workplan_queries(2), count_workplan_queries(10))
@@ -482,7 +482,7 @@ class TestPartnerOrganizationListViewForCSV(BaseTenantTestCase):
         # but I want to make sure the response looks CSV-ish.
         self.assertEqual(response.get('Content-Disposition'), 'attachment;filename=partner.csv')
 
-        response_content = response.rendered_content.decode('utf-8')
+        response_content = b''.join(response.streaming_content).decode('utf-8')
 
         self.assertIsInstance(response_content, str)
 
@@ -10,6 +10,7 @@ from etools.applications.partners.views.interventions_v3 import (
     InterventionPDOutputsDetailUpdateView,
     InterventionPDOutputsListCreateView,
     InterventionRiskDeleteView,
+    InterventionWorkplanView,
     PMPInterventionAttachmentListCreateView,
     PMPInterventionAttachmentUpdateDeleteView,
     PMPInterventionDeleteView,
@@ -264,6 +265,11 @@ urlpatterns = [
         view=InterventionActivityDetailUpdateView.as_view(),
         name='intervention-activity-detail',
     ),
+    path(
+        'interventions/<int:intervention_pk>/workplan/',
+        view=InterventionWorkplanView.as_view(http_method_names=['get', 'put']),
+        name='intervention-workplan',
+    ),
     path(
         'interventions/<int:intervention_pk>/risks/<int:pk>/',
         view=InterventionRiskDeleteView.as_view(http_method_names=['delete']),
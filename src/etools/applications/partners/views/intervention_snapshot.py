@@ -1,10 +1,4 @@
-from etools.applications.partners.amendment_utils import (
-    full_snapshot_instance,
-    INTERVENTION_FULL_SNAPSHOT_IGNORED_FIELDS,
-    INTERVENTION_FULL_SNAPSHOT_RELATED_FIELDS,
-)
-from etools.applications.partners.models import Intervention
-from etools.applications.partners.serializers.intervention_snapshot import save_snapshot
+from etools.applications.partners.serializers.intervention_snapshot import intervention_snapshot
 
 
 class FullInterventionSnapshotDeleteMixin:
@@ -15,27 +9,8 @@ class FullInterventionSnapshotDeleteMixin:
     def get_intervention(self):
         raise NotImplementedError
 
-    def prefetch_relations(self, instance: object) -> Intervention:
-        return Intervention.objects.full_snapshot_qs().get(pk=instance.pk)
-
     def delete(self, request, *args, **kwargs):
-        target = self.get_intervention()
-        target_before = full_snapshot_instance(
-            self.prefetch_relations(target),
-            INTERVENTION_FULL_SNAPSHOT_RELATED_FIELDS,
-            INTERVENTION_FULL_SNAPSHOT_IGNORED_FIELDS,
-        )
-
-        response = super().delete(request, *args, **kwargs)
-
-        # refresh instance to avoid cached relations
-        target = self.prefetch_relations(target)
-
-        current_obj_dict = full_snapshot_instance(
-            target,
-            INTERVENTION_FULL_SNAPSHOT_RELATED_FIELDS,
-            INTERVENTION_FULL_SNAPSHOT_IGNORED_FIELDS,
-        )
-        save_snapshot(request.user, target, target_before, current_obj_dict)
+        with intervention_snapshot(self.get_intervention(), request.user):
+            response = super().delete(request, *args, **kwargs)
 
         return response
@@ -22,8 +22,8 @@ from rest_framework_csv import renderers as r
 from unicef_restlib.views import QueryStringFilterMixin
 from unicef_snapshot.models import Activity
 
-from etools.applications.core.mixins import ExportModelMixin
-from etools.applications.core.renderers import CSVFlatRenderer
+from etools.applications.core.mixins import ExportModelMixin, StreamingExportMixin
+from etools.applications.core.renderers import CSVFlatRenderer, XLSXRenderer
 from etools.applications.environment.helpers import tenant_switch_is_active
 from etools.applications.partners.exports_v2 import InterventionCSVRenderer, InterventionLocationCSVRenderer
 from etools.applications.partners.filters import (
@@ -96,7 +96,7 @@ class InterventionListBaseView(ValidatorViewMixin, ListCreateAPIView):
         return qs
 
 
-class InterventionListAPIView(QueryStringFilterMixin, ExportModelMixin, InterventionListBaseView):
+class InterventionListAPIView(QueryStringFilterMixin, ExportModelMixin, StreamingExportMixin, InterventionListBaseView):
     """
     Create new Interventions.
     Returns a list of Interventions.
@@ -108,6 +108,7 @@ class InterventionListAPIView(QueryStringFilterMixin, ExportModelMixin, Interven
         JSONRenderer,
         InterventionCSVRenderer,
         CSVFlatRenderer,
+        XLSXRenderer,
     )
 
     search_terms = ('title__icontains', 'agreement__partner__organization__name__icontains', 'number__icontains')
@@ -148,7 +149,7 @@ class InterventionListAPIView(QueryStringFilterMixin, ExportModelMixin, Interven
             if "format" in query_params.keys():
                 if query_params.get("format") == 'csv':
                     return InterventionExportSerializer
-                if query_params.get("format") == 'csv_flat':
+                if query_params.get("format") in ['csv_flat', 'xlsx']:
                     return InterventionExportFlatSerializer
             if "verbosity" in query_params.keys():
                 if query_params.get("verbosity") == 'minimal':
@@ -235,11 +236,12 @@ class InterventionListAPIView(QueryStringFilterMixin, ExportModelMixin, Interven
         query_params = self.request.query_params
         response = super().list(request)
         if "format" in query_params.keys():
-            if query_params.get("format") in ['csv', "csv_flat"]:
+            if query_params.get("format") in ['csv', "csv_flat", "xlsx"]:
                 country = Country.objects.get(schema_name=connection.schema_name)
                 today = '{:%Y_%m_%d}'.format(datetime.date.today())
                 filename = f"PD_budget_as_of_{today}_{country.country_short_code}"
-                response['Content-Disposition'] = f"attachment;filename={filename}.csv"
+                extension = 'xlsx' if query_params.get("format") == 'xlsx' else 'csv'
+                response['Content-Disposition'] = f"attachment;filename={filename}.{extension}"
 
         return response
 
@@ -272,7 +274,7 @@ class InterventionListDashView(InterventionListBaseView):
     def get_queryset(self):
         q = super().get_queryset()
         # if Partnership Manager get all
-        if self.request.user.groups.filter(name='Partnership Manager').exists():
+        if 'Partnership Manager' in self.request.user.group_names:
             return q.all()
 
         return q.filter(
@@ -4,7 +4,7 @@ from copy import copy
 
 from django.conf import settings
 from django.db import transaction, utils
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext as _
 
@@ -29,6 +29,7 @@ from rest_framework.status import is_success
 from rest_framework.views import APIView
 
 from etools.applications.field_monitoring.permissions import IsEditAction, IsReadAction
+from etools.applications.partners.budgets import budget_totals_deferred
 from etools.applications.partners.exports_v2 import InterventionXLSRenderer
 from etools.applications.partners.filters import InterventionEditableByFilter, PartnerNameOrderingFilter
 from etools.applications.partners.models import (
@@ -87,7 +88,10 @@ from etools.applications.partners.views.interventions_v2 import (
 )
 from etools.applications.partners.views.v3 import PMPBaseViewMixin
 from etools.applications.reports.models import InterventionActivity, LowerResult
-from etools.applications.reports.serializers.v2 import InterventionActivityDetailSerializer
+from etools.applications.reports.serializers.v2 import (
+    InterventionActivityDetailSerializer,
+    InterventionWorkplanSerializer,
+)
 from etools.applications.utils.pagination import AppendablePageNumberPagination
 from etools.libraries.djangolib.fields import CURRENCY_LIST
 from etools.libraries.djangolib.utils import get_current_site
@@ -531,34 +535,35 @@ class PMPInterventionSupplyItemUploadView(
                 status.HTTP_400_BAD_REQUEST,
             )
 
-        # update all supply items related to intervention
-        for title, unit_number, unit_price, product_number in file_data:
-            # check if supply item exists
-            supply_qs = InterventionSupplyItem.objects.filter(
-                intervention=intervention,
-                title=title,
-                unit_price=unit_price,
-                provided_by=InterventionSupplyItem.PROVIDED_BY_UNICEF,
-            )
-            if supply_qs.exists():
-                item = supply_qs.get()
-                item.unit_number += unit_number
-                item.save()
-            else:
-                try:
-                    InterventionSupplyItem.objects.create(
-                        intervention=intervention,
-                        title=title,
-                        unit_number=unit_number,
-                        unit_price=unit_price,
-                        unicef_product_number=product_number,
-                        provided_by=InterventionSupplyItem.PROVIDED_BY_UNICEF,
-                    )
-                except utils.DataError as err:
-                    return Response(
-                        {"supply_items_file": f"{product_number}:  {str(err)}"},
-                        status.HTTP_400_BAD_REQUEST,
-                    )
+        # update all supply items related to intervention, budget is recalculated once all items are saved
+        with budget_totals_deferred():
+            for title, unit_number, unit_price, product_number in file_data:
+                # check if supply item exists
+                supply_qs = InterventionSupplyItem.objects.filter(
+                    intervention=intervention,
+                    title=title,
+                    unit_price=unit_price,
+                    provided_by=InterventionSupplyItem.PROVIDED_BY_UNICEF,
+                )
+                if supply_qs.exists():
+                    item = supply_qs.get()
+                    item.unit_number += unit_number
+                    item.save()
+                else:
+                    try:
+                        InterventionSupplyItem.objects.create(
+                            intervention=intervention,
+                            title=title,
+                            unit_number=unit_number,
+                            unit_price=unit_price,
+                            unicef_product_number=product_number,
+                            provided_by=InterventionSupplyItem.PROVIDED_BY_UNICEF,
+                        )
+                    except utils.DataError as err:
+                        return Response(
+                            {"supply_items_file": f"{product_number}:  {str(err)}"},
+                            status.HTTP_400_BAD_REQUEST,
+                        )
         # make sure we get the correct totals
         intervention.refresh_from_db()
         return Response(
@@ -613,6 +618,28 @@ class InterventionActivityDetailUpdateView(InterventionActivityViewMixin, Retrie
     pass
 
 
+class InterventionWorkplanView(DetailedInterventionResponseMixin, RetrieveUpdateAPIView):
+    """Whole pd outputs -> activities -> items tree of the intervention, updated at once"""
+    permission_classes = [
+        IsAuthenticated,
+        IsReadAction | (IsEditAction & intervention_field_is_editable_permission('pd_outputs')),
+    ]
+    serializer_class = InterventionWorkplanSerializer
+
+    def get_root_object(self):
+        return Intervention.objects.filter(pk=self.kwargs.get('intervention_pk')).first()
+
+    def get_intervention(self):
+        return self.get_root_object()
+
+    def get_object(self):
+        intervention = self.get_root_object()
+        if intervention is None:
+            raise Http404
+        self.check_object_permissions(self.request, intervention)
+        return intervention
+
+
 class InterventionRiskDeleteView(FullInterventionSnapshotDeleteMixin, DestroyAPIView):
     queryset = InterventionRisk.objects
     permission_classes = [
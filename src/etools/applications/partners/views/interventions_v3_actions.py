@@ -381,7 +381,7 @@ class PMPInterventionCancelView(PMPInterventionActionView):
         if pd.status == Intervention.CANCELLED:
             raise ValidationError(_("PD has already been cancelled."))
 
-        if not request.user.groups.filter(name=PRC_SECRETARY).exists():
+        if PRC_SECRETARY not in request.user.group_names:
             raise ValidationError(_("Only PRC Secretary can cancel"))
 
         request.data.update({"status": Intervention.CANCELLED})
@@ -23,8 +23,8 @@ from rest_framework_csv import renderers as r
 from unicef_restlib.views import QueryStringFilterMixin
 
 from etools.applications.action_points.models import ActionPoint
-from etools.applications.core.mixins import ExportModelMixin
-from etools.applications.core.renderers import CSVFlatRenderer
+from etools.applications.core.mixins import ExportModelMixin, StreamingExportMixin
+from etools.applications.core.renderers import CSVFlatRenderer, XLSXRenderer
 from etools.applications.partners.exports_v2 import (
     PartnerOrganizationCSVRenderer,
     PartnerOrganizationDashboardCsvRenderer,
@@ -71,7 +71,7 @@ from etools.libraries.djangolib.views import ExternalModuleFilterMixin
 
 
 class PartnerOrganizationListAPIView(ExternalModuleFilterMixin, QueryStringFilterMixin, ExportModelMixin,
-                                     ListCreateAPIView):
+                                     StreamingExportMixin, ListCreateAPIView):
     """
     Create new Partners.
     Returns a list of Partners.
@@ -83,7 +83,8 @@ class PartnerOrganizationListAPIView(ExternalModuleFilterMixin, QueryStringFilte
     renderer_classes = (
         r.JSONRenderer,
         PartnerOrganizationCSVRenderer,
-        CSVFlatRenderer
+        CSVFlatRenderer,
+        XLSXRenderer,
     )
     filters = (
         ('partner_type', 'organization__organization_type__in'),
@@ -117,7 +118,7 @@ class PartnerOrganizationListAPIView(ExternalModuleFilterMixin, QueryStringFilte
         if "format" in query_params.keys():
             if query_params.get("format") == 'csv':
                 return PartnerOrganizationExportSerializer
-            if query_params.get("format") == 'csv_flat':
+            if query_params.get("format") in ['csv_flat', 'xlsx']:
                 return PartnerOrganizationExportFlatSerializer
         if "verbosity" in query_params.keys():
             if query_params.get("verbosity") == 'minimal':
@@ -150,7 +151,7 @@ class PartnerOrganizationListAPIView(ExternalModuleFilterMixin, QueryStringFilte
                 if query_params.get("hidden").lower() == "true":
                     hidden = True
                     # return all partners when exporting and hidden=true
-                    if query_params.get("format", None) in ['csv', 'csv_flat']:
+                    if query_params.get("format", None) in ['csv', 'csv_flat', 'xlsx']:
                         hidden = None
                 if query_params.get("hidden").lower() == "false":
                     hidden = False
@@ -175,6 +176,8 @@ class PartnerOrganizationListAPIView(ExternalModuleFilterMixin, QueryStringFilte
         if "format" in query_params.keys():
             if query_params.get("format") in ['csv', 'csv_flat']:
                 response['Content-Disposition'] = "attachment;filename=partner.csv"
+            if query_params.get("format") == 'xlsx':
+                response['Content-Disposition'] = "attachment;filename=partner.xlsx"
 
         return response
 
@@ -114,7 +114,7 @@ class PCAPDFView(LoginRequiredMixin, PDFTemplateView):
 
         font_path = settings.PACKAGE_ROOT + '/assets/fonts/'
 
-        if not self.request.user.groups.filter(name=PARTNERSHIP_MANAGER_GROUP).exists():
+        if PARTNERSHIP_MANAGER_GROUP not in self.request.user.group_names:
             return {"error": _('Partnership Manager role required for pca export.')}
 
         self.agreement.terms_acknowledged_by = self.request.user
@@ -233,7 +233,7 @@ class GTCPDFView(LoginRequiredMixin, PDFTemplateView):
 
         font_path = settings.PACKAGE_ROOT + '/assets/fonts/'
 
-        if not self.request.user.groups.filter(name=PARTNERSHIP_MANAGER_GROUP).exists():
+        if PARTNERSHIP_MANAGER_GROUP not in self.request.user.group_names:
             return {"error": _('Partnership Manager role required for pca export.')}
 
         self.agreement.terms_acknowledged_by = self.request.user
@@ -30,6 +30,7 @@ from etools.applications.partners.models import (
 from etools.applications.partners.permissions import SENIOR_MANAGEMENT_GROUP
 from etools.applications.reports.models import CountryProgramme, Result, ResultType
 from etools.libraries.djangolib.fields import CURRENCIES
+from etools.libraries.views.cache import cache_response
 
 
 # TODO move in core (after utils package has been merged in core)
@@ -56,6 +57,7 @@ def choices_to_json_ready(choices, sort_choices=True):
 class PMPStaticDropdownsListAPIView(APIView):
     permission_classes = (IsAuthenticated,)
 
+    @cache_response('pmp-dropdowns')
     def get(self, request):
         """
         Return All Static values used for dropdowns in the frontend
@@ -124,6 +126,7 @@ class PMPStaticDropdownsListAPIView(APIView):
 class PMPDropdownsListApiView(APIView):
     permission_classes = (IsAuthenticated, IsAdminUser)
 
+    @cache_response('pmp-dropdowns')
     def get(self, request):
         """
         Return All dropdown values used for Agreements form
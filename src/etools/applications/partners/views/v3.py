@@ -34,6 +34,7 @@ from etools.applications.partners.permissions import UserIsPartnerStaffMemberPer
 from etools.applications.partners.views.v2 import choices_to_json_ready
 from etools.applications.reports.models import CountryProgramme, Result, ResultType
 from etools.libraries.djangolib.fields import CURRENCIES
+from etools.libraries.views.cache import cache_response
 
 
 class PMPBaseViewMixin:
@@ -167,6 +168,7 @@ class PMPDropdownsListApiView(APIView):
             return local_workspace.local_currency.pk
         return None
 
+    @cache_response('pmp-dropdowns')
     def get(self, request):
         """
         Return All dropdown values used for Agreements form
@@ -402,8 +402,10 @@ class LowerResult(TimeStampedModel):
                 self.__class__.objects.filter(result_link=self.result_link).count() + 1,
             )
         super().save(*args, **kwargs)
+        from etools.applications.partners.budgets import update_budget_totals
+
         # update budgets
-        self.result_link.intervention.planned_budget.save()
+        update_budget_totals(self.result_link.intervention)
 
     @classmethod
     def renumber_results_for_result_link(cls, result_link):
@@ -1092,8 +1094,10 @@ class InterventionActivity(TimeStampedModel):
                 self.__class__.objects.filter(result=self.result).count() + 1,
             )
         super().save(*args, **kwargs)
+        from etools.applications.partners.budgets import update_budget_totals
+
         # update budgets
-        self.result.result_link.intervention.planned_budget.save()
+        update_budget_totals(self.result.result_link.intervention)
 
     @classmethod
     def renumber_activities_for_result(cls, result: LowerResult, start_id=None):
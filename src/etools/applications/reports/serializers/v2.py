@@ -1,14 +1,21 @@
+from collections import Counter
+
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from unicef_rest_export.serializers import ExportSerializer
 
+from etools.applications.partners.budgets import budget_totals_deferred, update_budget_totals
 from etools.applications.partners.models import Intervention
-from etools.applications.partners.serializers.intervention_snapshot import FullInterventionSnapshotSerializerMixin
+from etools.applications.partners.serializers.intervention_snapshot import (
+    FullInterventionSnapshotSerializerMixin,
+    snapshot_bulk_change,
+)
 from etools.applications.reports.models import (
     AppliedIndicator,
     Disaggregation,
@@ -653,6 +660,21 @@ class InterventionTimeFrameSerializer(serializers.ModelSerializer):
         return 'Q{}'.format(obj.quarter)
 
 
+def activity_deactivation_blocked(intervention):
+    """Activities of active or later interventions having FRs with actual/outstanding amount can't be deactivated"""
+    active_or_later_statuses = [
+        Intervention.ACTIVE,
+        Intervention.SUSPENDED,
+        Intervention.ENDED,
+        Intervention.CLOSED,
+        Intervention.TERMINATED,
+    ]
+    return (
+        intervention.status in active_or_later_statuses and
+        intervention.frs.filter(Q(actual_amt__gt=0) | Q(outstanding_amt__gt=0)).exists()
+    )
+
+
 class InterventionActivityDetailSerializer(
     FullInterventionSnapshotSerializerMixin,
     serializers.ModelSerializer,
@@ -693,20 +715,12 @@ class InterventionActivityDetailSerializer(
             # if status is active or later and FR with actual/outstanding amount > 0:
             # deactivation is blocked
             intervention = self.get_intervention()
-            active_or_later_statuses = [
-                Intervention.ACTIVE,
-                Intervention.SUSPENDED,
-                Intervention.ENDED,
-                Intervention.CLOSED,
-                Intervention.TERMINATED,
-            ]
-            if (intervention and
-                    intervention.status in active_or_later_statuses and
-                    intervention.frs.filter(Q(actual_amt__gt=0) | Q(outstanding_amt__gt=0)).exists()):
+            if intervention and activity_deactivation_blocked(intervention):
                 raise ValidationError(_('This activity cannot be deactivated because there are Direct Cash Transfers associated in eZHACT.'))
         return attrs
 
     @transaction.atomic
+    @budget_totals_deferred()
     def create(self, validated_data):
         # TODO: [e4] remove this whenever a better validation is decided on. This is out of place but needed as a hotfix
         if self.intervention.status in [self.intervention.SIGNATURE]:
@@ -719,6 +733,7 @@ class InterventionActivityDetailSerializer(
         return self.instance
 
     @transaction.atomic
+    @budget_totals_deferred()
     def update(self, instance, validated_data):
         options = validated_data.pop('items', None)
         time_frames = validated_data.pop('time_frames', None)
@@ -774,3 +789,226 @@ class LowerResultWithActivityItemsSerializer(LowerResultSerializer):
 
     class Meta(LowerResultSerializer.Meta):
         fields = LowerResultSerializer.Meta.fields + ["activities"]
+
+
+class TimeFrameIdsField(serializers.ListField):
+    child = serializers.IntegerField()
+
+    def to_representation(self, data):
+        return [time_frame.pk for time_frame in data.all()]
+
+
+class WorkplanActivityItemSerializer(InterventionActivityItemSerializer):
+    class Meta(InterventionActivityItemSerializer.Meta):
+        read_only_fields = ['code']
+
+
+class WorkplanActivitySerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    items = WorkplanActivityItemSerializer(many=True, required=False)
+    # validated against the intervention quarters at once instead of a query per time frame
+    time_frames = TimeFrameIdsField(required=False)
+
+    class Meta:
+        model = InterventionActivity
+        fields = (
+            'id',
+            'name',
+            'code',
+            'context_details',
+            'unicef_cash',
+            'cso_cash',
+            'items',
+            'time_frames',
+            'is_active',
+        )
+        read_only_fields = ['code']
+
+
+class WorkplanResultSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField()
+    activities = WorkplanActivitySerializer(many=True)
+
+    class Meta:
+        model = LowerResult
+        fields = ('id', 'code', 'name', 'activities')
+        read_only_fields = ['code', 'name']
+
+
+class InterventionWorkplanSerializer(FullInterventionSnapshotSerializerMixin, serializers.Serializer):
+    """
+    Upsert the activities and items of the intervention pd outputs in one request.
+
+    Activities without id are created, activities missing in the request are kept as is. When items are provided
+    for an activity they replace its items. Everything is written with bulk operations, codes are assigned in one
+    pass and the activities cash and intervention budget are calculated once at the end.
+    """
+    results = WorkplanResultSerializer(many=True)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        intervention = self.instance
+        # activities can't be added or changed in signature, see InterventionActivityDetailSerializer.create/update
+        if intervention.status in [intervention.SIGNATURE]:
+            raise ValidationError(_('The workplan is not able to be changed in this status'))
+
+        result_ids = [result['id'] for result in attrs['results']]
+        self.lower_results = LowerResult.objects.filter(
+            result_link__intervention=intervention,
+        ).select_related('result_link').in_bulk(result_ids)
+        missing_result_ids = set(result_ids) - set(self.lower_results)
+        if missing_result_ids:
+            raise ValidationError({'results': [
+                _('Unable to find pd outputs: {}').format(', '.join(map(str, sorted(missing_result_ids))))
+            ]})
+        if len(set(result_ids)) != len(result_ids):
+            raise ValidationError({'results': [_('Pd outputs can be provided only once')]})
+
+        self.activities = {
+            activity.pk: activity
+            for activity in InterventionActivity.objects.filter(result__in=result_ids).prefetch_related('items')
+        }
+        activity_ids = []
+        item_ids = []
+        deactivated = False
+        for result_data in attrs['results']:
+            for activity_data in result_data['activities']:
+                activity = self.activities.get(activity_data.get('id'))
+                if 'id' in activity_data and (activity is None or activity.result_id != result_data['id']):
+                    raise ValidationError({'results': [
+                        _('Unable to find activity for id: {}').format(activity_data['id'])
+                    ]})
+                if activity:
+                    activity_ids.append(activity.pk)
+                    deactivated |= activity.is_active and activity_data.get('is_active') is False
+
+                existing_item_ids = {item.pk for item in activity.items.all()} if activity else set()
+                for item_data in activity_data.get('items', []):
+                    if 'id' in item_data and item_data['id'] not in existing_item_ids:
+                        raise ValidationError({'results': [
+                            _('Unable to find item for id: {}').format(item_data['id'])
+                        ]})
+                    if 'id' in item_data:
+                        item_ids.append(item_data['id'])
+
+        if len(set(activity_ids)) != len(activity_ids) or len(set(item_ids)) != len(item_ids):
+            raise ValidationError({'results': [_('Activities and items can be provided only once')]})
+        if deactivated and activity_deactivation_blocked(intervention):
+            raise ValidationError(_('This activity cannot be deactivated because there are Direct Cash Transfers associated in eZHACT.'))
+        return attrs
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        now = timezone.now()
+        activities_count = Counter(activity.result_id for activity in self.activities.values())
+        new_activities, updated_activities, activity_time_frames = [], [], []
+        new_items, updated_items, removed_items = [], [], []
+
+        for result_data in validated_data['results']:
+            result = self.lower_results[result_data['id']]
+            for activity_data in result_data['activities']:
+                activity_data = dict(activity_data)
+                items = activity_data.pop('items', None)
+                time_frames = activity_data.pop('time_frames', None)
+                activity_id = activity_data.pop('id', None)
+
+                if activity_id is None:
+                    activities_count[result.pk] += 1
+                    activity = InterventionActivity(
+                        result=result, code='{0}.{1}'.format(result.code, activities_count[result.pk]),
+                    )
+                    new_activities.append(activity)
+                else:
+                    activity = self.activities[activity_id]
+                    activity.modified = now
+                    updated_activities.append(activity)
+                    if items is None and activity.items.all():
+                        # cash of the activity having items is calculated from them
+                        activity_data.pop('unicef_cash', None)
+                        activity_data.pop('cso_cash', None)
+
+                for key, value in activity_data.items():
+                    setattr(activity, key, value)
+
+                if time_frames is not None:
+                    activity_time_frames.append((activity, time_frames))
+
+                if items is not None:
+                    activity_items = self.set_items(activity, items, now, new_items, updated_items, removed_items)
+                    if activity_items:
+                        activity.unicef_cash = sum(item.unicef_cash for item in activity_items)
+                        activity.cso_cash = sum(item.cso_cash for item in activity_items)
+
+        # bulk operations don't send signals, so the snapshot has to record the changed relations beforehand
+        snapshot_bulk_change(InterventionActivity)
+        snapshot_bulk_change(InterventionActivityItem)
+
+        with budget_totals_deferred():
+            if removed_items:
+                InterventionActivityItem.objects.filter(pk__in=[item.pk for item in removed_items]).delete()
+
+            InterventionActivity.objects.bulk_create(new_activities)
+            InterventionActivity.objects.bulk_update(updated_activities, fields=[
+                'name', 'context_details', 'unicef_cash', 'cso_cash', 'is_active', 'modified',
+            ])
+            self.set_time_frames(activity_time_frames)
+
+            InterventionActivityItem.objects.bulk_update(updated_items, fields=[
+                'code', 'name', 'unit', 'unit_price', 'no_units', 'unicef_cash', 'cso_cash', 'modified',
+            ])
+            InterventionActivityItem.objects.bulk_create(new_items)
+
+            update_budget_totals(instance)
+
+        return instance
+
+    def set_items(self, activity, items, now, new_items, updated_items, removed_items):
+        existing_items = {item.pk: item for item in activity.items.all()} if activity.pk else {}
+        kept_items, created_items = [], []
+        for item_data in items:
+            item_data = dict(item_data)
+            item_id = item_data.pop('id', None)
+            if item_id is None:
+                created_items.append(InterventionActivityItem(activity=activity, **item_data))
+                continue
+
+            item = existing_items.pop(item_id)
+            for key, value in item_data.items():
+                setattr(item, key, value)
+            item.modified = now
+            kept_items.append(item)
+
+        # same numbering as renumber_items_for_activity, new items go last
+        activity_items = sorted(kept_items, key=lambda item: item.pk) + created_items
+        for i, item in enumerate(activity_items):
+            item.code = '{0}.{1}'.format(activity.code, i + 1)
+
+        new_items.extend(created_items)
+        updated_items.extend(kept_items)
+        removed_items.extend(existing_items.values())
+        return activity_items
+
+    def set_time_frames(self, activity_time_frames):
+        if not activity_time_frames:
+            return
+
+        quarters = set(self.instance.quarters.values_list('id', flat=True))
+        through = InterventionActivity.time_frames.through
+        through.objects.filter(interventionactivity__in=[activity.pk for activity, __ in activity_time_frames]).delete()
+        through.objects.bulk_create([
+            through(interventionactivity_id=activity.pk, interventiontimeframe_id=time_frame)
+            for activity, time_frames in activity_time_frames
+            for time_frame in sorted(set(time_frames) & quarters)
+        ])
+
+    def to_representation(self, instance):
+        results = LowerResult.objects.filter(result_link__intervention=instance).prefetch_related(
+            'activities__items',
+            'activities__time_frames',
+        )
+        return {
+            'results': WorkplanResultSerializer(results, many=True, context=self.context).data,
+        }
+
+    def get_intervention(self):
+        return self.instance
@@ -1,14 +1,26 @@
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from etools.applications.partners.models import Intervention, InterventionBudget, InterventionResultLink
+from etools.applications.partners.budgets import update_budget_totals
+from etools.applications.partners.models import Intervention, InterventionResultLink
 from etools.applications.partners.utils import get_quarters_range
 from etools.applications.reports.models import (
+    CountryProgramme,
+    Indicator,
     InterventionActivity,
     InterventionActivityItem,
     InterventionTimeFrame,
     LowerResult,
+    Office,
+    Result,
+    Section,
 )
+from etools.libraries.views.cache import register_view_cache_invalidation
+
+register_view_cache_invalidation('sections', Section)
+register_view_cache_invalidation('offices', Office)
+register_view_cache_invalidation('results', Result, CountryProgramme)
+register_view_cache_invalidation('indicators', Indicator)
 
 
 @receiver(post_save, sender=Intervention)
@@ -49,11 +61,8 @@ def calc_totals_on_delete(instance, **kwargs):
     except LowerResult.DoesNotExist:
         pass
     else:
-        try:
-            # update budgets
-            result.result_link.intervention.planned_budget.save()
-        except InterventionBudget.DoesNotExist:
-            pass
+        # update budgets
+        update_budget_totals(result.result_link.intervention)
 
 
 @receiver(post_delete, sender=InterventionActivityItem)
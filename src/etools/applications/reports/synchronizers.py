@@ -3,12 +3,15 @@ import json
 import logging
 
 from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
 
 from unicef_vision.exceptions import VisionException
 from unicef_vision.settings import INSIGHT_DATE_FORMAT
 
 from etools.applications.reports.models import CountryProgramme, Indicator, Result, ResultType
 from etools.applications.vision.synchronizers import VisionDataTenantSynchronizer
+from etools.libraries.views.cache import bump_cache_version
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +23,10 @@ class ResultStructureSynchronizer:
         self.outcomes = {}
         self.outputs = {}
         self.activities = {}
+        # trees of the results created or moved, rebuilt once all the results are saved
+        self.affected_tree_ids = set()
+        self.results_changed = False
+        self._next_tree_id = None
 
     @staticmethod
     def _update_changes(local, remote):
@@ -67,102 +74,101 @@ class ResultStructureSynchronizer:
 
         return total_data, total_updated, len(new_cps)
 
-    def update_outcomes(self):
-        remote_outcomes = self.data['outcomes']
-        outcome_type = ResultType.objects.get(name=ResultType.OUTCOME)
-        total_data = len(remote_outcomes)
-        total_updated = 0
-
-        local_outcomes = dict([(r.wbs, r) for r in Result.objects.filter(wbs__in=list(remote_outcomes.keys()),
-                                                                         result_type__name=ResultType.OUTCOME
-                                                                         )])
-
-        for local_outcome in local_outcomes.values():
-            if self._update_changes(local_outcome, remote_outcomes[local_outcome.wbs]):
-                logger.debug('Updated {}'.format(local_outcome))
-                local_outcome.save()
-                total_updated += 1
-            del remote_outcomes[local_outcome.wbs]
-
-        new_outcomes = {}
-        for remote_outcome in remote_outcomes.values():
-            remote_outcome['country_programme'] = self._get_local_parent(remote_outcome['wbs'], 'cp')
-            remote_outcome['result_type'] = outcome_type
-
-            new_outcomes[remote_outcome['wbs']], _ = Result.objects.get_or_create(**remote_outcome)
+    def _get_new_tree_id(self):
+        if self._next_tree_id is None:
+            self._next_tree_id = (Result.objects.aggregate(Max('tree_id'))['tree_id__max'] or 0) + 1
+        tree_id = self._next_tree_id
+        self._next_tree_id += 1
+        return tree_id
+
+    def _update_results(self, remote_results, result_type_name, parent_type=None):
+        """
+        Update the results of the type and create the missing ones, with bulk queries.
+        Parents are taken from the results synchronized before, new results are added to the tree of their parent
+        with placeholder tree fields and the affected trees are rebuilt by rebuild_trees.
+        """
+        result_type = ResultType.objects.get(name=result_type_name)
+        total_data = len(remote_results)
+        now = timezone.now()
+        updated_results = []
+        updated_fields = {'modified'}
+
+        local_results = dict([(r.wbs, r) for r in Result.objects.filter(wbs__in=list(remote_results.keys()),
+                                                                        result_type__name=result_type_name)])
+
+        for local_result in local_results.values():
+            if self._update_changes(local_result, remote_results[local_result.wbs]):
+                logger.debug('Updated {}'.format(local_result))
+                updated_fields.update(remote_results[local_result.wbs])
+                updated_results.append(local_result)
+            del remote_results[local_result.wbs]
+
+        for remote_result in remote_results.values():
+            remote_result['country_programme'] = self._get_local_parent(remote_result['wbs'], 'cp')
+            if parent_type:
+                remote_result['parent'] = self._get_local_parent(remote_result['wbs'], parent_type)
+            remote_result['result_type'] = result_type
+
+        # a result can exist for the wbs and country programme with another type, update it instead of creating
+        existing_results = dict([
+            ((r.wbs, r.country_programme_id), r)
+            for r in Result.objects.filter(wbs__in=list(remote_results.keys())).select_related('parent')
+        ])
+
+        new_results = {}
+        for wbs, remote_result in remote_results.items():
+            country_programme = remote_result['country_programme']
+            result = existing_results.get((wbs, country_programme.pk if country_programme else None))
+            if result is None:
+                parent = remote_result.get('parent')
+                result = Result(
+                    lft=0, rght=0, level=0,
+                    tree_id=parent.tree_id if parent else self._get_new_tree_id(),
+                    **remote_result,
+                )
+                self.affected_tree_ids.add(result.tree_id)
+                new_results[wbs] = result
+            else:
+                parent_id = result.parent_id
+                if self._update_changes(result, remote_result):
+                    logger.debug('Updated {}'.format(result))
+                    updated_fields.update(remote_result)
+                    updated_results.append(result)
+                if result.parent_id != parent_id:
+                    # moved to another tree, both trees need rebuilding
+                    self.affected_tree_ids.add(result.tree_id)
+                    result.tree_id = result.parent.tree_id if result.parent else self._get_new_tree_id()
+                    self.affected_tree_ids.add(result.tree_id)
+                    updated_fields.add('tree_id')
+            local_results[wbs] = result
+
+        for result in updated_results:
+            result.modified = now
+        Result.objects.bulk_create(new_results.values())
+        Result.objects.bulk_update(updated_results, sorted(updated_fields))
+        if updated_results or new_results:
+            self.results_changed = True
+
+        return local_results, (total_data, len(updated_results), len(new_results))
 
-        # add the newly created cps
-        local_outcomes.update(new_outcomes)
-        self.outcomes = local_outcomes
-        return total_data, total_updated, len(new_outcomes)
+    def update_outcomes(self):
+        self.outcomes, totals = self._update_results(self.data['outcomes'], ResultType.OUTCOME)
+        return totals
 
     def update_outputs(self):
-        rem_outputs = self.data['outputs']
-        output_type = ResultType.objects.get(name=ResultType.OUTPUT)
-        total_data = len(rem_outputs)
-        total_updated = 0
-
-        loc_outputs = dict([(r.wbs, r) for r in Result.objects.filter(wbs__in=list(rem_outputs.keys()),
-                                                                      result_type__name=ResultType.OUTPUT)])
-
-        for loc_output in loc_outputs.values():
-            if self._update_changes(loc_output, rem_outputs[loc_output.wbs]):
-                logger.debug('Updated {}'.format(loc_output))
-                loc_output.save()
-                total_updated += 1
-            del rem_outputs[loc_output.wbs]
-
-        new_outputs = {}
-        for rem_output in rem_outputs.values():
-            rem_output['country_programme'] = self._get_local_parent(rem_output['wbs'], 'cp')
-            rem_output['parent'] = self._get_local_parent(rem_output['wbs'], 'outcome')
-            rem_output['result_type'] = output_type
-
-            new_outputs[rem_output['wbs']], _ = Result.objects.get_or_create(**rem_output)
-
-        # add the newly created cps
-        loc_outputs.update(new_outputs)
-        self.outputs = loc_outputs
-        return total_data, total_updated, len(new_outputs)
+        self.outputs, totals = self._update_results(self.data['outputs'], ResultType.OUTPUT, parent_type='outcome')
+        return totals
 
     def update_activities(self):
-        rem_activities = self.data['activities']
-        activity_type = ResultType.objects.get(name=ResultType.ACTIVITY)
-        total_data = len(rem_activities)
-        total_updated = 0
-
-        loc_activities = dict([(r.wbs, r) for r in Result.objects.filter(wbs__in=list(rem_activities.keys()),
-                                                                         result_type__name=ResultType.ACTIVITY)])
-
-        for loc_activity in loc_activities.values():
-            if self._update_changes(loc_activity, rem_activities[loc_activity.wbs]):
-                logger.debug('Updated {}'.format(loc_activity))
-                loc_activity.save()
-                total_updated += 1
-            del rem_activities[loc_activity.wbs]
-
-        new_activities = {}
-        for rem_activity in rem_activities.values():
-            rem_activity['country_programme'] = self._get_local_parent(rem_activity['wbs'], 'cp')
-            rem_activity['parent'] = self._get_local_parent(rem_activity['wbs'], 'output')
-            rem_activity['result_type'] = activity_type
-
-            lookup = {
-                "wbs": rem_activity.get("wbs"),
-                "country_programme": rem_activity.get("country_programme"),
-            }
-            defaults = {k: v for k, v in rem_activity.items() if k not in lookup}
-            obj, created = Result.objects.get_or_create(**lookup, defaults=defaults)
-            if not created and self._update_changes(obj, rem_activity):
-                obj.save()
-                total_updated += 1
-            if created:
-                new_activities[rem_activity["wbs"]] = obj
-            loc_activities[rem_activity["wbs"]] = obj
+        self.activities, totals = self._update_results(
+            self.data['activities'], ResultType.ACTIVITY, parent_type='output',
+        )
+        return totals
 
-        # add the newly created cps
-        self.activities = loc_activities
-        return total_data, total_updated, len(new_activities)
+    def rebuild_trees(self):
+        for tree_id in sorted(self.affected_tree_ids):
+            Result._tree_manager.partial_rebuild(tree_id)
+        self.affected_tree_ids = set()
 
     @transaction.atomic
     def update(self):
@@ -182,6 +188,11 @@ class ResultStructureSynchronizer:
         total_activities = self.update_activities()
         activities = 'Activities updated: Total {}, Updated {}, New {}'.format(*total_activities)
 
+        self.rebuild_trees()
+        if self.results_changed:
+            # bulk queries don't send the signals invalidating the cached results
+            transaction.on_commit(lambda: bump_cache_version('results', 'pmp-dropdowns'))
+
         return {
             'details': '\n'.join([cps, outcomes, outputs, activities]),
             'total_records': sum([i[0] for i in [total_cps, total_outcomes, total_outputs, total_activities]]),
@@ -383,8 +394,15 @@ class RAMSynchronizer(VisionDataTenantSynchronizer):
         results = Result.objects.filter(result_type__name='Output', wbs__in=wbss).all()
         result_map = dict([(r.wbs, r) for r in results])
 
-        existing_records = Indicator.objects.filter(code__in=records.keys()).prefetch_related('result').all()
+        existing_records = list(Indicator.objects.filter(code__in=records.keys()).select_related('result'))
 
+        # results of any type for the indicators that lost theirs, resolved at once
+        missing_result_map = dict([(r.wbs, r) for r in Result.objects.filter(
+            wbs__in=[records[er.code]['result__wbs'] for er in existing_records if not er.result],
+        )])
+
+        now = timezone.now()
+        indicators_to_update = []
         for er in existing_records:
             # remote record:
             rr = records[er.code]
@@ -393,8 +411,8 @@ class RAMSynchronizer(VisionDataTenantSynchronizer):
                 if field == 'result__wbs':
                     if not er.result:
                         try:
-                            missing_result = Result.objects.get(wbs=rr[field])
-                        except Result.DoesNotExist:
+                            missing_result = missing_result_map[rr[field]]
+                        except KeyError:
                             logger.error('Indicator missing result {}'.format(er.id))
                             break
                         else:
@@ -415,9 +433,12 @@ class RAMSynchronizer(VisionDataTenantSynchronizer):
                     record_needs_saving = True
             if record_needs_saving:
                 updated += 1
-                er.save()
+                er.modified = now
+                indicators_to_update.append(er)
 
-        list_of_existing_codes = [er.code for er in existing_records]
+        Indicator.objects.bulk_update(indicators_to_update, ['name', 'baseline', 'target', 'result', 'modified'])
+
+        list_of_existing_codes = set([er.code for er in existing_records])
 
         records_to_create = []
         for r in records.items():
@@ -439,6 +460,10 @@ class RAMSynchronizer(VisionDataTenantSynchronizer):
         indicators_deactivated = Indicator.objects.exclude(code__in=records.keys()).exclude(active=False).update(
             active=False)
 
+        if created or updated or indicators_activated or indicators_deactivated:
+            # bulk queries don't send the signals invalidating the cached indicators
+            transaction.on_commit(lambda: bump_cache_version('indicators'))
+
         return {
             'details': '\n'.join([
                 'Created Skipped {}'.format(skipped_creation),
@@ -1,5 +1,8 @@
 import datetime
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from etools.applications.core.tests.cases import BaseTenantTestCase
 from etools.applications.reports.models import CountryProgramme, Indicator, Result, ResultType
 from etools.applications.reports.synchronizers import (
@@ -401,6 +404,69 @@ class TestResultStructureSynchronizer(BaseTenantTestCase):
         self.assertEqual(result["total_records"], 4)
         self.assertEqual(result["processed"], 0)
 
+    def test_update_create_tree(self):
+        """New results are created with their parents and added to the results tree"""
+        today = datetime.date.today()
+        cp_wbs = "C" * 10
+        outcome_wbs = cp_wbs + "OOOO"
+        cp = CountryProgrammeFactory(wbs=cp_wbs)
+        dates = {"from_date": today, "to_date": today}
+        existing_outcome = ResultFactory(
+            wbs=outcome_wbs,
+            country_programme=cp,
+            result_type=self.result_type_outcome,
+            name="Outcome",
+            **dates,
+        )
+        self.data["cps"] = {cp_wbs: {"wbs": cp_wbs, "name": cp.name, "from_date": cp.from_date, "to_date": cp.to_date}}
+        self.data["outcomes"] = {
+            outcome_wbs: {"wbs": outcome_wbs, "name": "Outcome", **dates},
+            cp_wbs + "NNNN": {"wbs": cp_wbs + "NNNN", "name": "New Outcome", **dates},
+        }
+        self.data["outputs"] = {
+            wbs: {"wbs": wbs, "name": wbs, **dates}
+            for wbs in [outcome_wbs + "PPP1", outcome_wbs + "PPP2", cp_wbs + "NNNNPPP1"]
+        }
+        self.data["activities"] = {
+            wbs: {"wbs": wbs, "name": wbs, **dates}
+            for wbs in [outcome_wbs + "PPP1AAA1", outcome_wbs + "PPP1AAA2", cp_wbs + "NNNNPPP1AAA1"]
+        }
+        self.adapter.data = self.data
+
+        result = self.adapter.update()
+        self.assertIn("Outcomes updated: Total 2, Updated 0, New 1", result["details"])
+        self.assertIn("Outputs updated: Total 3, Updated 0, New 3", result["details"])
+        self.assertIn("Activities updated: Total 3, Updated 0, New 3", result["details"])
+
+        existing_outcome.refresh_from_db()
+        self.assertEqual(
+            sorted(existing_outcome.get_descendants().values_list("wbs", flat=True)),
+            [outcome_wbs + "PPP1", outcome_wbs + "PPP1AAA1", outcome_wbs + "PPP1AAA2", outcome_wbs + "PPP2"],
+        )
+        output = Result.objects.get(wbs=outcome_wbs + "PPP1")
+        self.assertEqual(output.parent, existing_outcome)
+        self.assertEqual(output.level, 1)
+        self.assertEqual(output.get_children().count(), 2)
+
+        new_outcome = Result.objects.get(wbs=cp_wbs + "NNNN")
+        self.assertIsNone(new_outcome.parent)
+        self.assertEqual(new_outcome.country_programme.wbs, cp_wbs)
+        self.assertNotEqual(new_outcome.tree_id, existing_outcome.tree_id)
+        self.assertEqual(new_outcome.get_descendant_count(), 2)
+
+    def test_update_outputs_queries(self):
+        """Number of queries to update outputs doesn't depend on the number of outputs"""
+        def update_outputs(prefix, count):
+            outputs = [
+                ResultFactory(wbs="{}{}".format(prefix, i), result_type=self.result_type_output) for i in range(count)
+            ]
+            self.adapter.data = {"outputs": {output.wbs: {"name": "Changed"} for output in outputs}}
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.adapter.update_outputs(), (count, count, 0))
+            return len(queries)
+
+        self.assertEqual(update_outputs("A", 1), update_outputs("B", 5))
+
 
 class TestProgrammeSynchronizer(BaseTenantTestCase):
     @classmethod
@@ -18,6 +18,7 @@ from etools.applications.reports.serializers.v1 import (
     UnitSerializer,
 )
 from etools.libraries.djangolib.views import ExternalModuleFilterMixin
+from etools.libraries.views.cache import cache_response
 
 
 class ResultTypeViewSet(mixins.ListModelMixin,
@@ -46,6 +47,10 @@ class SectionViewSet(ExternalModuleFilterMixin,
         'tpm': [lambda user: Q(tpm_activities__tpm_visit__tpm_partner__organization=user.profile.organization)]
     }
 
+    @cache_response('sections')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 class ResultViewSet(viewsets.ModelViewSet):
     """
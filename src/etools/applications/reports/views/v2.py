@@ -69,6 +69,7 @@ from etools.applications.reports.serializers.v2 import (
     SpecialReportingRequirementSerializer,
 )
 from etools.libraries.djangolib.views import ExternalModuleFilterMixin
+from etools.libraries.views.cache import cache_response
 
 
 class OutputListAPIView(ListAPIView):
@@ -131,6 +132,7 @@ class OutputListAPIView(ListAPIView):
             current_cp = CountryProgramme.main_active()
             return q.filter(country_programme=current_cp)
 
+    @cache_response('results')
     def list(self, request):
         dropdown = self.request.query_params.get("dropdown", None)
         if dropdown in ['true', 'True', '1', 'yes']:
@@ -156,6 +158,7 @@ class ResultIndicatorListAPIView(ListAPIView):
     serializer_class = IndicatorSerializer
     permission_classes = (IsAdminUser,)
 
+    @cache_response('indicators')
     def list(self, request, pk=None, format=None):
         """
         Return All Indicators for Result
@@ -539,3 +542,7 @@ class OfficeViewSet(
             else:
                 qs = qs.filter(id__in=ids)
         return qs
+
+    @cache_response('offices')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
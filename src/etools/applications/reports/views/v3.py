@@ -23,6 +23,7 @@ from etools.applications.reports.views.v2 import (
     SpecialReportingRequirementRetrieveUpdateDestroyView,
 )
 from etools.libraries.djangolib.views import ExternalModuleFilterMixin
+from etools.libraries.views.cache import cache_response
 
 
 class PMPOfficeViewSet(
@@ -53,6 +54,10 @@ class PMPOfficeViewSet(
                 qs = qs.filter(pk__in=ids)
         return qs
 
+    @cache_response('offices')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 class PMPSectionViewSet(
         PMPBaseViewMixin,
@@ -74,6 +79,10 @@ class PMPSectionViewSet(
     def get_queryset(self, format=None):
         return super().get_queryset(module="pmp")
 
+    @cache_response('sections')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 class PMPSpecialReportingRequirementListCreateView(
         PMPBaseViewMixin,
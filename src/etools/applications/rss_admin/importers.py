@@ -1,13 +1,25 @@
 from django.contrib.gis.geos import Point
+from django.db import transaction
+from django.utils import timezone
 
 import openpyxl
+from unicef_locations.cache import invalidate_cache
 
 from etools.applications.field_monitoring.fm_settings.models import LocationSite
+from etools.applications.locations.services import LocationReverseGeocodingService
 from etools.applications.utils.helpers import generate_hash
+from etools.libraries.views.cache import bump_cache_version
 
 
 class LocationSiteImporter:
+    """
+    Upsert the sites of the spreadsheet by p_code.
+
+    Rows are streamed and written in chunks with bulk operations: the parents of the chunk sites are found with one
+    query and the caches are invalidated once at the end, as bulk operations don't send the save signals.
+    """
     required_headers = ['Site_Name', 'Latitude', 'Longitude']
+    chunk_size = 1000
 
     @staticmethod
     def _get_pcode(split_name, name):
@@ -16,56 +28,110 @@ class LocationSiteImporter:
             return generate_hash(name, 12)
         return p_code
 
+    def _parse_row(self, row, header_idx):
+        """Site p_code, name and point of the row, None if the row is invalid"""
+        # trailing empty cells are not always returned in read only mode
+        row = tuple(row) + (None,) * (max(header_idx.values()) + 1 - len(row))
+        name_raw = row[header_idx['Site_Name']]
+        if not name_raw or str(name_raw).strip() == 'None':
+            return None
+
+        try:
+            split_name = str(name_raw).split('_')
+            clean_name = split_name[0].split(':')[1].strip()
+        except Exception:  # noqa
+            return None
+
+        p_code = self._get_pcode(split_name, clean_name)
+        try:
+            longitude = float(str(row[header_idx['Longitude']]).strip())
+            latitude = float(str(row[header_idx['Latitude']]).strip())
+        except Exception:  # noqa
+            return None
+
+        return p_code, clean_name, Point(longitude, latitude, srid=LocationSite._meta.get_field('point').srid)
+
     def import_file(self, upload):
         try:
-            wb = openpyxl.load_workbook(upload)
+            wb = openpyxl.load_workbook(upload, read_only=True)
         except Exception:  # noqa
             return False, {'detail': 'Invalid or unreadable XLSX file'}
 
-        sheet = wb.active
-        headers = [cell.value for cell in sheet[1]]
-        if any(h not in headers for h in self.required_headers):
-            return False, {'detail': 'Missing required columns: Site_Name, Latitude, Longitude'}
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            headers = list(next(rows, None) or [])
+            if any(h not in headers for h in self.required_headers):
+                return False, {'detail': 'Missing required columns: Site_Name, Latitude, Longitude'}
 
-        header_idx = {h: headers.index(h) for h in headers}
+            header_idx = {h: headers.index(h) for h in headers}
+            stats = {'created': 0, 'updated': 0, 'skipped': 0}
 
-        created = 0
-        updated = 0
-        skipped = 0
+            chunk = {}
+            for row in rows:
+                site = self._parse_row(row, header_idx) if row else None
+                if site is None:
+                    stats['skipped'] += 1
+                    continue
 
-        for row_idx in range(2, sheet.max_row + 1):
-            row = [c.value for c in sheet[row_idx]]
-            name_raw = row[header_idx['Site_Name']]
-            if not name_raw or str(name_raw).strip() == 'None':
-                skipped += 1
-                continue
+                p_code, name, point = site
+                if p_code in chunk:
+                    # the same site is written again
+                    stats['updated'] += 1
+                chunk[p_code] = (name, point)
+                if len(chunk) >= self.chunk_size:
+                    self._write_chunk(chunk, stats)
+                    chunk = {}
+            if chunk:
+                self._write_chunk(chunk, stats)
+        finally:
+            wb.close()
+
+        if stats['created'] or stats['updated']:
+            self._invalidate_caches()
+
+        return True, stats
 
-            try:
-                split_name = str(name_raw).split('_')
-                clean_name = split_name[0].split(':')[1].strip()
-            except Exception:  # noqa
-                skipped += 1
+    @transaction.atomic
+    def _write_chunk(self, chunk, stats):
+        now = timezone.now()
+        existing = {}
+        for site in LocationSite.objects.filter(p_code__in=chunk).order_by('pk'):
+            existing.setdefault(site.p_code, site)
+
+        new_sites, moved_sites, updated_sites = [], [], []
+        for p_code, (name, point) in chunk.items():
+            site = existing.get(p_code)
+            if site is None:
+                new_sites.append(LocationSite(p_code=p_code, name=name, point=point))
                 continue
 
-            p_code = self._get_pcode(split_name, clean_name)
-            try:
-                longitude = float(str(row[header_idx['Longitude']]).strip())
-                latitude = float(str(row[header_idx['Latitude']]).strip())
-            except Exception:  # noqa
-                skipped += 1
+            stats['updated'] += 1
+            if site.name == name and site.point == point:
                 continue
+            if site.point != point:
+                # parent is looked up again for the moved sites only, same as on save
+                moved_sites.append(site)
+            site.name = name
+            site.point = point
+            site.modified = now
+            updated_sites.append(site)
+
+        self._set_parents(new_sites + moved_sites)
+        created_sites = [site for site in new_sites if site.parent_id]
+        stats['created'] += len(created_sites)
+        stats['skipped'] += len(new_sites) - len(created_sites)
 
-            point = Point(longitude, latitude)
-            obj, was_created = LocationSite.objects.update_or_create(
-                p_code=p_code,
-                defaults={
-                    'point': point,
-                    'name': clean_name,
-                }
-            )
-            if was_created:
-                created += 1
-            else:
-                updated += 1
-
-        return True, {'created': created, 'updated': updated, 'skipped': skipped}
+        LocationSite.objects.bulk_create(created_sites)
+        LocationSite.objects.bulk_update(updated_sites, fields=['name', 'point', 'parent', 'modified'])
+
+    @staticmethod
+    def _set_parents(sites):
+        parent_ids = LocationReverseGeocodingService().get_parent_location_ids([site.point for site in sites])
+        for site, parent_id in zip(sites, parent_ids):
+            site.parent_id = parent_id or site.parent_id
+
+    @staticmethod
+    def _invalidate_caches():
+        # same invalidation as the LocationSite save signals, once for the whole file
+        invalidate_cache()
+        transaction.on_commit(lambda: bump_cache_version('fm-sites'))
@@ -2,8 +2,11 @@ from datetime import date, timedelta
 from io import BytesIO
 
 from django.contrib.admin.models import LogEntry
+from django.contrib.gis.geos import GEOSGeometry
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
@@ -18,7 +21,11 @@ from etools.applications.field_monitoring.data_collection.models import (
 )
 from etools.applications.field_monitoring.data_collection.tests.factories import ActivityQuestionFactory
 from etools.applications.field_monitoring.fm_settings.models import LocationSite
-from etools.applications.field_monitoring.fm_settings.tests.factories import OptionFactory, QuestionFactory
+from etools.applications.field_monitoring.fm_settings.tests.factories import (
+    LocationSiteFactory,
+    OptionFactory,
+    QuestionFactory,
+)
 from etools.applications.field_monitoring.planning.models import MonitoringActivity
 from etools.applications.field_monitoring.planning.tests.factories import MonitoringActivityFactory
 from etools.applications.partners.tests.factories import InterventionFactory, PartnerFactory
@@ -87,6 +94,60 @@ class TestRssAdminFieldMonitoringApi(BaseTenantTestCase):
         self.assertGreaterEqual(resp.data['skipped'], 2)
         self.assertEqual(LocationSite.objects.count(), 2)
 
+    def upload_sites(self, rows):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(["Site_Name", "Latitude", "Longitude"])
+        for row in rows:
+            ws.append(row)
+        buf = BytesIO()
+        wb.save(buf)
+        upload = SimpleUploadedFile(
+            'LocationSites.xlsx',
+            buf.getvalue(),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        url = reverse('rss_admin:rss-admin-sites-bulk-upload')
+        return self.forced_auth_req('post', url, user=self.user, data={'import_file': upload}, request_format='multipart')
+
+    def test_sites_bulk_upload_upsert(self):
+        country = LocationFactory(admin_level=0, is_active=True, geom=GEOSGeometry(
+            'MULTIPOLYGON(((0 0, 0 40, 40 40, 40 0, 0 0)))', srid=4326,
+        ))
+        district = LocationFactory(admin_level=1, parent=country, is_active=True, geom=GEOSGeometry(
+            'MULTIPOLYGON(((0 0, 0 10, 10 10, 10 0, 0 0)))', srid=4326,
+        ))
+        moved = LocationSiteFactory(p_code='MOVED1', parent=country, point=GEOSGeometry('POINT(20 20)', srid=4326))
+        renamed = LocationSiteFactory(p_code='RENAMED1', parent=country, point=GEOSGeometry('POINT(30 30)', srid=4326))
+
+        resp = self.upload_sites([
+            ["LOC: Moved_MOVED1", "5", "5"],
+            ["LOC: Renamed_RENAMED1", "30", "30"],
+            ["LOC: New_NEW1", "2", "2"],
+            ["LOC: Outside_NEW2", "50", "50"],
+        ])
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.assertEqual(resp.data, {'created': 2, 'updated': 2, 'skipped': 0})
+        moved.refresh_from_db()
+        self.assertEqual(moved.parent, district)
+        renamed.refresh_from_db()
+        self.assertEqual((renamed.name, renamed.parent), ('Renamed', country))
+        self.assertEqual(LocationSite.objects.get(p_code='NEW1').parent, district)
+        self.assertEqual(LocationSite.objects.get(p_code='NEW2').parent, country)
+
+    def test_sites_bulk_upload_queries_independent_of_rows(self):
+        LocationFactory(admin_level=0, is_active=True)
+
+        def count_queries(rows_count, offset):
+            rows = [[f"LOC: Site_P{offset + i}", str(i), str(i)] for i in range(rows_count)]
+            with CaptureQueriesContext(connection) as queries:
+                resp = self.upload_sites(rows)
+            self.assertEqual(resp.data['created'], rows_count)
+            return len(queries)
+
+        self.assertEqual(count_queries(2, 0), count_queries(20, 100))
+
     def test_answer_hact_question_updates_overall_and_pv(self):
         # Create completed MonitoringActivity linked to partner
         activity = MonitoringActivityFactory(status='completed', partners=[self.partner])
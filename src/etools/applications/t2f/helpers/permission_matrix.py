@@ -106,16 +106,16 @@ def get_user_role_list(user, travel=None):
         if user == travel.supervisor:
             roles.append(UserTypes.SUPERVISOR)
 
-    if user.groups.filter(name='Finance Focal Point').exists():
+    if 'Finance Focal Point' in user.group_names:
         roles.append(UserTypes.FINANCE_FOCAL_POINT)
 
-    if user.groups.filter(name='Travel Focal Point').exists():
+    if 'Travel Focal Point' in user.group_names:
         roles.append(UserTypes.TRAVEL_FOCAL_POINT)
 
-    if user.groups.filter(name='Travel Administrator').exists():
+    if 'Travel Administrator' in user.group_names:
         roles.append(UserTypes.TRAVEL_ADMINISTRATOR)
 
-    if user.groups.filter(name='Representative Office').exists():
+    if 'Representative Office' in user.group_names:
         roles.append(UserTypes.REPRESENTATIVE)
 
     return roles
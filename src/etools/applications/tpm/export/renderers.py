@@ -2,9 +2,10 @@ from copy import copy
 
 from django.utils.translation import gettext as _
 
-from rest_framework_csv.renderers import CSVRenderer
 from unicef_rest_export.renderers import FriendlyCSVRenderer
 
+from etools.applications.core.renderers import CSVRenderer
+
 
 class TPMActivityCSVRenderer(FriendlyCSVRenderer):
     header = ['ref', 'visit', 'visit_status', 'activity', 'section', 'cp_output', 'partner', 'intervention', 'pd_ssfa',
@@ -25,6 +25,7 @@ from etools.applications.action_points.conditions import (
     ActionPointAssigneeCondition,
     ActionPointAuthorCondition,
 )
+from etools.applications.core.mixins import StreamingExportMixin
 from etools.applications.partners.models import PartnerOrganization
 from etools.applications.partners.serializers.partner_organization_v2 import MinimalPartnerOrganizationListSerializer
 from etools.applications.permissions2.conditions import ObjectStatusCondition
@@ -339,6 +340,7 @@ class VisitsCPOutputView(generics.ListAPIView):
 
 class TPMVisitViewSet(
     BaseTPMViewSet,
+    StreamingExportMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -416,8 +418,7 @@ class TPMVisitViewSet(
             'tpm_activities__intervention', 'tpm_activities__locations', 'tpm_activities__unicef_focal_points',
             'tpm_partner_focal_points'
         ).order_by('id'))
-        serializer = TPMVisitExportSerializer(tpm_visits, many=True)
-        return Response(serializer.data, headers={
+        return self.get_streaming_response(tpm_visits, serializer=TPMVisitExportSerializer(many=True), headers={
             'Content-Disposition': 'attachment;filename=tpm_visits_{}.csv'.format(timezone.now().date())
         })
 
@@ -93,7 +93,7 @@ class BaseTripSerializer(serializers.ModelSerializer):
         # delete is available for the traveller or the travel administrator
         if self.context["view"].action == "list":
             return {
-                "delete": obj.traveller == user or user.groups.filter(name='Travel Administrator').exists()
+                "delete": obj.traveller == user or 'Travel Administrator' in user.group_names
             }
 
         ps = Trip.permission_structure()
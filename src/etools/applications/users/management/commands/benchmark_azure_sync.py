@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from etools.libraries.azure_graph_api.client import azure_sync_users
+
+
+class GraphStubHandler(BaseHTTPRequestHandler):
+    """Serve pages of generated users the way the graph api users endpoint does"""
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        top = int(params['$top'][0])
+        skip = int(params.get('$skiptoken', ['0'])[0])
+        server = self.server
+
+        data = {'value': [self.get_user(i) for i in range(skip, min(skip + top, server.users))]}
+        if skip + top < server.users:
+            data['@odata.nextLink'] = 'http://{}:{}/users?$top={}&$skiptoken={}'.format(
+                *server.server_address, top, skip + top,
+            )
+        else:
+            data['@odata.deltaLink'] = 'http://{}:{}/users/delta'.format(*server.server_address)
+
+        time.sleep(server.latency)
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def get_user(self, index):
+        return {
+            'id': 'benchmark-{}'.format(index),
+            'userPrincipalName': 'benchmark.user{}@unicef.org'.format(index),
+            'mail': 'benchmark.user{}@unicef.org'.format(index),
+            'givenName': 'Benchmark',
+            'surname': 'User {}'.format(index),
+            'userType': 'Member',
+            'companyName': 'UNICEF',
+            'jobTitle': 'Officer',
+            'businessPhones': ['+100{}'.format(index)],
+        }
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Measure the azure users synchronization against a local stub of the graph api, changes are rolled back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', dest='users', type=int, default=5000)
+        parser.add_argument('--page-size', dest='page_size', type=int, default=250)
+        parser.add_argument('--latency', dest='latency', type=float, default=0.2,
+                            help='Graph api response time in seconds')
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), GraphStubHandler)
+        server.users = options['users']
+        server.latency = options['latency']
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = 'http://{}:{}/users?$top={}'.format(*server.server_address, options['page_size'])
+
+        try:
+            with transaction.atomic():
+                for label in ['created', 'unchanged']:
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        status, _ = azure_sync_users(url, access_token='benchmark')
+                        duration = time.perf_counter() - start
+                    self.stdout.write(
+                        f'{label}: {status["processed"]} users, {duration:.1f} s, '
+                        f'{status["processed"] / duration:.0f} users/s, {len(queries)} queries',
+                    )
+                transaction.set_rollback(True)
+        finally:
+            server.shutdown()
@@ -59,7 +59,7 @@ class GroupEditPermissionMixin:
         return Group.objects.filter(name__in=list(set(groups_allowed_editing)))
 
     def can_add_user(self):
-        return self.request.user.groups.filter(name__in=self.CAN_ADD_USER).exists()
+        return not self.request.user.group_names.isdisjoint(self.CAN_ADD_USER)
 
     def can_review_user(self):
-        return self.request.user.groups.filter(name__in=self.CAN_REVIEW_USER).exists()
+        return not self.request.user.group_names.isdisjoint(self.CAN_REVIEW_USER)
@@ -12,6 +12,7 @@ from django.contrib.auth.models import (
     UserManager,
 )
 from django.contrib.contenttypes.fields import GenericRelation
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.mail import send_mail
 from django.core.validators import MaxValueValidator, MinValueValidator
@@ -32,6 +33,9 @@ from etools.libraries.djangolib.models import GroupWrapper
 
 logger = logging.getLogger(__name__)
 
+USER_GROUPS_CACHE_KEY = 'user_groups:{user_id}:{version}:{country_id}:{organization_id}'
+USER_GROUPS_VERSION_CACHE_KEY = 'user_groups_version:{user_id}'
+
 
 def preferences_default_dict():
     return {'language': settings.LANGUAGE_CODE}
@@ -257,6 +261,57 @@ class User(TimeStampedModel, AbstractBaseUser, PermissionsMixin):
         )
         return Group.objects.filter(realms__in=current_country_realms).distinct()
 
+    @property
+    def group_names(self):
+        """Names of the groups the user has in the current country and organization"""
+        return self._get_resolved_groups()[1]
+
+    @property
+    def group_ids(self):
+        """Ids of the groups the user has in the current country and organization"""
+        return self._get_resolved_groups()[0]
+
+    def _get_resolved_groups(self):
+        """
+        Resolve active realm groups once per (country, organization) for this instance.
+        As request.user lives only for one request, this makes group checks cost a single query per request.
+        :return: (frozenset of group ids, frozenset of group names)
+        """
+        country_id = getattr(connection.tenant, "id", None)
+        organization_id = self.profile.organization_id
+        resolved = self.__dict__.setdefault('_resolved_groups', {})
+        if (country_id, organization_id) not in resolved:
+            groups = self._get_groups_map(country_id, organization_id)
+            resolved[(country_id, organization_id)] = (frozenset(groups.keys()), frozenset(groups.values()))
+        return resolved[(country_id, organization_id)]
+
+    def _get_groups_map(self, country_id, organization_id):
+        if not settings.USER_GROUPS_CACHE_TIMEOUT:
+            return self._query_groups_map(country_id, organization_id)
+
+        version = cache.get(USER_GROUPS_VERSION_CACHE_KEY.format(user_id=self.pk), 0)
+        cache_key = USER_GROUPS_CACHE_KEY.format(
+            user_id=self.pk, version=version, country_id=country_id, organization_id=organization_id,
+        )
+        groups = cache.get(cache_key)
+        if groups is None:
+            groups = self._query_groups_map(country_id, organization_id)
+            cache.set(cache_key, groups, settings.USER_GROUPS_CACHE_TIMEOUT)
+        return groups
+
+    def _query_groups_map(self, country_id, organization_id):
+        return dict(Group.objects.filter(
+            realms__user=self,
+            realms__country_id=country_id,
+            realms__organization_id=organization_id,
+            realms__is_active=True,
+        ).distinct().values_list('id', 'name'))
+
+    def clear_groups_cache(self):
+        """Forget resolved groups, should be called every time realms are changed bypassing Realm.save"""
+        self.__dict__.pop('_resolved_groups', None)
+        invalidate_user_groups_cache(self.pk)
+
     def get_groups_for_organization_id(self, organization_id, **extra_filters):
         current_country_realms = self.realms.filter(
             country=connection.tenant, organization_id=organization_id, **extra_filters)
@@ -316,9 +371,20 @@ class User(TimeStampedModel, AbstractBaseUser, PermissionsMixin):
 
         if self.pk and not self.is_active:
             self.realms.update(is_active=False)
+            self.clear_groups_cache()
         super().save(*args, **kwargs)
 
 
+def invalidate_user_groups_cache(user_id):
+    if not settings.USER_GROUPS_CACHE_TIMEOUT:
+        return
+    version_key = USER_GROUPS_VERSION_CACHE_KEY.format(user_id=user_id)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, 1, None)
+
+
 def custom_dashboards_default():
     return dict(bi_url='')
 
@@ -230,6 +230,7 @@ class UserCreationSerializer(serializers.ModelSerializer):
                         group=group
                     ))
             Realm.objects.bulk_create(realm_list)
+            user.clear_groups_cache()
             user.save()
             user.profile.save()
 
@@ -302,6 +302,7 @@ class UserRealmUpdateSerializer(UserRealmBaseSerializer):
         self.create_realms(instance, organization_id, _to_add)
         realm_qs.filter(group__id__in=_to_deactivate).update(is_active=False)
         realm_qs.filter(group__id__in=_to_reactivate).update(is_active=True)
+        instance.clear_groups_cache()
 
         instance.update_active_state()
 
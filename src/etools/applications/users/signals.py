@@ -7,7 +7,7 @@ from django.dispatch import receiver
 from django.utils import timezone
 
 from etools.applications.last_mile.services.permissions_service import LMSMPermissionsService
-from etools.applications.users.models import Realm
+from etools.applications.users.models import invalidate_user_groups_cache, Realm
 from etools.applications.users.tasks import sync_realms_to_prp
 
 
@@ -46,3 +46,12 @@ def sync_realms_to_prp_on_delete(instance: Realm, **kwargs):
                 eta=now + datetime.timedelta(minutes=settings.PRP_USER_SYNC_DELAY)
             )
     )
+
+
+@receiver(post_save, sender=Realm)
+@receiver(post_delete, sender=Realm)
+def clear_user_groups_cache(instance: Realm, **kwargs):
+    if Realm._meta.get_field('user').is_cached(instance):
+        instance.user.clear_groups_cache()
+    else:
+        invalidate_user_groups_cache(instance.user_id)
@@ -4,7 +4,7 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.db import connection, IntegrityError, transaction
-from django.db.models import Prefetch
+from django.db.models import Prefetch, Q
 from django.utils import timezone
 
 from celery.utils.log import get_task_logger
@@ -175,7 +175,98 @@ class AzureUserMapper:
                     return False
         return True
 
-    def update_user(self, user, record):
+    def create_or_update_users(self, records):
+        """
+        Create or update the users of a page of records: existing users are resolved with one query,
+        users and profiles are written with bulk queries.
+        If the page can't be saved in bulk, e.g. because of a duplicated guid, records are saved one by one.
+        """
+        status = {'processed': 0, 'created': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        valid_records = {}
+        for record in records:
+            status['processed'] += 1
+            if self.record_is_valid(record):
+                valid_records[record[self.KEY_ATTRIBUTE].lower()] = record
+            else:
+                status['skipped'] += 1
+
+        try:
+            with transaction.atomic():
+                page_status = self._save_users(valid_records)
+        except IntegrityError as e:
+            logger.info('Integrity error on users bulk saving, saving one by one - exception {}'.format(e))
+            page_status = {'created': 0, 'updated': 0, 'errors': 0}
+            for record in valid_records.values():
+                record_status = self.create_or_update_user(record)
+                for key in page_status:
+                    page_status[key] += record_status[key]
+
+        status.update(page_status)
+        return status
+
+    def _save_users(self, records):
+        status = {'created': 0, 'updated': 0, 'errors': 0}
+        now = timezone.now()
+
+        users, conflicting_keys = {}, set()
+        user_qs = get_user_model().objects.filter(
+            Q(email__in=records.keys()) | Q(username__in=records.keys()),
+        ).select_related('profile')
+        for user in user_qs:
+            if user.email == user.username:
+                users[user.email] = user
+            else:
+                # user can't be created with the same email and username
+                conflicting_keys.update([user.email, user.username])
+
+        new_users, updated_users, updated_keys = [], [], set()
+        for key_value, record in records.items():
+            user = users.get(key_value)
+            if user is None:
+                if key_value in conflicting_keys:
+                    logger.error('Integrity error on user retrieving: {}'.format(key_value))
+                    status['errors'] += 1
+                    continue
+                user = get_user_model()(email=key_value, username=key_value, is_staff=True)
+                user.set_unusable_password()
+                users[key_value] = user
+                new_users.append(user)
+            if self._update_user_attributes(user, record) and user.pk:
+                user.modified = now
+                updated_users.append(user)
+                updated_keys.add(key_value)
+
+        get_user_model().objects.bulk_create(new_users)
+        get_user_model().objects.bulk_update(updated_users, list(self.USER_ATTR_MAP) + ['modified'])
+
+        new_profiles, updated_profiles = [], []
+        for user in new_users:
+            # profiles are created by the user post_save signal when saved one by one
+            user.profile = UserProfile(user=user, organization=self.unicef_organization)
+            new_profiles.append(user.profile)
+        for key_value, record in records.items():
+            if key_value not in users:
+                continue
+            user = users[key_value]
+            profile = getattr(user, 'profile', None)
+            if profile is None:
+                profile = user.profile = UserProfile(user=user)
+                new_profiles.append(profile)
+            if self._update_profile_attributes(profile, record) and profile.pk:
+                if profile.country_override_id:
+                    # as in UserProfile.save
+                    profile.country_id = profile.country_override_id
+                updated_profiles.append(profile)
+                updated_keys.add(key_value)
+
+        UserProfile.objects.bulk_create(new_profiles)
+        UserProfile.objects.bulk_update(updated_profiles, list(self.PROFILE_ATTR_MAP) + ['organization'])
+
+        status['created'] = len(new_users)
+        status['updated'] = len(updated_keys)
+        return status
+
+    def _update_user_attributes(self, user, record):
         modified = False
         for attr, record_attr in self.USER_ATTR_MAP.items():
             record_value = record.get(record_attr, None)
@@ -184,20 +275,28 @@ class AzureUserMapper:
                     record_value = record_value.lower()
                 attr_modified = self._set_attribute(user, attr, record_value)
                 modified = modified or attr_modified
-
-        if modified:
-            logger.info(f'User {user} updated with {record}')
-            user.save()
-
         return modified
 
-    def update_profile(self, profile, record):
+    def _update_profile_attributes(self, profile, record):
         modified = False
         for attr, record_attr in self.PROFILE_ATTR_MAP.items():
             record_value = record.get(record_attr, None)
             if record_value:
                 attr_modified = self._set_attribute(profile, attr, record_value)
                 modified = modified or attr_modified
+        return modified
+
+    def update_user(self, user, record):
+        modified = self._update_user_attributes(user, record)
+
+        if modified:
+            logger.info(f'User {user} updated with {record}')
+            user.save()
+
+        return modified
+
+    def update_profile(self, profile, record):
+        modified = self._update_profile_attributes(profile, record)
 
         if modified:
             logger.debug(f'Updated Profile: {profile.user}')
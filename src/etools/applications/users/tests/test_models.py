@@ -2,13 +2,21 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.exceptions import ValidationError
-from django.test import SimpleTestCase
+from django.test import override_settings, SimpleTestCase
 
+from etools.applications.action_points.models import PME
 from etools.applications.core.tests.cases import BaseTenantTestCase
-from etools.applications.partners.permissions import PRC_SECRETARY
+from etools.applications.partners.permissions import PARTNERSHIP_MANAGER_GROUP, PRC_SECRETARY, UNICEF_USER
 from etools.applications.reports.tests.factories import OfficeFactory
 from etools.applications.users import models
-from etools.applications.users.tests.factories import CountryFactory, ProfileFactory, UserFactory
+from etools.applications.users.tests.factories import (
+    CountryFactory,
+    GroupFactory,
+    ProfileFactory,
+    RealmFactory,
+    UserFactory,
+)
+from etools.libraries.djangolib.utils import is_user_in_groups
 
 
 class TestWorkspaceCounter(BaseTenantTestCase):
@@ -109,6 +117,49 @@ class TestUserModel(BaseTenantTestCase):
         user.email = "NotNormal@example.com"
         self.assertRaises(ValidationError, user.save)
 
+    def test_group_names_resolved_once(self):
+        user = UserFactory(realms__data=[UNICEF_USER, PME.name])
+        user = models.User.objects.get(pk=user.pk)
+        user.profile
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.group_names, frozenset([UNICEF_USER, PME.name]))
+            self.assertTrue(is_user_in_groups(user, [PME.name]))
+            self.assertFalse(is_user_in_groups(user, [PARTNERSHIP_MANAGER_GROUP]))
+            self.assertEqual(len(user.group_ids), 2)
+
+    def test_group_names_cleared_on_realm_change(self):
+        user = UserFactory(realms__data=[UNICEF_USER])
+        self.assertEqual(user.group_names, frozenset([UNICEF_USER]))
+
+        RealmFactory(
+            user=user,
+            country=CountryFactory(),
+            organization=user.profile.organization,
+            group=GroupFactory(name=PME.name),
+        )
+        self.assertEqual(user.group_names, frozenset([UNICEF_USER, PME.name]))
+
+        user.realms.update(is_active=False)
+        user.clear_groups_cache()
+        self.assertEqual(user.group_names, frozenset())
+
+    @override_settings(USER_GROUPS_CACHE_TIMEOUT=60)
+    def test_group_names_shared_through_cache(self):
+        user = UserFactory(realms__data=[UNICEF_USER])
+        self.assertEqual(user.group_names, frozenset([UNICEF_USER]))
+
+        user = models.User.objects.get(pk=user.pk)
+        user.profile
+        with self.assertNumQueries(0):
+            self.assertEqual(user.group_names, frozenset([UNICEF_USER]))
+
+        realm = user.realms.first()
+        realm.is_active = False
+        realm.save()
+        user = models.User.objects.get(pk=user.pk)
+        self.assertEqual(user.group_names, frozenset())
+
 
 class TestStrUnicode(SimpleTestCase):
     """Ensure calling str() on model instances returns the right text."""
@@ -2,6 +2,8 @@ from datetime import timedelta
 from unittest import skip
 
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from django_tenants.utils import schema_context
@@ -203,6 +205,78 @@ class TestUserMapper(BaseTenantTestCase):
         profile = UserProfile.objects.get(user__email=email)
         self.assertEqual(profile.phone_number, phone)
 
+    def _get_record(self, email, **kwargs):
+        record = {
+            "userPrincipalName": email,
+            "givenName": "Tester",
+            "mail": email,
+            "surname": "Last",
+            "userType": "Internal",
+            "companyName": "UNICEF",
+        }
+        record.update(kwargs)
+        return record
+
+    def test_create_or_update_users(self):
+        country_uat = CountryFactory(name="UAT", business_area_code="UAT")
+        self.mapper.countries = {"UAT": country_uat}
+        UserFactory(email="existing@example.com", username="existing@example.com", first_name="Old", realms__data=[])
+        UserFactory(email="unchanged@example.com", username="unchanged@example.com",
+                    first_name="Tester", last_name="Last", realms__data=[])
+        UserFactory(email="conflict@example.com", username="conflict", realms__data=[])
+
+        res = self.mapper.create_or_update_users([
+            self._get_record("New@example.com", businessPhones=["123", "456"], **{
+                "extension_f4805b4021f643d0aa596e1367d432f1_extensionAttribute1": "UAT",
+            }),
+            self._get_record("existing@example.com", jobTitle="Officer"),
+            self._get_record("unchanged@example.com"),
+            self._get_record("conflict@example.com"),
+            {"userPrincipalName": "invalid@example.com"},
+        ])
+        self.assertEqual(res, {'processed': 5, 'created': 1, 'updated': 1, 'skipped': 1, 'errors': 1})
+
+        user = get_user_model().objects.get(email="new@example.com")
+        self.assertEqual(user.username, "new@example.com")
+        self.assertTrue(user.is_staff)
+        self.assertFalse(user.has_usable_password())
+        self.assertEqual(user.profile.phone_number, "123- 456")
+        self.assertEqual(user.profile.organization, Organization.objects.get(name='UNICEF', vendor_number='000'))
+        self.assertEqual(user.profile.country, country_uat)
+        self.assertEqual(user.realms.count(), 1)
+
+        user = get_user_model().objects.get(email="existing@example.com")
+        self.assertEqual(user.first_name, "Tester")
+        self.assertEqual(user.profile.post_title, "Officer")
+        self.assertFalse(get_user_model().objects.filter(email="invalid@example.com").exists())
+
+    def test_create_or_update_users_duplicated_guid(self):
+        """If the page can't be saved in bulk, valid records are saved one by one"""
+        country_uat = CountryFactory(name="UAT", business_area_code="UAT")
+        self.mapper.countries = {"UAT": country_uat}
+        res = self.mapper.create_or_update_users([
+            self._get_record("first@example.com", id="guid"),
+            self._get_record("second@example.com", id="guid"),
+        ])
+        self.assertEqual(res, {'processed': 2, 'created': 1, 'updated': 0, 'skipped': 0, 'errors': 1})
+        self.assertEqual(UserProfile.objects.get(guid="guid").user.email, "first@example.com")
+
+    def test_create_or_update_users_queries(self):
+        """Number of queries doesn't depend on the number of users updated"""
+        def update_users(prefix, count):
+            for i in range(count):
+                email = "{}{}@example.com".format(prefix, i)
+                UserFactory(email=email, username=email, realms__data=[])
+            records = [
+                self._get_record("{}{}@example.com".format(prefix, i), givenName="Changed") for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                res = self.mapper.create_or_update_users(records)
+            self.assertEqual(res['updated'], count)
+            return len(queries)
+
+        self.assertEqual(update_users("a", 1), update_users("b", 5))
+
 
 class TestDeactivateInactiveTask(BaseTenantTestCase):
     def test_logic(self):
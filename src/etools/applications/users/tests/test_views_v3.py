@@ -4,6 +4,7 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.db import connection
+from django.test import override_settings
 from django.urls import reverse
 
 from rest_framework import status
@@ -979,6 +980,18 @@ class TestUserRealmView(BaseTenantTestCase):
         self.user.refresh_from_db()
         self.assertTrue(self.user.is_active)
 
+    @override_settings(USER_GROUPS_CACHE_TIMEOUT=60)
+    def test_patch_deactivate_clears_groups_cache(self):
+        data = {"organization": self.organization.pk, "groups": [GroupFactory(name=IPViewer.name).pk]}
+        response = self.make_request_detail(self.ip_admin, self.user.id, data=data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(User.objects.get(pk=self.user.pk).group_names, frozenset([IPViewer.name]))
+
+        data["groups"] = [GroupFactory(name=IPEditor.name).pk]
+        response = self.make_request_detail(self.ip_admin, self.user.id, data=data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(User.objects.get(pk=self.user.pk).group_names, frozenset([IPEditor.name]))
+
     def test_patch_partnership_manager_200(self):
         new_user = UserFactory(realms__data=[], profile__organization=self.organization)
         data = {
@@ -93,6 +93,7 @@ class ChangeUserRoleView(CreateAPIView, GenericAPIView):
             user.realms\
                 .filter(group__in=roles, country=workspace, organization=unicef_organization)\
                 .update(is_active=False)
+            user.clear_groups_cache()
         else:
             realms = []
             for role in roles:
@@ -105,6 +106,7 @@ class ChangeUserRoleView(CreateAPIView, GenericAPIView):
                 )[0])
             if data["access_type"] == "set":
                 user.realms.exclude(id__in=[realm.id for realm in realms]).update(is_active=False)
+                user.clear_groups_cache()
 
         if user.profile.country_override and user.profile.country_override != workspace:
             user.profile.country_override = None
@@ -11,8 +11,9 @@ class VisionSyncLogAdmin(VisionLoggerAdmin):
     change_form_template = 'admin/vision/vision_log/change_form.html'
 
     list_filter = VisionLoggerAdmin.list_filter + ('country',)
-    list_display = VisionLoggerAdmin.list_display + ('country',)
-    readonly_fields = VisionLoggerAdmin.readonly_fields + ('country',)
+    list_display = VisionLoggerAdmin.list_display + ('duration', 'country',)
+    readonly_fields = VisionLoggerAdmin.readonly_fields + ('country', 'run_id', 'duration')
+    search_fields = ('run_id',)
 
     actions = None
 
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.23 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vision', '0002_visionsynclog_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visionsynclog',
+            name='duration',
+            field=models.DurationField(blank=True, null=True, verbose_name='Duration'),
+        ),
+        migrations.AddField(
+            model_name='visionsynclog',
+            name='run_id',
+            field=models.CharField(blank=True, db_index=True, max_length=32, null=True, verbose_name='Run'),
+        ),
+    ]
@@ -9,6 +9,9 @@ from etools.applications.users.models import Country
 class VisionSyncLog(AbstractVisionLog):
     country = models.ForeignKey(Country, verbose_name=_('Country'), on_delete=models.CASCADE)
     data = models.JSONField(verbose_name=_('Sent Data'), null=True, blank=True)
+    # sync run the handler was scheduled by, see etools.applications.vision.tasks.vision_sync_task
+    run_id = models.CharField(verbose_name=_('Run'), max_length=32, null=True, blank=True, db_index=True)
+    duration = models.DurationField(verbose_name=_('Duration'), null=True, blank=True)
 
     def __str__(self):
         return '{0.country} {0.date_processed}:{0.successful} {0.total_processed}'.format(self)
@@ -1,10 +1,13 @@
 import logging
+import time
+from datetime import timedelta
 
 from django.db import connection
 
 from django_tenants.utils import get_public_schema_name, get_tenant_model
 from unicef_vision.synchronizers import VisionDataSynchronizer
 
+from etools.applications.environment.helpers import tenant_switch_is_active
 from etools.applications.vision.models import VisionSyncLog
 
 logger = logging.getLogger(__name__)
@@ -12,6 +15,10 @@ logger = logging.getLogger(__name__)
 
 class VisionDataTenantSynchronizer(VisionDataSynchronizer):
     LOGGER_CLASS = VisionSyncLog
+    # set by the sync orchestrator, to group the logs of one sync run
+    run_id = None
+    # tenant switch turning the sync off
+    DISABLED_SWITCH = None
 
     def __init__(self, detail=None, business_area_code=None, *args, **kwargs):
         super().__init__(detail, business_area_code, *args, **kwargs)
@@ -24,4 +31,25 @@ class VisionDataTenantSynchronizer(VisionDataSynchronizer):
     def logger_parameters(self):
         kwargs = super().logger_parameters()
         kwargs['country'] = self.country
+        kwargs['run_id'] = self.run_id
         return kwargs
+
+    def is_disabled(self):
+        return bool(self.DISABLED_SWITCH) and tenant_switch_is_active(self.DISABLED_SWITCH)
+
+    def log_disabled(self):
+        """Log the sync of a disabled synchronizer as successful, as there is nothing to sync"""
+        self.log = self.LOGGER_CLASS(**self.logger_parameters())
+        self.log.successful = True
+        self.log.details = 'Sync is disabled'
+        self.log.save()
+
+    def sync(self):
+        started = time.monotonic()
+        try:
+            super().sync()
+        finally:
+            log = getattr(self, 'log', None)
+            if log and log.pk:
+                log.duration = timedelta(seconds=time.monotonic() - started)
+                log.save(update_fields=['duration'])
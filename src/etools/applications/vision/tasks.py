@@ -1,4 +1,8 @@
-from django.db import connection
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 
 from celery.utils.log import get_task_logger
@@ -10,6 +14,7 @@ from etools.applications.governments.synchronizers import EWPsSynchronizer
 from etools.applications.partners.synchronizers import DirectCashTransferSynchronizer, PartnerSynchronizer
 from etools.applications.reports.synchronizers import ProgrammeSynchronizer, RAMSynchronizer
 from etools.applications.users.models import Country
+from etools.applications.vision.models import VisionSyncLog
 from etools.config.celery import app
 
 PUBLIC_SYNC_HANDLERS = {}
@@ -26,22 +31,108 @@ SYNC_HANDLERS = {
     'ewp': EWPsSynchronizer,
 }
 
+# handlers are synced after the handlers they depend on, e.g. RAM indicators are linked to programme results
+# and cash transfers to partners
+SYNC_HANDLER_DEPENDENCIES = {
+    'ram': ['programme'],
+    'face_forms': ['partner'],
+    'fund_reservation': ['partner'],
+    'dct': ['partner'],
+    'ewp': ['programme', 'partner'],
+}
+
+VISION_SYNC_SLOT_KEY = 'vision-sync-slot.{scope}.{slot}'
+VISION_SYNC_SCHEDULED_KEY = 'vision-sync-scheduled.{run_id}.{country}.{handler}'
+
 
 logger = get_task_logger(__name__)
 
 
+def get_sync_dependencies(handlers):
+    """Dependencies of every handler among the synced handlers; dependencies not being synced are ignored"""
+    return {
+        handler: [dependency for dependency in SYNC_HANDLER_DEPENDENCIES.get(handler, []) if dependency in handlers]
+        for handler in handlers
+    }
+
+
+def get_synced_handlers(country, run_id, handlers):
+    """Handlers of the run synced successfully for the country"""
+    synced_handler_names = set(VisionSyncLog.objects.filter(
+        country=country, run_id=run_id, successful=True,
+    ).values_list('handler_name', flat=True))
+    return {handler for handler in handlers if SYNC_HANDLERS[handler].__name__ in synced_handler_names}
+
+
+def schedule_dependent_handlers(country, handler, run_id, handlers):
+    """Schedule the handlers of the run depending on the synced handler, once all their dependencies are synced"""
+    synced_handlers = get_synced_handlers(country, run_id, handlers)
+    for dependent, dependencies in get_sync_dependencies(handlers).items():
+        if handler not in dependencies or dependent in synced_handlers:
+            continue
+        if not synced_handlers.issuperset(dependencies):
+            # waiting for other branches; the handler is scheduled by the last synced dependency
+            continue
+
+        # dependencies finishing at the same time both see each other synced, schedule the handler once
+        key = VISION_SYNC_SCHEDULED_KEY.format(run_id=run_id, country=country.business_area_code, handler=dependent)
+        if cache.add(key, timezone.now(), timeout=settings.VISION_SYNC_SLOT_TIMEOUT):
+            sync_handler.delay(country.business_area_code, dependent, run_id=run_id, run_handlers=handlers)
+
+
+def _acquire_sync_slot(scope, limit):
+    if not limit:
+        return None, True
+    for slot in range(limit):
+        key = VISION_SYNC_SLOT_KEY.format(scope=scope, slot=slot)
+        # slots expire, so that the ones of a lost worker are released eventually
+        if cache.add(key, timezone.now(), timeout=settings.VISION_SYNC_SLOT_TIMEOUT):
+            return key, True
+    return None, False
+
+
+@contextmanager
+def vision_sync_slot(handler):
+    """
+    Hold an overall and a per Vision endpoint slot while the handler runs, to cap the number of handlers
+    hitting Vision at the same time. Yields False if no slot is available.
+    """
+    acquired_keys = []
+    scopes = [
+        ('all', settings.VISION_SYNC_MAX_CONCURRENCY),
+        (SYNC_HANDLERS[handler].ENDPOINT, settings.VISION_SYNC_MAX_ENDPOINT_CONCURRENCY),
+    ]
+    available = True
+    for scope, limit in scopes:
+        key, available = _acquire_sync_slot(scope, limit)
+        if not available:
+            break
+        if key:
+            acquired_keys.append(key)
+
+    try:
+        yield available
+    finally:
+        cache.delete_many(acquired_keys)
+
+
 @app.task
 def vision_sync_task(business_area_code=None, synchronizers=SYNC_HANDLERS.keys()):
     """
     Do the vision sync for all countries that have vision_sync_enabled=True,
     or just the named country.  Defaults to SYNC_HANDLERS but a
     different iterable of handlers can be passed in.
+
+    Handlers of a country not depending on other handlers are scheduled first, every synced handler then
+    schedules the handlers depending on it (see SYNC_HANDLER_DEPENDENCIES), so a failing handler only stops
+    its dependents. vision_last_synced is updated once every handler of the run succeeded.
     """
     # Not invoked as a task from code in this repo, but it is scheduled
     # by other means, so it's really a Celery task.
 
     global_synchronizers = [handler for handler in synchronizers if SYNC_HANDLERS[handler].GLOBAL_CALL]
     tenant_synchronizers = [handler for handler in synchronizers if not SYNC_HANDLERS[handler].GLOBAL_CALL]
+    run_id = uuid.uuid4().hex
 
     country_filter_dict = {
         'vision_sync_enabled': True
@@ -53,12 +144,13 @@ def vision_sync_task(business_area_code=None, synchronizers=SYNC_HANDLERS.keys()
     if not business_area_code or business_area_code == '0':  # public schema
         for handler in global_synchronizers:
             sync_handler.delay(business_area_code, handler)
+    sync_dependencies = get_sync_dependencies(tenant_synchronizers)
     for country in countries:
-        connection.set_tenant(country)
-        for handler in tenant_synchronizers:
-            sync_handler.delay(country.business_area_code, handler)
-        country.vision_last_synced = timezone.now()
-        country.save()
+        for handler, dependencies in sync_dependencies.items():
+            if not dependencies:
+                sync_handler.delay(
+                    country.business_area_code, handler, run_id=run_id, run_handlers=tenant_synchronizers,
+                )
 
     text = 'Created tasks for the following countries: {} and synchronizers: {}'.format(
         ',\n '.join([country.name for country in countries]),
@@ -68,9 +160,10 @@ def vision_sync_task(business_area_code=None, synchronizers=SYNC_HANDLERS.keys()
 
 
 @app.task(bind=True, autoretry_for=(VisionException,), retry_kwargs={'max_retries': 1})
-def sync_handler(self, business_area_code, handler):
+def sync_handler(self, business_area_code, handler, run_id=None, run_handlers=None):
     """
-    Run .sync() on one handler for one country.
+    Run .sync() on one handler for one country. Within a sync run, the handlers of the run depending on it
+    are scheduled once it succeeds.
     """
     # Scheduled from vision_sync_task() (above).
     logger.info('Starting vision sync handler {} for country {}'.format(handler, business_area_code))
@@ -81,13 +174,30 @@ def sync_handler(self, business_area_code, handler):
             handler, business_area_code
         ))
         # No point in retrying if there's no such country
-    else:
+        return
+
+    with vision_sync_slot(handler) as available:
+        if not available:
+            # too many handlers hitting vision, queue it again; unlike retry(), this doesn't count as a failed attempt
+            self.apply_async(
+                args=self.request.args, kwargs=self.request.kwargs,
+                countdown=settings.VISION_SYNC_THROTTLE_COUNTDOWN, retries=self.request.retries,
+            )
+            return
+
         try:
             if handler == "programme":
-                SYNC_HANDLERS[handler](business_area_code=country.business_area_code, cycle="all").sync()
+                synchronizer = SYNC_HANDLERS[handler](business_area_code=country.business_area_code, cycle="all")
+            else:
+                synchronizer = SYNC_HANDLERS[handler](business_area_code=country.business_area_code)
+            synchronizer.run_id = run_id
+            if synchronizer.is_disabled():
+                # nothing to sync, the run is not held back by it
+                synchronizer.log_disabled()
+                logger.info("{} sync is disabled for {} [{}]".format(handler, country.name, business_area_code))
             else:
-                SYNC_HANDLERS[handler](business_area_code=country.business_area_code).sync()
-            logger.info("{} sync successfully for {} [{}]".format(handler, country.name, business_area_code))
+                synchronizer.sync()
+                logger.info("{} sync successfully for {} [{}]".format(handler, country.name, business_area_code))
 
         except VisionException:
             # Catch and log the exception so we're aware there's a problem.
@@ -97,3 +207,22 @@ def sync_handler(self, business_area_code, handler):
             # The 'autoretry_for' in the task decorator tells Celery to
             # retry this a few times on VisionExceptions, so just re-raise it
             raise
+
+    if run_id and run_handlers:
+        schedule_dependent_handlers(country, handler, run_id, run_handlers)
+        finish_vision_sync.delay(business_area_code, run_id, run_handlers)
+
+
+@app.task
+def finish_vision_sync(business_area_code, run_id, handlers):
+    """
+    Mark the country as synced if every handler of the run succeeded. Runs after every synced handler of the run,
+    so it is the last synced handler that updates vision_last_synced.
+    """
+    country = Country.objects.get(business_area_code=business_area_code)
+    if set(handlers) - get_synced_handlers(country, run_id, handlers):
+        # other handlers are still running, or failed
+        return
+
+    Country.objects.filter(pk=country.pk).update(vision_last_synced=timezone.now())
+    logger.info('Vision sync run {} finished for {}'.format(run_id, country.name))
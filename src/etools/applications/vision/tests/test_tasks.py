@@ -1,17 +1,18 @@
 # Python imports
 
-import datetime
-
+from django.core.cache import cache
+from django.db import connection
 from django.test import SimpleTestCase
 from django.test.utils import override_settings
-from django.utils import timezone
 
 import mock
 from unicef_vision.exceptions import VisionException
 
 import etools.applications.vision.tasks
 from etools.applications.core.tests.cases import BaseTenantTestCase
+from etools.applications.environment.tests.factories import TenantSwitchFactory
 from etools.applications.users.tests.factories import CountryFactory
+from etools.applications.vision.models import VisionSyncLog
 
 
 def _build_country(name):
@@ -34,7 +35,6 @@ def _build_country(name):
 
 @mock.patch('etools.applications.vision.tasks.Country')
 @mock.patch('etools.applications.vision.tasks.sync_handler')
-@mock.patch('etools.applications.vision.tasks.connection', spec=['set_tenant'])
 @mock.patch('etools.applications.vision.tasks.logger.info')
 class TestVisionSyncTask(SimpleTestCase):
     """Exercises the vision_sync_task() task which requires a lot of mocking and some monkey patching."""
@@ -50,60 +50,26 @@ class TestVisionSyncTask(SimpleTestCase):
         """Ensure vision_sync_task() called Country.objects.filter()"""
         self.assertEqual(countryMock.objects.filter.call_count, 1)
 
-    def _assertVisionLastSynced(self, tenant_countries_used=None):
-        """Ensure vision_sync_task() set vision_last_synced on countries as expected.
-        tenant_countries_used should be a list of countries. If None, defaults to self.tenant_countries.
-        """
-        if tenant_countries_used is None:
-            tenant_countries_used = self.tenant_countries
-
-        # vision_last_synced should not have been set on the public country
-        self.assertIsNone(self.public_country.vision_last_synced)
-        # ,save() should not have been called on the public country
-        self.assertEqual(self.public_country.save.call_count, 0)
-
-        for country in tenant_countries_used:
-            # vision_last_synced should have been set to "now" on the tenants. Since "now" for the
-            # task might be slightly different than "now" for this test, we accept any time within
-            # the last 60 seconds which should be far more slack than necessary. If you prefer to
-            # look for an exact value, mock etools.applications.vision.tasks.timezone.now() so you control what
-            # it returns.
-            self.assertIsInstance(country.vision_last_synced, datetime.datetime)
-            delta = timezone.now() - country.vision_last_synced
-            self.assertLess(delta.seconds, 60)
-
-            # .save() should have been called with no args/kwargs on each country.
-            self.assertEqual(country.save.call_count, 1)
-            self.assertEqual(country.save.call_args, ((), {}))
-
-    def _assertConnectionTenantSet(self, mock_django_db_connection, tenant_countries_used=None):
-        """Ensure vision_sync_task() set the DB connection schema to the appropriate tenant countries.
-        tenant_countries_used should be a list of countries. If None, defaults to self.tenant_countries.
-        """
-        if tenant_countries_used is None:
-            tenant_countries_used = self.tenant_countries
-
-        # Verify that the connection tenant was set once for each tenant country.
-        self.assertEqual(mock_django_db_connection.set_tenant.call_count, len(tenant_countries_used))
-        for call_args, country in zip(mock_django_db_connection.set_tenant.call_args_list, tenant_countries_used):
-            self.assertEqual(call_args[0], (country, ))
-            self.assertEqual(call_args[1], {})
-
-    def _assertGlobalHandlersSynced(self, mock_handler, all_sync_task=15, public_task=0):
-        """Verify that public handler tasks were called
-        all_sync_task is the number of tasks called.
-        sync_t0 is the number of tasks called for public schema
-        """
-        self.assertEqual(mock_handler.delay.call_count, all_sync_task)
-        countries = [arguments[0][0] for arguments in mock_handler.delay.call_args_list]
-        self.assertEqual(countries.count('Global'), public_task)
-
-    def _assertTenantHandlersSynced(self, mock_handler, all_sync_task=15, sync_t0=5, sync_t1=5, sync_t2=5):
-        """Verify that tenant handler tasks were called
-        all_sync_task is the number of tasks called.
-        sync_t0 is the number of tasks called for ZZZ Test 0
-        sync_t1 is the number of tasks called for ZZZ Test 1
-        sync_t2 is the number of tasks called for ZZZ Test 2
+    def _assertVisionLastSyncedNotSet(self):
+        """vision_last_synced is only set by finish_vision_sync, once every handler of the run succeeded"""
+        for country in [self.public_country] + self.tenant_countries:
+            self.assertIsNone(country.vision_last_synced)
+            self.assertEqual(country.save.call_count, 0)
+
+    def _assertRun(self, mock_handler, handlers):
+        """Every handler is scheduled within the same run, knowing the handlers of the run"""
+        run_ids = set()
+        for call_args in mock_handler.delay.call_args_list:
+            self.assertEqual(call_args[1]['run_handlers'], handlers)
+            run_ids.add(call_args[1]['run_id'])
+        self.assertEqual(len(run_ids), 1)
+
+    def _assertTenantHandlersSynced(self, mock_handler, all_sync_task=6, sync_t0=2, sync_t1=2, sync_t2=2):
+        """Verify that tenant handler tasks not depending on other handlers were scheduled
+        all_sync_task is the number of tasks scheduled.
+        sync_t0 is the number of tasks scheduled for ZZZ Test 0
+        sync_t1 is the number of tasks scheduled for ZZZ Test 1
+        sync_t2 is the number of tasks scheduled for ZZZ Test 2
         """
         self.assertEqual(mock_handler.delay.call_count, all_sync_task)
         countries = [arguments[0][0] for arguments in mock_handler.delay.call_args_list]
@@ -127,63 +93,60 @@ class TestVisionSyncTask(SimpleTestCase):
         self.assertEqual(mock_logger.call_args[0], (expected_msg, ))
         self.assertEqual(mock_logger.call_args[1], {})
 
-    @override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_EAGER_PROPAGATES_EXCEPTIONS=True)
-    def test_sync_no_args_success_case(self, mock_logger, mock_django_db_connection, mock_handler,
-                                       countryMock):
+    def test_sync_no_args_success_case(self, mock_logger, mock_handler, countryMock):
         """Exercise etools.applications.vision.tasks.vision_sync_task() called without passing any argument"""
 
         countryMock.objects.filter = mock.Mock(return_value=self.tenant_countries)
-        # Mock connection.set_tenant() so we can verify calls to it.
-        mock_django_db_connection.set_tenant = mock.Mock()
         etools.applications.vision.tasks.vision_sync_task()
 
         self._assertCountryMockCalls(countryMock)
-        self._assertGlobalHandlersSynced(mock_handler, 21)
-        self._assertTenantHandlersSynced(mock_handler, 21, 7, 7, 7)
-        self._assertConnectionTenantSet(mock_django_db_connection)
-        self._assertVisionLastSynced()
+        # dependent handlers are scheduled by the handlers they depend on
+        self._assertTenantHandlersSynced(mock_handler)
+        self._assertRun(mock_handler, list(etools.applications.vision.tasks.SYNC_HANDLERS.keys()))
+        self._assertVisionLastSyncedNotSet()
         self._assertLoggerMessages(mock_logger)
 
-    @override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_EAGER_PROPAGATES_EXCEPTIONS=True)
-    def test_sync_country_filter_args(self, mock_logger, mock_django_db_connection, mock_handler,
-                                      countryMock):
+    def test_sync_country_filter_args(self, mock_logger, mock_handler, countryMock):
         """
         Exercise etools.applications.vision.tasks.vision_sync_task() called with passing as argument a specific country
         """
 
         selected_countries = [self.tenant_countries[0], ]
         countryMock.objects.filter = mock.Mock(return_value=selected_countries)
-        mock_django_db_connection.set_tenant = mock.Mock()
         etools.applications.vision.tasks.vision_sync_task(business_area_code='ZZZ Test0')
 
         self._assertCountryMockCalls(countryMock)
-        self._assertGlobalHandlersSynced(mock_handler, all_sync_task=7)
-        self._assertTenantHandlersSynced(mock_handler, 7, 7, 0, 0)
-        self._assertConnectionTenantSet(mock_django_db_connection, selected_countries)
-        self._assertVisionLastSynced(selected_countries)
+        self._assertTenantHandlersSynced(mock_handler, 2, 2, 0, 0)
+        self._assertVisionLastSyncedNotSet()
         self._assertLoggerMessages(mock_logger, selected_countries)
 
-    @override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_EAGER_PROPAGATES_EXCEPTIONS=True)
-    def test_sync_synchronizer_filter_args(self, mock_logger, mock_django_db_connection, mock_handler, countryMock):
+    def test_sync_synchronizer_filter_args(self, mock_logger, mock_handler, countryMock):
         """
         Exercise etools.applications.vision.tasks.vision_sync_task()
         called with passing as argument a specific synchronizer
         """
         selected_synchronizers = ['programme', ]
         countryMock.objects.filter = mock.Mock(return_value=self.tenant_countries)
-        # Mock connection.set_tenant() so we can verify calls to it.
-        mock_django_db_connection.set_tenant = mock.Mock()
         etools.applications.vision.tasks.vision_sync_task(synchronizers=selected_synchronizers)
 
         self._assertCountryMockCalls(countryMock)
-        self._assertGlobalHandlersSynced(mock_handler, all_sync_task=3, public_task=0)
         self._assertTenantHandlersSynced(mock_handler, all_sync_task=3, sync_t0=1, sync_t1=1, sync_t2=1)
-        self._assertConnectionTenantSet(mock_django_db_connection)
-        self._assertVisionLastSynced()
+        self._assertRun(mock_handler, selected_synchronizers)
+        self._assertVisionLastSyncedNotSet()
         self._assertLoggerMessages(mock_logger, None, selected_synchronizers)
 
-    @override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_EAGER_PROPAGATES_EXCEPTIONS=True)
-    def test_sync_country_and_synchronizer_filter_args(self, mock_logger, mock_django_db_connection, mock_handler, countryMock):
+    def test_sync_independent_synchronizers(self, mock_logger, mock_handler, countryMock):
+        """Handlers whose dependencies are not synced are scheduled right away"""
+        selected_synchronizers = ['ram', 'dct', 'programme', 'face_forms']
+        selected_countries = [self.tenant_countries[0], ]
+        countryMock.objects.filter = mock.Mock(return_value=selected_countries)
+        etools.applications.vision.tasks.vision_sync_task(
+            business_area_code='ZZZ Test0', synchronizers=selected_synchronizers)
+
+        handlers = [call_args[0][1] for call_args in mock_handler.delay.call_args_list]
+        self.assertEqual(handlers, ['dct', 'programme', 'face_forms'])
+
+    def test_sync_country_and_synchronizer_filter_args(self, mock_logger, mock_handler, countryMock):
         """
         Exercise etools.applications.vision.tasks.vision_sync_task()
         called with passing a specific country and a synchronizer
@@ -192,19 +155,140 @@ class TestVisionSyncTask(SimpleTestCase):
         selected_countries = [self.tenant_countries[0], ]
 
         countryMock.objects.filter = mock.Mock(return_value=selected_countries)
-        # Mock connection.set_tenant() so we can verify calls to it.
-        mock_django_db_connection.set_tenant = mock.Mock()
         etools.applications.vision.tasks.vision_sync_task(
             business_area_code='ZZZ Test0', synchronizers=selected_synchronizers)
 
         self._assertCountryMockCalls(countryMock)
-        self._assertGlobalHandlersSynced(mock_handler, all_sync_task=1, public_task=0)
         self._assertTenantHandlersSynced(mock_handler, all_sync_task=1, sync_t0=1, sync_t1=0, sync_t2=0)
-        self._assertConnectionTenantSet(mock_django_db_connection, selected_countries)
-        self._assertVisionLastSynced(selected_countries)
+        self._assertVisionLastSyncedNotSet()
         self._assertLoggerMessages(mock_logger, selected_countries, selected_synchronizers)
 
 
+class TestGetSyncDependencies(SimpleTestCase):
+    def test_dependencies(self):
+        self.assertEqual(
+            etools.applications.vision.tasks.get_sync_dependencies(['ewp', 'ram', 'programme', 'partner', 'dct']),
+            {
+                'ewp': ['programme', 'partner'],
+                'ram': ['programme'],
+                'programme': [],
+                'partner': [],
+                'dct': ['partner'],
+            },
+        )
+
+    def test_missing_dependency_ignored(self):
+        self.assertEqual(
+            etools.applications.vision.tasks.get_sync_dependencies(['ram', 'dct', 'face_forms']),
+            {'ram': [], 'dct': [], 'face_forms': []},
+        )
+
+
+@mock.patch('etools.applications.vision.tasks.sync_handler')
+class TestScheduleDependentHandlers(BaseTenantTestCase):
+    handlers = ['programme', 'ram', 'partner', 'face_forms', 'fund_reservation', 'dct', 'ewp']
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def _log(self, handler_name, successful=True):
+        VisionSyncLog.objects.create(
+            country=self.tenant, handler_name=handler_name, run_id='run', successful=successful,
+        )
+
+    def _schedule(self, handler):
+        etools.applications.vision.tasks.schedule_dependent_handlers(self.tenant, handler, 'run', self.handlers)
+
+    def _scheduled(self, mock_handler):
+        return [call_args[0][1] for call_args in mock_handler.delay.call_args_list]
+
+    def test_branches(self, mock_handler):
+        self._log('ProgrammeSynchronizer')
+        self._schedule('programme')
+        # ewp waits for the partners
+        self.assertEqual(self._scheduled(mock_handler), ['ram'])
+
+        mock_handler.reset_mock()
+        self._log('PartnerSynchronizer')
+        self._schedule('partner')
+        self.assertEqual(self._scheduled(mock_handler), ['face_forms', 'fund_reservation', 'dct', 'ewp'])
+        self.assertEqual(mock_handler.delay.call_args[1], {'run_id': 'run', 'run_handlers': self.handlers})
+
+    def test_join_scheduled_once(self, mock_handler):
+        self._log('ProgrammeSynchronizer')
+        self._log('PartnerSynchronizer')
+        self._schedule('programme')
+        self._schedule('partner')
+        self.assertEqual(self._scheduled(mock_handler).count('ewp'), 1)
+
+    def test_failed_dependency(self, mock_handler):
+        self._log('ProgrammeSynchronizer')
+        self._log('PartnerSynchronizer', successful=False)
+        self._schedule('programme')
+        # the partner branch is stopped, the programme one goes on
+        self.assertEqual(self._scheduled(mock_handler), ['ram'])
+
+
+@override_settings(VISION_SYNC_MAX_CONCURRENCY=2, VISION_SYNC_MAX_ENDPOINT_CONCURRENCY=1)
+class TestVisionSyncSlot(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_endpoint_limit(self):
+        vision_sync_slot = etools.applications.vision.tasks.vision_sync_slot
+        with vision_sync_slot('partner') as available:
+            self.assertTrue(available)
+            with vision_sync_slot('partner') as available:
+                self.assertFalse(available)
+            with vision_sync_slot('programme') as available:
+                self.assertTrue(available)
+        with vision_sync_slot('partner') as available:
+            self.assertTrue(available)
+
+    def test_global_limit(self):
+        vision_sync_slot = etools.applications.vision.tasks.vision_sync_slot
+        with vision_sync_slot('partner'), vision_sync_slot('programme'):
+            with vision_sync_slot('ram') as available:
+                self.assertFalse(available)
+            # slot of the endpoint is released when global limit is reached
+            self.assertEqual(cache.keys('vision-sync-slot.ramindicators.*'), [])
+
+    @override_settings(VISION_SYNC_MAX_CONCURRENCY=0, VISION_SYNC_MAX_ENDPOINT_CONCURRENCY=0)
+    def test_no_limit(self):
+        vision_sync_slot = etools.applications.vision.tasks.vision_sync_slot
+        with vision_sync_slot('partner'), vision_sync_slot('partner') as available:
+            self.assertTrue(available)
+
+
+class TestFinishVisionSync(BaseTenantTestCase):
+    def test_finish(self):
+        handlers = ['programme', 'ram']
+        VisionSyncLog.objects.create(
+            country=self.tenant, handler_name='ProgrammeSynchronizer', run_id='run', successful=True,
+        )
+        VisionSyncLog.objects.create(
+            country=self.tenant, handler_name='RAMSynchronizer', run_id='other', successful=True,
+        )
+        etools.applications.vision.tasks.finish_vision_sync(self.tenant.business_area_code, 'run', handlers)
+        self.tenant.refresh_from_db()
+        self.assertIsNone(self.tenant.vision_last_synced)
+
+        failed_log = VisionSyncLog.objects.create(
+            country=self.tenant, handler_name='RAMSynchronizer', run_id='run', successful=False,
+        )
+        etools.applications.vision.tasks.finish_vision_sync(self.tenant.business_area_code, 'run', handlers)
+        self.tenant.refresh_from_db()
+        self.assertIsNone(self.tenant.vision_last_synced)
+
+        failed_log.successful = True
+        failed_log.save()
+        etools.applications.vision.tasks.finish_vision_sync(self.tenant.business_area_code, 'run', handlers)
+        self.tenant.refresh_from_db()
+        self.assertIsNotNone(self.tenant.vision_last_synced)
+
+
 class TestSyncHandlerTask(BaseTenantTestCase):
     """Exercises the sync_handler()"""
 
@@ -259,3 +343,36 @@ class TestSyncHandlerTask(BaseTenantTestCase):
         )
         self.assertEqual(mock_logger.call_args[0], (expected_msg,))
         self.assertEqual(mock_logger.call_args[1], {})
+
+    @mock.patch('etools.applications.vision.tasks.ProgrammeSynchronizer.sync')
+    @mock.patch('etools.applications.vision.tasks.sync_handler.apply_async')
+    @mock.patch('etools.applications.vision.tasks.vision_sync_slot')
+    @override_settings(VISION_SYNC_THROTTLE_COUNTDOWN=30)
+    def test_sync_throttled(self, mock_slot, mock_apply_async, mock_sync):
+        """Throttled handler is queued again without using a retry"""
+        mock_slot.return_value.__enter__.return_value = False
+
+        etools.applications.vision.tasks.sync_handler(
+            self.tenant.business_area_code, 'programme', run_id='run', run_handlers=['programme'],
+        )
+        mock_sync.assert_not_called()
+        self.assertEqual(mock_apply_async.call_count, 1)
+        self.assertEqual(mock_apply_async.call_args[1]['countdown'], 30)
+        self.assertEqual(mock_apply_async.call_args[1]['retries'], 0)
+
+    @mock.patch('etools.applications.vision.tasks.EWPsSynchronizer.sync')
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_EAGER_PROPAGATES_EXCEPTIONS=True)
+    def test_sync_disabled(self, mock_sync):
+        """Disabled handler is a successful no-op of the run"""
+        tenant_switch = TenantSwitchFactory(name="EWP Sync Disabled")
+        tenant_switch.countries.add(connection.tenant)
+
+        etools.applications.vision.tasks.sync_handler.delay(
+            self.tenant.business_area_code, 'ewp', run_id='run', run_handlers=['ewp'],
+        )
+        mock_sync.assert_not_called()
+        self.assertTrue(VisionSyncLog.objects.filter(
+            country=self.tenant, handler_name='EWPsSynchronizer', run_id='run', successful=True,
+        ).exists())
+        self.tenant.refresh_from_db()
+        self.assertIsNotNone(self.tenant.vision_last_synced)
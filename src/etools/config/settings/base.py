@@ -384,6 +384,7 @@ CELERY_EMAIL_BACKEND = get_from_secrets_or_env('EMAIL_BACKEND', 'django.core.mai
 CELERY_TASK_ROUTES = {
     'etools.applications.vision.tasks.sync_handler': {'queue': 'vision_queue'},
     'etools.applications.hact.tasks.update_hact_for_country': {'queue': 'vision_queue'},
+    'etools.applications.hact.tasks.update_hact_for_partners': {'queue': 'vision_queue'},
     'etools.applications.hact.tasks.update_audit_hact_count': {'queue': 'vision_queue'},
     'etools.libraries.azure_graph_api.tasks.sync_delta_users': {'queue': 'vision_queue'},
     'etools.libraries.azure_graph_api.tasks.sync_all_users': {'queue': 'vision_queue'}
@@ -652,6 +653,31 @@ PRP_API_ENDPOINT = get_from_secrets_or_env('PRP_API_ENDPOINT', '')  # example: h
 PRP_API_USER = get_from_secrets_or_env('PRP_API_USER', '')
 PRP_USER_SYNC_DELAY = int(get_from_secrets_or_env('PRP_USER_SYNC_DELAY', 5))
 
+# Seconds to share resolved user groups (per user/tenant/organization) through the cache; 0 disables it
+# and groups are only memoized on the user instance for the duration of the request
+USER_GROUPS_CACHE_TIMEOUT = int(get_from_secrets_or_env('USER_GROUPS_CACHE_TIMEOUT', 0))
+
+
+# Number of partners recalculated per celery subtask by update_hact_for_country; 0 runs the whole country in one task
+HACT_UPDATE_CHUNK_SIZE = int(get_from_secrets_or_env('HACT_UPDATE_CHUNK_SIZE', 0))
+
+
+# Seconds a background export can be reused for identical requests, as long as the exported data didn't change
+EXPORT_JOB_CACHE_TIMEOUT = int(get_from_secrets_or_env('EXPORT_JOB_CACHE_TIMEOUT', 24 * 60 * 60))
+
+
+# Server side cache of the reference data endpoints (sections, offices, dropdowns...), invalidated on model changes
+RESPONSE_CACHE_ENABLED = str2bool(get_from_secrets_or_env('RESPONSE_CACHE_ENABLED', 'True'))
+RESPONSE_CACHE_TIMEOUT = int(get_from_secrets_or_env('RESPONSE_CACHE_TIMEOUT', 24 * 60 * 60))
+
+
+# Vision sync handlers running at the same time, overall and per Vision endpoint; 0 disables the limit
+VISION_SYNC_MAX_CONCURRENCY = int(get_from_secrets_or_env('VISION_SYNC_MAX_CONCURRENCY', 4))
+VISION_SYNC_MAX_ENDPOINT_CONCURRENCY = int(get_from_secrets_or_env('VISION_SYNC_MAX_ENDPOINT_CONCURRENCY', 2))
+# Seconds before a throttled handler is retried, and before the slot of a lost worker is released
+VISION_SYNC_THROTTLE_COUNTDOWN = int(get_from_secrets_or_env('VISION_SYNC_THROTTLE_COUNTDOWN', 60))
+VISION_SYNC_SLOT_TIMEOUT = int(get_from_secrets_or_env('VISION_SYNC_SLOT_TIMEOUT', 2 * 60 * 60))
+
 
 # EPD settings
 PMP_V2_RELEASE_DATE = get_from_secrets_or_env('PMP_PD_V2_RELEASE_DATE', '2020-10-01')
@@ -74,6 +74,9 @@ if 'test' in sys.argv:
         'django.contrib.auth.hashers.MD5PasswordHasher',
     ]
 
+    # cached responses would outlive the per test transaction rollback
+    RESPONSE_CACHE_ENABLED = False
+
     TEST_NON_SERIALIZED_APPS = [
         # These apps contains test models that haven't been created by migration.
         # So on the serialization stage these models do not exist.
@@ -9,7 +9,13 @@ from rest_framework_swagger.renderers import OpenAPIRenderer
 
 from etools.applications.core.schemas import get_schema_view, get_swagger_view
 from etools.applications.core.urlresolvers import decorator_include
-from etools.applications.core.views import IssueJWTRedirectView, logout_view, MainView, SocialLogoutView
+from etools.applications.core.views import (
+    ExportJobViewSet,
+    IssueJWTRedirectView,
+    logout_view,
+    MainView,
+    SocialLogoutView,
+)
 from etools.applications.core.zendesk_sso import zendesk_sso_info, zendesk_sso_redirect
 from etools.applications.locations.prp_views import PRPLocationListAPIView
 from etools.applications.locations.views import (
@@ -64,6 +70,7 @@ api.register(r'reports/units', UnitViewSet, basename='units')
 api.register(r'reports/sectors', SectionViewSet, basename='sectors')  # TODO remove me (keeping this for trips...)
 api.register(r'locations', LocationsViewSet, basename='locations')
 api.register(r'locations-light', LocationsLightViewSet, basename='locations-light')
+api.register(r'exports', ExportJobViewSet, basename='exports')
 
 urlpatterns = [
     # Used for admin and dashboard pages in django
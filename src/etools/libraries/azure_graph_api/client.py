@@ -1,4 +1,5 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from django.conf import settings
 from django.core.cache import cache
@@ -42,34 +43,47 @@ def get_token():
     return token
 
 
-def analyse_page(url, access_token):
+def get_page(session, url, access_token):
     """
-    analyse the page
+    retrieve the page
+    :param session: http session
     :param url: url to call
     :param access_token: azure access token
-    :return: tuple, next page url and delta url
+    :return: page json response
     """
     headers = {'Authorization': 'Bearer {}'.format(access_token)}
-    response = requests.get(url, headers=headers)
+    response = session.get(url, headers=headers)
     jresponse = response.json()
-    if response.status_code == 200:
-        logger.info('Azure: Information retrieved')
-        status = handle_records(jresponse)
-        url = jresponse.get('@odata.nextLink', None)
-    else:
+    if response.status_code != 200:
         logger.error('Error during synchronization process')
         raise AzureHttpError('Error processing the response {}'.format(response.status_code), response.status_code)
-    return url, status, jresponse.get('@odata.deltaLink', None)
+    logger.info('Azure: Information retrieved')
+    return jresponse
 
 
-def azure_sync_users(url):
+def azure_sync_users(url, access_token=None):
     """
     synchronize users with azure
+    the next page is fetched in the background while the current one is saved
     :param url: azure endpoint for users
-    :return: delta link to use to retrieve delta updates
+    :param access_token: azure access token, retrieved if not provided
+    :return: tuple, status of all the pages and delta url to use to retrieve delta updates
     """
-    access_token = get_token()
+    access_token = access_token or get_token()
+    status = {'processed': 0, 'created': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
     delta_link = None
-    while url:
-        url, status, delta_link = analyse_page(url, access_token)
+
+    # the session keeps the connection to the graph api alive between pages
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=1) as executor:
+        next_page = executor.submit(get_page, session, url, access_token)
+        while next_page:
+            jresponse = next_page.result()
+            url = jresponse.get('@odata.nextLink', None)
+            next_page = executor.submit(get_page, session, url, access_token) if url else None
+
+            page_status = handle_records(jresponse)
+            for key in status:
+                status[key] += page_status[key]
+            delta_link = jresponse.get('@odata.deltaLink', delta_link)
+
     return status, delta_link
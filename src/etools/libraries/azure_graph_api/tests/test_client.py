@@ -31,24 +31,31 @@ class TestClient(TestCase):
 
     @responses.activate
     @patch('etools.libraries.azure_graph_api.client.get_token', return_value='t0k3n')
-    @patch("etools.libraries.azure_graph_api.client.handle_records", return_value='status')
+    @patch("etools.libraries.azure_graph_api.client.handle_records",
+           return_value={'processed': 2, 'created': 1, 'updated': 1, 'skipped': 0, 'errors': 0})
     def test_azure_sync_users_ok(self, handle_function, token):
         url = '{}/{}/users?$top={}'.format(
             settings.AZURE_GRAPH_API_BASE_URL,
             settings.AZURE_GRAPH_API_VERSION,
             settings.AZURE_GRAPH_API_PAGE_SIZE
         )
+        next_url = url + '&$skiptoken=page2'
         responses.add(
             responses.GET, url, status=200,
+            json={'@odata.nextLink': next_url},
+        )
+        responses.add(
+            responses.GET, next_url, status=200,
             json={'@odata.deltaLink': 'delta'},
         )
         status, delta = azure_sync_users(url)
-        self.assertEqual(status, 'status')
+        self.assertEqual(status, {'processed': 4, 'created': 2, 'updated': 2, 'skipped': 0, 'errors': 0})
         self.assertEqual(delta, 'delta')
         self.assertEqual(token.call_count, 1)
         self.assertEqual(token.call_args[0], ())
-        self.assertEqual(handle_function.call_count, 1)
-        self.assertEqual(handle_function.call_args[0], ({'@odata.deltaLink': 'delta'}, ))
+        self.assertEqual(handle_function.call_count, 2)
+        self.assertEqual(handle_function.call_args_list[0][0], ({'@odata.nextLink': next_url}, ))
+        self.assertEqual(handle_function.call_args_list[1][0], ({'@odata.deltaLink': 'delta'}, ))
 
     @responses.activate
     @patch('etools.libraries.azure_graph_api.client.get_token', return_value='t0k3n')
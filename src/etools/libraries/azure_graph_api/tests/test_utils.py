@@ -15,12 +15,14 @@ class TestClient(BaseTenantTestCase):
     def setUpTestData(cls):
         cls.group = GroupFactory(name='UNICEF User')
 
-    @patch('etools.libraries.azure_graph_api.utils.handle_record',
-           return_value=({'processed': 0, 'created': 0, 'updated': 0, 'skipped': 0, 'errors': 0}, {}))
+    @patch('etools.libraries.azure_graph_api.utils.AzureUserMapper.create_or_update_users',
+           return_value={'processed': 3, 'created': 0, 'updated': 0, 'skipped': 3, 'errors': 0})
     def test_handle_records(self, handle_function):
-        handle_records({'value': range(3)})
-        self.assertEqual(handle_function.call_count, 3)
-        self.assertEqual(handle_function.call_args[0], (2, ))
+        records = [{'userPrincipalName': 'user{}@unicef.org'.format(i)} for i in range(3)]
+        status = handle_records({'value': records})
+        self.assertEqual(status['processed'], 3)
+        self.assertEqual(handle_function.call_count, 1)
+        self.assertEqual(handle_function.call_args[0], (records, ))
 
     def test_handle_record_create(self):
         user_qs = get_user_model().objects
@@ -8,14 +8,11 @@ logger = logging.getLogger(__name__)
 def handle_records(jresponse):
 
     if 'value' in jresponse:
-        status = {'processed': 0, 'created': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
-        for record in jresponse['value']:
-            page_status, _ = handle_record(record)
-            status['processed'] += page_status['processed']
-            status['created'] += page_status['created']
-            status['updated'] += page_status['updated']
-            status['skipped'] += page_status['skipped']
-            status['errors'] += page_status['errors']
+        # the records of a page are saved together
+        if logger.isEnabledFor(logging.DEBUG):
+            for record in jresponse['value']:
+                log_record(record)
+        status = AzureUserMapper().create_or_update_users(jresponse['value'])
     else:
         status, _ = handle_record(jresponse)
 
@@ -23,10 +20,13 @@ def handle_records(jresponse):
 
 
 def handle_record(record):
-    logger.debug('Azure: Information retrieved %s', record.get('userPrincipalName', '-'))
     user_sync = AzureUserMapper()
     status = user_sync.create_or_update_user(record)
+    return status, log_record(record)
+
 
+def log_record(record):
+    logger.debug('Azure: Information retrieved %s', record.get('userPrincipalName', '-'))
     record_dict = {
         'Username*': record.get('userPrincipalName', '-'),
         'Email*': record['mail'].lower() if record.get('mail', None) else '',
@@ -69,4 +69,4 @@ def handle_record(record):
         logger.debug(f'{label}: {value}')
     logger.debug('----------------------------------------')
 
-    return status, record_dict
+    return record_dict
@@ -1,3 +1,25 @@
+import re
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+TAG_INDEX_KEY = 'cache-tag.{tag}'
+VIEW_CACHE_TAG = 'view-cache.{key_prefix}'
+VIEW_CACHE_KEY_PREFIXES = (
+    # views.decorators.cache.cache_page.<key_prefix>.<method>.<url md5>.<headers md5>[.<language>][.<timezone>]
+    ('views.decorators.cache.cache_page.', 1),
+    # views.decorators.cache.cache_header.<key_prefix>.<url md5>[.<language>][.<timezone>]
+    ('views.decorators.cache.cache_header.', 0),
+)
+MD5_SEGMENT = re.compile(r'^[0-9a-f]{32}$')
+
+# tags already cleaned up by pattern in this process, see TaggedKeysCacheMixin.delete_tag
+_scanned_tags = set()
+
+
+def get_view_cache_tag(key_prefix):
+    return VIEW_CACHE_TAG.format(key_prefix=key_prefix)
+
+
 class KeysListCacheMixin:
     def keys(self, pattern='*', version=None):
         """
@@ -6,3 +28,66 @@ class KeysListCacheMixin:
         example: https://redis.io/commands/keys/
         """
         raise NotImplementedError
+
+
+class TaggedKeysCacheMixin(KeysListCacheMixin):
+    """
+    Index keys by tag when they are set, so that they can be deleted together without scanning the keyspace.
+    Tags of a key are provided by get_key_tags; keys set by cache_page are tagged by their key prefix.
+    """
+
+    def get_key_tags(self, key):
+        for cache_prefix, segments_before_url in VIEW_CACHE_KEY_PREFIXES:
+            if key.startswith(cache_prefix):
+                segments = key[len(cache_prefix):].split('.')
+                for index, segment in enumerate(segments):
+                    if MD5_SEGMENT.match(segment):
+                        return [get_view_cache_tag('.'.join(segments[:index - segments_before_url]))]
+        return []
+
+    def tag_keys(self, tag, keys, timeout=DEFAULT_TIMEOUT, version=None):
+        """Add keys to the tag index, which should live at least as long as the keys"""
+        raise NotImplementedError
+
+    def pop_tagged_keys(self, tag, version=None):
+        """Return the keys of the tag index and delete it in one step, so keys tagged meanwhile are not lost"""
+        raise NotImplementedError
+
+    def _tag(self, keys, timeout, version):
+        tags = {}
+        for key in keys:
+            for tag in self.get_key_tags(key):
+                tags.setdefault(tag, []).append(key)
+        for tag, tagged_keys in tags.items():
+            self.tag_keys(tag, tagged_keys, timeout=timeout, version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = super().add(key, value, timeout=timeout, version=version)
+        if added:
+            self._tag([key], timeout, version)
+        return added
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        result = super().set(key, value, timeout=timeout, version=version)
+        self._tag([key], timeout, version)
+        return result
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        result = super().set_many(data, timeout=timeout, version=version)
+        self._tag(data.keys(), timeout, version)
+        return result
+
+    def delete_tag(self, tag, fallback_patterns=None, version=None):
+        """
+        Delete the keys registered under the tag.
+        If fallback_patterns are provided, the keys matching them are cleaned up by scanning the keyspace the first
+        time the tag is deleted in the process, to catch keys set before they were indexed.
+        """
+        keys = set(self.pop_tagged_keys(tag, version=version))
+        if fallback_patterns and tag not in _scanned_tags:
+            for pattern in fallback_patterns:
+                keys.update(self.keys(pattern, version=version))
+            _scanned_tags.add(tag)
+        if keys:
+            self.delete_many(list(keys), version=version)
+        return len(keys)
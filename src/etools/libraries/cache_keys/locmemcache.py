@@ -1,8 +1,9 @@
 from fnmatch import fnmatch
 
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
 from django.core.cache.backends.locmem import LocMemCache
 
-from etools.libraries.cache_keys.base import KeysListCacheMixin
+from etools.libraries.cache_keys.base import KeysListCacheMixin, TAG_INDEX_KEY, TaggedKeysCacheMixin
 
 
 class KeysListLocMemCacheMixin(KeysListCacheMixin, LocMemCache):
@@ -14,3 +15,19 @@ class KeysListLocMemCacheMixin(KeysListCacheMixin, LocMemCache):
             key[version_prefix_len:] for key in self._cache.keys()
             if fnmatch(key, pattern) and key.startswith(version_prefix)
         ]
+
+
+class TaggedKeysLocMemCacheMixin(TaggedKeysCacheMixin, KeysListLocMemCacheMixin):
+    def tag_keys(self, tag, keys, timeout=DEFAULT_TIMEOUT, version=None):
+        # the index is a regular entry without expiration, stale keys are ignored on delete
+        tag_key = TAG_INDEX_KEY.format(tag=tag)
+        tagged_keys = self.get(tag_key, set(), version=version)
+        tagged_keys.update(keys)
+        self.set(tag_key, tagged_keys, timeout=None, version=version)
+
+    def pop_tagged_keys(self, tag, version=None):
+        # the index is private to the process, read and delete don't need to be atomic like on redis
+        tag_key = TAG_INDEX_KEY.format(tag=tag)
+        tagged_keys = self.get(tag_key, set(), version=version)
+        self.delete(tag_key, version=version)
+        return list(tagged_keys)
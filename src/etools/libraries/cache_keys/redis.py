@@ -1,17 +1,57 @@
 from redis_cache import RedisCache
+from redis_cache.backends.base import DEFAULT_TIMEOUT
 
-from etools.libraries.cache_keys.base import KeysListCacheMixin
+from etools.libraries.cache_keys.base import KeysListCacheMixin, TAG_INDEX_KEY, TaggedKeysCacheMixin
 
 
 class KeysListRedisCacheMixin(KeysListCacheMixin, RedisCache):
+    scan_count = 1000
+
     def keys(self, pattern='*', version=None):
         versioned_pattern = self.make_key(pattern, version=version)
         client = self.get_client(versioned_pattern, write=False)
         version_prefix = self.make_key('', version=version)
         version_prefix_len = len(version_prefix)
-        keys = (k.decode('utf-8') for k in client.keys(pattern=versioned_pattern))
+        # iterate with a cursor instead of KEYS, which blocks the server while walking the whole keyspace
+        keys = (k.decode('utf-8') for k in client.scan_iter(match=versioned_pattern, count=self.scan_count))
         return [
             key[version_prefix_len:]
             for key in keys
             if key.startswith(version_prefix)
         ]
+
+
+class TaggedKeysRedisCacheMixin(TaggedKeysCacheMixin, KeysListRedisCacheMixin):
+    def _tag_keys(self, client, tag_key, keys, timeout):
+        pipeline = client.pipeline()
+        pipeline.ttl(tag_key)
+        pipeline.sadd(tag_key, *keys)
+        ttl, _ = pipeline.execute()
+
+        if timeout is None:
+            client.persist(tag_key)
+        elif ttl == -2 or 0 <= ttl < timeout:
+            # new index, or one expiring before the keys just added
+            client.expire(tag_key, timeout)
+
+    def tag_keys(self, tag, keys, timeout=DEFAULT_TIMEOUT, version=None):
+        tag_key = self.make_key(TAG_INDEX_KEY.format(tag=tag), version=version)
+        timeout = self.get_timeout(timeout)
+        if timeout is not None and timeout <= 0:
+            # keys are expired straight away
+            return
+        client = self.get_client(tag_key, write=True)
+        self._tag_keys(client, tag_key, keys, timeout)
+
+    def _pop_tagged_keys(self, client, tag_key):
+        # read and delete in a MULTI/EXEC transaction, keys tagged afterwards go to a new index
+        pipeline = client.pipeline(transaction=True)
+        pipeline.smembers(tag_key)
+        pipeline.delete(tag_key)
+        keys, _ = pipeline.execute()
+        return [key.decode('utf-8') for key in keys]
+
+    def pop_tagged_keys(self, tag, version=None):
+        tag_key = self.make_key(TAG_INDEX_KEY.format(tag=tag), version=version)
+        client = self.get_client(tag_key, write=True)
+        return self._pop_tagged_keys(client, tag_key)
@@ -22,7 +22,9 @@ def is_user_in_groups(user, group_names):
     if isinstance(group_names, str):
         # Anticipate common programming oversight.
         raise ValueError('group_names parameter must be a tuple or list, not a string')
-    return user.groups.filter(name__in=group_names).exists()
+    if not user.is_authenticated:
+        return False
+    return not user.group_names.isdisjoint(group_names)
 
 
 def get_all_field_names(TheModel):
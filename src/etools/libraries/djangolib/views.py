@@ -20,7 +20,7 @@ class ExternalModuleFilterMixin:
     def get_queryset(self, module=None):
         qs = super().get_queryset()
         user = self.request.user
-        if not (user.is_unicef_user() or user.groups.filter(name="Read-Only API").exists()):
+        if not (user.is_unicef_user() or "Read-Only API" in user.group_names):
             if module is None:
                 query_params = self.request.query_params
                 module = query_params.get(self.param_name, None)
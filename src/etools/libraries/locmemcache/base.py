@@ -1,7 +1,7 @@
 from django.core.cache.backends.locmem import LocMemCache
 
-from etools.libraries.cache_keys.locmemcache import KeysListLocMemCacheMixin
+from etools.libraries.cache_keys.locmemcache import TaggedKeysLocMemCacheMixin
 
 
-class eToolsLocMemCache(KeysListLocMemCacheMixin, LocMemCache):
+class eToolsLocMemCache(TaggedKeysLocMemCacheMixin, LocMemCache):
     pass
@@ -2,10 +2,10 @@ from redis.exceptions import ConnectionError
 from redis_cache import RedisCache
 from redis_cache.backends.base import DEFAULT_TIMEOUT
 
-from etools.libraries.cache_keys.redis import KeysListRedisCacheMixin
+from etools.libraries.cache_keys.redis import TaggedKeysRedisCacheMixin
 
 
-class eToolsCache(KeysListRedisCacheMixin, RedisCache):
+class eToolsCache(TaggedKeysRedisCacheMixin, RedisCache):
     def _get(self, client, key, default=None):
         try:
             value = super()._get(client, key, default)
@@ -59,6 +59,19 @@ class eToolsCache(KeysListRedisCacheMixin, RedisCache):
         except ConnectionError:
             pass
 
+    def _tag_keys(self, client, tag_key, keys, timeout):
+        try:
+            super()._tag_keys(client, tag_key, keys, timeout)
+        except ConnectionError:
+            pass
+
+    def _pop_tagged_keys(self, client, tag_key):
+        try:
+            keys = super()._pop_tagged_keys(client, tag_key)
+        except ConnectionError:
+            keys = []
+        return keys
+
     def get_or_set(
             self,
             key,
@@ -89,9 +102,9 @@ class eToolsCache(KeysListRedisCacheMixin, RedisCache):
             value = delta
         return value
 
-    def delete(self, key):
+    def delete(self, key, version=None):
         try:
-            result = super().delete(key)
+            result = super().delete(key, version=version)
         except ConnectionError:
             result = True
         return result
@@ -0,0 +1,104 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from etools.libraries.cache_keys import base
+from etools.libraries.cache_keys.base import get_view_cache_tag
+from etools.libraries.locmemcache.base import eToolsLocMemCache
+from etools.libraries.redis_cache.base import eToolsCache
+from etools.libraries.views.cache import invalidate_view_cache
+
+PAGE_KEY = 'views.decorators.cache.cache_page.locations.NPL.GET.{0}.d41d8cd98f00b204e9800998ecf8427e.en-us.UTC'
+HEADER_KEY = 'views.decorators.cache.cache_header.locations.NPL.{0}.en-us.UTC'
+URL_HASH = '26d04fa6a67a4cb34885a9c5b1206e39'
+
+
+class TestTaggedKeysCache(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = eToolsLocMemCache('test-tagged-keys', {})
+        self.cache.clear()
+        base._scanned_tags.clear()
+
+    def test_view_cache_tags(self):
+        tag = get_view_cache_tag('locations.NPL')
+        self.assertEqual(self.cache.get_key_tags(PAGE_KEY.format(URL_HASH)), [tag])
+        self.assertEqual(self.cache.get_key_tags(HEADER_KEY.format(URL_HASH)), [tag])
+        self.assertEqual(self.cache.get_key_tags('locations-etag-1'), [])
+
+    def test_delete_tag(self):
+        self.cache.set(PAGE_KEY.format(URL_HASH), 'page')
+        self.cache.set(HEADER_KEY.format(URL_HASH), 'header')
+        self.cache.set('views.decorators.cache.cache_page.fm-sites.NPL.GET.{0}.x'.format(URL_HASH), 'other')
+        self.cache.set('unrelated', 'value')
+
+        deleted = self.cache.delete_tag(get_view_cache_tag('locations.NPL'))
+        self.assertEqual(deleted, 2)
+        self.assertIsNone(self.cache.get(PAGE_KEY.format(URL_HASH)))
+        self.assertIsNone(self.cache.get(HEADER_KEY.format(URL_HASH)))
+        self.assertEqual(self.cache.get('unrelated'), 'value')
+        self.assertEqual(self.cache.delete_tag(get_view_cache_tag('locations.NPL')), 0)
+        self.assertEqual(self.cache.delete_tag(get_view_cache_tag('fm-sites.NPL')), 1)
+
+    def test_fallback_patterns(self):
+        # set before keys were indexed
+        LocMemCache.set(self.cache, 'views.decorators.cache.cache_page.locations.NPL.old', 'page')
+        tag = get_view_cache_tag('locations.NPL')
+        patterns = ['views.decorators.cache.cache_page.locations.NPL.*']
+
+        self.assertEqual(self.cache.delete_tag(tag, fallback_patterns=patterns), 1)
+        self.assertEqual(self.cache.keys('views.*'), [])
+
+        # pattern is only scanned once per process
+        LocMemCache.set(self.cache, 'views.decorators.cache.cache_page.locations.NPL.old', 'page')
+        self.assertEqual(self.cache.delete_tag(tag, fallback_patterns=patterns), 0)
+
+
+class TestTaggedKeysRedisCache(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        base._scanned_tags.clear()
+        # no connection is opened until the client is used
+        self.cache = eToolsCache('localhost:6379', {})
+        self.client = MagicMock()
+        patcher = patch.object(self.cache, 'get_client', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache.master_client = self.client
+
+    def test_delete_version(self):
+        self.cache.delete('key', version=2)
+        self.client.delete.assert_called_once_with(self.cache.make_key('key', version=2))
+
+    def test_delete_tag(self):
+        tag = get_view_cache_tag('locations.NPL')
+        tag_key = self.cache.make_key(base.TAG_INDEX_KEY.format(tag=tag), version=2)
+        pipeline = self.client.pipeline.return_value
+        pipeline.execute.return_value = [{PAGE_KEY.format(URL_HASH).encode()}, 1]
+
+        self.assertEqual(self.cache.delete_tag(tag, version=2), 1)
+
+        # index is read and deleted in one transaction
+        self.client.pipeline.assert_called_once_with(transaction=True)
+        pipeline.smembers.assert_called_once_with(tag_key)
+        pipeline.delete.assert_called_once_with(tag_key)
+        self.client.delete.assert_called_once_with(self.cache.make_key(PAGE_KEY.format(URL_HASH), version=2))
+
+
+class TestInvalidateViewCache(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        base._scanned_tags.clear()
+
+    def test_invalidate(self):
+        cache.set(PAGE_KEY.format(URL_HASH), 'page')
+        cache.set(HEADER_KEY.format(URL_HASH), 'header')
+        cache.set('views.decorators.cache.cache_page.locations.KEN.GET.{0}.x'.format(URL_HASH), 'other tenant')
+
+        invalidate_view_cache('locations.NPL')
+        self.assertEqual(cache.keys('views.*'), [
+            'views.decorators.cache.cache_page.locations.KEN.GET.{0}.x'.format(URL_HASH),
+        ])
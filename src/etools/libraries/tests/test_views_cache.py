@@ -0,0 +1,137 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from django_tenants.utils import get_public_schema_name
+from rest_framework import status
+from unicef_locations.models import GatewayType
+
+from etools.applications.core.tests.cases import BaseTenantTestCase
+from etools.applications.organizations.tests.factories import OrganizationFactory
+from etools.applications.reports.tests.factories import OfficeFactory, SectionFactory
+from etools.applications.users.tests.factories import UserFactory
+from etools.libraries.views.cache import bump_cache_version, get_cache_versions
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class TestCacheResponse(BaseTenantTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.unicef_user = UserFactory(is_staff=True)
+        cls.section = SectionFactory()
+        cls.url = reverse('sections-list')
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_cached(self):
+        response = self.forced_auth_req('get', self.url, user=self.unicef_user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            cached_response = self.forced_auth_req('get', self.url, user=self.unicef_user)
+        self.assertEqual(cached_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_response.data, response.data)
+        self.assertEqual(cached_response['ETag'], response['ETag'])
+
+    def test_not_modified(self):
+        first_response = self.forced_auth_req('get', self.url, user=self.unicef_user)
+
+        response = self.forced_auth_req(
+            'get', self.url, user=self.unicef_user, HTTP_IF_NONE_MATCH=first_response['ETag'],
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.forced_auth_req(
+            'get', self.url, user=self.unicef_user, HTTP_IF_MODIFIED_SINCE=first_response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_invalidated_on_change(self):
+        response = self.forced_auth_req('get', self.url, user=self.unicef_user)
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SectionFactory()
+
+        response = self.forced_auth_req('get', self.url, user=self.unicef_user, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_other_namespace_not_invalidated(self):
+        response = self.forced_auth_req('get', self.url, user=self.unicef_user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OfficeFactory()
+
+        with self.assertNumQueries(0):
+            cached_response = self.forced_auth_req('get', self.url, user=self.unicef_user)
+        self.assertEqual(cached_response['ETag'], response['ETag'])
+
+    def test_dropdowns_invalidated_on_location_type_change(self):
+        url = reverse('pmp_v3:dropdown-dynamic-list')
+        response = self.forced_auth_req('get', url, user=self.unicef_user)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Region', [location_type['name'] for location_type in response.data['location_types']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            location_type = GatewayType.objects.create(name='Region', admin_level=1)
+
+        response = self.forced_auth_req('get', url, user=self.unicef_user)
+        self.assertIn(
+            {'id': location_type.id, 'name': 'Region', 'admin_level': 1},
+            list(response.data['location_types']),
+        )
+
+    def test_public_model_invalidates_all_tenants(self):
+        version, = get_cache_versions(['pmp-dropdowns'], schema_name=get_public_schema_name())
+        tenant_version, = get_cache_versions(['pmp-dropdowns'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrganizationFactory()
+
+        self.assertEqual(get_cache_versions(['pmp-dropdowns'], schema_name=get_public_schema_name()), [version + 1])
+        self.assertEqual(get_cache_versions(['pmp-dropdowns']), [tenant_version])
+
+    def test_dropdowns_invalidated_on_signatory_change(self):
+        url = reverse('pmp_v3:dropdown-dynamic-list')
+        response = self.forced_auth_req('get', url, user=self.unicef_user)
+        etag = response['ETag']
+
+        # logins don't change the dropdowns
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unicef_user.last_login = timezone.now()
+            self.unicef_user.save(update_fields=['last_login'])
+        response = self.forced_auth_req('get', url, user=self.unicef_user)
+        self.assertEqual(response['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unicef_user.first_name = 'Renamed'
+            self.unicef_user.save()
+        response = self.forced_auth_req('get', url, user=self.unicef_user)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_query_params(self):
+        self.forced_auth_req('get', self.url, user=self.unicef_user)
+        response = self.forced_auth_req('get', self.url, user=self.unicef_user, data={'active': 'false'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_versions(self):
+        version, = get_cache_versions(['sections'])
+        bump_cache_version('sections')
+        self.assertEqual(get_cache_versions(['sections']), [version + 1])
+        # other tenants are not affected
+        bump_cache_version('sections', schema_name='other')
+        self.assertEqual(get_cache_versions(['sections']), [version + 1])
+
+        # evicted counters don't start over
+        cache.clear()
+        bump_cache_version('sections')
+        self.assertGreaterEqual(get_cache_versions(['sections'])[0], version)
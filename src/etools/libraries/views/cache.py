@@ -1,15 +1,167 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
 from django.core.cache import caches, DEFAULT_CACHE_ALIAS
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from django.utils.translation import get_language
+
+from django_tenants.utils import get_public_schema_name
+from rest_framework import status
+from rest_framework.response import Response
+
+from etools.libraries.cache_keys.base import get_view_cache_tag
+
+VIEW_CACHE_VERSION_KEY = 'view-cache-version.{schema_name}.{namespace}'
+VIEW_CACHE_KEY = 'view-cache.{schema_name}.{digest}'
 
 
 def invalidate_view_cache(key_prefix, cache_alias=None):
     """
     invalidates cache created by django.views.decorators.cache.cache_page
-    url as well as context are variable, depending on url parameters, so wildcard them out and rely on key prefix only
+    keys are indexed by key prefix when set (see etools.libraries.cache_keys), so only the keys of the prefix
+    are deleted; keys cached before being indexed are cleaned up by scanning once per process
     key example:
     views.decorators.cache.cache_page.fm-sites.NPL.GET.26d04fa6a67a4cb34885a9c5b1206e39.d96d7cd887705ba571615e93962d710e.en-us.UTC
     """
     page_cache_pattern = 'views.decorators.cache.cache_page.{0}.*'.format(key_prefix)
     headers_cache_pattern = 'views.decorators.cache.cache_header.{0}.*'.format(key_prefix)
     cache = caches[cache_alias or DEFAULT_CACHE_ALIAS]
-    cache.delete_many(cache.keys(page_cache_pattern))
-    cache.delete_many(cache.keys(headers_cache_pattern))
+    cache.delete_tag(get_view_cache_tag(key_prefix), fallback_patterns=[page_cache_pattern, headers_cache_pattern])
+
+
+def get_initial_cache_version():
+    # counters start from the current time, so a counter evicted from the cache can't reuse the version
+    # of responses still cached
+    return int(time.time() * 1000)
+
+
+def get_cache_versions(namespaces, schema_name=None, cache_alias=None):
+    """Current version of every namespace for the tenant"""
+    cache = caches[cache_alias or DEFAULT_CACHE_ALIAS]
+    schema_name = schema_name or connection.schema_name
+    keys = [VIEW_CACHE_VERSION_KEY.format(schema_name=schema_name, namespace=namespace) for namespace in namespaces]
+
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, get_initial_cache_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_cache_version(*namespaces, schema_name=None, cache_alias=None):
+    """Invalidate the cached responses of the namespaces for the tenant"""
+    cache = caches[cache_alias or DEFAULT_CACHE_ALIAS]
+    schema_name = schema_name or connection.schema_name
+    for namespace in namespaces:
+        key = VIEW_CACHE_VERSION_KEY.format(schema_name=schema_name, namespace=namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, get_initial_cache_version(), timeout=None)
+
+
+def is_shared_model(model):
+    """Models of the public schema, shared by all the tenants"""
+    return model._meta.app_config.name not in settings.TENANT_APPS
+
+
+def register_view_cache_invalidation(namespace, *models, fields=None):
+    """
+    Bump the namespace version of the current tenant when an instance of the models is saved or deleted,
+    or the version shared by all the tenants for the models of the public schema.
+    Models can be given as classes or "app_label.ModelName" strings. When fields are given, saves updating
+    only other fields with update_fields are ignored.
+    """
+
+    def invalidate(sender, instance, update_fields=None, **kwargs):
+        if fields and update_fields and not set(update_fields) & set(fields):
+            return
+        # changes of a tenant only affect that tenant responses
+        schema_name = get_public_schema_name() if is_shared_model(sender) else connection.schema_name
+        # bump once the changes are visible, so that a concurrent request can't cache the previous data
+        transaction.on_commit(lambda: bump_cache_version(namespace, schema_name=schema_name))
+
+    for model in models:
+        label = model if isinstance(model, str) else model._meta.label
+        for signal in [post_save, post_delete]:
+            signal.connect(
+                invalidate,
+                sender=model,
+                weak=False,
+                dispatch_uid=f'view-cache-{namespace}-{label}-{signal is post_save}',
+            )
+
+
+def get_user_cache_variant(user):
+    # UNICEF users get the full data, while external users can be restricted to their own records
+    if user.is_unicef_user():
+        return f'unicef.{int(user.is_staff)}'
+    return f'user.{user.pk}'
+
+
+def cache_response(*namespaces, timeout=None, cache_alias=None):
+    """
+    Cache the response data of a DRF view method, per tenant and kind of user.
+
+    The ETag is built from the namespaces versions of the tenant and of the public schema, so clients can
+    revalidate without the view being called; versions are bumped on model changes with
+    register_view_cache_invalidation.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, request, *args, **kwargs):
+            if not settings.RESPONSE_CACHE_ENABLED or request.method != 'GET':
+                return func(self, request, *args, **kwargs)
+
+            cache = caches[cache_alias or DEFAULT_CACHE_ALIAS]
+            versions = get_cache_versions(namespaces, cache_alias=cache_alias) + get_cache_versions(
+                namespaces, schema_name=get_public_schema_name(), cache_alias=cache_alias,
+            )
+            digest = hashlib.md5('|'.join([
+                *namespaces,
+                *map(str, versions),
+                get_user_cache_variant(request.user),
+                get_language() or '',
+                request.META.get('HTTP_ACCEPT', ''),
+                request.get_full_path(),
+            ]).encode()).hexdigest()
+            key = VIEW_CACHE_KEY.format(schema_name=connection.schema_name, digest=digest)
+            etag = f'W/"{digest}"'
+
+            cached = cache.get(key)
+            last_modified = cached[1] if cached else None
+
+            if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+            if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE'))
+            if if_none_match:
+                not_modified = etag in parse_etags(if_none_match)
+            else:
+                not_modified = bool(last_modified and if_modified_since and if_modified_since >= last_modified)
+
+            if not_modified:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            elif cached:
+                response = Response(cached[0])
+            else:
+                response = func(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                last_modified = int(time.time())
+                cache.set(key, (response.data, last_modified), timeout or settings.RESPONSE_CACHE_TIMEOUT)
+
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, must_revalidate=True)
+            return response
+
+        return wrapper
+
+    return decorator